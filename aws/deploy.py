@@ -1,13 +1,17 @@
 #!/usr/bin/env python
 import argparse
 import datetime
+import hashlib
+import shlex
 import shutil
 import subprocess
+import sys
 import time
 from pathlib import Path
 
 from taxonomy.config import Options, get_options
 
+HOME_DIR = "/home/ec2-user/"
 STAGING_DIR = "/home/ec2-user/staging/"
 
 
@@ -18,6 +22,13 @@ def run_ssh(options: Options, command: str) -> None:
     )
 
 
+def get_ssh_output(options: Options, command: str) -> str:
+    print(f"# {command}")
+    return subprocess.check_output(
+        ["ssh", "-i", options.pem_file, options.hesperomys_host, command], text=True
+    )
+
+
 def run_scp(
     options: Options, local_path: Path, remote_path: str, *, is_directory: bool
 ) -> None:
@@ -39,16 +50,111 @@ def save_data(options: Options, version: str) -> None:
         options.db_filename.parent / f"{options.db_filename.name}.{version}"
     )
     assert not saved_filename.exists(), f"{saved_filename} already exists"
-    shutil.copy(options.db_filename, saved_filename)
+    clone_file(options.db_filename, saved_filename)
 
 
-def deploy_data(options: Options) -> None:
-    run_ssh(options, f"mkdir -p {STAGING_DIR}")
-    run_scp(options, options.db_filename, STAGING_DIR, is_directory=False)
-    run_scp(options, options.derived_data_filename, STAGING_DIR, is_directory=False)
+def clone_file(source: Path, dest: Path) -> None:
+    """Copy a file, sharing its blocks with the original if the filesystem can.
+
+    On APFS, btrfs and XFS this takes no time and no extra space, and blocks are
+    only copied once one of the files is modified. Elsewhere the file is copied
+    whole.
+
+    """
+    if sys.platform == "darwin":
+        command = ["cp", "-c", str(source), str(dest)]
+    else:
+        command = ["cp", "--reflink=auto", str(source), str(dest)]
+    try:
+        subprocess.check_call(command)
+    except (OSError, subprocess.CalledProcessError):
+        shutil.copy(source, dest)
+
+
+def get_data_files(options: Options) -> list[Path]:
+    files = [options.db_filename, options.derived_data_db_filename]
     # Also deploy the full-text search database used by hsweb
     if options.search_db_filename and options.search_db_filename.exists():
-        run_scp(options, options.search_db_filename, STAGING_DIR, is_directory=False)
+        files.append(options.search_db_filename)
+    return files
+
+
+def deploy_data(options: Options, *, full: bool = False) -> None:
+    """Upload the data files to the staging directory on the server.
+
+    By default, each file is first copied on the server from the deployed
+    version, and rsync then only sends the blocks that changed, which for the
+    SQLite databases is usually a small fraction of the file. With full=True,
+    the files are copied whole with scp.
+
+    The checksums of the staged files are verified before returning.
+
+    """
+    run_ssh(options, f"mkdir -p {STAGING_DIR}")
+    files = get_data_files(options)
+    for path in files:
+        if full:
+            run_scp(options, path, STAGING_DIR, is_directory=False)
+        else:
+            run_rsync(options, path)
+    for path in files:
+        verify_checksum(options, path, STAGING_DIR + path.name)
+
+
+def run_rsync(options: Options, local_path: Path) -> None:
+    live_path = shlex.quote(HOME_DIR + local_path.name)
+    staged_path = shlex.quote(STAGING_DIR + local_path.name)
+    # Start from the deployed file so that only the differences are sent
+    run_ssh(
+        options,
+        f"test -e {staged_path} || ! test -e {live_path}"
+        f" || cp --reflink=auto {live_path} {staged_path}",
+    )
+    command = [
+        "rsync",
+        "--inplace",
+        "--no-whole-file",
+        "--times",
+        "--stats",
+        "-e",
+        f"ssh -i {shlex.quote(str(options.pem_file))}",
+        str(local_path),
+        f"{options.hesperomys_host}:{STAGING_DIR}",
+    ]
+    print(f"# {command}")
+    subprocess.check_call(command)
+
+
+def get_sha256(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(1 << 20):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def verify_checksum(options: Options, local_path: Path, remote_path: str) -> None:
+    expected = get_sha256(local_path)
+    output = get_ssh_output(options, f"sha256sum {shlex.quote(remote_path)}")
+    actual = output.split()[0]
+    if actual != expected:
+        raise RuntimeError(
+            f"checksum mismatch for {remote_path}: expected {expected}, got {actual}"
+        )
+
+
+def swap_data(options: Options) -> None:
+    """Move the staged data files into place.
+
+    Each rename is atomic, but the files are moved one at a time, and hsweb
+    opens its database connections lazily in each worker thread. Until it is
+    restarted, a running hsweb may therefore read some of the old files and some
+    of the new ones, so full_deploy() restarts it right after the swap.
+
+    """
+    for path in get_data_files(options):
+        staged_path = shlex.quote(STAGING_DIR + path.name)
+        run_ssh(options, f"mv -f {staged_path} {shlex.quote(HOME_DIR)}")
 
 
 def validate_version(version: str) -> None:
@@ -134,7 +240,7 @@ def restart(options: Options, *, kill: bool = True, port: int = 80) -> None:
     )
 
 
-def full_deploy(options: Options, version: str) -> None:
+def full_deploy(options: Options, version: str, *, full_data: bool = False) -> None:
     assert_git_clean(options.taxonomy_repo)
     assert_git_clean(options.hesperomys_repo)
     validate_version(version)
@@ -142,11 +248,11 @@ def full_deploy(options: Options, version: str) -> None:
     push_hesperomys(options, version)
 
     save_data(options, version)
-    deploy_data(options)
-    run_ssh(options, "mv /home/ec2-user/staging/* /home/ec2-user/")
+    deploy_data(options, full=full_data)
     deploy_hesperomys(options)
     deploy_taxonomy(options)
     deploy_game_data(options)
+    swap_data(options)
     restart(options)
 
 
@@ -168,6 +274,12 @@ def main() -> None:
     parser.add_argument("version", nargs="?")
     parser.add_argument("--port", type=int, default=80)
     parser.add_argument("--kill", action="store_true", default=False)
+    parser.add_argument(
+        "--full-data",
+        action="store_true",
+        default=False,
+        help="upload the data files whole instead of only the changes",
+    )
     args = parser.parse_args()
 
     options = get_options()
@@ -179,7 +291,7 @@ def main() -> None:
             interactive_ssh(options)
         case "deploy":
             assert args.version
-            full_deploy(options, args.version)
+            full_deploy(options, args.version, full_data=args.full_data)
         case "code":
             update_code(options)
 
@@ -2,5 +2,5 @@
 PORT=$1
 
 while true; do
-    TAXONOMY_CONFIG_FILE=~/taxonomy/taxonomy.ini sudo nohup /home/ec2-user/.local/bin/uv run --python=python3.14 -m hsweb  -p $PORT -b ~/hesperomys >>/home/ec2-user/hesperomys.log 2>&1
+    TAXONOMY_CONFIG_FILE=~/taxonomy/taxonomy.ini sudo nohup /home/ec2-user/.local/bin/uv run --python=python3.14 -m hsweb  -p $PORT -b ~/hesperomys -w 8 -t 30 --cache-size 10000 >>/home/ec2-user/hesperomys.log 2>&1
 done
@@ -1,5 +1,6 @@
 import argparse
 import logging
+from pathlib import Path
 
 from aiohttp import web
 
@@ -10,6 +11,32 @@ if __name__ == "__main__":
     parser.add_argument("-p", "--port", type=int)
     parser.add_argument("-b", "--build-root", type=str)
     parser.add_argument("-v", "--verbose", action="store_true", default=False)
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=0,
+        help="run GraphQL operations in a pool of this many threads",
+    )
+    parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=None,
+        help="timeout in seconds for GraphQL operations (requires --workers)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=0,
+        help="number of GraphQL responses to cache in memory (requires --workers)",
+    )
+    parser.add_argument(
+        "--cache-db",
+        type=Path,
+        default=None,
+        help="SQLite file to also store cached GraphQL responses in",
+    )
     args = parser.parse_args()
     logging.basicConfig(level=logging.INFO)
 
@@ -17,4 +44,13 @@ if __name__ == "__main__":
         logger = logging.getLogger("peewee")
         logger.setLevel(logging.DEBUG)
 
-    web.run_app(index.make_app(args.build_root), port=args.port)
+    web.run_app(
+        index.make_app(
+            args.build_root,
+            workers=args.workers,
+            timeout=args.timeout,
+            cache_size=args.cache_size,
+            cache_db=args.cache_db,
+        ),
+        port=args.port,
+    )
@@ -0,0 +1,396 @@
+"""Cache of GraphQL responses.
+
+The frontend requests the same pages over and over, so PooledGraphQLView keeps
+the encoded responses to queries in an in-process LRU cache, optionally backed by
+a SQLite database that survives restarts. Entries are keyed by the normalized
+query document, variables and operation name.
+
+Each entry records every object that was read while resolving it (see
+record_objects() in taxonomy.db.models.base). An entry is invalidated when:
+
+- One of those objects is saved, or an object that refers to one of them through
+  a foreign key is saved (through BaseModel.save_event).
+- An object of a model the entry touched is created (through creation_event),
+  since it may show up in lists such as newest or reverse relations.
+- One of the database files is modified. On a read-only replica, the database is
+  replaced wholesale, so every entry older than the new file is dropped.
+
+get() only looks in memory, so it can run on the event loop; on a miss,
+get_from_disk() does the blocking lookup in the database and should run in a
+worker thread.
+
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from graphql import parse, print_ast
+from graphql.error import GraphQLSyntaxError
+from graphql.language.ast import OperationDefinition
+
+from taxonomy.db.models.base import BaseModel
+
+ObjectKey = tuple[str, int]
+
+
+@dataclass
+class Entry:
+    body: str
+    status: int
+    created: float
+    objects: frozenset[ObjectKey]
+
+
+@dataclass
+class Stats:
+    hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+
+    def to_json(self) -> dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else None,
+        }
+
+
+def get_cache_key(
+    data: Any, query_data: Mapping[str, Any], *, pretty: bool = False
+) -> str | None:
+    """Return the cache key for a request, or None if it should not be cached.
+
+    Batched requests, mutations and requests that fail to parse are not cached.
+
+    """
+    if not isinstance(data, Mapping):
+        return None
+    params = {**query_data, **data}
+    query = params.get("query")
+    variables = params.get("variables")
+    if not isinstance(query, str):
+        return None
+    if isinstance(variables, str):
+        try:
+            variables = json.loads(variables)
+        except ValueError:
+            return None
+    try:
+        document = parse(query)
+    except GraphQLSyntaxError:
+        return None
+    if any(
+        isinstance(definition, OperationDefinition) and definition.operation != "query"
+        for definition in document.definitions
+    ):
+        return None
+    normalized = json.dumps(
+        [print_ast(document), variables, params.get("operationName"), pretty],
+        sort_keys=True,
+    )
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class ResponseCache:
+    """LRU cache of encoded GraphQL responses.
+
+    max_entries limits the in-memory tier. If db_filename is given, entries are
+    also stored there and can be looked up with get_from_disk() on a miss in
+    memory. watched_files are the
+    database files the responses are computed from; entries older than their
+    last modification are dropped.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10_000,
+        db_filename: Path | None = None,
+        watched_files: Iterable[Path] = (),
+    ) -> None:
+        self.max_entries = max_entries
+        self.db_filename = db_filename
+        self.watched_files = list(watched_files)
+        self.stats = Stats()
+        self._entries: OrderedDict[str, Entry] = OrderedDict()
+        self._by_object: dict[ObjectKey, set[str]] = {}
+        self._by_call_sign: dict[str, set[str]] = {}
+        # get() runs on the event loop, put() in worker threads
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._watched_mtime = self._get_watched_mtime()
+        self._last_invalidation = 0.0
+        for model_cls in BaseModel.__subclasses__():
+            if "save_event" in model_cls.__dict__:
+                model_cls.save_event.on(self.on_save)
+            if "creation_event" in model_cls.__dict__:
+                model_cls.creation_event.on(self.on_create)
+
+    @property
+    def conn(self) -> sqlite3.Connection | None:
+        if self.db_filename is None:
+            return None
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # static analysis: ignore[internal_error]
+            conn = self._local.conn = sqlite3.connect(str(self.db_filename))
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS response(
+                        key TEXT PRIMARY KEY,
+                        body TEXT NOT NULL,
+                        status INTEGER NOT NULL,
+                        created REAL NOT NULL
+                    )
+                    """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS response_object(
+                        key TEXT NOT NULL,
+                        call_sign TEXT NOT NULL,
+                        object_id INTEGER NOT NULL
+                    )
+                    """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS response_object_key
+                    ON response_object(key)
+                    """)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS response_object_object
+                    ON response_object(call_sign, object_id)
+                    """)
+        return conn
+
+    def get(self, key: str) -> Entry | None:
+        """Look up a response in memory. This does no database I/O."""
+        self.check_watched_files()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+            return entry
+
+    def get_from_disk(self, key: str) -> Entry | None:
+        """Look up a response that is not in memory in the database.
+
+        This blocks, so it should not run on the event loop.
+
+        """
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.stats.misses += 1
+            else:
+                self.stats.disk_hits += 1
+                self._add_in_memory(key, entry)
+        return entry
+
+    def put(
+        self,
+        key: str,
+        body: str,
+        status: int,
+        objects: frozenset[ObjectKey],
+        *,
+        started: float,
+    ) -> None:
+        """Store a response that was computed starting at time started.
+
+        If anything was invalidated in the meantime, the response may already be
+        stale, so it is not stored.
+
+        """
+        entry = Entry(body, status, time.time(), objects)
+        with self._lock:
+            if self._last_invalidation >= started:
+                return
+            self._add_in_memory(key, entry)
+        if (conn := self.conn) is not None:
+            with conn:
+                conn.execute("DELETE FROM response_object WHERE key = ?", (key,))
+                conn.execute(
+                    "INSERT OR REPLACE INTO response VALUES (?, ?, ?, ?)",
+                    (key, body, status, entry.created),
+                )
+                conn.executemany(
+                    "INSERT INTO response_object VALUES (?, ?, ?)",
+                    [(key, call_sign, oid) for call_sign, oid in objects],
+                )
+
+    def _load_from_disk(self, key: str) -> Entry | None:
+        conn = self.conn
+        if conn is None:
+            return None
+        row = conn.execute(
+            "SELECT body, status, created FROM response WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        body, status, created = row
+        if created < self._watched_mtime:
+            # check_watched_files() leaves stale entries on disk
+            with conn:
+                self._delete_from_disk(conn, {key})
+            return None
+        objects = conn.execute(
+            "SELECT call_sign, object_id FROM response_object WHERE key = ?", (key,)
+        ).fetchall()
+        return Entry(body, status, created, frozenset(map(tuple, objects)))
+
+    def _add_in_memory(self, key: str, entry: Entry) -> None:
+        if self.max_entries <= 0:
+            return
+        self._remove_in_memory(key)
+        self._entries[key] = entry
+        for obj in entry.objects:
+            self._by_object.setdefault(obj, set()).add(key)
+            self._by_call_sign.setdefault(obj[0], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove_in_memory(next(iter(self._entries)))
+
+    def _remove_in_memory(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for obj in entry.objects:
+            if keys := self._by_object.get(obj):
+                keys.discard(key)
+                if not keys:
+                    del self._by_object[obj]
+            if keys := self._by_call_sign.get(obj[0]):
+                keys.discard(key)
+                if not keys:
+                    del self._by_call_sign[obj[0]]
+
+    def invalidate_objects(self, objects: Iterable[ObjectKey]) -> int:
+        """Drop all entries that touched any of the given objects."""
+        objects = list(objects)
+        with self._lock:
+            keys = set()
+            for obj in objects:
+                keys |= self._by_object.get(obj, set())
+            for key in keys:
+                self._remove_in_memory(key)
+        if (conn := self.conn) is not None:
+            with conn:
+                for call_sign, oid in objects:
+                    keys.update(
+                        key
+                        for (key,) in conn.execute(
+                            "SELECT key FROM response_object"
+                            " WHERE call_sign = ? AND object_id = ?",
+                            (call_sign, oid),
+                        )
+                    )
+                self._delete_from_disk(conn, keys)
+        self._record_invalidation(keys)
+        return len(keys)
+
+    def invalidate_call_sign(self, call_sign: str) -> int:
+        """Drop all entries that touched any object of a model."""
+        with self._lock:
+            keys = set(self._by_call_sign.get(call_sign, set()))
+            for key in keys:
+                self._remove_in_memory(key)
+        if (conn := self.conn) is not None:
+            with conn:
+                keys.update(
+                    key
+                    for (key,) in conn.execute(
+                        "SELECT DISTINCT key FROM response_object WHERE call_sign = ?",
+                        (call_sign,),
+                    )
+                )
+                self._delete_from_disk(conn, keys)
+        self._record_invalidation(keys)
+        return len(keys)
+
+    def invalidate_before(self, timestamp: float) -> int:
+        """Drop all entries created before the given time."""
+        keys = self._invalidate_in_memory_before(timestamp)
+        if (conn := self.conn) is not None:
+            with conn:
+                keys.update(
+                    key
+                    for (key,) in conn.execute(
+                        "SELECT key FROM response WHERE created < ?", (timestamp,)
+                    )
+                )
+                self._delete_from_disk(conn, keys)
+        self._record_invalidation(keys)
+        return len(keys)
+
+    def _invalidate_in_memory_before(self, timestamp: float) -> set[str]:
+        with self._lock:
+            keys = {
+                key for key, entry in self._entries.items() if entry.created < timestamp
+            }
+            for key in keys:
+                self._remove_in_memory(key)
+        return keys
+
+    def _record_invalidation(self, keys: set[str]) -> None:
+        with self._lock:
+            self._last_invalidation = time.time()
+            self.stats.invalidations += len(keys)
+
+    def _delete_from_disk(self, conn: sqlite3.Connection, keys: set[str]) -> None:
+        conn.executemany("DELETE FROM response WHERE key = ?", [(k,) for k in keys])
+        conn.executemany(
+            "DELETE FROM response_object WHERE key = ?", [(k,) for k in keys]
+        )
+
+    def _get_watched_mtime(self) -> float:
+        mtimes = [0.0]
+        for path in self.watched_files:
+            try:
+                mtimes.append(path.stat().st_mtime)
+            except FileNotFoundError:
+                pass
+        return max(mtimes)
+
+    def check_watched_files(self) -> None:
+        """Drop the entries in memory that are older than a watched file.
+
+        Entries on disk that are older are skipped and deleted by
+        get_from_disk(), so this does no database I/O.
+
+        """
+        mtime = self._get_watched_mtime()
+        if mtime > self._watched_mtime:
+            self._watched_mtime = mtime
+            self._record_invalidation(self._invalidate_in_memory_before(mtime))
+
+    def on_save(self, obj: BaseModel) -> None:
+        objects = [(obj.call_sign, obj.id)]
+        for clirm_field in type(obj).clirm_fields.values():
+            if isinstance(clirm_field.type_object, type) and issubclass(
+                clirm_field.type_object, BaseModel
+            ):
+                oid = clirm_field.get_raw(obj)
+                if oid is not None:
+                    objects.append((clirm_field.type_object.call_sign, oid))
+        self.invalidate_objects(objects)
+
+    def on_create(self, obj: BaseModel) -> None:
+        self.invalidate_call_sign(obj.call_sign)
+        self.on_save(obj)
+
+    def get_metrics(self) -> dict[str, Any]:
+        with self._lock:
+            return {**self.stats.to_json(), "entries": len(self._entries)}
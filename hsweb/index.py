@@ -5,7 +5,11 @@ from pathlib import Path
 from aiohttp import web
 from aiohttp_graphql import GraphQLView
 
+from taxonomy.config import get_options
+
 from . import schema
+from .cache import ResponseCache
+from .pool import PooledGraphQLView
 
 HESPEROMYS_ROOT = Path("/Users/jelle/py/hesperomys")
 STATIC_DIR = Path(__file__).parent / "static"
@@ -36,12 +40,39 @@ async def favicon_handler(request: web.Request) -> web.Response:
     )
 
 
+def make_metrics_handler(
+    cache: ResponseCache,
+) -> Callable[[web.Request], Awaitable[web.Response]]:
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({"response_cache": cache.get_metrics()})
+
+    return handler
+
+
 async def on_prepare(request: web.Request, response: web.Response) -> None:
     response.headers["Access-Control-Allow-Origin"] = "http://localhost:3000"
     response.headers["Access-Control-Allow-Headers"] = "*"
 
 
-def make_app(build_root: str | None = None) -> web.Application:
+def make_app(
+    build_root: str | None = None,
+    *,
+    workers: int = 0,
+    timeout: float | None = None,
+    cache_size: int = 0,
+    cache_db: Path | None = None,
+) -> web.Application:
+    """Create the hsweb application.
+
+    If workers is nonzero, GraphQL operations run in a pool of that many threads,
+    and those that take longer than timeout seconds fail with a 504 response.
+    Otherwise they run on the event loop.
+
+    If cache_size is nonzero (requires workers), responses to up to that many
+    queries are cached in memory, and in the cache_db SQLite file if given. Cache
+    statistics are served at /metrics.
+
+    """
     if build_root is None:
         hesperomys_dir = HESPEROMYS_ROOT
     else:
@@ -49,7 +80,34 @@ def make_app(build_root: str | None = None) -> web.Application:
     app = web.Application()
     # Validate schema consistency for frontend queries before serving
     schema.validate_no_conflicting_model_fields(schema.schema)
-    GraphQLView.attach(app, schema=schema.schema, graphiql=True)
+    if workers:
+        cache = None
+        if cache_size:
+            options = get_options()
+            cache = ResponseCache(
+                max_entries=cache_size,
+                db_filename=cache_db,
+                watched_files=[
+                    path
+                    for path in (
+                        options.db_filename,
+                        options.derived_data_db_filename,
+                        options.search_db_filename,
+                    )
+                    if path != Path()
+                ],
+            )
+            app.add_routes([web.get("/metrics", make_metrics_handler(cache))])
+        PooledGraphQLView.attach(
+            app,
+            schema=schema.schema,
+            graphiql=True,
+            workers=workers,
+            timeout=timeout,
+            cache=cache,
+        )
+    else:
+        GraphQLView.attach(app, schema=schema.schema, graphiql=True)
     app.router.add_static("/static", hesperomys_dir / "build" / "static")
     # Serve pre-generated game data files
     app.router.add_static("/games/data", GAME_DATA_DIR)
@@ -0,0 +1,156 @@
+"""Batch loading of objects for the GraphQL resolvers.
+
+Resolving a list of objects one field at a time issues a query for every object
+(and another for every foreign key or reverse relation it has). The loaders here
+follow the DataLoader pattern: resolvers ask a per-request loader for an object
+and get back a promise. graphql-core resolves every field at one level of the
+query before it settles those promises, so all objects requested at that level
+are fetched together, with one ``IN (...)`` query per model.
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import logging
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+import clirm
+from graphene import ResolveInfo
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from taxonomy.db.constants import CommentKind
+from taxonomy.db.models import NameComment
+from taxonomy.db.models.base import (
+    PREFETCH_BATCH_SIZE,
+    BaseModel,
+    load_many,
+    trace_queries,
+)
+
+from .pagination import After, SortKey, get_sort_fields
+
+logger = logging.getLogger(__name__)
+
+
+class ModelLoader(DataLoader):
+    """Loads objects of a model by id."""
+
+    def __init__(self, model_cls: type[BaseModel]) -> None:
+        super().__init__(max_batch_size=PREFETCH_BATCH_SIZE)
+        self.model_cls = model_cls
+
+    def batch_load_fn(self, keys: Sequence[int]) -> Promise[list[BaseModel | None]]:
+        objs = {obj.id: obj for obj in load_many(self.model_cls, keys)}
+        return Promise.resolve([objs.get(key) for key in keys])
+
+
+class ReverseRelationLoader(DataLoader):
+    """Loads the first limit objects referring to each of a set of objects.
+
+    This mirrors the reverse relation resolver in schema.py: objects are ordered
+    by their label field and id, invalid objects are skipped, and if after is
+    given, only objects that sort after it are included.
+
+    """
+
+    def __init__(
+        self, field: clirm.Field[Any], limit: int, after: SortKey | None = None
+    ) -> None:
+        super().__init__(max_batch_size=PREFETCH_BATCH_SIZE)
+        self.field = field
+        model_cls = field.model_cls
+        assert issubclass(model_cls, BaseModel)
+        self.model_cls = model_cls
+        self.limit = limit
+        self.after = after
+
+    def batch_load_fn(self, keys: Sequence[int]) -> Promise[list[list[BaseModel]]]:
+        model_cls = self.model_cls
+        query = model_cls.add_validity_check(
+            model_cls.select().filter(self.field.is_in(keys))
+        )
+        if model_cls is NameComment:
+            query = query.filter(
+                NameComment.kind.is_not_in(
+                    (CommentKind.structured_quote, CommentKind.automatic_change)
+                )
+            )
+        sort_fields = get_sort_fields(model_cls)
+        if self.after is not None:
+            query = query.filter(After(sort_fields, self.after))
+        order_by = ", ".join(f"`{field.name}`" for field in sort_fields)
+        inner, params = query.stringify(
+            f"*, ROW_NUMBER() OVER (PARTITION BY `{self.field.name}` ORDER BY"
+            f" {order_by}) AS _position"
+        )
+        cursor = model_cls.clirm.select(
+            f"SELECT * FROM ({inner}) WHERE _position <= ?"
+            f" ORDER BY `{self.field.name}`, _position",
+            (*params, self.limit),
+        )
+        objs: dict[int, list[BaseModel]] = {key: [] for key in keys}
+        for row in cursor.fetchall():
+            data = dict(row)
+            del data["_position"]
+            obj = model_cls(**data)
+            assert isinstance(obj, BaseModel)
+            objs[data[self.field.name]].append(obj)
+        return Promise.resolve([objs[key] for key in keys])
+
+
+def _get_loaders(info: ResolveInfo) -> dict[object, DataLoader]:
+    # The request object doubles as a per-request cache, see schema.load_model()
+    return info.context["request"].setdefault("loaders", {})
+
+
+def get_model_loader(info: ResolveInfo, model_cls: type[BaseModel]) -> ModelLoader:
+    loaders = _get_loaders(info)
+    key = model_cls.call_sign
+    loader = loaders.get(key)
+    if not isinstance(loader, ModelLoader):
+        loader = loaders[key] = ModelLoader(model_cls)
+    return loader
+
+
+def get_reverse_relation_loader(
+    info: ResolveInfo, field: clirm.Field[Any], limit: int, after: SortKey | None
+) -> ReverseRelationLoader:
+    loaders = _get_loaders(info)
+    model_cls = field.model_cls
+    assert issubclass(model_cls, BaseModel)
+    key = (
+        model_cls.call_sign,
+        field.name,
+        limit,
+        tuple(after) if after is not None else None,
+    )
+    loader = loaders.get(key)
+    if not isinstance(loader, ReverseRelationLoader):
+        loader = loaders[key] = ReverseRelationLoader(field, limit, after)
+    return loader
+
+
+@contextlib.contextmanager
+def log_query_count(operation_name: str | None) -> Iterator[None]:
+    """Log the number of queries to the main database during an operation."""
+    num_queries = 0
+
+    def count_query(statement: str) -> None:
+        nonlocal num_queries
+        num_queries += 1
+
+    start = time.perf_counter()
+    try:
+        with trace_queries(BaseModel.clirm.conn, count_query):
+            yield
+    finally:
+        logger.info(
+            "GraphQL operation %s: %d queries in %.0f ms",
+            operation_name or "(anonymous)",
+            num_queries,
+            (time.perf_counter() - start) * 1000,
+        )
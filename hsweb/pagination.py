@@ -0,0 +1,120 @@
+"""Keyset pagination for GraphQL connections.
+
+graphene's default connections encode the offset of an edge in its cursor, so a
+resolver has to produce every row before the requested page and let graphene
+slice them off. Here the cursor instead holds the sort key of the edge (e.g. the
+label and id of an object), and the next page is fetched with a WHERE clause
+that selects rows sorting after it. Fetching page N then costs the same as
+fetching the first page.
+
+Resolvers fetch first + 1 rows after the cursor and pass them to make_page(),
+which uses the extra row to fill in hasNextPage.
+
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from typing import Any
+
+import clirm
+from clirm.base import Condition
+from graphene import ObjectType
+from graphene.relay import Connection, PageInfo
+
+from taxonomy.db.models.base import BaseModel
+
+SortKey = Sequence[Any]
+
+
+def encode_cursor(key: SortKey) -> str:
+    return base64.b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(after: str | None) -> list[Any] | None:
+    if not after:
+        return None
+    try:
+        key = json.loads(base64.b64decode(after))
+    except (binascii.Error, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {after!r}") from e
+    if isinstance(key, list):
+        return key
+    raise ValueError(f"Invalid cursor: {after!r}")
+
+
+def get_sort_fields(model_cls: type[BaseModel]) -> list[clirm.Field[Any]]:
+    """Fields to sort by: the label field (if any), then the id."""
+    fields = []
+    if hasattr(model_cls, "label_field") and model_cls.label_field != "id":
+        fields.append(getattr(model_cls, model_cls.label_field))
+    fields.append(model_cls.id)
+    return fields
+
+
+def get_sort_key(obj: BaseModel, fields: Sequence[clirm.Field[Any]]) -> list[Any]:
+    return [field.get_raw(obj) for field in fields]
+
+
+def keyset_condition(
+    columns: Sequence[str], key: SortKey
+) -> tuple[str, tuple[object, ...]]:
+    """SQL for rows sorting after key when ordered by columns (ascending).
+
+    NULLs sort first, as in SQLite.
+
+    """
+    if len(columns) != len(key):
+        raise ValueError(f"Invalid cursor: expected {len(columns)} values")
+    clauses = []
+    args: list[object] = []
+    for i, (column, value) in enumerate(zip(columns, key, strict=True)):
+        parts = []
+        for prev_column, prev_value in zip(columns[:i], key[:i], strict=True):
+            if prev_value is None:
+                parts.append(f"`{prev_column}` IS NULL")
+            else:
+                parts.append(f"`{prev_column}` = ?")
+                args.append(prev_value)
+        if value is None:
+            parts.append(f"`{column}` IS NOT NULL")
+        else:
+            parts.append(f"`{column}` > ?")
+            args.append(value)
+        clauses.append(f"({' AND '.join(parts)})")
+    return f"({' OR '.join(clauses)})", tuple(args)
+
+
+class After(Condition):
+    """Condition matching rows that sort after key when ordered by fields."""
+
+    def __init__(self, fields: Sequence[clirm.Field[Any]], key: SortKey) -> None:
+        self.fields = fields
+        self.key = key
+
+    def stringify(self) -> tuple[str, tuple[object, ...]]:
+        return keyset_condition([field.name for field in self.fields], self.key)
+
+
+def make_page(
+    connection_type: type[Connection],
+    items: Sequence[tuple[SortKey, ObjectType]],
+    *,
+    first: int,
+    after: str | None,
+) -> Connection:
+    """Build a connection from up to first + 1 (sort key, node) pairs."""
+    edges = [
+        connection_type.Edge(node=node, cursor=encode_cursor(key))
+        for key, node in items[:first]
+    ]
+    page_info = PageInfo(
+        start_cursor=edges[0].cursor if edges else None,
+        end_cursor=edges[-1].cursor if edges else None,
+        has_previous_page=bool(after),
+        has_next_page=len(items) > first,
+    )
+    return connection_type(edges=edges, page_info=page_info)
@@ -0,0 +1,170 @@
+"""Run GraphQL operations in a pool of worker threads.
+
+The resolvers in schema.py do blocking SQLite I/O, so running them on the event
+loop lets a single slow query stall every other request. PooledGraphQLView parses
+the request on the event loop and hands execution to a bounded thread pool. Each
+worker thread gets its own SQLite connections (see LazyClirm). The number of
+queries each operation makes is logged at INFO level. Responses to queries can
+be cached, see cache.py; the event loop only looks in the in-memory cache, and
+the worker looks in the on-disk cache before executing the operation.
+
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from aiohttp import web
+from aiohttp_graphql import GraphQLView
+from graphql_server import HttpQueryError, encode_execution_results, run_http_query
+
+from taxonomy.db.models.base import record_objects
+
+from .cache import ResponseCache, get_cache_key
+from .loaders import log_query_count
+
+logger = logging.getLogger(__name__)
+
+
+class PooledGraphQLView(GraphQLView):
+    def __init__(
+        self,
+        *,
+        workers: int,
+        timeout: float | None = None,
+        cache: ResponseCache | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hsweb-graphql"
+        )
+        self.timeout = timeout
+        self.cache = cache
+
+    def execute(
+        self,
+        request_method: str,
+        data: Any,
+        query_data: Any,
+        context: Any,
+        *,
+        pretty: bool = False,
+        cache_key: str | None = None,
+    ) -> tuple[str, int]:
+        started = time.time()
+        if self.cache is not None and cache_key is not None:
+            entry = self.cache.get_from_disk(cache_key)
+            if entry is not None:
+                return entry.body, entry.status
+        operation_name = data.get("operationName") if isinstance(data, dict) else None
+        with log_query_count(operation_name), record_objects() as objects:
+            execution_results, _ = run_http_query(
+                self.schema,
+                request_method,
+                data,
+                query_data=query_data,
+                batch_enabled=self.batch,
+                root_value=self.root_value,
+                context_value=context,
+                middleware=self.middleware,
+                **self.execution_options,
+            )
+        result, status_code = encode_execution_results(
+            execution_results,
+            is_batch=isinstance(data, list),
+            format_error=self.error_formatter,
+            encode=partial(self.encoder, pretty=pretty),
+        )
+        if (
+            self.cache is not None
+            and cache_key is not None
+            and status_code == 200
+            and all(r is not None and not r.errors for r in execution_results)
+        ):
+            self.cache.put(
+                cache_key, result, status_code, frozenset(objects), started=started
+            )
+        return result, status_code
+
+    async def __call__(self, request: web.Request) -> web.StreamResponse:
+        if request.method.lower() == "options":
+            return self.process_preflight(request)
+        if self.is_graphiql(request):
+            # The interactive explorer is only for development
+            return await super().__call__(request)
+        loop = asyncio.get_running_loop()
+        start = time.monotonic()
+        try:
+            data = await self.parse_body(request)
+            cache_key = None
+            if self.cache is not None:
+                cache_key = get_cache_key(
+                    data, request.query, pretty=self.is_pretty(request)
+                )
+                entry = self.cache.get(cache_key) if cache_key is not None else None
+                if entry is not None:
+                    return web.Response(
+                        text=entry.body,
+                        status=entry.status,
+                        content_type="application/json",
+                    )
+            # If the timeout expires while the operation is still queued, it is
+            # cancelled; if it is already running, it finishes in the background.
+            execute = partial(
+                self.execute,
+                request.method.lower(),
+                data,
+                dict(request.query),
+                self.get_context(request),
+                pretty=self.is_pretty(request),
+                cache_key=cache_key,
+            )
+            result, status_code = await asyncio.wait_for(
+                loop.run_in_executor(self.pool, execute), timeout=self.timeout
+            )
+        except HttpQueryError as err:
+            return web.Response(
+                text=self.encoder({"errors": [self.error_formatter(err)]}),
+                status=err.status_code,
+                headers=err.headers,
+                content_type="application/json",
+            )
+        except TimeoutError:
+            logger.warning(
+                "GraphQL request timed out after %.1f s", time.monotonic() - start
+            )
+            return web.Response(
+                text=self.encoder({"errors": [{"message": "Request timed out"}]}),
+                status=504,
+                content_type="application/json",
+            )
+        return web.Response(
+            text=result, status=status_code, content_type="application/json"
+        )
+
+    def shutdown(self) -> None:
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def attach(
+        cls,
+        app: web.Application,
+        *,
+        route_path: str = "/graphql",
+        route_name: str = "graphql",
+        **kwargs: Any,
+    ) -> None:
+        view = cls(**kwargs)
+
+        async def dispatch(request: web.Request) -> web.StreamResponse:
+            return await view(request)
+
+        async def on_cleanup(app: web.Application) -> None:
+            view.shutdown()
+
+        app.router.add_route("*", route_path, dispatch, name=route_name)
+        app.on_cleanup.append(on_cleanup)
@@ -3,8 +3,9 @@ from __future__ import annotations
 import base64
 import enum
 import re
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from itertools import islice
+from operator import attrgetter
 from typing import TYPE_CHECKING, Any, TypeVar
 
 import clirm
@@ -27,24 +28,34 @@ from graphene import (
 )
 from graphene.relay import Connection, ConnectionField, Node
 from graphene.utils.str_converters import to_snake_case
+from promise import Promise
 
+from taxonomy import search as fts
 from taxonomy.adt import ADT, unwrap_type
 from taxonomy.config import get_options
 from taxonomy.db import models
-from taxonomy.db.constants import CommentKind
+from taxonomy.db.constants import ArticleType
 from taxonomy.db.derived_data import DerivedField
 from taxonomy.db.models import (
     Article,
+    CitationGroup,
     ClassificationEntry,
     Location,
     Name,
-    NameComment,
     Period,
     Person,
     Taxon,
 )
-from taxonomy.db.models.base import ADTField, BaseModel, TextField, TextOrNullField
+from taxonomy.db.models.base import (
+    ADTField,
+    BaseModel,
+    ModelT,
+    TextField,
+    TextOrNullField,
+)
 
+from .loaders import get_model_loader, get_reverse_relation_loader
+from .pagination import After, decode_cursor, get_sort_fields, get_sort_key, make_page
 from .render import CALL_SIGN_TO_MODEL, DOCS_ROOT, render_markdown, render_plain_text
 
 T = TypeVar("T")
@@ -153,30 +164,35 @@ def build_graphene_field(
         return Field(
             make_enum(clirm_field.type_object),
             required=not clirm_field.allow_none,
-            resolver=lambda parent, info: getattr(
-                get_model(model_cls, parent, info), name
+            resolver=lambda parent, info: load_model(model_cls, parent, info).then(
+                attrgetter(name)
             ),
         )
     elif issubclass(clirm_field.type_object, BaseModel):
         call_sign = getattr(model_cls, name).type_object.call_sign
 
-        def fk_resolver(parent: ObjectType, info: ResolveInfo) -> ObjectType | None:
-            model = get_model(model_cls, parent, info)
-            oid = getattr(model_cls, name).get_raw(model)
-            if oid is None:
-                return None
-            key = (call_sign, oid)
+        def fk_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[Any]:
             cache = info.context["request"]
-            if key in cache:
-                foreign_model = cache[key]
-            else:
-                foreign_model = getattr(model, name)
-                if foreign_model is None:
+            object_type = build_object_type_from_model(clirm_field.type_object)
+
+            def load_foreign_model(model: BaseModel) -> Any:
+                oid = getattr(model_cls, name).get_raw(model)
+                if oid is None:
                     return None
-                cache[key] = foreign_model
-            return build_object_type_from_model(clirm_field.type_object)(
-                id=foreign_model.id, oid=foreign_model.id
-            )
+                key = (call_sign, oid)
+                if key in cache:
+                    return object_type(id=oid, oid=oid)
+
+                def on_load(foreign_model: BaseModel | None) -> ObjectType | None:
+                    if foreign_model is None:
+                        return None
+                    cache[key] = foreign_model
+                    return object_type(id=oid, oid=oid)
+
+                loader = get_model_loader(info, clirm_field.type_object)
+                return loader.load(oid).then(on_load)
+
+            return load_model(model_cls, parent, info).then(load_foreign_model)
 
         return Field(
             lambda: build_object_type_from_model(clirm_field.type_object),
@@ -186,8 +202,7 @@ def build_graphene_field(
     elif isinstance(clirm_field, ADTField):
         adt_cls = clirm_field.adt_type
 
-        def adt_resolver(parent: ObjectType, info: ResolveInfo) -> list[ObjectType]:
-            model = get_model(model_cls, parent, info)
+        def build_adts(model: BaseModel) -> list[ObjectType]:
             adts = getattr(model, name)
             if not adts:
                 return []
@@ -208,42 +223,51 @@ def build_graphene_field(
                     )
             return out
 
+        def adt_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[Any]:
+            return load_model(model_cls, parent, info).then(build_adts)
+
         return List(NonNull(build_adt(adt_cls)), required=True, resolver=adt_resolver)
     elif (
         isinstance(clirm_field, (TextField, TextOrNullField))
         or name in model_cls.markdown_fields
     ):
 
-        def md_resolver(parent: ObjectType, info: ResolveInfo) -> str | None:
-            value = getattr(get_model(model_cls, parent, info), name)
+        def render_md(model: BaseModel) -> str | None:
+            value = getattr(model, name)
             if value is None:
                 return None
             return render_markdown(value)
 
+        def md_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[Any]:
+            return load_model(model_cls, parent, info).then(render_md)
+
         return Field(String, required=not clirm_field.allow_none, resolver=md_resolver)
     elif clirm_field.type_object is str:
 
-        def str_resolver(parent: ObjectType, info: ResolveInfo) -> str | None:
-            value = getattr(get_model(model_cls, parent, info), name)
+        def render_str(model: BaseModel) -> str | None:
+            value = getattr(model, name)
             if value is None:
                 return None
             return render_plain_text(value)
 
+        def str_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[Any]:
+            return load_model(model_cls, parent, info).then(render_str)
+
         return Field(String, required=not clirm_field.allow_none, resolver=str_resolver)
     elif clirm_field.type_object is int:
         return Field(
             Int,
             required=not clirm_field.allow_none,
-            resolver=lambda parent, info: getattr(
-                get_model(model_cls, parent, info), name
+            resolver=lambda parent, info: load_model(model_cls, parent, info).then(
+                attrgetter(name)
             ),
         )
     elif clirm_field.type_object is bool:
         return Field(
             Boolean,
             required=not clirm_field.allow_none,
-            resolver=lambda parent, info: getattr(
-                get_model(model_cls, parent, info), name
+            resolver=lambda parent, info: load_model(model_cls, parent, info).then(
+                attrgetter(name)
             ),
         )
     else:
@@ -252,15 +276,27 @@ def build_graphene_field(
         ), f"failed to translate {clirm_field} with type {clirm_field.type_object}"
 
 
-def get_model(model_cls: type[BaseModel], parent: Any, info: ResolveInfo) -> BaseModel:
+def load_model(
+    model_cls: type[ModelT], parent: Any, info: ResolveInfo
+) -> Promise[ModelT]:
+    """Load the model for a GraphQL object.
+
+    Objects requested at the same level of the query are loaded together, so
+    resolvers should chain on the returned promise rather than wait for it.
+
+    """
     cache = info.context["request"]
     key = (model_cls.call_sign, parent.oid)
-    if key not in cache:
-        obj = model_cls(parent.oid)
-        if obj.is_invalid() and not obj.get_redirect_target():
-            raise ValueError(f"No {model_cls} with id {obj.id}")
+    if key in cache:
+        return Promise.resolve(cache[key])
+
+    def check(obj: ModelT | None) -> ModelT:
+        if obj is None or (obj.is_invalid() and not obj.get_redirect_target()):
+            raise ValueError(f"No {model_cls} with id {parent.oid}")
         cache[key] = obj
-    return cache[key]
+        return obj
+
+    return get_model_loader(info, model_cls).load(parent.oid).then(check)
 
 
 @cache
@@ -274,73 +310,66 @@ def build_connection(object_type: type[ObjectType]) -> type[Connection]:
 def build_reverse_rel_count_field(
     model_cls: type[BaseModel], name: str, clirm_field: clirm.Field
 ) -> Field:
-    def resolver(parent: ObjectType, info: ResolveInfo) -> list[ObjectType]:
-        model = get_model(model_cls, parent, info)
-        query = getattr(model, name)
-        return query.count()
+    def resolver(parent: ObjectType, info: ResolveInfo) -> Promise[int]:
+        return load_model(model_cls, parent, info).then(
+            lambda model: getattr(model, name).count()
+        )
 
     return Int(required=True, resolver=resolver)
 
 
-def _get_locations(
-    parent: ObjectType, info: ResolveInfo, first: int = 10, after: str | None = None
-) -> Any:
-    model = get_model(Period, parent, info)
-    query = (
-        Location.select_valid()
-        .filter((Location.min_period == model) | (Location.max_period == model))
-        .order_by(getattr(Location, Location.label_field))
-    )
-    if after:
-        offset = int(base64.b64decode(after).split(b":")[1]) + 1
-        query = query.limit(first + offset + 1)
-    else:
-        query = query.limit(first + 1)
-    return query
-
-
-def locations_resolver(
-    parent: ObjectType, info: ResolveInfo, first: int = 10, after: str | None = None
-) -> list[ObjectType]:
-    object_type = build_object_type_from_model(Location)
-    query = _get_locations(parent, info, first, after)
+def _make_model_page(
+    model_cls: type[BaseModel],
+    query: Any,
+    sort_fields: Sequence[clirm.Field[Any]],
+    info: ResolveInfo,
+    first: int,
+    after: str | None,
+) -> Connection:
+    """Return a page of a query ordered by sort_fields, starting after the cursor."""
+    key = decode_cursor(after)
+    if key is not None:
+        query = query.filter(After(sort_fields, key))
+    query = query.order_by(*sort_fields).limit(first + 1)
+    object_type = build_object_type_from_model(model_cls)
     cache = info.context["request"]
-    ret = []
+    items = []
     for obj in query:
-        ret.append(object_type(id=obj.id, oid=obj.id))
-        cache[(Location.call_sign, obj.id)] = obj
-    return ret
+        items.append(
+            (get_sort_key(obj, sort_fields), object_type(id=obj.id, oid=obj.id))
+        )
+        cache[(model_cls.call_sign, obj.id)] = obj
+    return make_page(build_connection(object_type), items, first=first, after=after)
 
 
-def _get_aliases(
+def locations_resolver(
     parent: ObjectType, info: ResolveInfo, first: int = 10, after: str | None = None
-) -> Any:
-    model = get_model(Person, parent, info)
-    query = model.get_aliases()
-    if after:
-        offset = int(base64.b64decode(after).split(b":")[1]) + 1
-        query = query.limit(first + offset + 1)
-    else:
-        query = query.limit(first + 1)
-    return query
+) -> Promise[Connection]:
+    def get_page(model: Period) -> Connection:
+        query = Location.select_valid().filter(
+            (Location.min_period == model) | (Location.max_period == model)
+        )
+        return _make_model_page(
+            Location, query, get_sort_fields(Location), info, first, after
+        )
+
+    return load_model(Period, parent, info).then(get_page)
 
 
 def person_aliases_resolver(
     parent: ObjectType, info: ResolveInfo, first: int = 10, after: str | None = None
-) -> list[ObjectType]:
-    object_type = build_object_type_from_model(Person)
-    query = _get_aliases(parent, info, first, after)
-    cache = info.context["request"]
-    ret = []
-    for obj in query:
-        ret.append(object_type(id=obj.id, oid=obj.id))
-        cache[(Person.call_sign, obj.id)] = obj
-    return ret
+) -> Promise[Connection]:
+    return load_model(Person, parent, info).then(
+        lambda model: _make_model_page(
+            Person, model.get_aliases(), [Person.id], info, first, after
+        )
+    )
 
 
-def num_aliases_resolver(parent: ObjectType, info: ResolveInfo) -> list[ObjectType]:
-    model = get_model(Person, parent, info)
-    return model.get_aliases().count()
+def num_aliases_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[int]:
+    return load_model(Person, parent, info).then(
+        lambda model: model.get_aliases().count()
+    )
 
 
 def _get_names_missing_field(
@@ -349,15 +378,15 @@ def _get_names_missing_field(
     field: str,
     first: int = 10,
     after: str | None = None,
-) -> Any:
-    model = get_model(Taxon, parent, info)
-    query = model.names_missing_field_lazy(field)
+) -> Promise[Any]:
     if after:
         offset = int(base64.b64decode(after).split(b":")[1]) + 1
         limit = first + offset + 1
     else:
         limit = first + 1
-    return islice(query, limit)
+    return load_model(Taxon, parent, info).then(
+        lambda model: islice(model.names_missing_field_lazy(field), limit)
+    )
 
 
 def names_missing_field_resolver(
@@ -366,89 +395,88 @@ def names_missing_field_resolver(
     field: str,
     first: int = 10,
     after: str | None = None,
-) -> list[ObjectType]:
+) -> Promise[list[ObjectType]]:
     object_type = build_object_type_from_model(Name)
-    query = _get_names_missing_field(parent, info, field, first, after)
     cache = info.context["request"]
-    ret = []
-    for obj in query:
-        ret.append(object_type(id=obj.id, oid=obj.id))
-        cache[(Name.call_sign, obj.id)] = obj
-    return ret
+
+    def to_objects(query: Any) -> list[ObjectType]:
+        ret = []
+        for obj in query:
+            ret.append(object_type(id=obj.id, oid=obj.id))
+            cache[(Name.call_sign, obj.id)] = obj
+        return ret
+
+    return _get_names_missing_field(parent, info, field, first, after).then(to_objects)
 
 
 def num_names_missing_field_resolver(
     parent: ObjectType, info: ResolveInfo, field: str
-) -> int:
-    model = get_model(Taxon, parent, info)
-    return len(model.names_missing_field(field))
+) -> Promise[int]:
+    return load_model(Taxon, parent, info).then(
+        lambda model: len(model.names_missing_field(field))
+    )
 
 
 def num_locations_resolver(
     parent: ObjectType, info: ResolveInfo, first: int = 10, after: str | None = None
-) -> int:
-    model = get_model(Period, parent, info)
-    query = Location.select_valid().filter(
-        (Location.min_period == model) | (Location.max_period == model)
+) -> Promise[int]:
+    return load_model(Period, parent, info).then(
+        lambda model: Location.select_valid()
+        .filter((Location.min_period == model) | (Location.max_period == model))
+        .count()
     )
-    return query.count()
 
 
-def numeric_year_resolver_name(parent: ObjectType, info: ResolveInfo) -> int | None:
-    model = get_model(Name, parent, info)
-    assert isinstance(model, Name)
-    return model.valid_numeric_year()
+def numeric_year_resolver_name(
+    parent: ObjectType, info: ResolveInfo
+) -> Promise[int | None]:
+    return load_model(Name, parent, info).then(lambda model: model.valid_numeric_year())
 
 
-def variant_base_id_resolver_name(parent: ObjectType, info: ResolveInfo) -> int:
-    model = get_model(Name, parent, info)
-    assert isinstance(model, Name)
-    return model.resolve_variant().id
+def variant_base_id_resolver_name(
+    parent: ObjectType, info: ResolveInfo
+) -> Promise[int]:
+    return load_model(Name, parent, info).then(lambda model: model.resolve_variant().id)
 
 
-def numeric_year_resolver_article(parent: ObjectType, info: ResolveInfo) -> int | None:
-    model = get_model(Article, parent, info)
-    assert isinstance(model, Article)
-    return model.valid_numeric_year()
+def numeric_year_resolver_article(
+    parent: ObjectType, info: ResolveInfo
+) -> Promise[int | None]:
+    return load_model(Article, parent, info).then(
+        lambda model: model.valid_numeric_year()
+    )
 
 
 def build_reverse_rel_field(
     model_cls: type[BaseModel], name: str, clirm_field: clirm.Field
 ) -> Field:
     foreign_model = clirm_field.model_cls
+    assert issubclass(foreign_model, BaseModel)
     call_sign = foreign_model.call_sign
-
-    if hasattr(foreign_model, "label_field"):
-        label_field = getattr(foreign_model, foreign_model.label_field)
-
-        def apply_ordering(query: Any) -> Any:
-            return query.order_by(label_field)
-
-    else:
-
-        def apply_ordering(query: Any) -> Any:
-            return query
+    sort_fields = get_sort_fields(foreign_model)
 
     def resolver(
         parent: ObjectType, info: ResolveInfo, first: int = 10, after: str | None = None
-    ) -> list[ObjectType]:
-        model = get_model(model_cls, parent, info)
+    ) -> Promise[Connection]:
         object_type = build_object_type_from_model(foreign_model)
-        query = apply_ordering(getattr(model, name))
-        query = query.limit(first + _decode_after(after) + 1)
-        query = foreign_model.add_validity_check(query)
-        if foreign_model is NameComment:
-            query = query.filter(
-                NameComment.kind.is_not_in(
-                    (CommentKind.structured_quote, CommentKind.automatic_change)
+        cache = info.context["request"]
+
+        def to_page(objs: list[BaseModel]) -> Connection:
+            items = []
+            for obj in objs:
+                items.append(
+                    (get_sort_key(obj, sort_fields), object_type(id=obj.id, oid=obj.id))
                 )
+                cache[(call_sign, obj.id)] = obj
+            return make_page(
+                build_connection(object_type), items, first=first, after=after
             )
-        cache = info.context["request"]
-        ret = []
-        for obj in query:
-            ret.append(object_type(id=obj.id, oid=obj.id))
-            cache[(call_sign, obj.id)] = obj
-        return ret
+
+        # Loads the objects for all parents at this level of the query at once
+        loader = get_reverse_relation_loader(
+            info, clirm_field, first + 1, decode_cursor(after)
+        )
+        return loader.load(parent.oid).then(to_page)
 
     return ConnectionField(
         lambda: build_connection(build_object_type_from_model(foreign_model)),
@@ -456,13 +484,6 @@ def build_reverse_rel_field(
     )
 
 
-def _decode_after(after: str | None) -> int:
-    if after:
-        return int(base64.b64decode(after).split(b":")[1]) + 1
-    else:
-        return 0
-
-
 def make_connection(model_cls: type[BaseModel]) -> Callable[[], type[Connection]]:
     return lambda: build_connection(build_object_type_from_model(model_cls))
 
@@ -525,8 +546,7 @@ def build_derived_field(
     typ = derived_field.get_type()
     if isinstance(typ, type) and issubclass(typ, BaseModel):
 
-        def fk_resolver(parent: ObjectType, info: ResolveInfo) -> ObjectType | None:
-            model = get_model(model_cls, parent, info)
+        def build_foreign(model: BaseModel) -> ObjectType | None:
             foreign_model_oid = model.get_raw_derived_field(field_name)
             if foreign_model_oid is None:
                 return None
@@ -534,6 +554,9 @@ def build_derived_field(
                 id=foreign_model_oid, oid=foreign_model_oid
             )
 
+        def fk_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[Any]:
+            return load_model(model_cls, parent, info).then(build_foreign)
+
         return Field(
             lambda: build_object_type_from_model(typ),
             required=False,
@@ -543,17 +566,17 @@ def build_derived_field(
         return Field(
             make_enum(typ),
             required=False,
-            resolver=lambda parent, info: get_model(
-                model_cls, parent, info
-            ).get_derived_field(field_name),
+            resolver=lambda parent, info: load_model(model_cls, parent, info).then(
+                lambda model: model.get_derived_field(field_name)
+            ),
         )
     elif isinstance(typ, type) and typ in TYPE_TO_GRAPHENE:
         return Field(
             TYPE_TO_GRAPHENE[typ],
             required=False,
-            resolver=lambda parent, info: get_model(
-                model_cls, parent, info
-            ).get_derived_field(field_name),
+            resolver=lambda parent, info: load_model(model_cls, parent, info).then(
+                lambda model: model.get_derived_field(field_name)
+            ),
         )
     elif typing_inspect.is_generic_type(typ) and typing_inspect.get_origin(typ) is list:
         (arg_type,) = typing_inspect.get_args(typ)
@@ -568,12 +591,15 @@ def build_derived_field(
                 first: int = 10,
                 after: str | None = None,
             ) -> Any:
-                model = get_model(model_cls, parent, info)
-                foreign_model_oids = model.get_raw_derived_field(field_name)
-                if foreign_model_oids is None:
-                    return []
                 object_type = build_object_type_from_model(arg_type)
-                return [object_type(id=oid, oid=oid) for oid in foreign_model_oids]
+
+                def to_objects(model: BaseModel) -> list[ObjectType]:
+                    foreign_model_oids = model.get_raw_derived_field(field_name)
+                    if foreign_model_oids is None:
+                        return []
+                    return [object_type(id=oid, oid=oid) for oid in foreign_model_oids]
+
+                return load_model(model_cls, parent, info).then(to_objects)
 
         elif typ in TYPE_TO_GRAPHENE:
             elt_type = build_connection(TYPE_TO_GRAPHENE[arg_type])
@@ -584,8 +610,9 @@ def build_derived_field(
                 first: int = 10,
                 after: str | None = None,
             ) -> Any:
-                model = get_model(model_cls, parent, info)
-                return model.get_derived_field(field_name)
+                return load_model(model_cls, parent, info).then(
+                    lambda model: model.get_derived_field(field_name)
+                )
 
         else:
             assert False, f"unimplemented for {arg_type}"
@@ -601,12 +628,10 @@ def build_derived_count_field(
     typ = derived_field.get_type()
     if typing_inspect.is_generic_type(typ) and typing_inspect.get_origin(typ) is list:
 
-        def resolver(parent: ObjectType, info: ResolveInfo) -> int:
-            model = get_model(model_cls, parent, info)
-            value = model.get_raw_derived_field(field_name)
-            if value is None:
-                return 0
-            return len(value)
+        def resolver(parent: ObjectType, info: ResolveInfo) -> Promise[int]:
+            return load_model(model_cls, parent, info).then(
+                lambda model: len(model.get_raw_derived_field(field_name) or ())
+            )
 
         return Field(Int, required=True, resolver=resolver)
 
@@ -655,19 +680,22 @@ def build_object_type_from_model(model_cls: type[BaseModel]) -> type[ObjectType]
     )
     namespace["get_node"] = classmethod(get_node)
 
-    def page_title_resolver(parent: ObjectType, info: ResolveInfo) -> str:
-        model = get_model(model_cls, parent, info)
-        return model.get_page_title()
+    def page_title_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[str]:
+        return load_model(model_cls, parent, info).then(
+            lambda model: model.get_page_title()
+        )
 
     namespace["page_title"] = Field(String, required=True, resolver=page_title_resolver)
 
-    def redirect_url_resolver(parent: ObjectType, info: ResolveInfo) -> str | None:
-        model = get_model(model_cls, parent, info)
+    def get_redirect_url(model: BaseModel) -> str | None:
         target = model.get_redirect_target()
         if target is None:
             return None
         return target.get_url()
 
+    def redirect_url_resolver(parent: ObjectType, info: ResolveInfo) -> Promise[Any]:
+        return load_model(model_cls, parent, info).then(get_redirect_url)
+
     namespace["redirect_url"] = Field(
         String, required=False, resolver=redirect_url_resolver
     )
@@ -698,45 +726,46 @@ def build_model_field(model_cls: type[BaseModel]) -> tuple[Field, Field | None]:
 
 def ordered_classification_entries_resolver(
     parent: ObjectType, info: ResolveInfo, first: int = 10, after: str | None = None
-) -> list[ObjectType | None]:
+) -> Promise[Connection]:
     """Classification entries mapped to a Name, ordered by Article year.
 
     - Orders ascending by Article.valid_numeric_year(); unknown years last.
-    - Applies Relay-style pagination similar to other resolvers (uses `after`
-      offset convention and returns an extra element for hasNextPage).
+    - The cursor holds the (year, article id, entry id) of the last entry.
     """
-    name_model = get_model(Name, parent, info)
-    query = name_model.classification_entries
-    query = ClassificationEntry.add_validity_check(query)
 
-    entries = list(query)
-
-    def year_key(ce: ClassificationEntry) -> tuple[int, int]:
+    def year_key(ce: ClassificationEntry) -> tuple[int, int, int]:
         art_year = ce.article.valid_numeric_year()
         y = art_year if art_year is not None else 10_000_000
-        return (y, ce.article.id)
+        return (y, ce.article.id, ce.id)
 
-    entries.sort(key=year_key)
+    def get_page(name_model: Name) -> Connection:
+        entries = list(name_model.get_classification_entries())
+        entries.sort(key=year_key)
+        key = decode_cursor(after)
+        if key is not None:
+            start = tuple(key)
+            entries = [ce for ce in entries if year_key(ce) > start]
 
-    offset = _decode_after(after)
-    limit = first + offset + 1
-    sliced = entries[:limit]
+        object_type = build_object_type_from_model(ClassificationEntry)
+        cache = info.context["request"]
+        items = []
+        for ce in entries[: first + 1]:
+            items.append((year_key(ce), object_type(id=ce.id, oid=ce.id)))
+            cache[(ClassificationEntry.call_sign, ce.id)] = ce
+        return make_page(build_connection(object_type), items, first=first, after=after)
 
-    object_type = build_object_type_from_model(ClassificationEntry)
-    cache = info.context["request"]
-    ret: list[ObjectType] = []
-    for ce in sliced:
-        ret.append(object_type(id=ce.id, oid=ce.id))
-        cache[(ClassificationEntry.call_sign, ce.id)] = ce
-    return ret
+    return load_model(Name, parent, info).then(get_page)
 
 
 def num_ordered_classification_entries_resolver(
     parent: ObjectType, info: ResolveInfo
-) -> int:
+) -> Promise[int]:
     """Alias for num_classification_entries (count of backrefs)."""
-    name_model = get_model(Name, parent, info)
-    return name_model.classification_entries.count()
+    return load_model(Name, parent, info).then(
+        lambda name_model: ClassificationEntry.select()
+        .filter(ClassificationEntry.mapped_name == name_model)
+        .count()
+    )
 
 
 def get_model_resolvers() -> dict[str, Field]:
@@ -787,6 +816,23 @@ def resolve_autocompletions(
     return model_cls.getter(field).get_all()
 
 
+MAX_AUTOCOMPLETE_LIMIT = 100
+
+
+def resolve_autocomplete(
+    parent: ModelCls,
+    info: ResolveInfo,
+    prefix: str,
+    field: str | None = None,
+    limit: int = 20,
+) -> list[str]:
+    model_cls = get_by_call_sign(parent.call_sign)
+    if field is None:
+        field = model_cls.label_field
+    limit = max(0, min(limit, MAX_AUTOCOMPLETE_LIMIT))
+    return model_cls.getter(field).complete(prefix, limit=limit)
+
+
 def get_by_call_sign(call_sign: str) -> type[BaseModel]:
     return CALL_SIGN_TO_MODEL[call_sign.upper()]
 
@@ -798,17 +844,21 @@ class ModelConnection(Connection):
 
 def resolve_newest(
     parent: ModelCls, info: ResolveInfo, first: int = 10, after: str | None = None
-) -> list[Model]:
+) -> Connection:
     model_cls = get_by_call_sign(parent.call_sign)
     object_type = build_object_type_from_model(model_cls)
-    query = model_cls.select_valid().order_by(model_cls.id.desc())
-    query = query.limit(first + _decode_after(after) + 1)
-    ret = []
+    query = model_cls.select_valid()
+    key = decode_cursor(after)
+    if key is not None:
+        (last_id,) = key
+        query = query.filter(model_cls.id < last_id)
+    query = query.order_by(model_cls.id.desc()).limit(first + 1)
+    items = []
     cache = info.context["request"]
     for obj in query:
-        ret.append(object_type(id=obj.id, oid=obj.id))
+        items.append(([obj.id], object_type(id=obj.id, oid=obj.id)))
         cache[(model_cls.call_sign, obj.id)] = obj
-    return ret
+    return make_page(ModelConnection, items, first=first, after=after)
 
 
 class ModelCls(ObjectType):
@@ -822,6 +872,13 @@ class ModelCls(ObjectType):
         field=String(required=False),
         resolver=resolve_autocompletions,
     )
+    autocomplete = Field(
+        NonNull(List(NonNull(String))),
+        prefix=String(required=True),
+        field=String(required=False),
+        limit=Int(required=False),
+        resolver=resolve_autocomplete,
+    )
     newest = ConnectionField(
         NonNull(ModelConnection),
         first=Int(required=False),
@@ -830,10 +887,18 @@ class ModelCls(ObjectType):
     )
 
 
+class SearchPage(ObjectType):
+    page_num = Int(required=True)
+    highlight = String(required=False)
+
+
 class SearchResult(ObjectType):
     model = Field(Model)
     context = String(required=False)
     highlight = String(required=False)
+    # For full-text results: the number of matching pages and the best of them
+    num_pages = Int(required=False)
+    pages = List(NonNull(SearchPage), required=False)
 
     @classmethod
     def from_hit(cls, hit: dict[str, Any]) -> SearchResult:
@@ -856,15 +921,23 @@ class SearchResult(ObjectType):
         )
 
     @classmethod
-    def from_page_hit(
-        cls, article_id: int, page_num: int, snippet: str
-    ) -> SearchResult:
+    def from_article_hit(cls, hit: fts.ArticleHit) -> SearchResult:
         object_type = build_object_type_from_model(Article)
-        model = object_type(oid=article_id, id=article_id)
+        pages = [
+            SearchPage(
+                page_num=page.page_num,
+                highlight=(
+                    _snippet_to_highlight(page.snippet) if page.snippet else None
+                ),
+            )
+            for page in hit.pages
+        ]
         return SearchResult(
-            model=model,
-            context=f"Page {page_num}",
-            highlight=_snippet_to_highlight(snippet) if snippet else None,
+            model=object_type(oid=hit.article_id, id=hit.article_id),
+            context=", ".join(f"Page {page.page_num}" for page in pages) or None,
+            highlight=pages[0].highlight if pages else None,
+            num_pages=hit.num_pages,
+            pages=pages,
         )
 
 
@@ -873,10 +946,69 @@ def _snippet_to_highlight(snippet: str) -> str:
     return snippet.replace("<b>", "**").replace("</b>", "**")
 
 
+class SearchFacetValue(ObjectType):
+    # Set for citation group and taxon facets
+    model = Field(Model, required=False)
+    # Set for the article type facet
+    value = String(required=False)
+    count = Int(required=True)
+
+
+class SearchFacets(ObjectType):
+    citation_groups = List(NonNull(SearchFacetValue), required=True)
+    article_types = List(NonNull(SearchFacetValue), required=True)
+    taxa = List(NonNull(SearchFacetValue), required=True)
+
+
+def _model_facet(
+    model_cls: type[BaseModel], pairs: Sequence[tuple[int, int]]
+) -> list[SearchFacetValue]:
+    object_type = build_object_type_from_model(model_cls)
+    return [
+        SearchFacetValue(model=object_type(oid=oid, id=oid), count=count)
+        for oid, count in pairs
+    ]
+
+
 class SearchResultConnection(Connection):
     class Meta:
         node = SearchResult
 
+    total_count = Int(required=False)
+    total_count_is_exact = Boolean(required=False)
+    facets = Field(SearchFacets, limit=Int(required=False))
+
+    # Set by resolve_search(); counts and facets are only computed if requested
+    search_args: tuple[str, fts.SearchFilters] | None = None
+
+    _count: fts.HitCount | None = None
+
+    def get_count(self) -> fts.HitCount | None:
+        if self._count is None and self.search_args is not None:
+            self._count = fts.count_articles(*self.search_args)
+        return self._count
+
+    def resolve_total_count(self, info: ResolveInfo) -> int | None:
+        count = self.get_count()
+        return count.articles if count is not None else None
+
+    def resolve_total_count_is_exact(self, info: ResolveInfo) -> bool | None:
+        count = self.get_count()
+        return count.is_exact if count is not None else None
+
+    def resolve_facets(self, info: ResolveInfo, limit: int = 20) -> SearchFacets | None:
+        if self.search_args is None:
+            return None
+        facets = fts.get_facets(*self.search_args, limit=limit)
+        return SearchFacets(
+            citation_groups=_model_facet(CitationGroup, facets.citation_groups),
+            article_types=[
+                SearchFacetValue(value=ArticleType(value).name, count=count)
+                for value, count in facets.article_types
+            ],
+            taxa=_model_facet(Taxon, facets.taxa),
+        )
+
 
 def resolve_search(
     parent: ObjectType,
@@ -884,17 +1016,34 @@ def resolve_search(
     query: str,
     first: int = 10,
     after: str | None = None,
-) -> list[SearchResult | None]:
+    year_min: int | None = None,
+    year_max: int | None = None,
+    citation_group: int | None = None,
+    article_type: int | None = None,
+    taxon: int | None = None,
+    pages_per_result: int = 3,
+) -> Connection:
     # Use the local FTS search database (articles-only full text)
-    from taxonomy import search as fts
-
-    offset = _decode_after(after)
-    limit = first + offset + 1  # +1 so Relay can know if more results exist
-    hits = fts.search(query, limit=limit, offset=offset)
-    results = [
-        SearchResult.from_page_hit(h.article_id, h.page_num, h.snippet) for h in hits
-    ]
-    return [None] * offset + results
+    filters = fts.SearchFilters(
+        year_min=year_min,
+        year_max=year_max,
+        citation_group_id=citation_group,
+        article_type=article_type,
+        taxon_id=taxon,
+    )
+    key = decode_cursor(after)
+    # +1 so Relay can know if more results exist
+    hits = fts.search_articles(
+        query,
+        filters,
+        limit=first + 1,
+        after=(key[0], key[1]) if key is not None else None,
+        pages_per_article=pages_per_result,
+    )
+    items = [((h.score, h.article_id), SearchResult.from_article_hit(h)) for h in hits]
+    connection = make_page(SearchResultConnection, items, first=first, after=after)
+    connection.search_args = (query, filters)
+    return connection
 
 
 class PossibleHomonym(ObjectType):
@@ -964,7 +1113,15 @@ class QueryRoot(ObjectType):
         resolver=lambda self, info, call_sign: ModelCls(call_sign=call_sign),
     )
     search = ConnectionField(
-        SearchResultConnection, query=String(required=True), resolver=resolve_search
+        SearchResultConnection,
+        query=String(required=True),
+        year_min=Int(required=False),
+        year_max=Int(required=False),
+        citation_group=Int(required=False),
+        article_type=graphene.Argument(make_enum(ArticleType), required=False),
+        taxon=Int(required=False),
+        pages_per_result=Int(required=False),
+        resolver=resolve_search,
     )
     species_homonyms = Field(
         HomonymData,
@@ -0,0 +1,85 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from taxonomy.db.models import Name, Taxon
+from taxonomy.db.models.base import BaseModel, record_objects
+
+from .cache import ResponseCache
+
+
+@pytest.fixture(autouse=True)
+def _isolate_events(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Every ResponseCache subscribes to the save and creation events
+    for model_cls in BaseModel.__subclasses__():
+        for event_name in ("save_event", "creation_event"):
+            if event_name in model_cls.__dict__:
+                event = model_cls.__dict__[event_name]
+                monkeypatch.setattr(event, "handlers", list(event.handlers))
+
+
+def test_memory_and_disk(tmp_path: Path) -> None:
+    db_filename = tmp_path / "cache.db"
+    cache = ResponseCache(db_filename=db_filename)
+    cache.put("a", "body a", 200, frozenset({("N", 1)}), started=time.time())
+    cache.put("b", "body b", 200, frozenset({("N", 2)}), started=time.time())
+    entry = cache.get("a")
+    assert entry is not None
+    assert entry.body == "body a"
+
+    # After a restart, entries are only found on disk
+    cache = ResponseCache(db_filename=db_filename)
+    assert cache.get("a") is None
+    entry = cache.get_from_disk("a")
+    assert entry is not None
+    assert entry.objects == {("N", 1)}
+    assert cache.get("a") == entry
+    assert cache.stats.hits == 1
+    assert cache.stats.disk_hits == 1
+
+    # Entries are invalidated on disk even if they are not in memory
+    assert cache.invalidate_objects([("N", 2)]) == 1
+    assert cache.get_from_disk("b") is None
+    assert cache.stats.misses == 1
+    assert cache.invalidate_call_sign("N") == 1
+    assert cache.get("a") is None
+    assert cache.get_from_disk("a") is None
+
+
+def test_put_after_invalidation(tmp_path: Path) -> None:
+    cache = ResponseCache(db_filename=tmp_path / "cache.db")
+    started = time.time()
+    cache.invalidate_objects([("N", 1)])
+    cache.put("a", "body", 200, frozenset({("N", 1)}), started=started)
+    assert cache.get("a") is None
+    assert cache.get_from_disk("a") is None
+
+
+def test_watched_files(tmp_path: Path) -> None:
+    watched = tmp_path / "taxonomy.db"
+    watched.write_text("")
+    db_filename = tmp_path / "cache.db"
+    cache = ResponseCache(db_filename=db_filename, watched_files=[watched])
+    cache.put("a", "body", 200, frozenset(), started=time.time())
+    assert cache.get("a") is not None
+
+    mtime = time.time() + 10
+    os.utime(watched, (mtime, mtime))
+    assert cache.get("a") is None
+    assert cache.get_from_disk("a") is None
+    # The stale entry is deleted from disk as well
+    cache = ResponseCache(db_filename=db_filename)
+    assert cache.get_from_disk("a") is None
+
+
+def test_record_objects() -> None:
+    with record_objects() as outer:
+        Name(1)
+        with record_objects() as inner:
+            Taxon(2)
+        assert inner == {("T", 2)}
+    assert outer == {("N", 1), ("T", 2)}
+    Name(3)
+    assert ("N", 3) not in outer
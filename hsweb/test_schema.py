@@ -0,0 +1,37 @@
+import pytest
+
+from taxonomy.db.models import Name
+from taxonomy.getinput import PrefixIndex
+
+from . import schema
+
+QUERY = """
+query ($prefix: String!, $limit: Int) {
+  modelCls(callSign: "N") {
+    autocomplete(prefix: $prefix, limit: $limit)
+  }
+}
+"""
+
+
+def _autocomplete(prefix: str, limit: int | None = None) -> list[str]:
+    result = schema.schema.execute(
+        QUERY, variable_values={"prefix": prefix, "limit": limit}
+    )
+    assert result.errors is None, result.errors
+    assert result.data is not None
+    return result.data["modelCls"]["autocomplete"]
+
+
+def test_autocomplete(monkeypatch: pytest.MonkeyPatch) -> None:
+    names = [f"Mus {i:03}" for i in range(150)]
+    getter = Name.getter(Name.label_field)
+    monkeypatch.setattr(getter, "_data", PrefixIndex([*names, "Rattus"]))
+    monkeypatch.setattr(getter, "_encoded_data", set())
+
+    assert _autocomplete("Mus 00") == names[:10]
+    assert _autocomplete("Mus", limit=3) == names[:3]
+    assert _autocomplete("Rat") == ["Rattus"]
+    assert _autocomplete("Mus", limit=-1) == []
+    # The limit is capped
+    assert _autocomplete("Mus", limit=1000) == names[: schema.MAX_AUTOCOMPLETE_LIMIT]
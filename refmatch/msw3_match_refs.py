@@ -8,6 +8,7 @@ if __package__ is None or __package__ == "":
 
 lib = importlib.import_module("data_import.lib")
 matcher = importlib.import_module("taxonomy.refmatch.matcher")
+index_store = importlib.import_module("taxonomy.refmatch.index_store")
 
 OUTPUT_DIR = Path(__file__).resolve().parent / "output"
 DEFAULT_INPUT = OUTPUT_DIR / "msw3-refs-parsed.csv"
@@ -82,6 +83,20 @@ def parse_args() -> argparse.Namespace:
         dest="bhl_mode",
         help="Deprecated alias for --bhl-mode=network.",
     )
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help=(
+            "Recompute every record of the stored taxonomy Article index instead of "
+            "only those whose Article changed."
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Match references in this many worker processes (default: match serially).",
+    )
     return parser.parse_args()
 
 
@@ -94,6 +109,8 @@ def main() -> None:
         bhl_mode=args.bhl_mode,
         doi_learning=args.doi_learning,
         clear_crossref_cache_every=args.clear_crossref_cache_every,
+        build_index=lambda: index_store.load_article_index(rebuild=args.rebuild_index),
+        workers=args.workers,
     )
 
 
@@ -0,0 +1,75 @@
+"""Compare coordinates.Geometry with the segment-based point-in-polygon test.
+
+The segment-based test (get_polygon() and is_in_polygon_single()) is the
+implementation used before Geometry existed: it intersects a segment from (0, 0)
+to the point with every edge of every ring.
+
+Points are drawn uniformly from the bounding box of the polygon. The two tests
+may disagree for points very close to an edge, where the segment-based test is
+sensitive to rounding.
+
+"""
+
+import argparse
+import random
+import time
+from collections.abc import Callable
+
+from taxonomy import coordinates
+
+
+def run(label: str, func: Callable[[], list[bool]]) -> list[bool]:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label}: {elapsed:.3f} s ({elapsed / len(result) * 1e6:.1f} µs/point),"
+        f" {sum(result)} of {len(result)} points inside"
+    )
+    return result
+
+
+def segments_contain(
+    polygons: list[list[coordinates.LineSegment]], points: list[coordinates.Point]
+) -> list[bool]:
+    return [
+        any(coordinates.is_in_polygon_single(p, polygon) for polygon in polygons)
+        for p in points
+    ]
+
+
+def bench_path(path: str, num_points: int, rng: random.Random) -> None:
+    print(f"== {path}")
+    start = time.perf_counter()
+    geometry = coordinates.get_geometry(path)
+    polygons = coordinates.get_polygon(path)
+    print(f"loaded in {time.perf_counter() - start:.3f} s")
+    min_lon = min(ring.bbox.min_longitude for ring in geometry.rings)
+    max_lon = max(ring.bbox.max_longitude for ring in geometry.rings)
+    min_lat = min(ring.bbox.min_latitude for ring in geometry.rings)
+    max_lat = max(ring.bbox.max_latitude for ring in geometry.rings)
+    points = [
+        coordinates.Point(rng.uniform(min_lon, max_lon), rng.uniform(min_lat, max_lat))
+        for _ in range(num_points)
+    ]
+    old = run("segments", lambda: segments_contain(polygons, points))
+    new = run("geometry", lambda: geometry.contains_many(points))
+    mismatches = [p for p, a, b in zip(points, old, new, strict=True) if a != b]
+    if mismatches:
+        print(f"{len(mismatches)} mismatches, e.g. {mismatches[:3]}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("paths", nargs="*", default=["countries/brazil"])
+    parser.add_argument("-n", "--num-points", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for path in args.paths:
+        bench_path(path, args.num_points, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare a full rebuild of the derived data with an incremental update.
+
+Simulates edits by marking a random sample of objects as changed, then times
+update_derived_data() against a full compute_all_derived_fields() pass. Nothing is
+written to disk.
+
+"""
+
+import argparse
+import random
+import time
+
+from taxonomy.db import derived_data
+from taxonomy.db.models import BaseModel, Name, Taxon
+
+
+def sample_ids(model_cls: type[BaseModel], count: int) -> list[int]:
+    ids = [obj.id for obj in model_cls.select_valid()]
+    return random.sample(ids, min(count, len(ids)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--edits", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-full", action="store_true")
+    args = parser.parse_args()
+    random.seed(args.seed)
+
+    models = BaseModel.__subclasses__()
+    num_taxa = args.edits // 4
+    dirty = {
+        Name.call_sign: set(sample_ids(Name, args.edits - num_taxa)),
+        Taxon.call_sign: set(sample_ids(Taxon, num_taxa)),
+    }
+
+    start = time.perf_counter()
+    changes = derived_data.update_derived_data(models, dirty)
+    incremental = time.perf_counter() - start
+    num_changed = sum(
+        len(ids) for (_, field), ids in changes.items() if field is not None
+    )
+    print(
+        f"incremental update after {args.edits} edits: {incremental:.2f} s"
+        f" ({num_changed} values changed)"
+    )
+
+    if not args.skip_full:
+        start = time.perf_counter()
+        for model_cls in models:
+            model_cls.compute_all_derived_fields()
+        full = time.perf_counter() - start
+        print(f"full rebuild: {full:.2f} s ({full / incremental:.1f}x slower)")
+    # Leave the stored derived data untouched
+    derived_data.get_store().rollback()
+
+
+if __name__ == "__main__":
+    main()
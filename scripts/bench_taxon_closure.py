@@ -0,0 +1,57 @@
+"""Compare Taxon.all_names() using the taxon closure with a recursive walk.
+
+The recursive walk is the implementation used before the closure table existed:
+one get_names() and one get_children() query per taxon in the subtree.
+
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+
+from taxonomy.db.models import BaseModel, Name, Taxon
+
+
+def recursive_all_names(taxon: Taxon) -> set[Name]:
+    names = set(taxon.get_names())
+    for child in taxon.get_children():
+        names |= recursive_all_names(child)
+    return names
+
+
+def run(label: str, func: Callable[[], set[Name]]) -> set[Name]:
+    num_queries = 0
+
+    def count_query(statement: str) -> None:
+        nonlocal num_queries
+        num_queries += 1
+
+    conn = BaseModel.clirm.conn
+    conn.set_trace_callback(count_query)
+    try:
+        start = time.perf_counter()
+        names = func()
+        elapsed = time.perf_counter() - start
+    finally:
+        conn.set_trace_callback(None)
+    print(f"{label}: {elapsed:.2f} s, {num_queries} queries, {len(names)} names")
+    return names
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("taxon", nargs="?", default="Rodentia")
+    args = parser.parse_args()
+
+    taxon = Taxon.select_valid().filter(Taxon.valid_name == args.taxon).get()
+    closure_names = run("closure", taxon.all_names)
+    recursive_names = run("recursive", lambda: recursive_all_names(taxon))
+    if closure_names != recursive_names:
+        print(
+            f"results differ: {len(closure_names - recursive_names)} names only in"
+            f" closure, {len(recursive_names - closure_names)} only in recursive walk"
+        )
+
+
+if __name__ == "__main__":
+    main()
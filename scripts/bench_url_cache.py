@@ -0,0 +1,83 @@
+"""Benchmark a full pass over the URL cache.
+
+Fills a fresh cache database in a temporary directory with --keys keys, first
+with a commit per insert as before write batching and then with the default
+buffered inserts, and then reads all keys back with a SELECT per key (what a
+cached() function does on a miss in memory) and with get_many(). The configured
+URL cache is not touched.
+
+"""
+
+import argparse
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from taxonomy.db import url_cache
+from taxonomy.db.url_cache import CacheDomain
+
+
+def timed(label: str, func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label}: {elapsed:.2f} s")
+    return elapsed
+
+
+def use_database(db: sqlite3.Connection) -> None:
+    url_cache.get_database = lambda: db  # type: ignore[assignment]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=100_000)
+    parser.add_argument("--value-size", type=int, default=1000)
+    args = parser.parse_args()
+    keys = [f"10.1234/key.{i}" for i in range(args.keys)]
+    value = "x" * args.value_size
+
+    def store_all() -> None:
+        for key in keys:
+            url_cache.store(CacheDomain.test, key, value)
+
+    def store_all_and_flush() -> None:
+        store_all()
+        url_cache.flush()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Untuned connection with a commit per insert, as before
+        db = sqlite3.connect(Path(tmpdir) / "unbatched.db")
+        url_cache.ensure_schema(db)
+        use_database(db)
+        url_cache.WRITE_BATCH_SIZE = 1
+        unbatched = timed(
+            f"{args.keys} inserts, commit each, rollback journal", store_all
+        )
+
+        db = url_cache.open_database(Path(tmpdir) / "batched.db")
+        use_database(db)
+        url_cache.WRITE_BATCH_SIZE = 1000
+        batched = timed(f"{args.keys} inserts, batched, WAL", store_all_and_flush)
+        print(f"  {unbatched / batched:.1f}x faster")
+
+        url_cache.clear_memory_cache()
+        single = timed(
+            f"{args.keys} warm lookups, one query each",
+            lambda: [url_cache.get(CacheDomain.test, key) for key in keys],
+        )
+        url_cache.clear_memory_cache()
+        found: dict[str, str] = {}
+        bulk = timed(
+            f"{args.keys} warm lookups, get_many()",
+            lambda: found.update(url_cache.get_many(CacheDomain.test, keys)),
+        )
+        assert len(found) == args.keys
+        print(f"  {single / bulk:.1f}x faster")
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,7 @@ from taxonomy.db.models.citation_group.cg import CitationGroup
 def iter_articles_missing_pmid(*, only_if_existing: bool = False) -> Iterable[Article]:
     cgs_with_pmids = set()
     if only_if_existing:
-        arts = Article.select_valid().filter(
-            Article.tags.contains(f"[{ArticleTag.PMID._tag},")
-        )
+        arts = Article.with_tag(ArticleTag.PMID)
         for art in arts:
             if art.has_tag(ArticleTag.PMID):
                 if art.citation_group:
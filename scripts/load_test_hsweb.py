@@ -0,0 +1,129 @@
+"""Load test for the hsweb GraphQL endpoint.
+
+Sends a stream of cheap queries while a few expensive queries run in the
+background, and reports latency percentiles for the cheap queries. When GraphQL
+operations run on the event loop, every slow query blocks all other requests and
+the p99 latency of the cheap ones approaches that of the slow ones; with a worker
+pool (python -m hsweb --workers N) it should stay low.
+
+Start the server first, e.g. python -m hsweb -p 8080 -w 8 -t 30.
+
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import aiohttp
+
+FAST_QUERY = """
+query Fast($oid: String!) {
+    byCallSign(callSign: "N", oid: $oid) { oid pageTitle }
+}
+"""
+
+SLOW_QUERY = """
+query Slow($oid: Int!) {
+    taxon(oid: $oid) {
+        children(first: 100) { edges { node {
+            children(first: 100) { edges { node {
+                children(first: 100) { edges { node { oid pageTitle } } }
+            } } }
+        } } }
+    }
+}
+"""
+
+
+async def run_query(
+    session: aiohttp.ClientSession, url: str, query: str, variables: dict[str, object]
+) -> tuple[float, int]:
+    start = time.perf_counter()
+    async with session.post(
+        url, json={"query": query, "variables": variables}
+    ) as response:
+        await response.read()
+        return time.perf_counter() - start, response.status
+
+
+async def run_slow_queries(
+    session: aiohttp.ClientSession, url: str, taxon_id: int, stop: asyncio.Event
+) -> list[float]:
+    latencies = []
+    while not stop.is_set():
+        latency, _ = await run_query(session, url, SLOW_QUERY, {"oid": taxon_id})
+        latencies.append(latency)
+    return latencies
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    stop = asyncio.Event()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    statuses: dict[int, int] = {}
+
+    async with aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=None)
+    ) as session:
+
+        async def fast_query(i: int) -> float:
+            async with semaphore:
+                latency, status = await run_query(
+                    session, args.url, FAST_QUERY, {"oid": str(i % args.max_oid + 1)}
+                )
+            statuses[status] = statuses.get(status, 0) + 1
+            return latency
+
+        slow_tasks = [
+            asyncio.create_task(
+                run_slow_queries(session, args.url, args.slow_taxon, stop)
+            )
+            for _ in range(args.slow)
+        ]
+        start = time.perf_counter()
+        fast_latencies = await asyncio.gather(
+            *(fast_query(i) for i in range(args.requests))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        slow_latencies = [
+            latency
+            for latencies in await asyncio.gather(*slow_tasks)
+            for latency in latencies
+        ]
+
+    print(
+        f"{args.requests} fast queries in {elapsed:.2f} s"
+        f" ({args.requests / elapsed:.1f}/s), statuses: {statuses}"
+    )
+    print(
+        f"fast latency: mean {statistics.mean(fast_latencies) * 1000:.0f} ms,"
+        f" p50 {percentile(fast_latencies, 0.5) * 1000:.0f} ms,"
+        f" p99 {percentile(fast_latencies, 0.99) * 1000:.0f} ms"
+    )
+    if slow_latencies:
+        print(
+            f"{len(slow_latencies)} slow queries,"
+            f" mean {statistics.mean(slow_latencies) * 1000:.0f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8080/graphql")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=2)
+    parser.add_argument("--slow-taxon", type=int, default=1)
+    parser.add_argument("--max-oid", type=int, default=10000)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
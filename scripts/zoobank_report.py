@@ -38,9 +38,7 @@ def is_present(art: Article, lsid: str) -> PresenceStatus:
 def run_names(output_f: IO[str]) -> None:
     print("## Names", file=output_f)
     print(file=output_f)
-    query = Name.select_valid().filter(
-        Name.type_tags.contains(f"[{TypeTag.LSIDName._tag},")
-    )
+    query = Name.with_tag(TypeTag.LSIDName)
     for nam in getinput.print_every_n(query, label="names"):
         tags = list(nam.get_tags(nam.type_tags, TypeTag.LSIDName))
         if len(tags) < 2 or nam.original_citation is None:
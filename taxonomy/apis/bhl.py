@@ -14,8 +14,8 @@ import httpx
 import Levenshtein
 
 from taxonomy import config, urlparse
-from taxonomy.db import helpers
-from taxonomy.db.url_cache import CacheDomain, cached, dirty_cache
+from taxonomy.db import helpers, url_fetch
+from taxonomy.db.url_cache import CacheDomain, dirty_cache
 
 T = TypeVar("T")
 
@@ -47,6 +47,12 @@ def get_title_to_data() -> dict[str, list[dict[str, str]]]:
     return output
 
 
+def get_response_text(response: httpx.Response) -> str:
+    # The BHL API reports errors in the Status field of the response, which
+    # callers check
+    return response.text
+
+
 @lru_cache(maxsize=256)
 def get_title_metadata(title_id: int) -> dict[str, Any]:
     result = json.loads(_get_title_metadata_string(str(title_id)))
@@ -55,13 +61,13 @@ def get_title_metadata(title_id: int) -> dict[str, Any]:
     return result["Result"][0]
 
 
-@cached(CacheDomain.bhl_title)
-def _get_title_metadata_string(title_id: str) -> str:
+@url_fetch.cached_request(CacheDomain.bhl_title, handle_response=get_response_text)
+def _get_title_metadata_string(title_id: str) -> url_fetch.Request:
     api_key = config.get_options().bhl_api_key
-    return httpx.get(
+    return url_fetch.Request(
         f"https://www.biodiversitylibrary.org/api3?op=GetTitleMetadata&id={title_id}"
         f"&idtype=bhl&items=t&format=json&apikey={api_key}"
-    ).text
+    )
 
 
 # profiling shows significant overhead from JSON decoding otherwise
@@ -75,14 +81,13 @@ def get_item_metadata(item_id: int) -> dict[str, Any] | None:
     return result["Result"][0]
 
 
-@cached(CacheDomain.bhl_item)
-def _get_item_metadata_string(item_id: str) -> str:
+@url_fetch.cached_request(CacheDomain.bhl_item, handle_response=get_response_text)
+def _get_item_metadata_string(item_id: str) -> url_fetch.Request:
     api_key = config.get_options().bhl_api_key
-    url = (
+    return url_fetch.Request(
         f"https://www.biodiversitylibrary.org/api3?op=GetItemMetadata&id={item_id}"
         f"&idtype=bhl&pages=t&parts=t&format=json&apikey={api_key}"
     )
-    return httpx.get(url).text
 
 
 @lru_cache(maxsize=256)
@@ -94,14 +99,13 @@ def get_page_metadata(page_id: int) -> dict[str, Any]:
     return result["Result"][0]
 
 
-@cached(CacheDomain.bhl_page)
-def _get_page_metadata_string(page_id: str) -> str:
+@url_fetch.cached_request(CacheDomain.bhl_page, handle_response=get_response_text)
+def _get_page_metadata_string(page_id: str) -> url_fetch.Request:
     api_key = config.get_options().bhl_api_key
-    url = (
+    return url_fetch.Request(
         f"https://www.biodiversitylibrary.org/api3?op=GetPageMetadata&pageid={page_id}"
         f"&idtype=bhl&ocr=t&names=t&format=json&apikey={api_key}"
     )
-    return httpx.get(url).text
 
 
 def get_part_metadata(part_id: int) -> dict[str, Any]:
@@ -111,14 +115,13 @@ def get_part_metadata(part_id: int) -> dict[str, Any]:
     return result["Result"][0]
 
 
-@cached(CacheDomain.bhl_part)
-def _get_part_metadata_string(part_id: str) -> str:
+@url_fetch.cached_request(CacheDomain.bhl_part, handle_response=get_response_text)
+def _get_part_metadata_string(part_id: str) -> url_fetch.Request:
     api_key = config.get_options().bhl_api_key
-    url = (
+    return url_fetch.Request(
         f"https://www.biodiversitylibrary.org/api3?op=GetPartMetadata&id={part_id}"
         f"&pages=t&idtype=bhl&format=json&apikey={api_key}"
     )
-    return httpx.get(url).text
 
 
 def is_external_item(item_id: int) -> bool:
@@ -499,6 +502,24 @@ def get_bhl_item_from_url(url: str) -> int | None:
     return None
 
 
+def prefetch_url_metadata(urls: Iterable[str]) -> None:
+    """Fetch the metadata of the BHL pages and parts in urls concurrently.
+
+    get_bhl_item_from_url() then finds it in the cache.
+
+    """
+    page_ids = []
+    part_ids = []
+    for url in urls:
+        match urlparse.parse_url(url):
+            case urlparse.BhlPage(id):
+                page_ids.append(str(id))
+            case urlparse.BhlPart(id):
+                part_ids.append(str(id))
+    url_fetch.prefetch(CacheDomain.bhl_page, page_ids)
+    url_fetch.prefetch(CacheDomain.bhl_part, part_ids)
+
+
 def get_bhl_bibliography_from_url(url: str) -> int | None:
     match urlparse.parse_url(url):
         case urlparse.BhlBibliography(id):
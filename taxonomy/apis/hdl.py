@@ -3,15 +3,11 @@ import urllib.parse
 
 import httpx
 
-from taxonomy.db.url_cache import CacheDomain, cached
+from taxonomy.db import url_fetch
+from taxonomy.db.url_cache import CacheDomain
 
 
-@cached(CacheDomain.is_hdl_valid)
-def _is_hdl_valid_cached(hdl: str) -> str:
-    # Use the Handle.net proxy server REST API
-    # https://www.handle.net/proxy_servlet.html
-    url = f"https://hdl.handle.net/api/handles/{urllib.parse.quote(hdl, safe='')}"
-    response = httpx.get(url)
+def _parse_hdl_response(response: httpx.Response) -> str:
     if response.status_code == 404:
         return "false"
     response.raise_for_status()
@@ -20,5 +16,14 @@ def _is_hdl_valid_cached(hdl: str) -> str:
     return "true" if data.get("responseCode") == 1 else "false"
 
 
+@url_fetch.cached_request(CacheDomain.is_hdl_valid, handle_response=_parse_hdl_response)
+def _is_hdl_valid_cached(hdl: str) -> url_fetch.Request:
+    # Use the Handle.net proxy server REST API
+    # https://www.handle.net/proxy_servlet.html
+    return url_fetch.Request(
+        f"https://hdl.handle.net/api/handles/{urllib.parse.quote(hdl, safe='')}"
+    )
+
+
 def is_hdl_valid(hdl: str) -> bool:
     return _is_hdl_valid_cached(hdl) == "true"
@@ -1,9 +1,8 @@
 import json
 
-import httpx
-
 from taxonomy import coordinates
-from taxonomy.db.url_cache import CacheDomain, cached
+from taxonomy.db import url_fetch
+from taxonomy.db.url_cache import CacheDomain
 
 UA = "taxonomy (https://github.com/JelleZijlstra/taxonomy)"
 
@@ -20,11 +19,9 @@ def get_openstreetmap_country(point: coordinates.Point) -> str | None:
         raise ValueError(data) from None
 
 
-@cached(CacheDomain.nominatim)
-def get_nominatim_data(url: str) -> str:
-    response = httpx.get(url, headers={"User-Agent": UA})
-    response.raise_for_status()
-    return response.text
+@url_fetch.cached_request(CacheDomain.nominatim)
+def get_nominatim_data(url: str) -> url_fetch.Request:
+    return url_fetch.Request(url, headers={"User-Agent": UA})
 
 
 HESP_COUNTRY_TO_OSM_COUNTRY = {
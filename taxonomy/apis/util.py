@@ -1,3 +1,4 @@
+import asyncio
 import time
 
 
@@ -12,3 +13,11 @@ class RateLimiter:
         if wait_time > 0:
             time.sleep(wait_time)
         self.last_time = time.time()
+
+    async def wait_async(self) -> None:
+        # Reserve the slot before sleeping, so that concurrent tasks are spaced out
+        now = time.time()
+        start = max(now, self.last_time + self.min_interval)
+        self.last_time = start
+        if start > now:
+            await asyncio.sleep(start - now)
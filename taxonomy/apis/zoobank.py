@@ -3,11 +3,10 @@ import re
 from dataclasses import dataclass
 from typing import Any
 
-import requests
+import httpx
 
-from taxonomy.db.url_cache import CacheDomain, cached
-
-from .util import RateLimiter
+from taxonomy.db import url_fetch
+from taxonomy.db.url_cache import CacheDomain
 
 
 def clean_lsid(lsid: str) -> str:
@@ -31,29 +30,27 @@ def is_valid_lsid(lsid: str) -> bool:
     )
 
 
-rate_limiter = RateLimiter(min_interval=0.5)
-
-
-@cached(CacheDomain.zoobank_act)
-def _get_zoobank_act_data(query: str) -> str:
-    rate_limiter.wait()
-    url = f"https://zoobank.org/NomenclaturalActs.json/{query}"
-    response = requests.get(url, timeout=1)
+def _parse_zoobank_response(response: httpx.Response) -> str:
     if response.status_code == 404:
         return "[]"
     response.raise_for_status()
     return response.text
 
 
-@cached(CacheDomain.zoobank_publication)
-def _get_zoobank_publication_data(query: str) -> str:
-    rate_limiter.wait()
-    url = f"https://zoobank.org/References.json/{query}"
-    response = requests.get(url, timeout=1)
-    if response.status_code == 404:
-        return "[]"
-    response.raise_for_status()
-    return response.text
+@url_fetch.cached_request(
+    CacheDomain.zoobank_act, handle_response=_parse_zoobank_response
+)
+def _get_zoobank_act_data(query: str) -> url_fetch.Request:
+    return url_fetch.Request(
+        f"https://zoobank.org/NomenclaturalActs.json/{query}", timeout=1
+    )
+
+
+@url_fetch.cached_request(
+    CacheDomain.zoobank_publication, handle_response=_parse_zoobank_response
+)
+def _get_zoobank_publication_data(query: str) -> url_fetch.Request:
+    return url_fetch.Request(f"https://zoobank.org/References.json/{query}", timeout=1)
 
 
 @dataclass(frozen=True)
@@ -80,7 +77,7 @@ def get_zoobank_data(original_name: str) -> list[ZooBankData]:
         api_response = json.loads(
             _get_zoobank_act_data(original_name.replace(" ", "_"))
         )
-    except requests.ConnectionError:
+    except httpx.TransportError:
         return []
     api_response = [
         entry
@@ -108,7 +105,7 @@ def get_zoobank_data_for_article(lsid: str) -> dict[str, Any]:
 def article_lsid_has_valid_data(lsid: str) -> bool:
     try:
         data = get_zoobank_data_for_article(lsid)
-    except requests.ConnectionError:
+    except httpx.TransportError:
         return False
     ref_uuid = data.get("referenceuuid", "")
     return clean_lsid(lsid) == clean_lsid(ref_uuid)
@@ -17,12 +17,21 @@ class Options(NamedTuple):
     db_filename: Path = Path()
     urlcache_filename: Path = Path()
     derived_data_filename: Path = Path()
+    derived_data_db_filename: Path = Path()
+    refmatch_index_filename: Path = Path()
     search_db_filename: Path = Path()
     jstor_db_filename: Path = Path()
     photos_path: Path = Path()
     pdf_text_path: Path = Path()
     item_file_path: Path = Path()
 
+    # Entries of the in-process URL cache, shared by all domains except those
+    # given their own size (by CacheDomain name) in urlcache_domain_memory_sizes
+    urlcache_memory_size: int = 2048
+    urlcache_domain_memory_sizes: Mapping[str, int] = {}
+    # Overrides of url_fetch.LIMITS, e.g. {"doi": {"concurrency": 5}}
+    urlcache_fetch_limits: Mapping[str, Mapping[str, float]] = {}
+
     db_server: str = ""
     db_username: str = ""
     db_password: str = ""
@@ -114,20 +123,36 @@ def parse_config_file(filename: Path) -> Options:
         db_filename = parse_path(section, "db_filename", base_path)
         if "TAXONOMY_DB_FILENAME" in os.environ:
             db_filename = db_filename.parent / os.environ["TAXONOMY_DB_FILENAME"]
+        derived_data_filename = parse_path(section, "derived_data_filename", base_path)
         return Options(
             new_path=parse_path(section, "new_path", base_path),
             downloads_path=parse_path(section, "downloads_path", base_path),
             library_path=parse_path(section, "library_path", base_path),
             data_path=parse_path(section, "data_path", base_path),
             parserdata_path=parse_path(section, "parserdata_path", base_path),
-            derived_data_filename=parse_path(
-                section, "derived_data_filename", base_path
+            derived_data_filename=derived_data_filename,
+            derived_data_db_filename=(
+                parse_path(section, "derived_data_db_filename", base_path)
+                if "derived_data_db_filename" in section
+                else derived_data_filename.with_suffix(".db")
+            ),
+            refmatch_index_filename=(
+                parse_path(section, "refmatch_index_filename", base_path)
+                if "refmatch_index_filename" in section
+                else db_filename.with_name("refmatch_index.db")
             ),
             photos_path=parse_path(section, "photos_path", base_path),
             pdf_text_path=parse_path(section, "pdf_text_path", base_path),
             item_file_path=parse_path(section, "item_file_path", base_path),
             db_filename=db_filename,
             urlcache_filename=parse_path(section, "urlcache_filename", base_path),
+            urlcache_memory_size=int(section.get("urlcache_memory_size", "2048")),
+            urlcache_domain_memory_sizes=json.loads(
+                section.get("urlcache_domain_memory_sizes", "{}")
+            ),
+            urlcache_fetch_limits=json.loads(
+                section.get("urlcache_fetch_limits", "{}")
+            ),
             search_db_filename=parse_path(section, "search_db_filename", base_path),
             jstor_db_filename=parse_path(section, "jstor_db_filename", base_path),
             db_server=section.get("db_server", ""),
@@ -0,0 +1,84 @@
+import sqlite3
+from collections import defaultdict
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from taxonomy import search
+from taxonomy.db import derived_data, tag_index
+from taxonomy.db.models.base import BaseModel
+from taxonomy.db.models.taxon import closure
+
+
+def _all_models() -> Iterator[type[BaseModel]]:
+    stack = list(BaseModel.__subclasses__())
+    while stack:
+        model_cls = stack.pop()
+        stack += model_cls.__subclasses__()
+        if hasattr(model_cls, "clirm_table_name"):
+            yield model_cls
+
+
+@pytest.fixture
+def db(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Iterator[sqlite3.Connection]:
+    """An empty in-memory database with a table for every model."""
+    conn = sqlite3.connect(":memory:")
+    for model_cls in _all_models():
+        columns = [
+            "`id` integer primary key",
+            *(
+                f"`{field.name}`"
+                for field in model_cls.clirm_fields.values()
+                if field.name != "id"
+            ),
+        ]
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS `{model_cls.clirm_table_name}`"
+            f" ({', '.join(columns)})"
+        )
+    monkeypatch.setattr(tag_index, "_table_checked", False)
+    monkeypatch.setattr(closure, "_table_checked", False)
+    # Keep objects marked dirty by saves out of the real derived data store
+    store = derived_data.DerivedDataStore(tmp_path / "derived.db")
+    monkeypatch.setattr(derived_data, "get_store", lambda: store)
+    monkeypatch.setattr(derived_data, "_dirty_objects", defaultdict(set))
+    old_conn = BaseModel.clirm._local.__dict__.get("conn")
+    BaseModel.clirm.conn = conn
+    try:
+        yield conn
+    finally:
+        BaseModel.clirm.conn = old_conn
+        conn.close()
+
+
+@pytest.fixture
+def search_db(monkeypatch: pytest.MonkeyPatch) -> Iterator[sqlite3.Connection]:
+    """An empty in-memory full-text search database."""
+    conn = sqlite3.connect(":memory:")
+    conn.execute("""
+        CREATE TABLE pages (
+          article_id INTEGER NOT NULL,
+          page_num   INTEGER NOT NULL,
+          year       INTEGER,
+          text       TEXT,
+          PRIMARY KEY (article_id, page_num)
+        )
+        """)
+    conn.execute("""
+        CREATE VIRTUAL TABLE pages_fts USING fts5(
+          text,
+          content='pages',
+          content_rowid='rowid',
+          tokenize='unicode61 remove_diacritics 2'
+        )
+        """)
+    for sql in search.FTS_TRIGGERS.values():
+        conn.execute(sql)
+    monkeypatch.setattr(search._local, "db", conn, raising=False)
+    monkeypatch.setattr(search, "_table_checked", False)
+    monkeypatch.setattr(search, "_facet_tables_checked", False)
+    try:
+        yield conn
+    finally:
+        conn.close()
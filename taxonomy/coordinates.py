@@ -1,6 +1,10 @@
 # static analysis: ignore[attribute_is_never_set]
+import array
 import functools
+import itertools
 import json
+import math
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass
 from typing import Self
 
@@ -84,25 +88,239 @@ def get_intersection(l1: Line | VerticalLine, l2: Line | VerticalLine) -> Point
     assert False, "unreachable"
 
 
-@functools.lru_cache(maxsize=256)
-def get_polygon(path: str) -> list[list[LineSegment]]:
+# Polygons are indexed for point-in-polygon tests as follows. Each ring keeps
+# its coordinates in flat arrays, its bounding box, and its edges bucketed into
+# horizontal bands of about EDGES_PER_BAND edges each, so that a ray-casting test
+# only looks at edges that can cross the latitude of the point. The rings of a
+# polygon file are in turn bucketed into a grid of GRID_CELL_SIZE degree cells.
+EDGES_PER_BAND = 8
+GRID_CELL_SIZE = 1.0
+KM_PER_DEGREE = 111.32
+
+
+@dataclass(frozen=True, slots=True)
+class BoundingBox:
+    min_longitude: float
+    min_latitude: float
+    max_longitude: float
+    max_latitude: float
+
+    def contains(self, p: Point) -> bool:
+        return (
+            self.min_longitude <= p.longitude <= self.max_longitude
+            and self.min_latitude <= p.latitude <= self.max_latitude
+        )
+
+    def expand(self, longitude_margin: float, latitude_margin: float) -> BoundingBox:
+        return BoundingBox(
+            self.min_longitude - longitude_margin,
+            self.min_latitude - latitude_margin,
+            self.max_longitude + longitude_margin,
+            self.max_latitude + latitude_margin,
+        )
+
+
+class Ring:
+    """A closed ring of points, indexed for point-in-polygon tests."""
+
+    __slots__ = ("_band_height", "_bands", "bbox", "latitudes", "longitudes")
+
+    def __init__(self, points: Sequence[Point]) -> None:
+        self.longitudes = array.array("d", (p.longitude for p in points))
+        self.latitudes = array.array("d", (p.latitude for p in points))
+        self.bbox = BoundingBox(
+            min(self.longitudes),
+            min(self.latitudes),
+            max(self.longitudes),
+            max(self.latitudes),
+        )
+        num_points = len(points)
+        num_bands = max(1, num_points // EDGES_PER_BAND)
+        height = self.bbox.max_latitude - self.bbox.min_latitude
+        self._band_height = height / num_bands if height > 0 else 1.0
+        self._bands: list[list[int]] = [[] for _ in range(num_bands)]
+        for i in range(num_points):
+            lat1 = self.latitudes[i]
+            lat2 = self.latitudes[(i + 1) % num_points]
+            if lat1 == lat2:
+                # Horizontal edges never cross a horizontal ray
+                continue
+            low = self._get_band(min(lat1, lat2))
+            high = self._get_band(max(lat1, lat2))
+            for band in range(low, high + 1):
+                self._bands[band].append(i)
+
+    def _get_band(self, latitude: float) -> int:
+        band = int((latitude - self.bbox.min_latitude) / self._band_height)
+        return min(max(band, 0), len(self._bands) - 1)
+
+    def contains(self, p: Point) -> bool:
+        """Ray-casting test: count crossings of a ray going east from p."""
+        if not self.bbox.contains(p):
+            return False
+        x = p.longitude
+        y = p.latitude
+        xs = self.longitudes
+        ys = self.latitudes
+        num_points = len(xs)
+        inside = False
+        for i in self._bands[self._get_band(y)]:
+            j = i + 1 if i + 1 < num_points else 0
+            y1 = ys[i]
+            y2 = ys[j]
+            if (y1 > y) != (y2 > y) and x < (xs[j] - xs[i]) * (y - y1) / (y2 - y1) + xs[
+                i
+            ]:
+                inside = not inside
+        return inside
+
+    def distance_km(self, p: Point) -> float:
+        """Approximate distance from p to the nearest edge of the ring.
+
+        Uses an equirectangular projection around p, which is accurate enough
+        for the short distances this is used for.
+
+        """
+        scale = math.cos(math.radians(p.latitude))
+        xs = self.longitudes
+        ys = self.latitudes
+        num_points = len(xs)
+        best = math.inf
+        for i in range(num_points):
+            j = i + 1 if i + 1 < num_points else 0
+            x1 = (xs[i] - p.longitude) * scale
+            y1 = ys[i] - p.latitude
+            dx = (xs[j] - p.longitude) * scale - x1
+            dy = ys[j] - p.latitude - y1
+            length = dx * dx + dy * dy
+            t = (
+                0.0
+                if length == 0
+                else min(1.0, max(0.0, -(x1 * dx + y1 * dy) / length))
+            )
+            best = min(best, math.hypot(x1 + t * dx, y1 + t * dy))
+        return best * KM_PER_DEGREE
+
+
+class Geometry:
+    """The rings in a GeoJSON file. A point is inside if it is in any ring."""
+
+    def __init__(self, rings: Iterable[Sequence[Point]]) -> None:
+        self.rings = [Ring(points) for points in rings if points]
+        self._grid: dict[tuple[int, int], list[Ring]] = {}
+        for ring in self.rings:
+            for cell in _get_cells(ring.bbox):
+                self._grid.setdefault(cell, []).append(ring)
+
+    def contains(self, p: Point) -> bool:
+        rings = self._grid.get(_get_cell(p.longitude, p.latitude), ())
+        return any(ring.contains(p) for ring in rings)
+
+    def contains_many(self, points: Iterable[Point]) -> list[bool]:
+        return [self.contains(p) for p in points]
+
+    def is_near(self, p: Point, distance_km: float) -> bool:
+        """Whether p is inside the geometry or within distance_km of its edge."""
+        if self.contains(p):
+            return True
+        latitude_margin = distance_km / KM_PER_DEGREE
+        scale = math.cos(math.radians(min(abs(p.latitude) + latitude_margin, 89.0)))
+        longitude_margin = latitude_margin / scale
+        return any(
+            ring.bbox.expand(longitude_margin, latitude_margin).contains(p)
+            and ring.distance_km(p) <= distance_km
+            for ring in self.rings
+        )
+
+
+class ReverseGeocoder:
+    """Finds the GeoJSON files (by path, as in get_path()) containing a point.
+
+    All rings of all files share one grid, so a lookup only tests the rings
+    whose bounding box overlaps the grid cell of the point.
+
+    """
+
+    def __init__(self, geometries: Mapping[str, Geometry]) -> None:
+        self._grid: dict[tuple[int, int], list[tuple[str, Ring]]] = {}
+        for path, geometry in geometries.items():
+            for ring in geometry.rings:
+                for cell in _get_cells(ring.bbox):
+                    self._grid.setdefault(cell, []).append((path, ring))
+
+    def get_paths(self, p: Point) -> list[str]:
+        paths = []
+        for path, ring in self._grid.get(_get_cell(p.longitude, p.latitude), ()):
+            if path not in paths and ring.contains(p):
+                paths.append(path)
+        return paths
+
+
+def get_all_paths() -> list[str]:
+    """Return the paths of all countries and areas in the GeoJSON data."""
+    base_path = get_options().geojson_path
+    files = [
+        *(base_path / "countries").glob("*.json"),
+        *(base_path / "areas").glob("*/*.json"),
+    ]
+    return sorted(
+        file.relative_to(base_path).with_suffix("").as_posix() for file in files
+    )
+
+
+@functools.cache
+def get_reverse_geocoder() -> ReverseGeocoder:
+    return ReverseGeocoder({path: get_geometry(path) for path in get_all_paths()})
+
+
+def _get_cell(longitude: float, latitude: float) -> tuple[int, int]:
+    return (
+        math.floor(longitude / GRID_CELL_SIZE),
+        math.floor(latitude / GRID_CELL_SIZE),
+    )
+
+
+def _get_cells(bbox: BoundingBox) -> Iterator[tuple[int, int]]:
+    min_x, min_y = _get_cell(bbox.min_longitude, bbox.min_latitude)
+    max_x, max_y = _get_cell(bbox.max_longitude, bbox.max_latitude)
+    for cell_x in range(min_x, max_x + 1):
+        for cell_y in range(min_y, max_y + 1):
+            yield cell_x, cell_y
+
+
+def _read_rings(path: str) -> list[list[Point]]:
     base_path = get_options().geojson_path
     full_path = base_path / (path + ".json")
     with full_path.open() as f:
         data = json.load(f)
+    return [
+        [_make_point(coords) for coords in ring]
+        for feature in data["features"]
+        for ring in feature["geometry"]["coordinates"]
+    ]
+
+
+@functools.lru_cache(maxsize=256)
+def get_geometry(path: str) -> Geometry:
+    return Geometry(_read_rings(path))
+
+
+@functools.lru_cache(maxsize=256)
+def get_polygon(path: str) -> list[list[LineSegment]]:
+    """Return the rings in a GeoJSON file as segments.
+
+    This is the representation used by is_in_polygon_single(), which
+    is_in_polygon() used before Geometry existed; see
+    scripts/bench_coordinates.py.
+
+    """
     result: list[list[LineSegment]] = []
-    for feature in data["features"]:
-        coords_list = feature["geometry"]["coordinates"]
-        for coords in coords_list:
-            lines = []
-            for i in range(len(coords) - 1):
-                p1 = _make_point(coords[i])
-                p2 = _make_point(coords[i + 1])
-                lines.append(LineSegment.from_points(p1, p2))
-            lines.append(
-                LineSegment.from_points(_make_point(coords[-1]), _make_point(coords[0]))
-            )
-            result.append(lines)
+    for points in _read_rings(path):
+        lines = [
+            LineSegment.from_points(p1, p2) for p1, p2 in itertools.pairwise(points)
+        ]
+        lines.append(LineSegment.from_points(points[-1], points[0]))
+        result.append(lines)
     return result
 
 
@@ -115,11 +333,15 @@ def _make_point(coords: list[float]) -> Point:
 
 
 def is_in_polygon(p: Point, path: str) -> bool:
-    polygons = get_polygon(path)
-    for polygon in polygons:
-        if is_in_polygon_single(p, polygon):
-            return True
-    return False
+    return get_geometry(path).contains(p)
+
+
+def are_in_polygon(points: Iterable[Point], path: str) -> list[bool]:
+    return get_geometry(path).contains_many(points)
+
+
+def is_near_polygon(p: Point, path: str, distance_km: float) -> bool:
+    return get_geometry(path).is_near(p, distance_km)
 
 
 def is_in_polygon_single(p: Point, polygon: list[LineSegment]) -> bool:
@@ -192,3 +414,20 @@ def get_path(country_name: str) -> str | None:
                 return f"areas/{directory.name}/{transformed_name}"
 
     raise ValueError(f"Country {country_name!r} not found")
+
+
+def get_name_for_path(path: str) -> str:
+    """Make a readable name for a GeoJSON path, e.g. "Corsica (France)".
+
+    This is used for areas that do not correspond to one of our Regions.
+
+    """
+    kind, *rest = path.split("/")
+
+    def humanize(name: str) -> str:
+        return name.replace("_", " ").title()
+
+    if kind == "areas" and len(rest) == 2:
+        parent, name = rest
+        return f"{humanize(name)} ({humanize(parent)})"
+    return humanize(rest[-1] if rest else kind)
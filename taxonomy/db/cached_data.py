@@ -1,17 +1,21 @@
 """Cache for storing arbitrary data."""
 
-import functools
 import sqlite3
+import threading
 from typing import Any
 
 from taxonomy.config import get_options
 
+_local = threading.local()
+
 
-@functools.cache
 def get_database() -> sqlite3.Connection:
-    option = get_options()
-    # static analysis: ignore[internal_error]
-    return sqlite3.connect(option.db_filename)
+    db = getattr(_local, "db", None)
+    if db is None:
+        option = get_options()
+        # static analysis: ignore[internal_error]
+        db = _local.db = sqlite3.connect(option.db_filename)
+    return db
 
 
 def run_query(sql: str, args: tuple[object, ...]) -> list[tuple[Any, ...]]:
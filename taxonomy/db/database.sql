@@ -377,6 +377,28 @@ CREATE INDEX "ce_article" on "classification_entry" (`article_id`);
 CREATE INDEX "ce_parent" on "classification_entry" (`parent_id`);
 
 
+CREATE TABLE `taxon_closure` (
+    `ancestor_id` integer not null,
+    `descendant_id` integer not null,
+    `depth` integer not null,
+    PRIMARY KEY (`ancestor_id`, `descendant_id`)
+) WITHOUT ROWID;
+CREATE INDEX "taxon_closure_descendant" on "taxon_closure" (`descendant_id`, `depth`);
+
+CREATE TABLE `tag_index` (
+    `call_sign` varchar(8) not null,
+    `object_id` integer not null,
+    `field` varchar(255) not null,
+    `tag_number` integer not null,
+    `tag_id` integer not null,
+    `arg_number` integer not null,
+    `value` integer default null,
+    `ref_call_sign` varchar(8) default null
+);
+CREATE INDEX "tag_index_tag" on "tag_index" (`call_sign`, `field`, `tag_id`, `arg_number`, `value`);
+CREATE INDEX "tag_index_object" on "tag_index" (`call_sign`, `object_id`, `field`);
+CREATE INDEX "tag_index_reference" on "tag_index" (`ref_call_sign`, `value`);
+
 CREATE TABLE `cached_data` (
     `name` varchar(255) not null,
     `data` blob
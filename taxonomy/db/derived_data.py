@@ -2,9 +2,14 @@
 
 import enum
 import pickle
-from collections.abc import Callable
+import sqlite3
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Collection, Iterable, Mapping, Sequence
 from dataclasses import dataclass
 from functools import cache
+from itertools import batched
+from pathlib import Path
 from typing import Any, Generic, Protocol, TypeVar
 
 import typing_inspect
@@ -21,12 +26,27 @@ ObjectData = dict[str, Any]  # derived data for a single object, keys are field
 ModelData = dict[int, ObjectData]  # keys are object ids
 DerivedData = dict[str, ModelData]  # keys are model call signs
 CachedData = dict[str, Any]
+# Keys are (call sign, field name)
+FieldKey = tuple[str, str]
+# Keys are (call sign, derived field name or None for the object itself)
+ChangeKey = tuple[str, str | None]
+Changes = dict[ChangeKey, set[int]]
+DirtyObjects = dict[str, set[int]]  # keys are model call signs
+
+_dirty_objects: DirtyObjects = defaultdict(set)
 
 
 class SetLater:
     pass
 
 
+class _Missing:
+    pass
+
+
+_MISSING = _Missing()
+
+
 class SingleComputeFunc(Protocol[T_co]):
     def __call__(self, model: "taxonomy.db.models.base.BaseModel", /) -> T_co:
         raise NotImplementedError
@@ -42,11 +62,41 @@ class _LazyTypeArg(Protocol[T_co]):
         raise NotImplementedError
 
 
+class IncrementalComputeFunc(Protocol[T_co]):
+    def __call__(
+        self, current: Mapping[int, Any], changes: Mapping[ChangeKey, Collection[int]]
+    ) -> Mapping[int, T_co]:
+        raise NotImplementedError
+
+
 @dataclass
 class LazyType(Generic[T]):
     typ: _LazyTypeArg[T]
 
 
+@dataclass(frozen=True)
+class Dependency:
+    """Declares what the value of a derived field is computed from.
+
+    The field needs to be recomputed when an object of the model returned by
+    lazy_model_cls changes, or, if derived_field is set, when the value of that
+    derived field changes on such an object.
+
+    get_affected_ids maps the changed object to the ids of the objects whose value
+    may be affected. By default, only the changed object itself is affected. If
+    include_referrers is set, objects whose current (list-valued) value contains
+    the changed object are also affected; this catches references that were removed.
+
+    """
+
+    lazy_model_cls: Callable[[], type["taxonomy.db.models.base.BaseModel"]]
+    get_affected_ids: (
+        Callable[["taxonomy.db.models.base.BaseModel"], Iterable[int]] | None
+    ) = None
+    derived_field: str | None = None
+    include_referrers: bool = False
+
+
 @dataclass
 class DerivedField(Generic[T]):
     name: str
@@ -54,6 +104,9 @@ class DerivedField(Generic[T]):
     compute: SingleComputeFunc[T] | None = None
     compute_all: ComputeAllFunc[T] | None = None
     pull_on_miss: bool = True
+    # If empty, the field depends only on the object it is defined on.
+    dependencies: Sequence[Dependency] = ()
+    compute_incremental: IncrementalComputeFunc[T] | None = None
 
     def get_value(
         self,
@@ -61,20 +114,8 @@ class DerivedField(Generic[T]):
         *,
         force_recompute: bool = False,
     ) -> T:
-        data = load_derived_data()
-        model_data = data.setdefault(model.call_sign, {})
-        object_data = model_data.setdefault(model.id, {})
-        if self.pull_on_miss:
-            if not force_recompute and self.name in object_data:
-                return self.deserialize(object_data[self.name], self.get_type())
-            assert (
-                self.compute is not None
-            ), "compute must be set for pull-on-miss field"
-            value = self.compute(model)
-            object_data[self.name] = self.serialize(value)
-            return value
-        else:
-            return self.deserialize(object_data.get(self.name), self.get_type())
+        raw_value = self.get_raw_value(model, force_recompute=force_recompute)
+        return self.deserialize(raw_value, self.get_type())
 
     def get_raw_value(
         self,
@@ -82,26 +123,23 @@ class DerivedField(Generic[T]):
         *,
         force_recompute: bool = False,
     ) -> T:
-        data = load_derived_data()
-        model_data = data.setdefault(model.call_sign, {})
-        object_data = model_data.setdefault(model.id, {})
+        store = get_store()
         if self.pull_on_miss:
-            if not force_recompute and self.name in object_data:
-                return object_data[self.name]
+            if not force_recompute:
+                value = store.get(model.call_sign, self.name, model.id, _MISSING)
+                if value is not _MISSING:
+                    return value
             assert (
                 self.compute is not None
             ), "compute must be set for pull-on-miss field"
-            value = self.compute(model)
-            object_data[self.name] = self.serialize(value)
-            return object_data[self.name]
+            serialized = self.serialize(self.compute(model))
+            store.set(model.call_sign, self.name, model.id, serialized)
+            return serialized
         else:
-            return object_data.get(self.name)  # type: ignore[return-value]
+            return store.get(model.call_sign, self.name, model.id)
 
     def set_value(self, model: "taxonomy.db.models.base.BaseModel", value: T) -> None:
-        data = load_derived_data()
-        data.setdefault(model.call_sign, {}).setdefault(model.id, {})[self.name] = (
-            self.serialize(value)
-        )
+        get_store().set(model.call_sign, self.name, model.id, self.serialize(value))
 
     def serialize(self, value: Any) -> Any:
         if isinstance(value, list):
@@ -138,32 +176,427 @@ class DerivedField(Generic[T]):
     def compute_and_store_all(
         self, model_cls: type["taxonomy.db.models.base.BaseModel"]
     ) -> None:
-        data = load_derived_data()
-        model_data = data.setdefault(model_cls.call_sign, {})
         if self.compute_all is not None:
             field_data = self.compute_all()
-            # First remove all data for this field
-            for object_data in model_data.values():
-                if self.name in object_data:
-                    del object_data[self.name]
         else:
             compute_func = self.compute
             assert compute_func is not None
             field_data = {obj.id: compute_func(obj) for obj in model_cls.select_valid()}
-        for model_id, value in field_data.items():
-            object_data = model_data.setdefault(model_id, {})
-            object_data[self.name] = self.serialize(value)
+        get_store().replace_field(
+            model_cls.call_sign,
+            self.name,
+            {oid: self.serialize(value) for oid, value in field_data.items()},
+        )
+
+    def get_dependencies(
+        self, model_cls: type["taxonomy.db.models.base.BaseModel"]
+    ) -> Sequence[Dependency]:
+        if self.dependencies:
+            return self.dependencies
+        return [Dependency(lambda: model_cls)]
+
+    def get_affected_ids(
+        self,
+        model_cls: type["taxonomy.db.models.base.BaseModel"],
+        changes: Mapping[ChangeKey, Collection[int]],
+    ) -> set[int]:
+        affected: set[int] = set()
+        for dependency in self.get_dependencies(model_cls):
+            dep_cls = dependency.lazy_model_cls()
+            changed_ids = changes.get((dep_cls.call_sign, dependency.derived_field))
+            if not changed_ids:
+                continue
+            if dependency.get_affected_ids is None:
+                affected.update(changed_ids)
+            else:
+                for oid in changed_ids:
+                    affected.update(dependency.get_affected_ids(dep_cls(oid)))
+            if dependency.include_referrers:
+                field_data = get_store().get_field(model_cls.call_sign, self.name)
+                affected.update(
+                    oid
+                    for oid, value in field_data.items()
+                    if isinstance(value, list)
+                    and not set(changed_ids).isdisjoint(value)
+                )
+        return affected
+
+    def compute_and_store_incremental(
+        self,
+        model_cls: type["taxonomy.db.models.base.BaseModel"],
+        changes: Mapping[ChangeKey, Collection[int]],
+    ) -> set[int]:
+        """Recompute the field for objects affected by the given changes.
+
+        Returns the ids of the objects whose value changed.
+
+        """
+        store = get_store()
+        new_values: Mapping[int, Any]
+        removed: set[int] = set()
+        if self.compute_incremental is not None:
+            current = store.get_field(model_cls.call_sign, self.name)
+            new_values = self.compute_incremental(current, changes)
+            removed = {oid for oid, value in new_values.items() if not value}
+        else:
+            affected = self.get_affected_ids(model_cls, changes)
+            if not affected:
+                return set()
+            if self.compute is None:
+                # No way to compute only part of the field; recompute everything.
+                old_values = dict(store.get_field(model_cls.call_sign, self.name))
+                self.compute_and_store_all(model_cls)
+                new_field_data = store.get_field(model_cls.call_sign, self.name)
+                return {
+                    oid
+                    for oid in old_values.keys() | new_field_data.keys()
+                    if old_values.get(oid, _MISSING)
+                    != new_field_data.get(oid, _MISSING)
+                }
+            compute_func = self.compute
+            new_values = {
+                obj.id: compute_func(obj)
+                for batch in batched(sorted(affected), 500)
+                for obj in model_cls.select_valid().filter(model_cls.id.is_in(batch))
+            }
+            removed = affected - new_values.keys()
+        changed = set()
+        for oid in removed:
+            if store.get(model_cls.call_sign, self.name, oid, _MISSING) is not _MISSING:
+                store.delete(model_cls.call_sign, self.name, oid)
+                changed.add(oid)
+        for oid, value in new_values.items():
+            if oid in removed:
+                continue
+            serialized = self.serialize(value)
+            if store.get(model_cls.call_sign, self.name, oid, _MISSING) != serialized:
+                store.set(model_cls.call_sign, self.name, oid, serialized)
+                changed.add(oid)
+        return changed
+
+
+def mark_dirty(model: "taxonomy.db.models.base.BaseModel") -> None:
+    """Record that the object changed, so its dependents get recomputed.
+
+    The record is written to the store right away, so that objects changed in a
+    session that ends before update_derived_fields are still picked up by the next
+    session.
+
+    """
+    ids = _dirty_objects[model.call_sign]
+    if model.id not in ids:
+        ids.add(model.id)
+        get_store().mark_dirty(model.call_sign, model.id)
+
+
+def get_dirty_objects() -> DirtyObjects:
+    return get_store().get_dirty()
+
+
+def clear_dirty_objects() -> None:
+    """Forget the changed objects once the next commit() succeeds."""
+    _dirty_objects.clear()
+    get_store().clear_dirty()
+
+
+def _get_field_order(
+    model_classes: Iterable[type["taxonomy.db.models.base.BaseModel"]],
+) -> list[tuple[type["taxonomy.db.models.base.BaseModel"], DerivedField[Any]]]:
+    """Order derived fields so that each field comes after the fields it depends on."""
+    fields = {
+        (model_cls.call_sign, field.name): (model_cls, field)
+        for model_cls in model_classes
+        for field in model_cls.derived_fields
+    }
+    ordered: list[
+        tuple[type["taxonomy.db.models.base.BaseModel"], DerivedField[Any]]
+    ] = []
+    seen: set[tuple[str, str]] = set()
+
+    def visit(key: tuple[str, str]) -> None:
+        if key in seen:
+            return
+        seen.add(key)
+        model_cls, field = fields[key]
+        for dependency in field.get_dependencies(model_cls):
+            if dependency.derived_field is not None:
+                dep_key = (
+                    dependency.lazy_model_cls().call_sign,
+                    dependency.derived_field,
+                )
+                if dep_key in fields:
+                    visit(dep_key)
+        ordered.append((model_cls, field))
+
+    for key in fields:
+        visit(key)
+    return ordered
+
+
+def update_derived_data(
+    model_classes: Iterable[type["taxonomy.db.models.base.BaseModel"]],
+    dirty: Mapping[str, Collection[int]],
+    *,
+    verbose: bool = False,
+) -> Changes:
+    """Recompute the derived fields affected by changes to the given objects.
+
+    Fields are updated in dependency order, so that a change to a derived field
+    propagates to the fields computed from it.
+
+    """
+    changes: Changes = defaultdict(set)
+    for call_sign, ids in dirty.items():
+        changes[(call_sign, None)].update(ids)
+    for model_cls, field in _get_field_order(model_classes):
+        changed = field.compute_and_store_incremental(model_cls, changes)
+        if changed:
+            if verbose:
+                print(
+                    f"{model_cls.__name__}.{field.name}: {len(changed)} changed",
+                    flush=True,
+                )
+            changes[(model_cls.call_sign, field.name)].update(changed)
+    return changes
+
+
+class DerivedDataStore:
+    """SQLite-backed storage for derived data.
+
+    Values are keyed by (call sign, field name, object id) and are loaded on demand,
+    either one at a time or a whole field at once. Writes are buffered in memory
+    until commit() is called, which writes them in a single transaction.
+
+    The store also records which objects changed since derived data was last
+    updated (see mark_dirty()).
+
+    """
+
+    def __init__(self, filename: Path) -> None:
+        self.filename = filename
+        # One connection per thread, since hsweb may read from worker threads
+        self._local = threading.local()
+        # Guards the in-memory state, which worker threads share
+        self._lock = threading.RLock()
+        self._fields: dict[FieldKey, dict[int, Any]] = {}
+        self._values: dict[FieldKey, dict[int, Any]] = defaultdict(dict)
+        self._pending: dict[FieldKey, dict[int, Any]] = defaultdict(dict)
+        # Dirty objects to forget in the next commit()
+        self._cleared_dirty: set[tuple[str, int]] = set()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # static analysis: ignore[internal_error]
+            conn = self._local.conn = sqlite3.connect(str(self.filename))
+            with conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS derived_data(
+                        call_sign TEXT NOT NULL,
+                        field TEXT NOT NULL,
+                        object_id INTEGER NOT NULL,
+                        value BLOB,
+                        PRIMARY KEY(call_sign, field, object_id)
+                    ) WITHOUT ROWID
+                    """)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS dirty_objects(
+                        call_sign TEXT NOT NULL,
+                        object_id INTEGER NOT NULL,
+                        PRIMARY KEY(call_sign, object_id)
+                    ) WITHOUT ROWID
+                    """)
+        return conn
+
+    def get(
+        self, call_sign: str, field: str, object_id: int, default: Any = None
+    ) -> Any:
+        with self._lock:
+            key = (call_sign, field)
+            if key in self._fields:
+                value = self._fields[key].get(object_id, _MISSING)
+            elif object_id in self._values[key]:
+                value = self._values[key][object_id]
+            else:
+                row = self.conn.execute(
+                    """
+                    SELECT value
+                    FROM derived_data
+                    WHERE call_sign = ? AND field = ? AND object_id = ?
+                    """,
+                    (call_sign, field, object_id),
+                ).fetchone()
+                value = _MISSING if row is None else pickle.loads(row[0])
+                self._values[key][object_id] = value
+            if value is _MISSING:
+                return default
+            return value
+
+    def get_field(self, call_sign: str, field: str) -> Mapping[int, Any]:
+        """Return all values for a field, keyed by object id."""
+        with self._lock:
+            key = (call_sign, field)
+            if key not in self._fields:
+                cursor = self.conn.execute(
+                    """
+                    SELECT object_id, value
+                    FROM derived_data
+                    WHERE call_sign = ? AND field = ?
+                    """,
+                    (call_sign, field),
+                )
+                field_data = {oid: pickle.loads(value) for oid, value in cursor}
+                for oid, value in self._pending[key].items():
+                    if value is _MISSING:
+                        field_data.pop(oid, None)
+                    else:
+                        field_data[oid] = value
+                self._fields[key] = field_data
+                self._values.pop(key, None)
+            return self._fields[key]
+
+    def set(self, call_sign: str, field: str, object_id: int, value: Any) -> None:
+        with self._lock:
+            key = (call_sign, field)
+            if key in self._fields:
+                self._fields[key][object_id] = value
+            else:
+                self._values[key][object_id] = value
+            self._pending[key][object_id] = value
+
+    def delete(self, call_sign: str, field: str, object_id: int) -> None:
+        with self._lock:
+            key = (call_sign, field)
+            if key in self._fields:
+                self._fields[key].pop(object_id, None)
+            else:
+                self._values[key][object_id] = _MISSING
+            self._pending[key][object_id] = _MISSING
+
+    def replace_field(
+        self, call_sign: str, field: str, field_data: Mapping[int, Any]
+    ) -> None:
+        """Replace all values for a field."""
+        with self._lock:
+            for oid in list(self.get_field(call_sign, field)):
+                if oid not in field_data:
+                    self.delete(call_sign, field, oid)
+            for oid, value in field_data.items():
+                self.set(call_sign, field, oid, value)
+
+    def mark_dirty(self, call_sign: str, object_id: int) -> None:
+        """Record a changed object. Unlike other writes, this is not buffered."""
+        with self._lock:
+            self._cleared_dirty.discard((call_sign, object_id))
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO dirty_objects(call_sign, object_id) VALUES(?, ?)",
+                    (call_sign, object_id),
+                )
+
+    def get_dirty(self) -> DirtyObjects:
+        with self._lock:
+            dirty: DirtyObjects = defaultdict(set)
+            for call_sign, object_id in self.conn.execute(
+                "SELECT call_sign, object_id FROM dirty_objects"
+            ):
+                if (call_sign, object_id) not in self._cleared_dirty:
+                    dirty[call_sign].add(object_id)
+            return dict(dirty)
+
+    def clear_dirty(self) -> None:
+        """Forget all changed objects in the next commit()."""
+        with self._lock:
+            self._cleared_dirty.update(self.conn.execute("SELECT * FROM dirty_objects"))
+
+    def commit(self) -> None:
+        """Write all pending changes in a single transaction."""
+        with self._lock:
+            if not any(self._pending.values()) and not self._cleared_dirty:
+                return
+            with self.conn:
+                self.conn.executemany(
+                    "DELETE FROM dirty_objects WHERE call_sign = ? AND object_id = ?",
+                    self._cleared_dirty,
+                )
+                for (call_sign, field), values in self._pending.items():
+                    self.conn.executemany(
+                        """
+                        DELETE FROM derived_data
+                        WHERE call_sign = ? AND field = ? AND object_id = ?
+                        """,
+                        [
+                            (call_sign, field, oid)
+                            for oid, value in values.items()
+                            if value is _MISSING
+                        ],
+                    )
+                    self.conn.executemany(
+                        """
+                        REPLACE INTO derived_data(call_sign, field, object_id, value)
+                        VALUES(?, ?, ?, ?)
+                        """,
+                        [
+                            (call_sign, field, oid, pickle.dumps(value))
+                            for oid, value in values.items()
+                            if value is not _MISSING
+                        ],
+                    )
+            self._pending.clear()
+            self._cleared_dirty.clear()
+
+    def rollback(self) -> None:
+        """Discard all changes that have not been committed."""
+        with self._lock:
+            self._pending.clear()
+            self._cleared_dirty.clear()
+            self._fields.clear()
+            self._values.clear()
+
+    def import_data(self, data: DerivedData) -> None:
+        """Replace the contents of the store with data in the old pickle format."""
+        with self._lock:
+            self.rollback()
+            with self.conn:
+                self.conn.execute("DELETE FROM derived_data")
+                self.conn.executemany(
+                    """
+                    INSERT INTO derived_data(call_sign, field, object_id, value)
+                    VALUES(?, ?, ?, ?)
+                    """,
+                    (
+                        (call_sign, field, oid, pickle.dumps(value))
+                        for call_sign, model_data in data.items()
+                        for oid, object_data in model_data.items()
+                        for field, value in object_data.items()
+                    ),
+                )
 
 
 @cache
-def load_derived_data() -> DerivedData:
+def get_store() -> DerivedDataStore:
+    store = DerivedDataStore(settings.derived_data_db_filename)
+    if (
+        not settings.derived_data_db_filename.exists()
+        and settings.derived_data_filename.is_file()
+    ):
+        migrate_pickle(store)
+    return store
+
+
+def migrate_pickle(store: DerivedDataStore | None = None) -> None:
+    """Copy data from the old derived data pickle into the SQLite store."""
+    if store is None:
+        store = get_store()
     try:
         with settings.derived_data_filename.open("rb") as f:
-            return pickle.load(f)
+            data: DerivedData = pickle.load(f)
     except (FileNotFoundError, EOFError):
-        return {}
+        return
+    print(f"Migrating derived data from {settings.derived_data_filename}")
+    store.import_data(data)
 
 
-def write_derived_data(data: DerivedData) -> None:
-    with settings.derived_data_filename.open("wb") as f:
-        pickle.dump(data, f)
+def write_derived_data() -> None:
+    get_store().commit()
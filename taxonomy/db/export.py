@@ -25,6 +25,7 @@ from .constants import (
     Status,
 )
 from .models import Article, Collection, Name, Occurrence, Taxon
+from .models.base import prefetch_related
 from .models.name import TypeTag
 
 CS = CommandSet("export", "Exporting data")
@@ -149,6 +150,15 @@ def export_names(
 ) -> None:
     """Export data about names to a CSV file."""
     names = get_names_for_export(taxon, ages, group, limit, min_rank_for_age_filtering)
+    prefetch_related(
+        names,
+        "taxon",
+        "original_citation__citation_group",
+        "citation_group",
+        "collection",
+        "type_locality__region",
+        "author_tags",
+    )
 
     with Path(filename).open("w") as f:
         writer: "csv.DictWriter[str]" = csv.DictWriter(
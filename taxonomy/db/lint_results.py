@@ -0,0 +1,219 @@
+"""Store of lint results that are known to be clean.
+
+Most objects do not change between runs of lint_all(), and neither does the
+outcome of most linters on them. A linter can declare the objects it reads
+(through the reads argument to Lint.add()); for such linters, a clean run is
+recorded in the lint_result table together with a hash of the rows of the object
+and of everything it declared, and the version of the linter. When the linter is
+next run on the same object and none of these has changed, it is skipped.
+
+Only clean results are stored: a linter that produced messages is always run
+again, so that the messages are shown and fixes are applied. Linters that also
+depend on data outside the database, such as web APIs, pass a TTL; their results
+are only reused until it expires.
+
+The table lives in the same database as cached_data and is created on first use.
+Tables created before checked_at existed are upgraded on first use; their rows
+count as expired for linters with a TTL.
+
+Each row is hashed at most once per linted object, however many linters read it,
+unless an object is saved in between (see note_save()).
+
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Sequence
+from typing import TYPE_CHECKING, Any
+
+from taxonomy.db import cached_data
+
+if TYPE_CHECKING:
+    from taxonomy.db.models.base import BaseModel
+
+TABLE_NAME = "lint_result"
+
+# A foreign key path such as "original_citation__citation_group", or a function
+# returning other objects the linter reads
+InputPath = str | Callable[[Any], Iterable["BaseModel"]]
+
+_table_checked = False
+# Incremented whenever an object is saved, so that cached row hashes are dropped
+_save_generation = 0
+
+
+def get_connection() -> sqlite3.Connection:
+    conn = cached_data.get_database()
+    global _table_checked
+    if not _table_checked:
+        with conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS `{TABLE_NAME}` (
+                    `call_sign` varchar(8) not null,
+                    `object_id` integer not null,
+                    `label` varchar(255) not null,
+                    `version` varchar(255) not null,
+                    `input_hash` varchar(64) not null,
+                    `checked_at` integer not null,
+                    PRIMARY KEY (`call_sign`, `object_id`, `label`)
+                )
+                """)
+            columns = {
+                row[1] for row in conn.execute(f"PRAGMA table_info({TABLE_NAME})")
+            }
+            if "checked_at" not in columns:
+                conn.execute(
+                    f"ALTER TABLE `{TABLE_NAME}` ADD COLUMN `checked_at` integer not"
+                    " null DEFAULT 0"
+                )
+        _table_checked = True
+    return conn
+
+
+def note_save() -> None:
+    """Called by BaseModel.save(), since a linter may have changed its inputs."""
+    global _save_generation
+    _save_generation += 1
+
+
+def get_related_objects(obj: BaseModel, paths: Iterable[InputPath]) -> list[BaseModel]:
+    """Follow foreign key paths such as "original_citation__citation_group"."""
+    out: list[BaseModel] = []
+    for path in paths:
+        if callable(path):
+            out += path(obj)
+            continue
+        objs = [obj]
+        for attr in path.split("__"):
+            objs = [related for o in objs if (related := getattr(o, attr)) is not None]
+            out += objs
+    return out
+
+
+def hash_row(obj: BaseModel) -> str:
+    """Return a hash of the database row of an object."""
+    fields = type(obj).clirm_fields
+    row = [(name, fields[name].get_raw(obj)) for name in sorted(fields)]
+    return hashlib.blake2b(
+        repr((obj.call_sign, obj.id, row)).encode(), digest_size=16
+    ).hexdigest()
+
+
+def hash_objects(
+    objs: Iterable[BaseModel], get_row_hash: Callable[[BaseModel], str] = hash_row
+) -> str:
+    """Return a hash of the database rows of the given objects."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for obj in objs:
+        hasher.update(get_row_hash(obj).encode())
+    return hasher.hexdigest()
+
+
+class ObjectResults:
+    """Stored clean results for a single object.
+
+    Lint.run() creates one of these for each object it lints, and calls save()
+    once all linters have run, so that each object costs one read and at most
+    one write.
+
+    """
+
+    def __init__(self, obj: BaseModel) -> None:
+        self.obj = obj
+        self._pending: list[tuple[str, str, str, int]] = []
+        self._stale: list[str] = []
+        rows = get_connection().execute(
+            f"SELECT label, version, input_hash, checked_at FROM `{TABLE_NAME}`"
+            " WHERE call_sign = ? AND object_id = ?",
+            (obj.call_sign, obj.id),
+        )
+        self._clean = {
+            label: (version, input_hash, checked_at)
+            for label, version, input_hash, checked_at in rows
+        }
+        self._row_hashes: dict[tuple[str, int], str] = {}
+        self._input_hashes: dict[tuple[InputPath, ...], str] = {}
+        self._generation = _save_generation
+
+    def get_input_hash(self, reads: Sequence[InputPath]) -> str:
+        if self._generation != _save_generation:
+            self._row_hashes.clear()
+            self._input_hashes.clear()
+            self._generation = _save_generation
+        key = tuple(reads)
+        input_hash = self._input_hashes.get(key)
+        if input_hash is None:
+            objs = [self.obj, *get_related_objects(self.obj, reads)]
+            input_hash = hash_objects(objs, self._get_row_hash)
+            self._input_hashes[key] = input_hash
+        return input_hash
+
+    def _get_row_hash(self, obj: BaseModel) -> str:
+        key = (obj.call_sign, obj.id)
+        row_hash = self._row_hashes.get(key)
+        if row_hash is None:
+            row_hash = self._row_hashes[key] = hash_row(obj)
+        return row_hash
+
+    def is_clean(
+        self,
+        label: str,
+        version: str,
+        input_hash: str,
+        ttl: datetime.timedelta | None = None,
+    ) -> bool:
+        if label not in self._clean:
+            return False
+        clean_version, clean_input_hash, checked_at = self._clean[label]
+        if ttl is not None and checked_at < time.time() - ttl.total_seconds():
+            return False
+        return (clean_version, clean_input_hash) == (version, input_hash)
+
+    def record_clean(self, label: str, version: str, input_hash: str) -> None:
+        checked_at = int(time.time())
+        self._clean[label] = (version, input_hash, checked_at)
+        self._pending.append((label, version, input_hash, checked_at))
+
+    def record_failure(self, label: str) -> None:
+        if self._clean.pop(label, None) is not None:
+            self._stale.append(label)
+
+    def save(self) -> None:
+        if not self._pending and not self._stale:
+            return
+        call_sign = self.obj.call_sign
+        oid = self.obj.id
+        with get_connection() as conn:
+            conn.executemany(
+                f"DELETE FROM `{TABLE_NAME}`"
+                " WHERE call_sign = ? AND object_id = ? AND label = ?",
+                [(call_sign, oid, label) for label in self._stale],
+            )
+            conn.executemany(
+                f"REPLACE INTO `{TABLE_NAME}` VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (call_sign, oid, label, version, input_hash, checked_at)
+                    for label, version, input_hash, checked_at in self._pending
+                ],
+            )
+        self._pending.clear()
+        self._stale.clear()
+
+
+def clear(call_sign: str | None = None, label: str | None = None) -> int:
+    """Forget stored results, optionally only for one model or linter."""
+    conditions = []
+    args = []
+    if call_sign is not None:
+        conditions.append("call_sign = ?")
+        args.append(call_sign)
+    if label is not None:
+        conditions.append("label = ?")
+        args.append(label)
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    with get_connection() as conn:
+        return conn.execute(f"DELETE FROM `{TABLE_NAME}`{where}", args).rowcount
@@ -10,6 +10,8 @@ __all__ = [
     "check",
     "citations",
     "lint",
+    "page_index",
+    "search_index",
     "set_path",
 ]
 
@@ -25,3 +27,5 @@ from . import add_data as add_data
 from . import api_data as api_data
 from . import set_path as set_path
 from . import check as check
+from . import search_index as search_index
+from . import page_index as page_index
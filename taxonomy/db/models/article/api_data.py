@@ -16,7 +16,7 @@ from bs4 import BeautifulSoup
 
 from taxonomy import config, parsing
 from taxonomy.apis.util import RateLimiter
-from taxonomy.db import helpers
+from taxonomy.db import helpers, url_fetch
 from taxonomy.db.constants import ArticleType, DateSource
 from taxonomy.db.helpers import clean_string, trimdoi
 from taxonomy.db.models.citation_group import CitationGroup
@@ -59,11 +59,7 @@ def clear_crossref_memory_caches() -> None:
     )
 
 
-@cached(CacheDomain.doi)
-def get_doi_json_cached(doi: str) -> str:
-    # "Good manners" section in https://api.crossref.org/swagger-ui/index.html
-    url = f"https://api.crossref.org/works/{urllib.parse.quote(doi)}?mailto=jelle.zijlstra@gmail.com"
-    response = httpx.get(url)
+def _parse_doi_response(response: httpx.Response) -> str:
     if response.status_code == 404:
         # Cache "null" for missing data
         return json.dumps(None)
@@ -71,6 +67,14 @@ def get_doi_json_cached(doi: str) -> str:
     return response.text
 
 
+@url_fetch.cached_request(CacheDomain.doi, handle_response=_parse_doi_response)
+def get_doi_json_cached(doi: str) -> url_fetch.Request:
+    # "Good manners" section in https://api.crossref.org/swagger-ui/index.html
+    return url_fetch.Request(
+        f"https://api.crossref.org/works/{urllib.parse.quote(doi)}?mailto=jelle.zijlstra@gmail.com"
+    )
+
+
 @cached(CacheDomain.crossref_openurl)
 def _get_doi_from_crossref_inner(params: str) -> str:
     query_dict = json.loads(params)
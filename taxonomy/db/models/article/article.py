@@ -58,6 +58,7 @@ from taxonomy.db.models.base import (
     BaseModel,
     LintConfig,
     TextField,
+    get_foreign_key_dependency,
     get_tag_based_derived_field,
 )
 from taxonomy.db.models.citation_group import CitationGroup
@@ -181,11 +182,19 @@ class Article(BaseModel):
             "ordered_new_names",
             LazyType(lambda: list[models.Name]),
             lambda art: models.name.name.get_ordered_names(art.get_new_names()),
+            dependencies=[
+                get_foreign_key_dependency(lambda: models.Name, "original_citation")
+            ],
         ),
         DerivedField(
             "root_classification_entries",
             LazyType(lambda: list[models.ClassificationEntry]),
             lambda art: art.get_root_classification_entries(),
+            dependencies=[
+                get_foreign_key_dependency(
+                    lambda: models.ClassificationEntry, "article"
+                )
+            ],
         ),
         get_tag_based_derived_field(
             "partially_suppressed_names",
@@ -1169,6 +1178,9 @@ class Article(BaseModel):
         pages = text_path.read_text().split("\x0c")
         year = self.valid_numeric_year()
         _search.replace_article_pages(self.id, pages=pages, year=year)
+        _search.record_indexed_file(
+            self.id, _search.FileStat.of(self.get_path()), len(pages)
+        )
         return len(pages)
 
     def find_earlier_usages(self) -> None:
@@ -1234,10 +1246,6 @@ class Article(BaseModel):
             self.add_tag(ArticleTag.AlternativeURL(self.url))
         self.url = url
 
-    @classmethod
-    def with_tag(cls, tag_cls: ArticleTag._Constructor) -> Query[Self]:  # type: ignore[name-defined]
-        return cls.select_valid().filter(Article.tags.contains(f"[{tag_cls._tag},"))
-
     def has_tag(self, tag_cls: ArticleTag._Constructor) -> bool:  # type: ignore[name-defined]
         tag_id = tag_cls._tag
         return any(tag[0] == tag_id for tag in self.get_raw_tags_field("tags"))
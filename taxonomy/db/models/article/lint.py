@@ -13,8 +13,8 @@ from collections import defaultdict
 from collections.abc import Collection, Generator, Hashable, Iterable, Sequence
 from typing import Any
 
+import httpx
 import Levenshtein
-import requests
 
 from taxonomy import getinput, urlparse
 from taxonomy.apis import bhl, zoobank
@@ -34,7 +34,7 @@ from taxonomy.db.models.citation_group import lint as cg_lint
 from taxonomy.db.models.citation_group.cg import CitationGroup, CitationGroupTag
 from taxonomy.db.models.citation_group.lint import get_biblio_pages
 from taxonomy.db.models.issue_date import IssueDate
-from taxonomy.db.models.lint import IgnoreLint, Lint
+from taxonomy.db.models.lint import NETWORK_LINT_TTL, IgnoreLint, Lint
 from taxonomy.db.models.person import AuthorTag, is_more_specific_than
 
 from . import jstor_db
@@ -762,7 +762,7 @@ def check_url(art: Article, cfg: LintConfig) -> Iterable[str]:
             yield f"URL {art.url}: {message}"
 
 
-@LINT.add("doi", requires_network=True)
+@LINT.add("doi", requires_network=True, reads=(), ttl=NETWORK_LINT_TTL)
 def check_doi(art: Article, cfg: LintConfig) -> Iterable[str]:
     if art.doi is None:
         return
@@ -788,7 +788,9 @@ def check_doi(art: Article, cfg: LintConfig) -> Iterable[str]:
                 yield message
 
 
-@LINT.add("bhl_item_from_bibliography", requires_network=True)
+@LINT.add(
+    "bhl_item_from_bibliography", requires_network=True, reads=(), ttl=NETWORK_LINT_TTL
+)
 def bhl_item_from_bibliography(art: Article, cfg: LintConfig) -> Iterable[str]:
     if art.url is None:
         return
@@ -806,7 +808,7 @@ def bhl_item_from_bibliography(art: Article, cfg: LintConfig) -> Iterable[str]:
                     yield message
 
 
-@LINT.add("bhl_part_from_page", requires_network=True)
+@LINT.add("bhl_part_from_page", requires_network=True, reads=(), ttl=NETWORK_LINT_TTL)
 def bhl_part_from_page(art: Article, cfg: LintConfig) -> Iterable[str]:
     if art.url is None or art.title is None:
         return
@@ -1753,7 +1755,7 @@ def should_not_have_issue(art: Article) -> bool:
     )
 
 
-@LINT.add("citation_group")
+@LINT.add("citation_group", reads=("citation_group",))
 def check_citation_group(art: Article, cfg: LintConfig) -> Iterable[str]:
     if art.type is ArticleType.JOURNAL:
         if art.citation_group is None:
@@ -1938,7 +1940,7 @@ def infer_lsid_from_names(art: Article, cfg: LintConfig) -> Iterable[str]:
             continue
         try:
             datas = get_zoobank_data_for_act(lsid)
-        except requests.exceptions.HTTPError as e:
+        except httpx.HTTPError as e:
             print(f"Error retrieving ZooBank data for {lsid}: {e!r}")
             continue
         for zoobank_data in datas:
@@ -2999,10 +3001,13 @@ def data_from_zoobank(art: Article, cfg: LintConfig) -> Iterable[str]:
         lsid = tag.text
         try:
             data = zoobank.get_zoobank_data_for_article(lsid)
-        except (requests.exceptions.ReadTimeout, json.JSONDecodeError):
+        except (httpx.TimeoutException, json.JSONDecodeError):
             # Some LSIDs consistently time out for some reason; skip them
             # And some produce invalid JSON
             continue
+        except httpx.HTTPError as e:
+            print(f"Error retrieving ZooBank data for {lsid}: {e!r}")
+            continue
 
         yield from _check_zoobank_year(art, data)
 
@@ -0,0 +1,221 @@
+"""Index of articles by year and page range.
+
+Used to find the articles that a name may have been described in, given the year
+and page of the name. An ArticlePageIndex is built from the articles of a single
+citation group. For each year, and each year and volume, it holds an interval
+tree over the pages of the articles, so that finding the articles that contain a
+page takes logarithmic time instead of a scan over the whole citation group.
+
+"""
+
+import math
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+from taxonomy.db import helpers
+
+from .article import Article
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class _Node(Generic[T]):
+    center: float
+    # Intervals that contain center, sorted by start and by end (descending)
+    by_start: list[tuple[float, float, T]]
+    by_end: list[tuple[float, float, T]]
+    left: "_Node[T] | None"
+    right: "_Node[T] | None"
+
+
+def _build_node(intervals: list[tuple[float, float, T]]) -> _Node[T] | None:
+    if not intervals:
+        return None
+    endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+    center = endpoints[len(endpoints) // 2]
+    left = [interval for interval in intervals if interval[1] < center]
+    right = [interval for interval in intervals if interval[0] > center]
+    overlapping = [
+        interval for interval in intervals if interval[0] <= center <= interval[1]
+    ]
+    return _Node(
+        center=center,
+        by_start=sorted(overlapping, key=lambda interval: interval[0]),
+        by_end=sorted(overlapping, key=lambda interval: interval[1], reverse=True),
+        left=_build_node(left),
+        right=_build_node(right),
+    )
+
+
+class IntervalTree(Generic[T]):
+    """Static tree of closed intervals (start, end, value).
+
+    Finding the k intervals that contain a point takes O(log n + k).
+
+    """
+
+    def __init__(self, intervals: Iterable[tuple[float, float, T]]) -> None:
+        self.intervals = [
+            interval for interval in intervals if interval[0] <= interval[1]
+        ]
+        self._root = _build_node(self.intervals)
+
+    def stab(self, point: float) -> Iterator[tuple[float, float, T]]:
+        """Yield the intervals that contain the point."""
+        node = self._root
+        while node is not None:
+            if point < node.center:
+                for interval in node.by_start:
+                    if interval[0] > point:
+                        break
+                    yield interval
+                node = node.left
+            elif point > node.center:
+                for interval in node.by_end:
+                    if interval[1] < point:
+                        break
+                    yield interval
+                node = node.right
+            else:
+                yield from node.by_start
+                return
+
+    def containing(self, start: float, end: float) -> Iterator[T]:
+        """Yield the values of the intervals that contain all of [start, end]."""
+        for interval in self.stab(start):
+            if interval[1] >= end:
+                yield interval[2]
+
+
+def get_page_interval(art: Article) -> tuple[float, float] | None:
+    """Return the pages for which art.is_page_in_range() is true, if any."""
+    if art.pages:
+        try:
+            pages = int(art.pages)
+        except ValueError:
+            return None
+        return -math.inf, pages
+    elif art.start_page and art.end_page:
+        try:
+            start_page = int(art.start_page)
+            end_page = int(art.end_page)
+        except ValueError:
+            return None
+        if start_page > end_page:
+            return None
+        return start_page, end_page
+    else:
+        return None
+
+
+class ArticlePageIndex:
+    """Articles with a page range, indexed by year and volume.
+
+    find() only returns articles that have full text, like the search by year it
+    replaces; find_in_volume() returns all of them.
+
+    """
+
+    def __init__(self, articles: Iterable[Article]) -> None:
+        self._articles: list[Article] = []
+        by_year: defaultdict[int, list[tuple[float, float, int]]] = defaultdict(list)
+        by_year_volume: defaultdict[
+            tuple[int, str | None], list[tuple[float, float, int]]
+        ] = defaultdict(list)
+        for art in articles:
+            interval = get_page_interval(art)
+            if interval is None:
+                continue
+            # Results are returned in the order of the input articles
+            entry = (*interval, len(self._articles))
+            self._articles.append(art)
+            year = art.numeric_year()
+            by_year[year].append(entry)
+            by_year_volume[(year, art.volume)].append(entry)
+        self._by_year = {key: IntervalTree(value) for key, value in by_year.items()}
+        self._by_year_volume = {
+            key: IntervalTree(value) for key, value in by_year_volume.items()
+        }
+        self._author_names: dict[int, frozenset[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._articles)
+
+    def find(
+        self,
+        year: int,
+        start_page: int | None,
+        end_page: int | None,
+        *,
+        authors: AbstractSet[str] = frozenset(),
+    ) -> list[Article]:
+        """Return the articles from the year that contain the pages and have full text.
+
+        If authors is given, only articles that include all of them (as returned
+        by get_author_names()) are returned.
+
+        """
+        positions = self._query(self._by_year.get(year), start_page, end_page)
+        return [
+            art
+            for art in self._get_articles(positions)
+            if not art.lacks_full_text() and authors <= self.get_author_names(art)
+        ]
+
+    def find_in_volume(
+        self,
+        volume: str,
+        series: str | None,
+        start_page: int | None,
+        end_page: int | None,
+        *,
+        near_year: int,
+        max_distance: int = 5,
+    ) -> list[Article]:
+        """Return the articles in the volume that contain the pages.
+
+        Only articles published within max_distance years of near_year are
+        considered. If series is None, articles in any series match.
+
+        """
+        positions: list[int] = []
+        for year in range(near_year - max_distance, near_year + max_distance + 1):
+            tree = self._by_year_volume.get((year, volume))
+            positions += self._query(tree, start_page, end_page)
+        return [
+            art
+            for art in self._get_articles(positions)
+            if series is None or art.series == series
+        ]
+
+    def get_author_names(self, art: Article) -> frozenset[str]:
+        """Return the simplified family names of the authors of the article."""
+        try:
+            return self._author_names[art.id]
+        except KeyError:
+            names = frozenset(
+                helpers.simplify_string(person.family_name)
+                for person in art.get_authors()
+            )
+            self._author_names[art.id] = names
+            return names
+
+    def _query(
+        self,
+        tree: IntervalTree[int] | None,
+        start_page: int | None,
+        end_page: int | None,
+    ) -> list[int]:
+        if tree is None:
+            return []
+        pages = [page for page in (start_page, end_page) if page is not None]
+        if not pages:
+            return [position for _, _, position in tree.intervals]
+        return list(tree.containing(min(pages), max(pages)))
+
+    def _get_articles(self, positions: Iterable[int]) -> list[Article]:
+        return [self._articles[position] for position in sorted(set(positions))]
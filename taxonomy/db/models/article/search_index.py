@@ -0,0 +1,194 @@
+"""Bulk indexing of the PDF library into the full-text search database.
+
+index_library() compares the size and modification time of every PDF in the
+library against what was recorded when it was last indexed, extracts the text of
+new and changed files in a pool of worker processes, and writes the pages in
+batches, one transaction per batch. When a large part of the library changed,
+the FTS triggers are dropped for the duration and pages_fts is rebuilt once at
+the end; otherwise the triggers update it as pages are written. When any
+articles were indexed or removed, it also refreshes the facet tables that
+searches are filtered by (see sync_facets()).
+
+Because each batch records the files it indexed in the same transaction as
+their pages, an interrupted run can simply be started again: it picks up the
+files that were not yet written.
+
+"""
+
+import contextlib
+import multiprocessing
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+
+from taxonomy import config, getinput
+from taxonomy import search as _search
+from taxonomy.db import models
+from taxonomy.db.constants import ArticleKind
+
+from .article import Article
+
+_options = config.get_options()
+
+DEFAULT_BATCH_SIZE = 200
+# Number of extraction jobs submitted ahead for each worker process
+JOBS_PER_WORKER = 2
+# Rebuild pages_fts from scratch instead of updating it through the triggers if
+# at least this fraction of the indexed articles changed
+FULL_REBUILD_FRACTION = 0.1
+
+
+@dataclass
+class IndexStats:
+    unchanged: int = 0
+    indexed: int = 0
+    pages: int = 0
+    removed: int = 0
+    missing: int = 0
+    failed: int = 0
+
+
+@dataclass(frozen=True)
+class _Job:
+    article_id: int
+    year: int | None
+    path: Path
+    # Where the extracted text is cached
+    text_path: Path
+
+
+def _find_jobs(
+    indexed: dict[int, _search.FileStat], stats: IndexStats, *, force: bool
+) -> tuple[list[_Job], set[int]]:
+    """Return the PDFs to index, and the ids of all articles that have a PDF."""
+    jobs = []
+    pdf_ids = set()
+    query = Article.select_valid().filter(Article.kind == ArticleKind.electronic)
+    for art in getinput.print_every_n(query, label="articles", n=10_000):
+        if not art.ispdf() or art.isredirect():
+            continue
+        pdf_ids.add(art.id)
+        path = art.get_path()
+        try:
+            stat = _search.FileStat.of(path)
+        except FileNotFoundError:
+            stats.missing += 1
+            continue
+        if not force and indexed.get(art.id) == stat:
+            stats.unchanged += 1
+            continue
+        text_path = _options.pdf_text_path / f"{art.id}.txt"
+        jobs.append(_Job(art.id, art.valid_numeric_year(), path, text_path))
+    return jobs, pdf_ids
+
+
+def _extract(
+    jobs: Iterable[_Job], *, workers: int, stats: IndexStats
+) -> Iterator[_search.ExtractedArticle]:
+    """Extract the text of the PDFs, yielding the articles as they finish.
+
+    Only a few jobs per worker are submitted at a time, so that the pending
+    futures and their results do not pile up in memory for a large library.
+
+    """
+    job_iter = iter(jobs)
+    # Spawn rather than fork so no SQLite connection is shared with the workers
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futures: dict[Future[_search.ExtractedArticle], _Job] = {}
+
+        def submit_next() -> None:
+            job = next(job_iter, None)
+            if job is not None:
+                future = pool.submit(
+                    _search.extract_pdf_pages,
+                    job.article_id,
+                    job.path,
+                    job.text_path,
+                    job.year,
+                )
+                futures[future] = job
+
+        for _ in range(workers * JOBS_PER_WORKER):
+            submit_next()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                job = futures.pop(future)
+                submit_next()
+                try:
+                    yield future.result()
+                except Exception as e:
+                    stats.failed += 1
+                    print(f"Failed to extract text from {job.path}: {e!r}")
+
+
+def index_library(
+    *,
+    workers: int = 4,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    force: bool = False,
+    dry_run: bool = False,
+) -> IndexStats:
+    """Index new and changed PDFs into the search database.
+
+    With force=True, every PDF is indexed again, although text extracted earlier
+    is still reused if it is newer than the PDF.
+
+    """
+    stats = IndexStats()
+    indexed = _search.get_indexed_files()
+    jobs, pdf_ids = _find_jobs(indexed, stats, force=force)
+    # Articles that were deleted, or no longer point to a PDF
+    removed = [article_id for article_id in indexed if article_id not in pdf_ids]
+    print(
+        f"{len(jobs)} PDFs to index, {stats.unchanged} unchanged,"
+        f" {len(removed)} to remove, {stats.missing} missing"
+    )
+    if dry_run:
+        return stats
+    if jobs or removed or force or not _search.has_facets():
+        sync_facets()
+    if not jobs and not removed and _search.has_fts_triggers():
+        return stats
+    num_changed = len(jobs) + len(removed)
+    full_rebuild = (
+        not _search.has_fts_triggers()
+        or num_changed >= FULL_REBUILD_FRACTION * len(indexed)
+    )
+    with _search.deferred_fts_sync() if full_rebuild else contextlib.nullcontext():
+        if removed:
+            _search.remove_articles(removed)
+            stats.removed = len(removed)
+        batch: list[_search.ExtractedArticle] = []
+        extracted = _extract(jobs, workers=workers, stats=stats)
+        for art in getinput.print_every_n(extracted, label="PDFs", n=batch_size):
+            batch.append(art)
+            stats.indexed += 1
+            stats.pages += len(art.pages)
+            if len(batch) >= batch_size:
+                _search.write_articles(batch)
+                batch.clear()
+        if batch:
+            _search.write_articles(batch)
+        if full_rebuild:
+            print("Rebuilding the full-text index")
+    print(stats)
+    return stats
+
+
+def sync_facets() -> None:
+    """Copy the data that searches are filtered and faceted by to the search DB."""
+    facets_query = (
+        Article.select_valid()
+        .filter(Article.kind == ArticleKind.electronic)
+        .stringify(f"id, {Article.citation_group.name}, {Article.type.name}")
+    )
+    taxa_query = (
+        models.Name.select_valid()
+        .filter(models.Name.original_citation != None)
+        .stringify(f"{models.Name.taxon.name}, {models.Name.original_citation.name}")
+    )
+    _search.replace_facets(_options.db_filename, facets_query, taxa_query)
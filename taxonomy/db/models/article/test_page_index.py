@@ -0,0 +1,93 @@
+import math
+import random
+import sqlite3
+
+from taxonomy.db.constants import ArticleKind, ArticleType
+
+from .article import Article
+from .page_index import ArticlePageIndex, IntervalTree
+
+
+def test_interval_tree() -> None:
+    rng = random.Random(0)
+    intervals: list[tuple[float, float, int]] = []
+    for i in range(300):
+        start = rng.randrange(1, 500)
+        intervals.append((start, start + rng.randrange(0, 40), i))
+    intervals.append((-math.inf, 120, 300))
+    tree = IntervalTree(intervals)
+
+    for start in range(0, 560, 7):
+        for length in (0, 1, 15):
+            end = start + length
+            expected = {
+                value for lo, hi, value in intervals if lo <= start and end <= hi
+            }
+            assert set(tree.containing(start, end)) == expected
+
+
+def test_interval_tree_empty() -> None:
+    tree: IntervalTree[int] = IntervalTree([(5, 3, 0)])
+    assert tree.intervals == []
+    assert list(tree.stab(4)) == []
+
+
+def _page_matches(art: Article, start_page: int | None, end_page: int | None) -> bool:
+    return all(
+        art.is_page_in_range(page)
+        for page in (start_page, end_page)
+        if page is not None
+    )
+
+
+def test_article_page_index(db: sqlite3.Connection) -> None:
+    rng = random.Random(0)
+    rows = []
+    for i in range(1, 121):
+        first_page = rng.randrange(1, 300)
+        last_page = first_page + rng.randrange(0, 30)
+        rows.append(
+            (
+                i,
+                str(rng.choice([1900, 1901, 1903])),
+                str(rng.choice([1, 2])),
+                rng.choice([None, "A"]),
+                str(first_page),
+                str(last_page),
+                rng.choice([None, "100"]) if i % 10 == 0 else None,
+                ArticleType.JOURNAL.value,
+                rng.choice([ArticleKind.electronic, ArticleKind.no_copy]).value,
+            )
+        )
+    db.executemany(
+        "INSERT INTO article (id, year, volume, series, start_page, end_page, pages,"
+        " type, kind) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    db.commit()
+    articles = [Article(i) for i in range(1, 121)]
+    index = ArticlePageIndex(articles)
+
+    for page in range(0, 340, 5):
+        for start_page, end_page in ((page, None), (page, page + 3)):
+            for year in (1900, 1901, 1902):
+                # The search by year only considers articles with full text
+                assert index.find(year, start_page, end_page) == [
+                    art
+                    for art in articles
+                    if art.numeric_year() == year
+                    and not art.lacks_full_text()
+                    and _page_matches(art, start_page, end_page)
+                ]
+            for volume, series in (("1", None), ("2", "A")):
+                # The search by volume considers all of them
+                assert index.find_in_volume(
+                    volume, series, start_page, end_page, near_year=1898, max_distance=3
+                ) == [
+                    art
+                    for art in articles
+                    if art.volume == volume
+                    and (series is None or art.series == series)
+                    and _page_matches(art, start_page, end_page)
+                    and abs(art.numeric_year() - 1898) <= 3
+                ]
@@ -0,0 +1,67 @@
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from taxonomy import search
+
+from .search_index import IndexStats, _extract, _Job
+
+
+def _make_job(tmp_path: Path, article_id: int, text: str | None) -> _Job:
+    pdf_path = tmp_path / f"{article_id}.pdf"
+    pdf_path.write_bytes(b"not really a PDF")
+    text_path = tmp_path / f"{article_id}.txt"
+    if text is not None:
+        text_path.write_text(text)
+        # The cached text must be newer than the PDF to be reused
+        mtime = pdf_path.stat().st_mtime + 1
+        os.utime(text_path, (mtime, mtime))
+    return _Job(article_id, 1900 + article_id, pdf_path, text_path)
+
+
+def test_index_text(tmp_path: Path, search_db: sqlite3.Connection) -> None:
+    jobs = [
+        _make_job(tmp_path, 1, "Mus musculus\x0cRattus rattus"),
+        _make_job(tmp_path, 2, "Rattus norvegicus"),
+        _make_job(tmp_path, 3, "Myodes glareolus"),
+        _make_job(tmp_path, 4, None),
+    ]
+    stats = IndexStats()
+    with search.deferred_fts_sync():
+        extracted = list(_extract(jobs, workers=2, stats=stats))
+        search.write_articles(extracted)
+    assert stats.failed == 1
+    assert sorted((art.article_id, list(art.pages)) for art in extracted) == [
+        (1, ["Mus musculus", "Rattus rattus"]),
+        (2, ["Rattus norvegicus"]),
+        (3, ["Myodes glareolus"]),
+    ]
+    assert search.has_fts_triggers()
+    rows = search_db.execute("""
+        SELECT article_id, page_num, year FROM pages
+        WHERE rowid IN (SELECT rowid FROM pages_fts WHERE pages_fts MATCH 'rattus')
+        ORDER BY article_id
+        """).fetchall()
+    assert rows == [(1, 2, 1901), (2, 1, 1902)]
+    assert set(search.get_indexed_files()) == {1, 2, 3}
+
+
+def _write_and_fail(search_db: sqlite3.Connection) -> None:
+    with search.deferred_fts_sync():
+        search_db.execute(
+            "INSERT INTO pages (article_id, page_num, year, text)"
+            " VALUES (1, 1, 1900, 'Rattus rattus')"
+        )
+        search_db.commit()
+        assert not search.has_fts_triggers()
+        raise RuntimeError
+
+
+def test_deferred_fts_sync_error(search_db: sqlite3.Connection) -> None:
+    with pytest.raises(RuntimeError):
+        _write_and_fail(search_db)
+    # The index is rebuilt and the triggers restored even if the update fails
+    assert search.has_fts_triggers()
+    assert search.count_articles("rattus") == search.HitCount(1, is_exact=True)
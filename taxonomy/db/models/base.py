@@ -1,63 +1,206 @@
 from __future__ import annotations
 
 import builtins
+import contextlib
 import enum
 import functools
 import importlib
 import inspect
+import itertools
 import json
+import multiprocessing
 import pickle
 import re
 import sqlite3
+import threading
 import traceback
 import typing
 import urllib.parse
 from collections import defaultdict
-from collections.abc import Callable, Collection, Container, Iterable, Mapping, Sequence
+from collections.abc import (
+    Callable,
+    Collection,
+    Container,
+    Iterable,
+    Iterator,
+    Mapping,
+    Sequence,
+)
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, replace
 from functools import partial
 from types import NoneType
 from typing import Any, ClassVar, Generic, Self, TypeVar
 
 import typing_inspect
-from clirm import Clirm, Field, Model, Query
+from clirm import Clirm, Field, Func, Model, Query
+from clirm.base import Condition, OrderBy
 
 from taxonomy import adt, config, events, getinput
 from taxonomy.apis.cloud_search import SearchField
-from taxonomy.db import cached_data, derived_data, helpers, models
+from taxonomy.db import (
+    cached_data,
+    derived_data,
+    helpers,
+    lint_results,
+    models,
+    tag_index,
+    url_cache,
+)
 from taxonomy.db.constants import StringKind
 
 settings = config.get_options()
 
 
 class LazyClirm(Clirm):
-    _conn: sqlite3.Connection | None = None
+    """Clirm instance that connects lazily, with one connection per thread.
+
+    This allows hsweb to run resolvers in a pool of worker threads.
+
+    """
+
+    _local: threading.local
 
     @property
     def conn(self) -> sqlite3.Connection:
-        if self._conn is None:
-            self._conn = self.make_connection()
-        return self._conn
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self.make_connection()
+        return conn
 
     @conn.setter
-    def conn(self, value: sqlite3.Connection) -> None:
-        self._conn = value
+    def conn(self, value: sqlite3.Connection | None) -> None:
+        self._local.conn = value
 
     def reconnect(self) -> None:
-        if self._conn is not None:
-            self._conn.close()
-        self._conn = self.make_connection()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = self.make_connection()
 
     def make_connection(self) -> sqlite3.Connection:
         # static analysis: ignore[internal_error]
         return sqlite3.connect(str(settings.db_filename))
 
     def __init__(self) -> None:
+        self._local = threading.local()
         super().__init__(None)  # static analysis: ignore[incompatible_argument]
 
 
 _getters: dict[tuple[type[Model], str | None], _NameGetter[Any]] = {}
 
+_recorded_objects = threading.local()
+# Guards clirm's identity maps, which hsweb's worker threads share
+_instance_cache_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def record_objects() -> Iterator[set[tuple[str, int]]]:
+    """Record the (call_sign, id) of every object instantiated in this thread.
+
+    Objects are instantiated for every row a query returns and every foreign key
+    that is followed, and load_many() records the objects it finds already
+    loaded, so this covers every object that is read.
+
+    """
+    outer = getattr(_recorded_objects, "objects", None)
+    objects: set[tuple[str, int]] = set()
+    _recorded_objects.objects = objects
+    try:
+        yield objects
+    finally:
+        _recorded_objects.objects = outer
+        if outer is not None:
+            outer |= objects
+
+
+def _record_object(obj: BaseModel) -> None:
+    objects = getattr(_recorded_objects, "objects", None)
+    if objects is not None:
+        objects.add((obj.call_sign, obj.id))
+
+
+# Active trace callbacks per connection; connections belong to a single thread
+_trace_callbacks = threading.local()
+
+
+@contextlib.contextmanager
+def trace_queries(
+    conn: sqlite3.Connection, callback: Callable[[str], object]
+) -> Iterator[None]:
+    """Call callback with every statement run on the connection within the block.
+
+    sqlite3 keeps a single trace callback and has no way to retrieve it, so code
+    that traces queries should use this function, which calls the callbacks of
+    all active blocks and removes the trace callback when the last one exits.
+
+    """
+    if not hasattr(_trace_callbacks, "by_conn"):
+        _trace_callbacks.by_conn = {}
+    callbacks: list[Callable[[str], object]] = _trace_callbacks.by_conn.setdefault(
+        conn, []
+    )
+
+    def trace(statement: str) -> None:
+        for cb in list(callbacks):
+            cb(statement)
+
+    if not callbacks:
+        conn.set_trace_callback(trace)
+    callbacks.append(callback)
+    try:
+        yield
+    finally:
+        callbacks.remove(callback)
+        if not callbacks:
+            del _trace_callbacks.by_conn[conn]
+            conn.set_trace_callback(None)
+
+
+PREFETCH_BATCH_SIZE = 500
+LINT_SHARD_SIZE = 1000
+
+ModelT = TypeVar("ModelT", bound="BaseModel")
+
+
+@dataclass
+class BaseQuery(Query[ModelT]):
+    """Query that can load related objects in bulk.
+
+    For example, Name.select_valid().prefetch("taxon", "original_citation__citation_group")
+    loads the taxa, original citations, and their citation groups for each batch of
+    names with one query per model, instead of one query per name.
+
+    """
+
+    prefetch_paths: Sequence[str] = ()
+
+    def prefetch(self, *paths: str) -> BaseQuery[ModelT]:
+        return replace(self, prefetch_paths=[*self.prefetch_paths, *paths])
+
+    def filter(self, *conds: Condition, **kwargs: Any) -> BaseQuery[ModelT]:
+        query = super().filter(*conds, **kwargs)
+        assert isinstance(query, BaseQuery)
+        return query
+
+    def limit(self, limit: int | None) -> BaseQuery[ModelT]:
+        query = super().limit(limit)
+        assert isinstance(query, BaseQuery)
+        return query
+
+    def order_by(self, *orders: OrderBy | Field[Any] | Func) -> BaseQuery[ModelT]:
+        query = super().order_by(*orders)
+        assert isinstance(query, BaseQuery)
+        return query
+
+    def __iter__(self) -> Iterator[ModelT]:
+        if not self.prefetch_paths:
+            yield from super().__iter__()
+            return
+        for batch in itertools.batched(super().__iter__(), PREFETCH_BATCH_SIZE):
+            prefetch_related(batch, *self.prefetch_paths)
+            yield from batch
+
 
 class _FieldEditor:
     """For easily editing fields. This is exposed as object.e."""
@@ -90,7 +233,6 @@ class LintConfig:
 
 
 ADTT = TypeVar("ADTT", bound=adt.ADT)
-ModelT = TypeVar("ModelT", bound="BaseModel")
 Linter = Callable[[ModelT, LintConfig], Iterable[str]]
 
 
@@ -117,6 +259,30 @@ class BaseModel(Model):
 
     e: ClassVar[_FieldEditor] = _FieldEditor()
 
+    # Related objects loaded by prefetch_related(), kept here so they stay in
+    # clirm's identity map for as long as this object is alive.
+    _prefetched_objects: list[BaseModel] | None = None
+
+    def __new__(cls, id: int, **kwargs: Any) -> Self:
+        # Look up and initialize the object under the lock, so that threads
+        # never see it half built. __init__ runs outside the lock, so it must
+        # not change the shared instance.
+        with _instance_cache_lock:
+            inst = cls._clirm_instance_cache.get(id)
+            if inst is None:
+                inst = object.__new__(cls)
+                Model.__init__(inst, id, **kwargs)
+                cls._clirm_instance_cache[id] = inst
+            else:
+                inst._clirm_data.update(kwargs)
+        return inst
+
+    def __init__(self, id: int, **kwargs: Any) -> None:
+        # Python calls __init__ on every instance __new__ returns, including
+        # those from the identity map, whose data must be kept (e.g. after
+        # prefetching). They are initialized in __new__.
+        _record_object(self)
+
     def __init_subclass__(cls) -> None:
         super().__init_subclass__()
         if hasattr(cls, "call_sign"):
@@ -125,10 +291,56 @@ class BaseModel(Model):
         for field in cls.derived_fields:
             if field.typ is derived_data.SetLater:
                 field.typ = cls
+        if "creation_event" in cls.__dict__:
+            cls.creation_event.on(derived_data.mark_dirty)
+        if "save_event" in cls.__dict__:
+            cls.save_event.on(derived_data.mark_dirty)
+
+    @classmethod
+    def select(cls) -> BaseQuery[Self]:
+        return BaseQuery(cls)
+
+    @classmethod
+    def get_reference_fields(cls) -> list[str]:
+        """Fields that reference other objects, directly or through tags."""
+        return [
+            name
+            for name, field in cls.clirm_fields.items()
+            if isinstance(field, ADTField) or issubclass(field.type_object, BaseModel)
+        ]
+
+    @classmethod
+    @functools.cache
+    def _get_adt_field_names(cls) -> frozenset[str]:
+        return frozenset(
+            field.name
+            for field in cls.clirm_fields.values()
+            if isinstance(field, ADTField)
+        )
+
+    @classmethod
+    def with_tag(cls, tag_cls: type[adt.ADT], **kwargs: Any) -> Query[Self]:
+        """Return valid objects that have a tag of the given type.
+
+        Keyword arguments filter on the arguments of the tag, which must be references
+        to other objects or integers, e.g. Name.with_tag(NameTag.PreoccupiedBy,
+        name=nam). This uses the tag index instead of scanning the serialized tags.
+
+        """
+        for field in cls.clirm_fields.values():
+            if (
+                isinstance(field, ADTField)
+                and field.adt_type._tag_to_member.get(tag_cls._tag) is tag_cls
+            ):
+                return cls.select_valid().filter(
+                    tag_index.HasTag(field, tag_cls, kwargs)
+                )
+        raise ValueError(f"{cls.__name__} has no field for {tag_cls}")
 
     @classmethod
     def create(cls, **kwargs: Any) -> Self:
         result = super().create(**kwargs)
+        tag_index.update_object(result)
         if hasattr(cls, "creation_event"):
             cls.creation_event.trigger(result)
         return result
@@ -149,7 +361,17 @@ class BaseModel(Model):
         enable_all: bool = False,
         experimental: bool = False,
         query: Iterable[Self] | None = None,
+        workers: int = 0,
     ) -> list[tuple[Self, list[str]]]:
+        """Lint all objects (or those in query) and return those with messages.
+
+        If workers is more than 1, the objects are split into shards that are
+        linted in a pool of that many processes, with autofix and interactive
+        mode disabled. Objects that produced messages are then linted again in
+        this process with the requested configuration, so that fixes are applied
+        one at a time. A custom linter must be picklable to be used in this mode.
+
+        """
         cls.clear_lint_caches()
         cfg = LintConfig(
             autofix=autofix,
@@ -159,9 +381,13 @@ class BaseModel(Model):
             enable_all=enable_all,
             experimental=experimental,
         )
+        if workers > 1:
+            bad = cls._lint_all_in_parallel(linter, cfg, query, workers=workers)
+            cls.clear_lint_caches()
+            return bad
         if query is None:
             if linter is None:
-                query = cls.select()
+                query = cls.select().prefetch(*cls.get_reference_fields())
             else:
                 # For specific linters, only worry about valid names
                 query = cls.select_valid()
@@ -177,6 +403,53 @@ class BaseModel(Model):
         cls.clear_lint_caches()
         return bad
 
+    @classmethod
+    def _lint_all_in_parallel(
+        cls,
+        linter: Linter[Self] | None,
+        cfg: LintConfig,
+        query: Iterable[Self] | None,
+        *,
+        workers: int,
+    ) -> list[tuple[Self, list[str]]]:
+        if query is None:
+            query = cls.select() if linter is None else cls.select_valid()
+        if isinstance(query, Query):
+            sql, params = query.stringify("id")
+            ids = [row[0] for row in cls.clirm.select(sql, params)]
+        else:
+            ids = [obj.id for obj in query]
+        shards = list(itertools.batched(ids, LINT_SHARD_SIZE))
+        worker_cfg = replace(cfg, autofix=False, interactive=False)
+        parent_linter = cls.general_lint if linter is None else linter
+        bad = []
+        # Use fresh processes rather than forking, so that no SQLite connection
+        # is shared with the parent. Each worker keeps its lint caches warm
+        # across the shards it processes.
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            results = pool.map(
+                _lint_shard,
+                itertools.repeat(cls),
+                itertools.repeat(linter),
+                itertools.repeat(worker_cfg),
+                shards,
+            )
+            for shard_results in getinput.print_every_n(
+                results, label=f"{cls.__name__} shards", n=10
+            ):
+                for oid, messages in shard_results:
+                    obj = cls(oid)
+                    if cfg.autofix or cfg.interactive:
+                        # Apply fixes one object at a time in this process
+                        messages = list(parent_linter(obj, cfg))
+                    if messages:
+                        for message in messages:
+                            print(message)
+                        bad.append((obj, messages))
+        return bad
+
     def format(self, *, quiet: bool = False, cfg: LintConfig = LintConfig()) -> bool:
         # First autofix
         for _ in self.general_lint(replace(cfg, interactive=False)):
@@ -554,7 +827,12 @@ class BaseModel(Model):
         return []
 
     def save(self) -> None:
+        changed_tag_fields = self._clirm_dirty_fields & self._get_adt_field_names()
+        if self._clirm_dirty_fields:
+            lint_results.note_save()
         super().save()
+        if changed_tag_fields:
+            tag_index.update_object(self, changed_tag_fields)
         if hasattr(self, "save_event"):
             self.save_event.trigger(self)
 
@@ -678,6 +956,16 @@ class BaseModel(Model):
                 print(f"Computing {field.name}", flush=True)
                 field.compute_and_store_all(cls)
 
+    @staticmethod
+    def update_derived_fields(*, verbose: bool = True) -> derived_data.Changes:
+        """Recompute derived fields affected by objects saved since the last update."""
+        dirty = derived_data.get_dirty_objects()
+        changes = derived_data.update_derived_data(
+            BaseModel.__subclasses__(), dirty, verbose=verbose
+        )
+        derived_data.clear_dirty_objects()
+        return changes
+
     def sort_key(self) -> Any:
         if hasattr(self, "label_field"):
             return getattr(self, self.label_field)
@@ -827,9 +1115,11 @@ class BaseModel(Model):
         return cls(data)
 
     @classmethod
-    def select_valid(cls) -> Query[Self]:
+    def select_valid(cls) -> BaseQuery[Self]:
         """Subclasses may override this to filter out removed instances."""
-        return cls.add_validity_check(cls.select())
+        query = cls.add_validity_check(cls.select())
+        assert isinstance(query, BaseQuery)
+        return query
 
     @classmethod
     def add_validity_check(cls, query: Query[Self]) -> Query[Self]:
@@ -1553,7 +1843,7 @@ class _NameGetter(Generic[ModelT]):
         self.cls = cls
         self.field = field
         self.field_obj = getattr(cls, field if field is not None else cls.label_field)
-        self._data: set[str] | None = None
+        self._data: getinput.PrefixIndex | None = None
         self._encoded_data: set[str] | None = None
         if hasattr(cls, "creation_event"):
             cls.creation_event.on(self.add_name)
@@ -1614,7 +1904,7 @@ class _NameGetter(Generic[ModelT]):
         if self._data is None:
             return
         key = self._cache_key()
-        cached_data.set(key, pickle.dumps((self._data, self._encoded_data)))
+        cached_data.set(key, pickle.dumps((list(self._data), self._encoded_data)))
 
     def add_name(self, nam: ModelT) -> None:
         if self._data is not None:
@@ -1623,14 +1913,20 @@ class _NameGetter(Generic[ModelT]):
     def _cache_key(self) -> str:
         return f"{self.cls.call_sign}:{self.field}"
 
-    def _add_obj(self, obj: ModelT) -> None:
-        assert self._data is not None
-        assert self._encoded_data is not None
+    def _get_value(self, obj: ModelT) -> str | None:
         val = obj.get_value_to_show_for_field(self.field)
         if val is None:
-            return
+            return None
         val = str(val)
         if val == "":
+            return None
+        return val
+
+    def _add_obj(self, obj: ModelT) -> None:
+        assert self._data is not None
+        assert self._encoded_data is not None
+        val = self._get_value(obj)
+        if val is None:
             return
         self._data.add(val)
         self._encoded_data.add(getinput.encode_name(val))
@@ -1702,7 +1998,7 @@ class _NameGetter(Generic[ModelT]):
                 continue
         assert False, "should never get here"
 
-    def _get_data(self) -> set[str]:
+    def _get_data(self) -> getinput.PrefixIndex:
         self._warm_cache()
         assert self._data is not None
         return self._data
@@ -1729,7 +2025,13 @@ class _NameGetter(Generic[ModelT]):
     def get_all(self) -> list[str]:
         self._warm_cache()
         assert self._data is not None
-        return sorted(self._data)
+        return list(self._data)
+
+    def complete(self, prefix: str, limit: int | None = None) -> list[str]:
+        """Return up to limit values starting with prefix, in sorted order."""
+        self._warm_cache()
+        assert self._data is not None
+        return self._data.search(prefix, limit=limit)
 
     def _warm_cache(self) -> None:
         if self._data is not None:
@@ -1737,14 +2039,24 @@ class _NameGetter(Generic[ModelT]):
         key = self._cache_key()
         data = cached_data.get(key)
         if data is not None:
-            self._data, self._encoded_data = pickle.loads(data)
+            values, self._encoded_data = pickle.loads(data)
+            if isinstance(values, list):
+                # save_cache() stores the values in sorted order
+                self._data = getinput.PrefixIndex.from_sorted(values)
+            else:
+                # Stored as a set by older versions
+                self._data = getinput.PrefixIndex(values)
         else:
-            self._data = set()
-            self._encoded_data = set()
+            values = []
             for i, obj in enumerate(self.cls.select_for_field(self.field)):
                 if i % 1000 == 0:
                     print(f"{self}: {i} done")
-                self._add_obj(obj)
+                val = self._get_value(obj)
+                if val is not None:
+                    values.append(val)
+            # Build the index in one go; adding values one by one is quadratic
+            self._data = getinput.PrefixIndex(values)
+            self._encoded_data = {getinput.encode_name(val) for val in self._data}
             self.save_cache()
 
 
@@ -1789,18 +2101,215 @@ def get_tag_based_derived_field(
         if skip_filter:
             query = field_obj != None
         else:
-            query = field_obj.contains(f"[{tag_id},")
+            query = tag_index.HasTag(field_obj, lazy_tag_cls())
         for obj in model_cls.select_valid().filter(query):
             for tag in obj.get_raw_tags_field(tag_field):
                 if tag[0] == tag_id:
                     out[tag[field_index]].append(obj)
         return out
 
+    def compute_incremental(
+        current: Mapping[int, Any],
+        changes: Mapping[derived_data.ChangeKey, Collection[int]],
+    ) -> dict[int, list[BaseModel]]:
+        model_cls = lazy_model_cls()
+        changed_ids = set(changes.get((model_cls.call_sign, None), ()))
+        if not changed_ids:
+            return {}
+        tag_id = lazy_tag_cls()._tag
+        # Objects that used to reference a changed object may have lost the reference
+        affected = {
+            oid for oid, value in current.items() if not changed_ids.isdisjoint(value)
+        }
+        new_references: dict[int, list[BaseModel]] = defaultdict(list)
+        for obj in itertools.chain.from_iterable(
+            model_cls.select_valid().filter(model_cls.id.is_in(batch))
+            for batch in itertools.batched(sorted(changed_ids), 500)
+        ):
+            for tag in obj.get_raw_tags_field(tag_field):
+                if tag[0] == tag_id:
+                    new_references[tag[field_index]].append(obj)
+        affected |= new_references.keys()
+        out = {}
+        for oid in affected:
+            kept = [
+                model_cls(ref_id)
+                for ref_id in current.get(oid, ())
+                if ref_id not in changed_ids
+            ]
+            out[oid] = sorted(
+                [*kept, *new_references.get(oid, ())], key=lambda obj: obj.id
+            )
+        return out
+
     return derived_data.DerivedField(
         name,
         derived_data.LazyType(lambda: list[lazy_model_cls()]),  # type: ignore[arg-type,misc]
         compute_all=compute_all,
         pull_on_miss=False,
+        dependencies=[derived_data.Dependency(lazy_model_cls)],
+        compute_incremental=compute_incremental,
+    )
+
+
+def prefetch_related(objs: Iterable[BaseModel], *paths: str) -> None:
+    """Load the objects referenced by objs through the given fields in bulk.
+
+    Each path is a field name, optionally followed by fields on the referenced
+    objects separated by "__" (e.g. "original_citation__citation_group"). For ADT
+    fields, all objects referenced from the tags are loaded.
+
+    Loaded objects are kept alive by the objects that reference them, so that
+    accessing the field later finds them in clirm's identity map.
+
+    """
+    objs = list(objs)
+    subpaths: dict[str, list[str]] = {}
+    for path in paths:
+        field_name, _, rest = path.partition("__")
+        field_subpaths = subpaths.setdefault(field_name, [])
+        if rest:
+            field_subpaths.append(rest)
+    for field_name, field_subpaths in subpaths.items():
+        referrers: list[tuple[BaseModel, list[tuple[type[BaseModel], int]]]] = []
+        ids_by_cls: dict[type[BaseModel], set[int]] = defaultdict(set)
+        for obj in objs:
+            field_obj = type(obj).clirm_fields.get(field_name)
+            if field_obj is None:
+                raise ValueError(f"{type(obj).__name__} has no field {field_name}")
+            refs = list(_get_references(field_obj, field_obj.get_raw(obj)))
+            for ref_cls, ref_id in refs:
+                ids_by_cls[ref_cls].add(ref_id)
+            referrers.append((obj, refs))
+        loaded = {
+            (ref_cls, ref_obj.id): ref_obj
+            for ref_cls, ids in ids_by_cls.items()
+            for ref_obj in load_many(ref_cls, ids)
+        }
+        for obj, refs in referrers:
+            if obj._prefetched_objects is None:
+                obj._prefetched_objects = []
+            obj._prefetched_objects.extend(loaded[ref] for ref in refs if ref in loaded)
+        if field_subpaths:
+            prefetch_related(loaded.values(), *field_subpaths)
+
+
+def iter_tags(
+    field_obj: ADTField[Any], raw_value: Any
+) -> Iterable[tuple[type[adt.ADT], list[Any]]]:
+    """Yield the member class and serialized arguments of each tag in an ADT field."""
+    if not raw_value:
+        return
+    tag_cls = field_obj.adt_type
+    for tag in json.loads(raw_value):
+        member_cls = tag_cls._tag_to_member.get(tag[0])
+        if member_cls is not None:
+            yield member_cls, tag[1:]
+
+
+def _get_references(
+    field_obj: Field[Any], raw_value: Any
+) -> Iterable[tuple[type[BaseModel], int]]:
+    if raw_value is None:
+        return
+    if isinstance(field_obj, ADTField):
+        for member_cls, args in iter_tags(field_obj, raw_value):
+            for arg_type, value in zip(
+                member_cls._attributes.values(), args, strict=False
+            ):
+                if (
+                    value is not None
+                    and isinstance(arg_type, type)
+                    and issubclass(arg_type, BaseModel)
+                ):
+                    yield arg_type, value
+    elif issubclass(field_obj.type_object, BaseModel):
+        yield field_obj.type_object, raw_value
+
+
+def _lint_shard(
+    model_cls: type[BaseModel],
+    linter: Linter[Any] | None,
+    cfg: LintConfig,
+    ids: Sequence[int],
+) -> list[tuple[int, list[str]]]:
+    """Lint a shard of objects in a worker process of BaseModel.lint_all()."""
+    out = []
+    for batch in itertools.batched(ids, PREFETCH_BATCH_SIZE):
+        query = model_cls.select().filter(model_cls.id.is_in(batch))
+        if linter is None:
+            query = query.prefetch(*model_cls.get_reference_fields())
+        objs = {obj.id: obj for obj in query}
+        for oid in batch:
+            if oid not in objs:
+                continue
+            obj = objs[oid]
+            messages = list(
+                linter(obj, cfg) if linter is not None else obj.general_lint(cfg)
+            )
+            if messages:
+                out.append((oid, messages))
+    # Worker processes exit without running atexit handlers
+    url_cache.flush()
+    return out
+
+
+def load_many(model_cls: type[ModelT], ids: Collection[int]) -> list[ModelT]:
+    """Load the given objects, skipping those that are already loaded."""
+    out = []
+    missing = []
+    for oid in ids:
+        obj = model_cls._clirm_instance_cache.get(oid)
+        if obj is not None and len(obj._clirm_data) > 1:
+            # Not instantiated again, so record_objects() would miss it
+            _record_object(obj)
+            out.append(obj)
+        else:
+            missing.append(oid)
+    for batch in itertools.batched(sorted(missing), PREFETCH_BATCH_SIZE):
+        out += model_cls.select().filter(model_cls.id.is_in(batch))
+    return out
+
+
+def get_foreign_key_dependency(
+    lazy_model_cls: Callable[[], type[BaseModel]], field_name: str
+) -> derived_data.Dependency:
+    """Dependency for a derived field that lists the objects referencing an object."""
+
+    def get_affected_ids(obj: BaseModel) -> list[int]:
+        target = getattr(obj, field_name)
+        if target is None:
+            return []
+        return [target.id]
+
+    return derived_data.Dependency(
+        lazy_model_cls, get_affected_ids=get_affected_ids, include_referrers=True
+    )
+
+
+def get_ancestor_dependency(
+    lazy_model_cls: Callable[[], type[BaseModel]],
+    get_node: Callable[[Any], Any],
+    *,
+    derived_field: str | None = None,
+) -> derived_data.Dependency:
+    """Dependency for a derived field that summarizes the tree below an object.
+
+    get_node maps the changed object to the node it is attached to, or None. That
+    node and all its ancestors (following their parent field) are affected.
+
+    """
+
+    def get_affected_ids(obj: BaseModel) -> list[int]:
+        ids: list[int] = []
+        node = get_node(obj)
+        while node is not None and node.id not in ids:
+            ids.append(node.id)
+            node = node.parent
+        return ids
+
+    return derived_data.Dependency(
+        lazy_model_cls, get_affected_ids=get_affected_ids, derived_field=derived_field
     )
 
 
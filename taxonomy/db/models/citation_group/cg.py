@@ -14,7 +14,12 @@ from taxonomy.apis.zoobank import article_lsid_has_valid_data
 from taxonomy.db import constants, helpers, models
 from taxonomy.db.constants import URL, ArticleIdentifier, Managed, Markdown, Regex
 from taxonomy.db.derived_data import DerivedField, LazyType
-from taxonomy.db.models.base import ADTField, BaseModel, LintConfig
+from taxonomy.db.models.base import (
+    ADTField,
+    BaseModel,
+    LintConfig,
+    get_foreign_key_dependency,
+)
 from taxonomy.db.models.region import Region
 
 CGTagT = TypeVar("CGTagT", bound="CitationGroupTag")
@@ -49,11 +54,17 @@ class CitationGroup(BaseModel):
             "ordered_names",
             LazyType(lambda: list[models.Name]),
             lambda cg: models.name.name.get_ordered_names(cg.names),
+            dependencies=[
+                get_foreign_key_dependency(lambda: models.Name, "citation_group")
+            ],
         ),
         DerivedField(
             "ordered_articles",
             LazyType(lambda: list[models.Article]),
             lambda cg: models.article.article.get_ordered_articles(cg.article_set),
+            dependencies=[
+                get_foreign_key_dependency(lambda: models.Article, "citation_group")
+            ],
         ),
     ]
 
@@ -19,12 +19,12 @@ from taxonomy.adt import ADT
 from taxonomy.apis import bhl
 from taxonomy.config import get_options, is_network_available
 from taxonomy.db import constants as db_constants
-from taxonomy.db import helpers
+from taxonomy.db import helpers, url_cache
 from taxonomy.db.constants import Managed, Markdown
 from taxonomy.db.models.article.check import LsFile as ArticleLsFile
 from taxonomy.db.models.article.check import burst as article_burst
 from taxonomy.db.models.citation_group import lint as cg_lint
-from taxonomy.db.url_cache import CacheDomain, run_query
+from taxonomy.db.url_cache import CacheDomain
 from taxonomy.getinput import CallbackMap
 
 from .base import ADTField, BaseModel, LintConfig
@@ -564,24 +564,11 @@ def _extract_pdf_text(pdf_path: Path, *, max_pages: int = 2) -> str:
 
 
 def _urlcache_get(domain: CacheDomain, key: str) -> str | None:
-    rows = run_query(
-        """
-        SELECT content FROM url_cache WHERE domain = ? AND key = ?
-        """,
-        (domain.value, key),
-    )
-    if len(rows) == 1:
-        return rows[0][0]
-    return None
+    return url_cache.get(domain, key)
 
 
 def _urlcache_set(domain: CacheDomain, key: str, content: str) -> None:
-    run_query(
-        """
-        INSERT INTO url_cache(domain, key, content) VALUES(?, ?, ?)
-        """,
-        (domain.value, key, content),
-    )
+    url_cache.store(domain, key, content)
 
 
 def _make_informative_preview_pdf(
@@ -2,18 +2,33 @@
 
 from __future__ import annotations
 
+import datetime
+import hashlib
+import marshal
 import traceback
-from collections.abc import Callable, Collection, Generator, Hashable, Iterable
+from collections.abc import (
+    Callable,
+    Collection,
+    Generator,
+    Hashable,
+    Iterable,
+    Sequence,
+)
 from dataclasses import dataclass, field, replace
 from functools import cache
 from typing import Generic, Protocol, TypeVar
 
 from taxonomy.config import is_network_available
+from taxonomy.db import lint_results
 
 from .base import BaseModel, LintConfig
+from .lint_profile import get_active_profiler
 
 ModelT = TypeVar("ModelT", bound=BaseModel)
 
+# How long stored results stay valid for linters that call web APIs
+NETWORK_LINT_TTL = datetime.timedelta(days=30)
+
 Linter = Callable[[ModelT, LintConfig], Iterable[str]]
 DuplicateKey = Callable[[ModelT], Hashable | None]
 DuplicateFixer = Callable[[Hashable, list[ModelT], LintConfig], None]
@@ -30,18 +45,56 @@ class LintWrapper(Generic[ModelT]):
     label: str
     lint: Lint[ModelT]
     requires_network: bool = False
+    # Paths of foreign keys this linter reads (e.g. "original_citation"), or
+    # functions returning other objects it reads. If set, clean results are
+    # stored in lint_results and the linter is skipped when the object and the
+    # objects it reads have not changed.
+    reads: Sequence[lint_results.InputPath] | None = None
+    version: int = 1
+    # How long stored clean results stay valid, for linters that also depend on
+    # data outside the database
+    ttl: datetime.timedelta | None = None
 
-    def __call__(self, obj: ModelT, cfg: LintConfig) -> Generator[str, None, set[str]]:
+    def __call__(
+        self,
+        obj: ModelT,
+        cfg: LintConfig,
+        results: lint_results.ObjectResults | None = None,
+    ) -> Generator[str, None, set[str]]:
         if self.requires_network and not is_network_available():
             return {self.label}
+        profiler = get_active_profiler()
+        if self.reads is None:
+            results = None
+        reads = self.reads or ()
+        if results is not None:
+            version = self.get_version(cfg)
+            input_hash = results.get_input_hash(reads)
+            if results.is_clean(self.label, version, input_hash, self.ttl):
+                if profiler is not None:
+                    profiler.record_skip(self.profile_key)
+                return set()
         try:
-            issues = list(self.linter(obj, cfg))
+            if profiler is None:
+                issues = list(self.linter(obj, cfg))
+            else:
+                with profiler.measure(self.profile_key):
+                    issues = list(self.linter(obj, cfg))
         except Exception as e:
             traceback.print_exc()
             yield f"{obj}: error running {self.label} linter: {e}"
+            if results is not None:
+                results.record_failure(self.label)
             return set()
         if not issues:
+            if results is not None:
+                if cfg.autofix:
+                    # The linter may have fixed something
+                    input_hash = results.get_input_hash(reads)
+                results.record_clean(self.label, version, input_hash)
             return set()
+        if results is not None:
+            results.record_failure(self.label)
         ignored_lints = self.lint.get_ignored_lints(obj)
         if self.label in ignored_lints:
             return {self.label}
@@ -49,6 +102,26 @@ class LintWrapper(Generic[ModelT]):
             yield f"{obj}: {issue} [{self.label}]"
         return set()
 
+    @property
+    def profile_key(self) -> str:
+        return f"{self.lint.model_cls.__name__}.{self.label}"
+
+    def get_version(self, cfg: LintConfig) -> str:
+        """Identify the code of the linter and the config options it may use.
+
+        The hash covers the linter function itself, but not the helpers it
+        calls; bump the version passed to Lint.add() when those change.
+
+        """
+        code_hash = _get_code_hash(self.linter)
+        return f"{self.version}:{code_hash}:{cfg.experimental:d}{cfg.manual_mode:d}"
+
+
+@cache
+def _get_code_hash(linter: Callable[..., object]) -> str:
+    code = marshal.dumps(linter.__code__)
+    return hashlib.blake2b(code, digest_size=8).hexdigest()
+
 
 @dataclass
 class Lint(Generic[ModelT]):
@@ -71,10 +144,39 @@ class Lint(Generic[ModelT]):
         disabled: bool = False,
         requires_network: bool = False,
         clear_caches: Callable[[], None] | None = None,
+        reads: Sequence[lint_results.InputPath] | None = None,
+        version: int = 1,
+        ttl: datetime.timedelta | None = None,
     ) -> Callable[[Linter[ModelT]], LintWrapper[ModelT]]:
+        """Register a linter.
+
+        Pass reads if the linter's outcome depends only on the object itself and
+        on the objects reachable through the given foreign key paths or returned
+        by the given functions (use () if it reads nothing else), and it reports
+        every problem it finds as a message. Clean results of such linters are
+        then stored and reused; bump version when the behavior of the linter
+        changes in a way the stored results would not notice.
+
+        If the outcome also depends on data outside the database, such as a web
+        API or data files, pass a ttl as well, after which stored results are
+        no longer reused. Linters that require the network must do so.
+
+        """
+        assert not (
+            requires_network and reads is not None and ttl is None
+        ), f"{label}: network linters with stored results need a ttl"
 
         def decorator(linter: Linter[ModelT]) -> LintWrapper[ModelT]:
-            lint_wrapper = LintWrapper(linter, disabled, label, self, requires_network)
+            lint_wrapper = LintWrapper(
+                linter,
+                disabled,
+                label,
+                self,
+                requires_network,
+                reads=tuple(reads) if reads is not None else None,
+                version=version,
+                ttl=ttl,
+            )
             if disabled:
                 self.disabled_linters.append(lint_wrapper)
             else:
@@ -146,6 +248,10 @@ class Lint(Generic[ModelT]):
         else:
             linters = self.linters
 
+        if any(linter.reads is not None for linter in linters):
+            results = lint_results.ObjectResults(obj)
+        else:
+            results = None
         used_ignores: set[str] = set()
         actual_ignores = self.get_ignored_lints(obj)
         for linter in linters:
@@ -153,7 +259,9 @@ class Lint(Generic[ModelT]):
                 lint_cfg = replace(cfg, interactive=False)
             else:
                 lint_cfg = cfg
-            used_ignores |= yield from linter(obj, lint_cfg)
+            used_ignores |= yield from linter(obj, lint_cfg, results)
+        if results is not None:
+            results.save()
         actual_ignores = self.get_ignored_lints(obj)
         unused = actual_ignores - used_ignores
         if unused:
@@ -0,0 +1,198 @@
+"""Per-linter profiling for the Lint framework.
+
+Profiling is opt-in: inside a profile_linters() block, every linter call made
+through LintWrapper records its wall time, the number of SQL statements it sent
+to the main database, and the number of HTTP requests it made through requests
+or httpx (including the URL cache fetchers in url_fetch).
+Only linters run in the current process and thread are measured; lint_all() with
+workers > 1 lints in other processes. The profile_lint_all shell command wraps
+lint_all() for one model; to profile anything else, use:
+
+    with profile_linters() as profiler:
+        Name.lint_all(autofix=False)
+    print(profiler.format_report())
+
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import math
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+import requests
+
+from .base import BaseModel, trace_queries
+
+# Wall times are kept in a histogram with this many buckets per factor of e,
+# which bounds the error of the reported percentile to about 6%.
+BUCKETS_PER_E = 16
+
+SORT_KEYS = ("total_time", "p95_time", "calls", "queries", "network_calls")
+
+
+@dataclass
+class LinterProfile:
+    calls: int = 0
+    # Calls skipped because a clean result was stored in lint_results
+    skipped: int = 0
+    total_time: float = 0.0
+    queries: int = 0
+    network_calls: int = 0
+    _histogram: dict[int, int] = field(default_factory=dict, repr=False)
+
+    def add_call(self, elapsed: float, queries: int, network_calls: int) -> None:
+        self.calls += 1
+        self.total_time += elapsed
+        self.queries += queries
+        self.network_calls += network_calls
+        bucket = math.floor(math.log(max(elapsed, 1e-9)) * BUCKETS_PER_E)
+        self._histogram[bucket] = self._histogram.get(bucket, 0) + 1
+
+    @property
+    def p95_time(self) -> float:
+        return self.percentile(0.95)
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound of the wall time of the given fraction of calls."""
+        if not self.calls:
+            return 0.0
+        threshold = fraction * self.calls
+        seen = 0
+        for bucket in sorted(self._histogram):
+            seen += self._histogram[bucket]
+            if seen >= threshold:
+                break
+        return math.exp((bucket + 1) / BUCKETS_PER_E)
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "skipped": self.skipped,
+            "total_time": self.total_time,
+            "p95_time": self.p95_time,
+            "queries": self.queries,
+            "network_calls": self.network_calls,
+        }
+
+
+class LintProfiler:
+    def __init__(self) -> None:
+        self.profiles: dict[str, LinterProfile] = {}
+        self.num_queries = 0
+        self.num_network_calls = 0
+
+    def count_query(self, statement: str) -> None:
+        self.num_queries += 1
+
+    def get_profile(self, key: str) -> LinterProfile:
+        if key not in self.profiles:
+            self.profiles[key] = LinterProfile()
+        return self.profiles[key]
+
+    def record_skip(self, key: str) -> None:
+        self.get_profile(key).skipped += 1
+
+    @contextlib.contextmanager
+    def measure(self, key: str) -> Iterator[None]:
+        queries = self.num_queries
+        network_calls = self.num_network_calls
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.get_profile(key).add_call(
+                time.perf_counter() - start,
+                self.num_queries - queries,
+                self.num_network_calls - network_calls,
+            )
+
+    def sorted_profiles(
+        self, sort_by: str = "total_time"
+    ) -> list[tuple[str, LinterProfile]]:
+        if sort_by not in SORT_KEYS:
+            raise ValueError(f"sort_by must be one of {SORT_KEYS}, not {sort_by!r}")
+        return sorted(
+            self.profiles.items(),
+            key=lambda pair: getattr(pair[1], sort_by),
+            reverse=True,
+        )
+
+    def format_report(
+        self, sort_by: str = "total_time", limit: int | None = None
+    ) -> str:
+        profiles = self.sorted_profiles(sort_by)
+        if limit is not None:
+            profiles = profiles[:limit]
+        width = max([len("linter"), *(len(key) for key, _ in profiles)])
+        lines = [
+            f"{'linter':<{width}} {'calls':>8} {'skipped':>8} {'total s':>9}"
+            f" {'p95 ms':>9} {'queries':>9} {'network':>8}"
+        ]
+        lines += [
+            f"{key:<{width}} {profile.calls:>8} {profile.skipped:>8}"
+            f" {profile.total_time:>9.2f} {profile.p95_time * 1000:>9.2f}"
+            f" {profile.queries:>9} {profile.network_calls:>8}"
+            for key, profile in profiles
+        ]
+        return "\n".join(lines)
+
+    def to_json(self, sort_by: str = "total_time") -> dict[str, Any]:
+        return {
+            key: profile.to_json() for key, profile in self.sorted_profiles(sort_by)
+        }
+
+    def dump(self, path: Path, sort_by: str = "total_time") -> None:
+        path.write_text(json.dumps(self.to_json(sort_by), indent=2))
+
+
+_active_profiler: LintProfiler | None = None
+
+
+def get_active_profiler() -> LintProfiler | None:
+    return _active_profiler
+
+
+@contextlib.contextmanager
+def _count_network_calls(
+    profiler: LintProfiler, cls: type[object], method_name: str = "send"
+) -> Iterator[None]:
+    """Count the calls to a method that sends an HTTP request."""
+    original = getattr(cls, method_name)
+
+    @functools.wraps(original)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        profiler.num_network_calls += 1
+        return original(*args, **kwargs)
+
+    setattr(cls, method_name, wrapper)
+    try:
+        yield
+    finally:
+        setattr(cls, method_name, original)
+
+
+@contextlib.contextmanager
+def profile_linters() -> Iterator[LintProfiler]:
+    """Profile all linters run within the block."""
+    global _active_profiler
+    if _active_profiler is not None:
+        raise RuntimeError("linter profiling is already active")
+    profiler = LintProfiler()
+    conn = BaseModel.clirm.conn
+    with contextlib.ExitStack() as stack:
+        for cls in (requests.Session, httpx.Client, httpx.AsyncClient):
+            stack.enter_context(_count_network_calls(profiler, cls))
+        stack.enter_context(trace_queries(conn, profiler.count_query))
+        _active_profiler = profiler
+        try:
+            yield profiler
+        finally:
+            _active_profiler = None
@@ -0,0 +1,286 @@
+"""Index of names for homonymy checks.
+
+The homonymy linters and the speciesHomonyms GraphQL field need, for a genus,
+the species-group names originally described in it (primary homonymy) and those
+currently placed in it (secondary homonymy), grouped by normalized root name, as
+well as the genus-group names with a given root name. Querying these per name
+makes a full lint issue a query per name and per genus, so the index here loads
+them all in one pass on first use.
+
+The index is kept up to date through Name.save_event (and creation_event) and
+Taxon.save_event, so it survives across lint runs. Lookups for names within an
+edit distance use a BK-tree per genus.
+
+"""
+
+from __future__ import annotations
+
+import bisect
+import itertools
+import threading
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+
+import Levenshtein
+
+from taxonomy.db.constants import Group, Rank
+from taxonomy.db.models.base import PREFETCH_BATCH_SIZE, BaseModel
+from taxonomy.db.models.taxon import Taxon, closure
+
+from .name import Name
+
+# The Taxon fields that decide which genera contain a taxon
+_PLACEMENT_FIELDS = ("parent", "rank", "age")
+
+# A word and its children, keyed by their distance to the word
+BKNode = tuple[str, dict[int, "BKNode"]]
+
+
+class BKTree:
+    """BK-tree for finding strings within an edit distance of a query."""
+
+    def __init__(
+        self,
+        words: Iterable[str] = (),
+        distance: Callable[[str, str], int] = Levenshtein.distance,
+    ) -> None:
+        self.distance = distance
+        self.root: BKNode | None = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        if self.root is None:
+            self.root = (word, {})
+            return
+        node_word, children = self.root
+        while True:
+            distance = self.distance(word, node_word)
+            if distance == 0:
+                return
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (word, {})
+                return
+            node_word, children = child
+
+    def search(self, word: str, max_distance: int) -> list[tuple[int, str]]:
+        """Return (distance, word) pairs for words within max_distance of word."""
+        if self.root is None:
+            return []
+        out = []
+        stack = [self.root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = self.distance(word, node_word)
+            if distance <= max_distance:
+                out.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return out
+
+
+@dataclass
+class RootNameGroup:
+    """Names in one genus, keyed by normalized root name."""
+
+    exact: dict[str, list[Name]] = field(default_factory=dict)
+    fuzzy: dict[str, list[Name]] = field(default_factory=dict)
+    _tree: BKTree | None = field(default=None, repr=False)
+
+    def get(self, *, fuzzy: bool) -> dict[str, list[Name]]:
+        return self.fuzzy if fuzzy else self.exact
+
+    def search(self, root_name: str, max_distance: int) -> list[tuple[int, str]]:
+        if self._tree is None:
+            self._tree = BKTree(self.exact)
+        return self._tree.search(root_name, max_distance)
+
+    def add(self, nam: Name, exact: str, fuzzy: str) -> None:
+        if exact not in self.exact:
+            self._tree = None
+        _insort(self.exact.setdefault(exact, []), nam)
+        _insort(self.fuzzy.setdefault(fuzzy, []), nam)
+
+    def remove(self, nam: Name, exact: str, fuzzy: str) -> None:
+        for mapping, key in ((self.exact, exact), (self.fuzzy, fuzzy)):
+            nams = mapping.get(key)
+            if nams is not None and nam in nams:
+                nams.remove(nam)
+                if not nams:
+                    del mapping[key]
+                    self._tree = None
+
+
+def _insort(nams: list[Name], nam: Name) -> None:
+    # Keep names in id order, as they would come from the database
+    bisect.insort(nams, nam, key=lambda nam: nam.id)
+
+
+# What the index recorded for a name, so it can be removed again
+@dataclass(frozen=True)
+class _Entry:
+    genus_root_name: str | None = None
+    original_parent_id: int | None = None
+    taxon_id: int | None = None
+    exact: str = ""
+    fuzzy: str = ""
+
+
+class HomonymIndex:
+    def __init__(self) -> None:
+        self.genus_names: dict[str, list[Name]] = {}
+        self.primary: dict[int, RootNameGroup] = {}
+        self.secondary: dict[int, RootNameGroup] = {}
+        self._entries: dict[int, _Entry] = {}
+        self._names_by_taxon: dict[int, set[Name]] = {}
+        self._genera_of_taxon: dict[int, list[int]] = {}
+        self._placement_of_taxon: dict[int, tuple[object, ...]] = {}
+
+    @classmethod
+    def build(cls) -> HomonymIndex:
+        index = cls()
+        index._genera_of_taxon = closure.get_subtree_roots_of_rank(Rank.genus)
+        columns = ", ".join(
+            f"`{Taxon.clirm_fields[field].name}`" for field in _PLACEMENT_FIELDS
+        )
+        index._placement_of_taxon = {
+            taxon_id: tuple(placement)
+            for taxon_id, *placement in BaseModel.clirm.conn.execute(
+                f"SELECT id, {columns} FROM taxon"
+            )
+        }
+        query = Name.add_validity_check(
+            Name.select().filter(Name.group.is_in((Group.genus, Group.species)))
+        )
+        for nam in sorted(query, key=lambda nam: nam.id):
+            index.add(nam)
+        return index
+
+    def get_genus_names(self, root_name: str) -> list[Name]:
+        return self.genus_names.get(root_name, [])
+
+    def get_primary(self, genus: Name) -> RootNameGroup:
+        return self.primary.get(genus.id, RootNameGroup())
+
+    def get_secondary(self, genus: Taxon) -> RootNameGroup:
+        return self.secondary.get(genus.id, RootNameGroup())
+
+    def add(self, nam: Name) -> None:
+        if nam.is_invalid():
+            return
+        if nam.group is Group.genus:
+            entry = _Entry(genus_root_name=nam.root_name)
+            _insort(self.genus_names.setdefault(nam.root_name, []), nam)
+        elif nam.group is Group.species and nam.year is not None:
+            entry = _Entry(
+                original_parent_id=type(nam).original_parent.get_raw(nam),
+                taxon_id=Name.taxon.get_raw(nam),
+                exact=nam.get_normalized_root_name(),
+                fuzzy=nam.get_normalized_root_name_for_homonymy(),
+            )
+            if entry.original_parent_id is not None:
+                self.primary.setdefault(entry.original_parent_id, RootNameGroup()).add(
+                    nam, entry.exact, entry.fuzzy
+                )
+            if entry.taxon_id is not None:
+                self._names_by_taxon.setdefault(entry.taxon_id, set()).add(nam)
+                for genus_id in self._get_genera_of_taxon(entry.taxon_id):
+                    self.secondary.setdefault(genus_id, RootNameGroup()).add(
+                        nam, entry.exact, entry.fuzzy
+                    )
+        else:
+            return
+        self._entries[nam.id] = entry
+
+    def remove(self, nam: Name) -> None:
+        entry = self._entries.pop(nam.id, None)
+        if entry is None:
+            return
+        if entry.genus_root_name is not None:
+            nams = self.genus_names.get(entry.genus_root_name, [])
+            if nam in nams:
+                nams.remove(nam)
+            return
+        if entry.original_parent_id is not None:
+            group = self.primary.get(entry.original_parent_id)
+            if group is not None:
+                group.remove(nam, entry.exact, entry.fuzzy)
+        if entry.taxon_id is not None:
+            self._names_by_taxon.get(entry.taxon_id, set()).discard(nam)
+            for genus_id in self._genera_of_taxon.get(entry.taxon_id, []):
+                group = self.secondary.get(genus_id)
+                if group is not None:
+                    group.remove(nam, entry.exact, entry.fuzzy)
+
+    def update_name(self, nam: Name) -> None:
+        self.remove(nam)
+        self.add(nam)
+
+    def update_taxon(self, taxon: Taxon) -> None:
+        """Move names whose genus changed because the taxon was moved or removed."""
+        placement = tuple(
+            Taxon.clirm_fields[field].get_raw(taxon) for field in _PLACEMENT_FIELDS
+        )
+        if self._placement_of_taxon.get(taxon.id) == placement:
+            # Most saves change some other field, such as the tags
+            return
+        self._placement_of_taxon[taxon.id] = placement
+        descendants = closure.get_descendants(taxon.id)
+        new_genera: dict[int, list[int]] = {}
+        for batch in itertools.batched(descendants, PREFETCH_BATCH_SIZE):
+            new_genera.update(
+                closure.get_subtree_roots_of_rank(Rank.genus, taxon_ids=batch)
+            )
+        for taxon_id in descendants:
+            genera = new_genera.get(taxon_id, [])
+            if genera == self._genera_of_taxon.get(taxon_id, []):
+                continue
+            nams = list(self._names_by_taxon.get(taxon_id, ()))
+            for nam in nams:
+                self.remove(nam)
+            self._genera_of_taxon[taxon_id] = genera
+            for nam in nams:
+                self.add(nam)
+
+    def _get_genera_of_taxon(self, taxon_id: int) -> list[int]:
+        if taxon_id not in self._genera_of_taxon:
+            # A taxon created after the index was built
+            self._genera_of_taxon[taxon_id] = closure.get_subtree_roots_of_rank(
+                Rank.genus, taxon_ids=[taxon_id]
+            ).get(taxon_id, [])
+        return self._genera_of_taxon[taxon_id]
+
+
+_index: HomonymIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> HomonymIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = HomonymIndex.build()
+    return _index
+
+
+def clear_index() -> None:
+    global _index
+    _index = None
+
+
+def _on_name_save(nam: Name) -> None:
+    if _index is not None:
+        _index.update_name(nam)
+
+
+def _on_taxon_save(taxon: Taxon) -> None:
+    if _index is not None:
+        _index.update_taxon(taxon)
+
+
+Name.creation_event.on(_on_name_save)
+Name.save_event.on(_on_name_save)
+Taxon.save_event.on(_on_taxon_save)
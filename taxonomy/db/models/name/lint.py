@@ -30,8 +30,8 @@ from functools import cache
 from typing import Generic, Protocol, Self, TypeVar, assert_never
 
 import clirm
+import httpx
 import Levenshtein
-import requests
 
 from taxonomy import adt, coordinates, getinput, urlparse
 from taxonomy.apis import bhl, nominatim
@@ -73,7 +73,7 @@ from taxonomy.db.models.collection import (
     Collection,
 )
 from taxonomy.db.models.item_file import ItemFile
-from taxonomy.db.models.lint import IgnoreLint, Lint
+from taxonomy.db.models.lint import NETWORK_LINT_TTL, IgnoreLint, Lint
 from taxonomy.db.models.name_complex import (
     NameComplex,
     NameEnding,
@@ -84,7 +84,7 @@ from taxonomy.db.models.name_complex import (
 from taxonomy.db.models.person import AuthorTag, PersonLevel
 from taxonomy.db.models.taxon import Taxon
 
-from . import parse_citations
+from . import homonyms, parse_citations
 from .guess_repository import get_most_likely_repository
 from .name import (
     PREOCCUPIED_TAGS,
@@ -1713,7 +1713,27 @@ def make_point(tag: TypeTag.Coordinates) -> coordinates.Point | None:  # type: i
     return coordinates.Point(lon, lat)
 
 
-@LINT.add("coordinates")
+# How far outside the polygon of its country a type locality may be
+COORDINATES_TOLERANCE_KM = 10.0
+
+
+def _get_type_locality_regions(nam: Name) -> list[models.Region]:
+    """The region of the type locality and its parents."""
+    regions: list[models.Region] = []
+    region = nam.type_locality.region if nam.type_locality is not None else None
+    while region is not None and region not in regions:
+        regions.append(region)
+        region = region.parent
+    return regions
+
+
+# Also reads the GeoJSON data and OpenStreetMap, so stored results expire; bump
+# the version when the GeoJSON data changes
+@LINT.add(
+    "coordinates",
+    reads=("type_locality", _get_type_locality_regions),
+    ttl=NETWORK_LINT_TTL,
+)
 def check_coordinates(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if nam.type_locality is None:
         return
@@ -1727,21 +1747,66 @@ def check_coordinates(nam: Name, cfg: LintConfig) -> Iterable[str]:
         if tl_country is None:
             continue
         polygon_path = coordinates.get_path(tl_country.name)
-        if polygon_path is not None and coordinates.is_in_polygon(point, polygon_path):
+        # The GeoJSON polygons are simplified, so coastal and border localities
+        # may fall just outside them.
+        if polygon_path is not None and coordinates.is_near_polygon(
+            point, polygon_path, COORDINATES_TOLERANCE_KM
+        ):
             continue
-        osm_country = nominatim.get_openstreetmap_country(point)
-        if osm_country is None:
-            yield f"cannot place coordinates {point} in any country (expected {tl_country.name})"
+        country = get_country_of_point(point)
+        if country is not None and _is_same_country(country, tl_country.name):
             continue
-        our_country = tl_country.name
-        if osm_country == our_country:
+        if is_network_available():
+            # Fall back to OpenStreetMap, which has more detailed boundaries
+            osm_country = nominatim.get_openstreetmap_country(point)
+            if osm_country is not None:
+                if _is_same_country(osm_country, tl_country.name):
+                    continue
+                country = osm_country
+        if country is None:
+            yield f"cannot place coordinates {point} in any country (expected {tl_country.name})"
             continue
-        our_country = nominatim.HESP_COUNTRY_TO_OSM_COUNTRY.get(
-            our_country, our_country
-        )
-        if our_country == osm_country:
+        yield f"coordinates {point} are in {country}, not {tl_country.name}"
+
+
+def get_country_of_point(point: coordinates.Point) -> str | None:
+    """Find the country containing a point using the local GeoJSON data.
+
+    Returns the name of the country Region if there is one for the GeoJSON file,
+    else a name derived from its path.
+
+    """
+    paths = coordinates.get_reverse_geocoder().get_paths(point)
+    if not paths:
+        return None
+    names = _get_country_names_by_path()
+    # Prefer whole countries over areas within them
+    paths = sorted(paths, key=lambda path: not path.startswith("countries/"))
+    for path in paths:
+        if path in names:
+            return names[path]
+    return coordinates.get_name_for_path(paths[0])
+
+
+@cache
+def _get_country_names_by_path() -> dict[str, str]:
+    names: dict[str, str] = {}
+    for region in models.Region.select_valid().filter(
+        models.Region.kind == RegionKind.country
+    ):
+        try:
+            path = coordinates.get_path(region.name)
+        except ValueError:
             continue
-        yield f"coordinates {point} are in {osm_country}, not {tl_country.name}"
+        if path is not None:
+            names.setdefault(path, region.name)
+    return names
+
+
+def _is_same_country(country: str, our_country: str) -> bool:
+    # Some of our countries are parts of other countries in OpenStreetMap
+    mapping = nominatim.HESP_COUNTRY_TO_OSM_COUNTRY
+    return mapping.get(country, country) == mapping.get(our_country, our_country)
 
 
 @LINT.add("type_locality_strict")
@@ -2946,7 +3011,7 @@ def check_for_lsid(nam: Name, cfg: LintConfig) -> Iterable[str]:
         return
     try:
         zoobank_data_list = get_zoobank_data(nam.corrected_original_name)
-    except requests.exceptions.HTTPError as e:
+    except httpx.HTTPError as e:
         print(f"Error retrieving ZooBank data: {e!r}")
         return
     if not zoobank_data_list:
@@ -2983,7 +3048,7 @@ def check_for_lsid(nam: Name, cfg: LintConfig) -> Iterable[str]:
         yield message
 
 
-@LINT.add("year")
+@LINT.add("year", reads=())
 def check_year(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if nam.year is None:
         return
@@ -2993,7 +3058,7 @@ def check_year(nam: Name, cfg: LintConfig) -> Iterable[str]:
         yield "year is a range"
 
 
-@LINT.add("year_matches")
+@LINT.add("year_matches", reads=("original_citation",))
 def check_year_matches(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if nam.original_citation is None:
         return
@@ -3023,7 +3088,7 @@ ATTRIBUTES_BY_GROUP = {
 }
 
 
-@LINT.add("disallowed_attributes")
+@LINT.add("disallowed_attributes", reads=())
 def check_disallowed_attributes(nam: Name, cfg: LintConfig) -> Iterable[str]:
     for field_name, groups in ATTRIBUTES_BY_GROUP.items():
         if nam.group not in groups:
@@ -3666,7 +3731,7 @@ def check_data_level(nam: Name, cfg: LintConfig) -> Iterable[str]:
                 yield f"has data from original, but missing crucial data: {ndl_reason}"
 
 
-@LINT.add("citation_group")
+@LINT.add("citation_group", reads=("citation_group",))
 def check_citation_group(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if nam.citation_group is None or nam.year is None:
         return
@@ -3674,7 +3739,7 @@ def check_citation_group(nam: Name, cfg: LintConfig) -> Iterable[str]:
         yield message
 
 
-@LINT.add("matches_citation")
+@LINT.add("matches_citation", reads=("original_citation",))
 def check_matches_citation(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if nam.original_citation is None or nam.page_described is None:
         return
@@ -3701,7 +3766,7 @@ def check_page_matches_citation(art: Article, page_text: str) -> Iterable[str]:
             yield f"{page_text} is not in {start_page}–{end_page} for {art}"
 
 
-@LINT.add("no_page_ranges")
+@LINT.add("no_page_ranges", reads=())
 def no_page_ranges(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if nam.page_described is None:
         return
@@ -4109,40 +4174,32 @@ def get_possible_homonyms(
     normalized_root_name = normalize_root_name_for_homonymy(root_name, sc)
     genera = {
         genus.resolve_variant(misidentification=True)
-        for genus in Name.select_valid().filter(
-            Name.group == Group.genus, Name.root_name == genus_name
-        )
+        for genus in homonyms.get_index().get_genus_names(genus_name)
     }
     for genus in genera:
-        primary_nonfuzzy = _get_primary_names_of_genus_and_variants(genus, fuzzy=False)
-        for nam in primary_nonfuzzy.get(root_name, []):
-            name_dict[nam].exact_name_match = True
-            name_dict[nam].same_original_genus = True
-        for other_root_name, nams in primary_nonfuzzy.items():
-            distance = Levenshtein.distance(root_name, other_root_name)
-            if distance <= 2:
-                for nam in nams:
+        for group in _get_primary_groups_of_genus_and_variants(genus):
+            for nam in group.exact.get(root_name, []):
+                name_dict[nam].exact_name_match = True
+                name_dict[nam].same_original_genus = True
+            for distance, other_root_name in group.search(root_name, 2):
+                for nam in group.exact[other_root_name]:
                     name_dict[nam].same_original_genus = True
                     name_dict[nam].edit_distance = distance
-        primary_fuzzy = _get_primary_names_of_genus_and_variants(genus, fuzzy=True)
-        for nam in primary_fuzzy.get(normalized_root_name, []):
-            name_dict[nam].fuzzy_name_match = True
-            name_dict[nam].same_original_genus = True
+            for nam in group.fuzzy.get(normalized_root_name, []):
+                name_dict[nam].fuzzy_name_match = True
+                name_dict[nam].same_original_genus = True
         taxon = _get_parent(genus)
         if taxon is not None:
-            secondary_nonfuzzy = _get_secondary_names_of_genus(taxon, fuzzy=False)
-            for nam in secondary_nonfuzzy.get(root_name, []):
+            group = _get_secondary_group(taxon)
+            for nam in group.exact.get(root_name, []):
                 name_dict[nam].exact_name_match = True
                 name_dict[nam].same_current_genus = True
-            for other_root_name, nams in secondary_nonfuzzy.items():
-                distance = Levenshtein.distance(root_name, other_root_name)
-                if distance <= 2:
-                    for nam in nams:
-                        name_dict[nam].same_current_genus = True
-                        name_dict[nam].edit_distance = distance
-
-            secondary_fuzzy = _get_secondary_names_of_genus(taxon, fuzzy=True)
-            for nam in secondary_fuzzy.get(normalized_root_name, []):
+            for distance, other_root_name in group.search(root_name, 2):
+                for nam in group.exact[other_root_name]:
+                    name_dict[nam].same_current_genus = True
+                    name_dict[nam].edit_distance = distance
+
+            for nam in group.fuzzy.get(normalized_root_name, []):
                 name_dict[nam].fuzzy_name_match = True
                 name_dict[nam].same_current_genus = True
 
@@ -4150,46 +4207,80 @@ def get_possible_homonyms(
                 for related_genus in taxon.parent.get_children().filter(
                     Taxon.rank == Rank.genus
                 ):
-                    secondary_nonfuzzy = _get_secondary_names_of_genus(
-                        related_genus, fuzzy=False
-                    )
-                    for other_root_name, nams in secondary_nonfuzzy.items():
-                        distance = Levenshtein.distance(root_name, other_root_name)
-                        if distance <= 2:
-                            for nam in nams:
-                                name_dict[nam].related_genus = True
-                                name_dict[nam].edit_distance = distance
+                    related_group = _get_secondary_group(related_genus)
+                    for distance, other_root_name in related_group.search(root_name, 2):
+                        for nam in related_group.exact[other_root_name]:
+                            name_dict[nam].related_genus = True
+                            name_dict[nam].edit_distance = distance
 
     return genera, name_dict.items()
 
 
 def _clear_homonym_caches() -> None:
-    _get_primary_names_of_genus.cache_clear()
-    _get_secondary_names_of_genus.cache_clear()
+    _build_secondary_group.cache_clear()
+
 
+def _with_variant_base_names(candidates: Iterable[Name]) -> list[Name]:
+    # can_preoccupy() also depends on the name a candidate is a variant of
+    inputs = []
+    for candidate in candidates:
+        inputs.append(candidate)
+        base_name = candidate.get_variant_base_name()
+        if base_name is not None:
+            inputs.append(base_name)
+    return inputs
 
-@LINT.add("species_secondary_homonym", clear_caches=_clear_homonym_caches)
+
+def _get_homonym_inputs(
+    reason: SelectionReason, *, fuzzy: bool
+) -> Callable[[Name], list[Name]]:
+    """Return the names a species-group homonymy linter reads besides nam."""
+
+    def get_inputs(nam: Name) -> list[Name]:
+        return _with_variant_base_names(
+            _get_species_group_homonym_candidates(nam, reason=reason, fuzzy=fuzzy)
+        )
+
+    return get_inputs
+
+
+@LINT.add(
+    "species_secondary_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.secondary_homonymy, fuzzy=False),),
+    clear_caches=_clear_homonym_caches,
+)
 def check_species_group_secondary_homonyms(nam: Name, cfg: LintConfig) -> Iterable[str]:
     yield from _check_species_group_homonyms(
         nam, reason=SelectionReason.secondary_homonymy, fuzzy=False, cfg=cfg
     )
 
 
-@LINT.add("species_primary_homonym")
+@LINT.add(
+    "species_primary_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.primary_homonymy, fuzzy=False),),
+)
 def check_species_group_primary_homonyms(nam: Name, cfg: LintConfig) -> Iterable[str]:
     yield from _check_species_group_homonyms(
         nam, reason=SelectionReason.primary_homonymy, fuzzy=False, cfg=cfg
     )
 
 
-@LINT.add("species_mixed_homonym", disabled=True)
+@LINT.add(
+    "species_mixed_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.mixed_homonymy, fuzzy=False),),
+    disabled=True,
+)
 def check_species_group_mixed_homonyms(nam: Name, cfg: LintConfig) -> Iterable[str]:
     yield from _check_species_group_homonyms(
         nam, reason=SelectionReason.mixed_homonymy, fuzzy=False, cfg=cfg
     )
 
 
-@LINT.add("species_reverse_mixed_homonym", disabled=True)
+@LINT.add(
+    "species_reverse_mixed_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.reverse_mixed_homonymy, fuzzy=False),),
+    disabled=True,
+)
 def check_species_group_reverse_mixed_homonyms(
     nam: Name, cfg: LintConfig
 ) -> Iterable[str]:
@@ -4198,7 +4289,10 @@ def check_species_group_reverse_mixed_homonyms(
     )
 
 
-@LINT.add("species_fuzzy_secondary_homonym")
+@LINT.add(
+    "species_fuzzy_secondary_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.secondary_homonymy, fuzzy=True),),
+)
 def check_species_group_fuzzy_secondary_homonyms(
     nam: Name, cfg: LintConfig
 ) -> Iterable[str]:
@@ -4207,7 +4301,10 @@ def check_species_group_fuzzy_secondary_homonyms(
     )
 
 
-@LINT.add("species_fuzzy_primary_homonym")
+@LINT.add(
+    "species_fuzzy_primary_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.primary_homonymy, fuzzy=True),),
+)
 def check_species_group_fuzzy_primary_homonyms(
     nam: Name, cfg: LintConfig
 ) -> Iterable[str]:
@@ -4216,7 +4313,11 @@ def check_species_group_fuzzy_primary_homonyms(
     )
 
 
-@LINT.add("species_fuzzy_mixed_homonym", disabled=True)
+@LINT.add(
+    "species_fuzzy_mixed_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.mixed_homonymy, fuzzy=True),),
+    disabled=True,
+)
 def check_species_group_fuzzy_mixed_homonyms(
     nam: Name, cfg: LintConfig
 ) -> Iterable[str]:
@@ -4225,7 +4326,11 @@ def check_species_group_fuzzy_mixed_homonyms(
     )
 
 
-@LINT.add("species_fuzzy_reverse_mixed_homonym", disabled=True)
+@LINT.add(
+    "species_fuzzy_reverse_mixed_homonym",
+    reads=(_get_homonym_inputs(SelectionReason.reverse_mixed_homonymy, fuzzy=True),),
+    disabled=True,
+)
 def check_species_group_fuzzy_reverse_mixed_homonyms(
     nam: Name, cfg: LintConfig
 ) -> Iterable[str]:
@@ -4234,52 +4339,72 @@ def check_species_group_fuzzy_reverse_mixed_homonyms(
     )
 
 
-@LINT.add("genus_homonym")
-def check_genus_group_homonyms(nam: Name, cfg: LintConfig) -> Iterable[str]:
+def _get_genus_homonym_candidates(nam: Name) -> list[Name]:
     if nam.group is not Group.genus:
-        return
+        return []
     if not nam.can_preoccupy():
-        return
-    possible_homonyms = list(
-        Name.select_valid().filter(
-            Name.root_name == nam.root_name, Name.group == Group.genus
-        )
-    )
+        return []
+    return homonyms.get_index().get_genus_names(nam.root_name)
+
+
+def _get_genus_homonym_inputs(nam: Name) -> list[Name]:
+    return _with_variant_base_names(_get_genus_homonym_candidates(nam))
+
+
+@LINT.add("genus_homonym", reads=(_get_genus_homonym_inputs,))
+def check_genus_group_homonyms(nam: Name, cfg: LintConfig) -> Iterable[str]:
+    possible_homonyms = _get_genus_homonym_candidates(nam)
     yield from _check_homonym_list(nam, possible_homonyms, cfg=cfg)
 
 
 def _check_species_group_homonyms(
     nam: Name, *, reason: SelectionReason, fuzzy: bool, cfg: LintConfig
 ) -> Iterable[str]:
+    possible_homonyms = _get_species_group_homonym_candidates(
+        nam, reason=reason, fuzzy=fuzzy
+    )
+    yield from _check_homonym_list(
+        nam, possible_homonyms, reason=reason, fuzzy=fuzzy, cfg=cfg
+    )
+
+
+def _get_species_group_homonym_candidates(
+    nam: Name, *, reason: SelectionReason, fuzzy: bool
+) -> list[Name]:
+    """Names with the same root name in the genus relevant to reason."""
     if nam.group is not Group.species:
-        return
+        return []
     if not nam.can_preoccupy():
-        return
+        return []
     match reason:
         case SelectionReason.primary_homonymy:
-            genus = nam.original_parent
-            if genus is None:
-                return
-            genus = genus.resolve_variant(misidentification=True)
-            name_dict = _get_primary_names_of_genus_and_variants(genus, fuzzy=fuzzy)
+            original_genus = nam.original_parent
+            if original_genus is None:
+                return []
+            original_genus = original_genus.resolve_variant(misidentification=True)
+            name_dict = _get_primary_names_of_genus_and_variants(
+                original_genus, fuzzy=fuzzy
+            )
         case SelectionReason.secondary_homonymy:
             genus = _get_parent(nam)
             if genus is None:
-                return
+                return []
             name_dict = _get_secondary_names_of_genus(genus, fuzzy=fuzzy)
         case SelectionReason.mixed_homonymy:
             genus = _get_parent(nam)
             if genus is None:
-                return
-            genus = genus.base_name.resolve_variant(misidentification=True)
-            name_dict = _get_primary_names_of_genus_and_variants(genus, fuzzy=fuzzy)
+                return []
+            original_genus = genus.base_name.resolve_variant(misidentification=True)
+            name_dict = _get_primary_names_of_genus_and_variants(
+                original_genus, fuzzy=fuzzy
+            )
         case SelectionReason.reverse_mixed_homonymy:
-            genus = nam.original_parent
-            if genus is None:
-                return
-            name_dict = _get_secondary_names_of_genus(genus.taxon, fuzzy=fuzzy)
+            original_genus = nam.original_parent
+            if original_genus is None:
+                return []
+            name_dict = _get_secondary_names_of_genus(original_genus.taxon, fuzzy=fuzzy)
         case SelectionReason.synonymy:
-            return
+            return []
         case _:
             assert_never(reason)
     root = (
@@ -4287,10 +4412,7 @@ def _check_species_group_homonyms(
         if fuzzy
         else nam.get_normalized_root_name()
     )
-    possible_homonyms = name_dict.get(root, [])
-    yield from _check_homonym_list(
-        nam, possible_homonyms, reason=reason, fuzzy=fuzzy, cfg=cfg
-    )
+    return name_dict.get(root, [])
 
 
 def _check_homonym_list(
@@ -4399,6 +4521,19 @@ def _check_homonym_list(
 def _get_primary_names_of_genus_and_variants(
     genus: Name, *, fuzzy: bool = False
 ) -> dict[str, list[Name]]:
+    groups = _get_primary_groups_of_genus_and_variants(genus)
+    if len(groups) == 1:
+        return groups[0].get(fuzzy=fuzzy)
+    root_name_to_names: dict[str, list[Name]] = {}
+    for group in groups:
+        for root_name, names in group.get(fuzzy=fuzzy).items():
+            root_name_to_names.setdefault(root_name, []).extend(names)
+    return root_name_to_names
+
+
+def _get_primary_groups_of_genus_and_variants(
+    genus: Name,
+) -> list[homonyms.RootNameGroup]:
     all_genera = {genus}
     stack = [genus]
     while stack:
@@ -4415,43 +4550,34 @@ def _get_primary_names_of_genus_and_variants(
             if nam not in all_genera:
                 all_genera.add(nam)
                 stack.append(nam)
-    if len(all_genera) == 1:
-        return _get_primary_names_of_genus(genus, fuzzy=fuzzy)
-    root_name_to_names: dict[str, list[Name]] = {}
-    for nam in all_genera:
-        for root_name, names in _get_primary_names_of_genus(nam, fuzzy=fuzzy).items():
-            root_name_to_names.setdefault(root_name, []).extend(names)
-    return root_name_to_names
-
-
-@functools.lru_cache(maxsize=8192)
-def _get_primary_names_of_genus(
-    genus: Name, *, fuzzy: bool = False
-) -> dict[str, list[Name]]:
-    root_name_to_names: dict[str, list[Name]] = {}
-    for nam in Name.add_validity_check(genus.original_children):
-        if nam.group is Group.species and nam.year is not None:
-            if fuzzy:
-                root_name = nam.get_normalized_root_name_for_homonymy()
-            else:
-                root_name = nam.get_normalized_root_name()
-            root_name_to_names.setdefault(root_name, []).append(nam)
-    return root_name_to_names
+    index = homonyms.get_index()
+    return [index.get_primary(nam) for nam in all_genera]
 
 
-@functools.lru_cache(maxsize=8192)
 def _get_secondary_names_of_genus(
     genus: Taxon, *, fuzzy: bool = False
 ) -> dict[str, list[Name]]:
-    root_name_to_names: dict[str, list[Name]] = {}
-    for nam in genus.all_names():
+    return _get_secondary_group(genus).get(fuzzy=fuzzy)
+
+
+def _get_secondary_group(taxon: Taxon) -> homonyms.RootNameGroup:
+    if taxon.rank is Rank.genus:
+        return homonyms.get_index().get_secondary(taxon)
+    return _build_secondary_group(taxon)
+
+
+@functools.lru_cache(maxsize=1024)
+def _build_secondary_group(taxon: Taxon) -> homonyms.RootNameGroup:
+    # The index only covers genera
+    group = homonyms.RootNameGroup()
+    for nam in taxon.all_names():
         if nam.group is Group.species and nam.year is not None:
-            if fuzzy:
-                root_name = nam.get_normalized_root_name_for_homonymy()
-            else:
-                root_name = nam.get_normalized_root_name()
-            root_name_to_names.setdefault(root_name, []).append(nam)
-    return root_name_to_names
+            group.add(
+                nam,
+                nam.get_normalized_root_name(),
+                nam.get_normalized_root_name_for_homonymy(),
+            )
+    return group
 
 
 def should_require_subgenus_original_parent(nam: Name) -> bool:
@@ -4788,7 +4914,12 @@ def _autoset_original_citation_url(nam: Name) -> None:
     nam.original_citation.set_or_replace_url(url)
 
 
-@LINT.add("authority_page_link", requires_network=True)
+@LINT.add(
+    "authority_page_link",
+    requires_network=True,
+    reads=("original_citation",),
+    ttl=NETWORK_LINT_TTL,
+)
 def check_must_have_authority_page_link(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if (
         nam.original_citation is None
@@ -4801,7 +4932,12 @@ def check_must_have_authority_page_link(nam: Name, cfg: LintConfig) -> Iterable[
             yield f"must have authority page link for {page}"
 
 
-@LINT.add("check_bhl_page", requires_network=True)
+@LINT.add(
+    "check_bhl_page",
+    requires_network=True,
+    reads=("original_citation",),
+    ttl=NETWORK_LINT_TTL,
+)
 def check_bhl_page(nam: Name, cfg: LintConfig) -> Iterable[str]:
     if nam.original_citation is None:
         return
@@ -49,7 +49,7 @@ from taxonomy.db.constants import (
     Status,
     TypeSpecimenKind,
 )
-from taxonomy.db.derived_data import DerivedField
+from taxonomy.db.derived_data import Dependency, DerivedField
 from taxonomy.db.models.article import Article
 from taxonomy.db.models.base import (
     ADTField,
@@ -97,6 +97,16 @@ _ETYMOLOGY_CUTOFF = 1990
 _DATA_CUTOFF = 1900
 
 
+def _get_name_ids(obj: BaseModel) -> Iterable[int]:
+    """Names whose fill data level depends on an article, taxon, or name complex."""
+    if isinstance(obj, Article):
+        names: Iterable[Name] = obj.get_new_names()
+    else:
+        assert isinstance(obj, (models.Taxon, models.SpeciesNameComplex))
+        names = obj.get_names()
+    return [nam.id for nam in names]
+
+
 class Name(BaseModel):
     creation_event = events.Event["Name"]()
     save_event = events.Event["Name"]()
@@ -171,7 +181,19 @@ class Name(BaseModel):
 
     derived_fields: ClassVar[list[DerivedField[Any]]] = [
         DerivedField(
-            "fill_data_level", FillDataLevel, lambda nam: nam.fill_data_level()[0]
+            "fill_data_level",
+            FillDataLevel,
+            lambda nam: nam.fill_data_level()[0],
+            # Also reads the type of the original citation, the age of the
+            # taxon and the kind of the species name complex
+            dependencies=[
+                Dependency(lambda: Name),
+                Dependency(lambda: Article, get_affected_ids=_get_name_ids),
+                Dependency(lambda: models.Taxon, get_affected_ids=_get_name_ids),
+                Dependency(
+                    lambda: models.SpeciesNameComplex, get_affected_ids=_get_name_ids
+                ),
+            ],
         ),
         get_tag_based_derived_field(
             "preoccupied_names", lambda: Name, "tags", lambda: NameTag.PreoccupiedBy, 1
@@ -369,14 +391,7 @@ class Name(BaseModel):
 
     @classmethod
     def with_tag_of_type(cls, tag_cls: builtins.type[adt.ADT]) -> list[Name]:
-        names = cls.select_valid().filter(Name.type_tags.contains(f"[{tag_cls._tag},"))
-        return [
-            name
-            for name in names
-            if any(
-                tag[0] == tag_cls._tag for tag in name.get_raw_tags_field("type_tags")
-            )
-        ]
+        return list(cls.with_tag(tag_cls))
 
     @classmethod
     def add_validity_check(cls, query: Any) -> Any:
@@ -1040,12 +1055,8 @@ class Name(BaseModel):
         self.type_tags = tuple(t for t in type_tags if t != tag)  # type: ignore[assignment]
 
     @classmethod
-    def with_tag(cls, tag_cls: NameTagCons) -> Query[Self]:
-        return cls.select_valid().filter(Name.tags.contains(f"[{tag_cls._tag},"))
-
-    @classmethod
-    def with_type_tag(cls, tag_cls: TypeTagCons) -> Query[Self]:
-        return cls.select_valid().filter(Name.type_tags.contains(f"[{tag_cls._tag},"))
+    def with_type_tag(cls, tag_cls: TypeTagCons, **kwargs: Any) -> Query[Self]:
+        return cls.with_tag(tag_cls, **kwargs)
 
     def has_type_tag(self, tag_cls: TypeTagCons) -> bool:
         tag_id = tag_cls._tag
@@ -0,0 +1,113 @@
+import sqlite3
+
+import Levenshtein
+import pytest
+
+from taxonomy.db.constants import AgeClass, Group, Rank, Status
+from taxonomy.db.models.name import homonyms
+from taxonomy.db.models.name.homonyms import BKTree
+from taxonomy.db.models.name.name import Name
+from taxonomy.db.models.taxon import Taxon, closure
+
+
+def test_bk_tree() -> None:
+    words = ["rufus", "rufa", "rufum", "rufescens", "ruber", "niger", "nigra", "rufus"]
+    tree = BKTree(words)
+    for query in ("rufus", "rubra", "nigrum", "albus"):
+        for max_distance in (0, 1, 2):
+            expected = {
+                (Levenshtein.distance(query, word), word)
+                for word in words
+                if Levenshtein.distance(query, word) <= max_distance
+            }
+            assert set(tree.search(query, max_distance)) == expected
+    assert sorted(tree.search("rufus", 1)) == [(0, "rufus"), (1, "rufum")]
+    assert BKTree().search("rufus", 2) == []
+
+
+def _scan_primary_names(genus: Name) -> dict[str, list[Name]]:
+    # How the homonymy linters found these names before the index
+    root_name_to_names: dict[str, list[Name]] = {}
+    query = Name.add_validity_check(
+        Name.select().filter(type(genus).original_parent == genus)
+    )
+    for nam in sorted(query, key=lambda nam: nam.id):
+        if nam.group is Group.species and nam.year is not None:
+            root_name = nam.get_normalized_root_name()
+            root_name_to_names.setdefault(root_name, []).append(nam)
+    return root_name_to_names
+
+
+def test_index_matches_scan(
+    db: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(homonyms, "_index", None)
+    db.executemany(
+        "INSERT INTO name (id, `group`, root_name, status, year, original_parent)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (1, Group.genus.value, "Mus", Status.valid.value, "1758", None),
+            (2, Group.species.value, "musculus", Status.valid.value, "1758", 1),
+            (3, Group.species.value, "musculus", Status.synonym.value, "1800", 1),
+            (4, Group.species.value, "rattus", Status.valid.value, "1758", 1),
+            (5, Group.species.value, "rattus", Status.valid.value, None, 1),
+        ],
+    )
+    db.commit()
+    genus = Name(1)
+
+    def check() -> None:
+        index = homonyms.get_index()
+        assert index.get_primary(genus).exact == _scan_primary_names(genus)
+        assert index.get_genus_names("Mus") == [genus]
+
+    check()
+    nam = Name(3)
+    nam.root_name = "rattus"
+    nam.save()
+    check()
+    nam = Name(4)
+    nam.status = Status.removed
+    nam.save()
+    check()
+    assert set(_scan_primary_names(genus)) == {"musculus", "rattus"}
+
+
+def test_update_taxon(db: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(homonyms, "_index", None)
+    db.executemany(
+        "INSERT INTO taxon (id, valid_name, rank, age, parent_id)"
+        " VALUES (?, ?, ?, ?, ?)",
+        [
+            (1, "Mus", Rank.genus.value, AgeClass.extant.value, None),
+            (2, "Rattus", Rank.genus.value, AgeClass.extant.value, None),
+            (3, "Mus musculus", Rank.species.value, AgeClass.extant.value, 1),
+        ],
+    )
+    db.execute(
+        "INSERT INTO name (id, `group`, root_name, status, year, taxon_id)"
+        " VALUES (?, ?, ?, ?, ?, ?)",
+        (1, Group.species.value, "musculus", Status.valid.value, "1758", 3),
+    )
+    db.commit()
+    closure.rebuild()
+    index = homonyms.get_index()
+    assert index.get_secondary(Taxon(1)).exact == {"musculus": [Name(1)]}
+
+    updated: list[int] = []
+    get_descendants = closure.get_descendants
+
+    def recording_get_descendants(taxon_id: int) -> list[int]:
+        updated.append(taxon_id)
+        return get_descendants(taxon_id)
+
+    monkeypatch.setattr(closure, "get_descendants", recording_get_descendants)
+    taxon = Taxon(3)
+    # Saving other fields does not touch the index
+    taxon.valid_name = "Mus domesticus"
+    assert updated == []
+
+    taxon.parent = Taxon(2)
+    assert updated == [3]
+    assert index.get_secondary(Taxon(1)).exact == {}
+    assert index.get_secondary(Taxon(2)).exact == {"musculus": [Name(1)]}
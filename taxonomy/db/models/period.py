@@ -19,7 +19,7 @@ from taxonomy.db.constants import (
 )
 from taxonomy.db.derived_data import DerivedField
 
-from .base import BaseModel, LintConfig
+from .base import BaseModel, LintConfig, get_ancestor_dependency
 from .region import Region
 
 T = TypeVar("T")
@@ -47,7 +47,23 @@ class Period(BaseModel):
     deleted = Field[bool](default=False)
 
     derived_fields: ClassVar[list[DerivedField[Any]]] = [
-        DerivedField("has_locations", bool, lambda period: period.has_locations())
+        DerivedField(
+            "has_locations",
+            bool,
+            lambda period: period.has_locations(),
+            # Objects are only traced to their current period, so a period that
+            # loses its last location keeps a stale value until the next full
+            # compute_derived_fields.
+            dependencies=[
+                get_ancestor_dependency(lambda: Period, lambda period: period),
+                get_ancestor_dependency(
+                    lambda: models.Location, lambda loc: loc.min_period
+                ),
+                get_ancestor_dependency(
+                    lambda: models.Location, lambda loc: loc.max_period
+                ),
+            ],
+        )
     ]
     search_fields: ClassVar[list[SearchField]] = [
         SearchField(SearchFieldType.text, "name"),
@@ -5,7 +5,7 @@ import enum
 import re
 import sys
 from collections import defaultdict
-from collections.abc import Callable, Hashable, Iterable, Mapping, Sequence
+from collections.abc import Callable, Collection, Hashable, Iterable, Mapping, Sequence
 from dataclasses import dataclass
 from typing import IO, Any, ClassVar, Self
 
@@ -15,12 +15,19 @@ from taxonomy import adt, events, getinput, parsing
 from taxonomy.apis.cloud_search import SearchField, SearchFieldType
 from taxonomy.db import helpers, models
 from taxonomy.db.constants import NamingConvention, PersonType
-from taxonomy.db.derived_data import DerivedField, LazyType, load_derived_data
+from taxonomy.db.derived_data import (
+    ChangeKey,
+    Dependency,
+    DerivedField,
+    LazyType,
+    get_store,
+)
 from taxonomy.db.openlibrary import get_author
 
 from .base import (
     ADTField,
     BaseModel,
+    BaseQuery,
     LintConfig,
     TextOrNullField,
     get_tag_based_derived_field,
@@ -80,34 +87,64 @@ class PersonLevel(enum.IntEnum):
 def get_derived_field_with_aliases(
     name: str, lazy_model_cls: Callable[[], type[BaseModel]], base_field: str
 ) -> DerivedField[list[Any]]:
-    def compute_all() -> dict[int, list[BaseModel]]:
+    def get_person_id_to_aliases() -> dict[int, list[int]]:
         person_id_to_aliases: dict[int, list[int]] = {}
         for alias in Person.select_valid().filter(Person.type == PersonType.alias):
             if alias.target is None:
                 continue
             person_id_to_aliases.setdefault(alias.target.id, []).append(alias.id)
+        return person_id_to_aliases
+
+    def compute_for(
+        oids: Iterable[int], person_id_to_aliases: Mapping[int, list[int]]
+    ) -> dict[int, list[BaseModel]]:
         out: dict[int, list[BaseModel]] = defaultdict(list)
-        model_data = load_derived_data().get(Person.call_sign, {})
-        candidates = set(person_id_to_aliases) | {
-            oid for oid, data in model_data.items() if base_field in data
-        }
-        for oid in candidates:
+        field_data = get_store().get_field(Person.call_sign, base_field)
+        for oid in oids:
             data = []
-            if base_data := model_data.get(oid, {}).get(base_field):
+            if base_data := field_data.get(oid):
                 data += base_data
             if oid in person_id_to_aliases:
                 for alias_id in person_id_to_aliases[oid]:
-                    if alias_data := model_data.get(alias_id, {}).get(base_field):
+                    if alias_data := field_data.get(alias_id):
                         data += alias_data
             if data:
                 out[oid] = data
         return out
 
+    def compute_all() -> dict[int, list[BaseModel]]:
+        person_id_to_aliases = get_person_id_to_aliases()
+        field_data = get_store().get_field(Person.call_sign, base_field)
+        candidates = set(person_id_to_aliases) | set(field_data)
+        return compute_for(candidates, person_id_to_aliases)
+
+    def compute_incremental(
+        current: Mapping[int, Any], changes: Mapping[ChangeKey, Collection[int]]
+    ) -> dict[int, list[BaseModel]]:
+        changed = {
+            *changes.get((Person.call_sign, base_field), ()),
+            *changes.get((Person.call_sign, None), ()),
+        }
+        if not changed:
+            return {}
+        person_id_to_aliases = get_person_id_to_aliases()
+        affected = set(changed)
+        for target_id, alias_ids in person_id_to_aliases.items():
+            if not changed.isdisjoint(alias_ids):
+                affected.add(target_id)
+        new_values = compute_for(affected, person_id_to_aliases)
+        return {oid: new_values.get(oid, []) for oid in affected}
+
     return DerivedField(
         name,
         LazyType(lambda: list[lazy_model_cls()]),  # type: ignore[arg-type,misc]
         compute_all=compute_all,
         pull_on_miss=False,
+        dependencies=[
+            Dependency(lambda: Person),
+            Dependency(lambda: Person, derived_field=base_field),
+        ],
+        compute_incremental=compute_incremental,
     )
 
 
@@ -223,6 +260,7 @@ class Person(BaseModel):
             lambda pers: models.name.name.get_ordered_names(
                 pers.get_derived_field("names_all")
             ),
+            dependencies=[Dependency(lambda: Person, derived_field="names_all")],
         ),
         DerivedField(
             "ordered_articles",
@@ -230,6 +268,7 @@ class Person(BaseModel):
             lambda pers: models.article.article.get_ordered_articles(
                 pers.get_derived_field("articles_all")
             ),
+            dependencies=[Dependency(lambda: Person, derived_field="articles_all")],
         ),
     ]
 
@@ -855,7 +894,7 @@ class Person(BaseModel):
             "names_missing_field": self.names_missing_field,
         }
 
-    def get_aliases(self) -> Iterable[Person]:
+    def get_aliases(self) -> BaseQuery[Person]:
         return Person.select_valid().filter(
             Person.target == self, Person.type == PersonType.alias
         )
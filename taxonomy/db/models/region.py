@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import collections
 import sys
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
 from typing import IO, Any, ClassVar, Self
 
 from clirm import Field
@@ -10,9 +10,26 @@ from clirm import Field
 from taxonomy import events, getinput
 from taxonomy.apis.cloud_search import SearchField, SearchFieldType
 from taxonomy.db import constants, models
-from taxonomy.db.derived_data import DerivedField
+from taxonomy.db.derived_data import Dependency, DerivedField
 
-from .base import BaseModel, get_tag_based_derived_field
+from .base import BaseModel, get_ancestor_dependency, get_tag_based_derived_field
+
+
+def _subtree_dependencies(
+    lazy_model_cls: Callable[[], type[BaseModel]],
+    get_region: Callable[[Any], Region | None],
+) -> list[Dependency]:
+    """The field depends on objects of the model anywhere below the region.
+
+    Objects are only traced to their current region, so a region that loses its
+    last object of a kind by moving it elsewhere keeps a stale value until the
+    next full compute_derived_fields.
+
+    """
+    return [
+        get_ancestor_dependency(lambda: Region, lambda region: region),
+        get_ancestor_dependency(lazy_model_cls, get_region),
+    ]
 
 
 class Region(BaseModel):
@@ -28,20 +45,72 @@ class Region(BaseModel):
     kind = Field[constants.RegionKind]()
 
     derived_fields: ClassVar[list[DerivedField[Any]]] = [
-        DerivedField("has_collections", bool, lambda region: region.has_collections()),
         DerivedField(
-            "has_citation_groups", bool, lambda region: region.has_citation_groups()
+            "has_collections",
+            bool,
+            lambda region: region.has_collections(),
+            dependencies=_subtree_dependencies(
+                lambda: models.Collection, lambda collection: collection.location
+            ),
+        ),
+        DerivedField(
+            "has_citation_groups",
+            bool,
+            lambda region: region.has_citation_groups(),
+            dependencies=_subtree_dependencies(
+                lambda: models.CitationGroup, lambda cg: cg.region
+            ),
+        ),
+        DerivedField(
+            "has_locations",
+            bool,
+            lambda region: region.has_locations(),
+            dependencies=_subtree_dependencies(
+                lambda: models.Location, lambda loc: loc.region
+            ),
+        ),
+        DerivedField(
+            "has_periods",
+            bool,
+            lambda region: region.has_periods(),
+            dependencies=_subtree_dependencies(
+                lambda: models.Period, lambda period: period.region
+            ),
+        ),
+        DerivedField(
+            "has_type_localities",
+            bool,
+            lambda region: not region.is_empty(),
+            dependencies=[
+                *_subtree_dependencies(lambda: models.Location, lambda loc: loc.region),
+                get_ancestor_dependency(
+                    lambda: models.Name,
+                    lambda nam: (
+                        None if nam.type_locality is None else nam.type_locality.region
+                    ),
+                ),
+            ],
         ),
-        DerivedField("has_locations", bool, lambda region: region.has_locations()),
-        DerivedField("has_periods", bool, lambda region: region.has_periods()),
-        DerivedField("has_type_localities", bool, lambda region: not region.is_empty()),
         DerivedField(
-            "has_associated_people", bool, lambda region: region.has_associated_people()
+            "has_associated_people",
+            bool,
+            lambda region: region.has_associated_people(),
+            dependencies=[
+                get_ancestor_dependency(lambda: Region, lambda region: region),
+                get_ancestor_dependency(
+                    lambda: Region,
+                    lambda region: region,
+                    derived_field="associated_people",
+                ),
+            ],
         ),
         DerivedField(
             "has_stratigraphic_units",
             bool,
             lambda region: region.has_stratigraphic_units(),
+            dependencies=_subtree_dependencies(
+                lambda: models.StratigraphicUnit, lambda unit: unit.region
+            ),
         ),
         get_tag_based_derived_field(
             "associated_people",
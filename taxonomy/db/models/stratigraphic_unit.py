@@ -13,7 +13,7 @@ from taxonomy.db import models
 from taxonomy.db.constants import RequirednessLevel, StratigraphicUnitRank
 from taxonomy.db.derived_data import DerivedField
 
-from .base import BaseModel
+from .base import BaseModel, get_ancestor_dependency
 from .period import Period
 from .region import Region
 
@@ -42,7 +42,19 @@ class StratigraphicUnit(BaseModel):
     deleted = Field[bool](default=False)
 
     derived_fields: ClassVar[list[DerivedField[Any]]] = [
-        DerivedField("has_locations", bool, lambda unit: unit.has_locations())
+        DerivedField(
+            "has_locations",
+            bool,
+            lambda unit: unit.has_locations(),
+            # As for Period.has_locations, locations that move to another unit
+            # are only picked up by a full compute_derived_fields.
+            dependencies=[
+                get_ancestor_dependency(lambda: StratigraphicUnit, lambda unit: unit),
+                get_ancestor_dependency(
+                    lambda: models.Location, lambda loc: loc.stratigraphic_unit
+                ),
+            ],
+        )
     ]
     search_fields: ClassVar[list[SearchField]] = [
         SearchField(SearchFieldType.text, "name"),
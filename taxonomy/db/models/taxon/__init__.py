@@ -1,4 +1,4 @@
-__all__ = ["Taxon", "display_organized", "lint"]
+__all__ = ["Taxon", "closure", "display_organized", "lint"]
 
-from . import lint
+from . import closure, lint
 from .taxon import Taxon, display_organized
@@ -0,0 +1,326 @@
+"""Closure table for the Taxon hierarchy.
+
+The taxon_closure table contains a row (ancestor_id, descendant_id, depth) for
+every pair of taxa where one is reachable from the other by following parent
+links, including a row with depth 0 for each taxon itself. It follows the raw
+parent_id column, so it includes removed and redirected taxa; subtree queries
+that should skip them filter on the path instead.
+
+The table is kept up to date from Taxon.save_event and Taxon.creation_event.
+If it does not exist yet, it is built from scratch on first use. On a read-only
+database, it is built as a temporary table for each connection instead.
+
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from clirm import Field
+from clirm.base import Condition
+
+from taxonomy.db.constants import AgeClass, Rank
+from taxonomy.db.models.base import BaseModel
+
+TABLE_NAME = "taxon_closure"
+
+_table_checked = False
+
+
+def get_connection() -> sqlite3.Connection:
+    conn = BaseModel.clirm.conn
+    global _table_checked
+    if _table_checked:
+        return conn
+    if _table_exists(conn, "sqlite_master"):
+        _table_checked = True
+    elif not _table_exists(conn, "sqlite_temp_master"):
+        try:
+            rebuild(conn)
+        except sqlite3.OperationalError:
+            # The database is read-only (as it may be for hsweb), so build a
+            # temporary table that lives as long as this connection.
+            rebuild(conn, temporary=True)
+        else:
+            _table_checked = True
+    return conn
+
+
+def _table_exists(conn: sqlite3.Connection, master_table: str) -> bool:
+    row = conn.execute(
+        f"SELECT 1 FROM {master_table} WHERE type = 'table' AND name = ?", (TABLE_NAME,)
+    ).fetchone()
+    return row is not None
+
+
+def _create_table(conn: sqlite3.Connection, *, temporary: bool = False) -> None:
+    conn.execute(f"""
+        CREATE {"TEMP " if temporary else ""}TABLE IF NOT EXISTS `{TABLE_NAME}` (
+            `ancestor_id` integer not null,
+            `descendant_id` integer not null,
+            `depth` integer not null,
+            PRIMARY KEY (`ancestor_id`, `descendant_id`)
+        ) WITHOUT ROWID
+        """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS {"temp." if temporary else ""}"taxon_closure_descendant"
+        ON `{TABLE_NAME}` (`descendant_id`, `depth`)
+        """)
+
+
+def compute_rows(parents: dict[int, int | None]) -> Iterator[tuple[int, int, int]]:
+    """Compute the closure rows from a mapping of taxon id to parent id.
+
+    Parent cycles are cut at the point where they are detected.
+
+    """
+    ancestors: dict[int, list[int]] = {}
+    for taxon_id in parents:
+        chain: list[int] = []
+        seen: set[int] = set()
+        current: int | None = taxon_id
+        while current is not None and current not in ancestors:
+            if current in seen:
+                break
+            seen.add(current)
+            chain.append(current)
+            current = parents.get(current)
+        rest = ancestors.get(current, []) if current is not None else []
+        for i in range(len(chain) - 1, -1, -1):
+            rest = [chain[i], *rest]
+            ancestors[chain[i]] = rest
+    for taxon_id, chain in ancestors.items():
+        for depth, ancestor_id in enumerate(chain):
+            yield ancestor_id, taxon_id, depth
+
+
+def rebuild(conn: sqlite3.Connection | None = None, *, temporary: bool = False) -> int:
+    """Rebuild the closure table from the taxon table. Returns the number of rows.
+
+    Raises sqlite3.OperationalError if the database is read-only, unless temporary
+    is set, in which case the table is created in the connection's temp schema.
+
+    """
+    if conn is None:
+        conn = BaseModel.clirm.conn
+    parents = dict(conn.execute("SELECT id, parent_id FROM taxon").fetchall())
+    rows = list(compute_rows(parents))
+    with conn:
+        _create_table(conn, temporary=temporary)
+        conn.execute(f"DELETE FROM `{TABLE_NAME}`")
+        conn.executemany(f"INSERT INTO `{TABLE_NAME}` VALUES (?, ?, ?)", rows)
+    return len(rows)
+
+
+def update_taxon(taxon_id: int, parent_id: int | None) -> None:
+    """Update the closure table after the parent of a taxon may have changed."""
+    conn = get_connection()
+    with conn:
+        conn.execute(
+            f"INSERT OR IGNORE INTO `{TABLE_NAME}` VALUES (?, ?, 0)",
+            (taxon_id, taxon_id),
+        )
+        row = conn.execute(
+            f"SELECT ancestor_id FROM `{TABLE_NAME}` WHERE descendant_id = ? AND"
+            " depth = 1",
+            (taxon_id,),
+        ).fetchone()
+        if (row[0] if row is not None else None) == parent_id:
+            return
+        # Detach the subtree rooted at this taxon from its old ancestors
+        conn.execute(
+            f"""
+            DELETE FROM `{TABLE_NAME}`
+            WHERE descendant_id IN (
+                SELECT descendant_id FROM `{TABLE_NAME}` WHERE ancestor_id = ?
+            )
+            AND ancestor_id IN (
+                SELECT ancestor_id FROM `{TABLE_NAME}`
+                WHERE descendant_id = ? AND depth > 0
+            )
+            """,
+            (taxon_id, taxon_id),
+        )
+        if parent_id is None or is_ancestor(taxon_id, parent_id, conn=conn):
+            # Parent cycles are reported by the parent_cycle linter.
+            return
+        conn.execute(
+            f"""
+            INSERT INTO `{TABLE_NAME}`
+            SELECT above.ancestor_id, below.descendant_id, above.depth + below.depth + 1
+            FROM `{TABLE_NAME}` AS above, `{TABLE_NAME}` AS below
+            WHERE above.descendant_id = ? AND below.ancestor_id = ?
+            """,
+            (parent_id, taxon_id),
+        )
+
+
+def is_ancestor(
+    ancestor_id: int, descendant_id: int, *, conn: sqlite3.Connection | None = None
+) -> bool:
+    if conn is None:
+        conn = get_connection()
+    row = conn.execute(
+        f"SELECT 1 FROM `{TABLE_NAME}` WHERE ancestor_id = ? AND descendant_id = ?",
+        (ancestor_id, descendant_id),
+    ).fetchone()
+    return row is not None
+
+
+def get_ancestors(taxon_id: int) -> list[tuple[int, Rank]]:
+    """Return the ids and ranks of the taxon and its ancestors, nearest first."""
+    rows = (
+        get_connection()
+        .execute(
+            f"""
+            SELECT taxon.id, taxon.rank
+            FROM `{TABLE_NAME}` AS closure
+            JOIN taxon ON taxon.id = closure.ancestor_id
+            WHERE closure.descendant_id = ?
+            ORDER BY closure.depth
+            """,
+            (taxon_id,),
+        )
+        .fetchall()
+    )
+    return [(ancestor_id, Rank(rank)) for ancestor_id, rank in rows]
+
+
+def get_stored_ancestors(taxon_id: int) -> list[int]:
+    rows = (
+        get_connection()
+        .execute(
+            f"SELECT ancestor_id FROM `{TABLE_NAME}` WHERE descendant_id = ?"
+            " ORDER BY depth",
+            (taxon_id,),
+        )
+        .fetchall()
+    )
+    return [ancestor_id for (ancestor_id,) in rows]
+
+
+def get_subtree_roots_of_rank(
+    rank: Rank, taxon_ids: Iterable[int] | None = None
+) -> dict[int, list[int]]:
+    """Map each taxon to the ancestors of the given rank whose subtree contains it.
+
+    Subtrees are as matched by InSubtree without other options: a taxon does not
+    belong to the subtree of an ancestor if there is a removed or redirected
+    taxon on the path between them (including the taxon itself). If taxon_ids is
+    given, only those taxa are included.
+
+    """
+    conn = get_connection()
+    args: list[object] = [rank.value, AgeClass.removed.value, AgeClass.redirect.value]
+    if taxon_ids is None:
+        restriction = ""
+    else:
+        taxon_ids = list(taxon_ids)
+        restriction = (
+            f"AND closure.descendant_id IN ({', '.join('?' for _ in taxon_ids)})"
+        )
+        args += taxon_ids
+    rows = conn.execute(
+        f"""
+        SELECT closure.descendant_id, closure.ancestor_id
+        FROM `{TABLE_NAME}` AS closure
+        JOIN taxon AS root ON root.id = closure.ancestor_id
+        WHERE root.rank = ?
+        AND NOT EXISTS (
+            SELECT 1
+            FROM `{TABLE_NAME}` AS path
+            JOIN taxon AS path_taxon ON path_taxon.id = path.ancestor_id
+            WHERE path.descendant_id = closure.descendant_id
+            AND path.depth < closure.depth
+            AND path_taxon.age IN (?, ?)
+        )
+        {restriction}
+        ORDER BY closure.descendant_id, closure.depth
+        """,
+        args,
+    ).fetchall()
+    roots: dict[int, list[int]] = {}
+    for taxon_id, root_id in rows:
+        roots.setdefault(taxon_id, []).append(root_id)
+    return roots
+
+
+def get_descendants(taxon_id: int) -> list[int]:
+    """Return the ids of the taxon and all taxa below it."""
+    rows = (
+        get_connection()
+        .execute(
+            f"SELECT descendant_id FROM `{TABLE_NAME}` WHERE ancestor_id = ?",
+            (taxon_id,),
+        )
+        .fetchall()
+    )
+    return [descendant_id for (descendant_id,) in rows]
+
+
+class InSubtree(Condition):
+    """Condition matching objects whose taxon lies in the subtree of a taxon.
+
+    This mirrors a recursive walk through Taxon.get_children(): it skips removed
+    and redirected taxa below the root, and taxa in exclude, together with
+    everything below them. If age is given, it matches only taxa of that age and
+    does not descend into taxa of a later age. If rank is given, it matches only
+    taxa of that rank and does not descend into taxa of that rank or lower.
+
+    """
+
+    def __init__(
+        self,
+        field: Field[Any],
+        root_id: int,
+        *,
+        exclude: Iterable[int] = (),
+        age: AgeClass | None = None,
+        rank: Rank | None = None,
+    ) -> None:
+        self.field = field
+        self.root_id = root_id
+        self.exclude = tuple(exclude)
+        self.age = age
+        self.rank = rank
+
+    def stringify(self) -> tuple[str, tuple[object, ...]]:
+        # Make sure the table exists before it is used in a query
+        get_connection()
+        matched = ["closure.ancestor_id = ?"]
+        matched_args: list[object] = [self.root_id]
+        pruned = ["(path.depth < closure.depth AND path_taxon.age IN (?, ?))"]
+        pruned_args: list[object] = [AgeClass.removed.value, AgeClass.redirect.value]
+        if self.exclude:
+            placeholders = ", ".join("?" for _ in self.exclude)
+            pruned.append(f"path.ancestor_id IN ({placeholders})")
+            pruned_args += self.exclude
+        if self.age is not None:
+            matched.append("descendant.age = ?")
+            matched_args.append(self.age.value)
+            pruned.append("path_taxon.age > ?")
+            pruned_args.append(self.age.value)
+        if self.rank is not None:
+            matched.append("descendant.rank = ?")
+            matched_args.append(self.rank.value)
+            pruned.append("(path.depth > 0 AND path_taxon.rank <= ?)")
+            pruned_args.append(self.rank.value)
+        query = f"""
+            (`{self.field.name}` IN (
+                SELECT closure.descendant_id
+                FROM `{TABLE_NAME}` AS closure
+                JOIN taxon AS descendant ON descendant.id = closure.descendant_id
+                WHERE {" AND ".join(matched)}
+                AND NOT EXISTS (
+                    SELECT 1
+                    FROM `{TABLE_NAME}` AS path
+                    JOIN taxon AS path_taxon ON path_taxon.id = path.ancestor_id
+                    WHERE path.descendant_id = closure.descendant_id
+                    AND path.depth <= closure.depth
+                    AND ({" OR ".join(pruned)})
+                )
+            ))
+        """
+        return query, (*matched_args, *pruned_args)
@@ -13,6 +13,7 @@ from taxonomy.db.constants import AgeClass, Group, NomenclatureStatus, Rank, Sta
 from taxonomy.db.models.base import LintConfig
 from taxonomy.db.models.lint import IgnoreLint, Lint
 
+from . import closure
 from .taxon import Taxon
 
 
@@ -81,6 +82,27 @@ def check_parent_cycle(taxon: Taxon, cfg: LintConfig) -> Iterable[str]:
             return
 
 
+@LINT.add("closure")
+def check_closure(taxon: Taxon, cfg: LintConfig) -> Iterable[str]:
+    expected: list[int] = []
+    current: Taxon | None = taxon
+    while current is not None and current.id not in expected:
+        expected.append(current.id)
+        current = current.parent
+    if current is not None:
+        # reported by check_parent_cycle
+        return
+    stored = closure.get_stored_ancestors(taxon.id)
+    if stored == expected:
+        return
+    message = f"taxon closure has ancestors {stored}, but expected {expected}"
+    if cfg.autofix:
+        print(f"{taxon}: {message}; rebuilding taxon closure")
+        closure.rebuild()
+    else:
+        yield message
+
+
 @LINT.add("rank")
 def check_rank(taxon: Taxon, cfg: LintConfig) -> Iterable[str]:
     if not taxon.rank.is_allowed_for_taxon:
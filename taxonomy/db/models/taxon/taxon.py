@@ -5,7 +5,7 @@ import re
 import sqlite3
 import sys
 from collections import Counter, defaultdict
-from collections.abc import Callable, Container, Iterable, Sequence
+from collections.abc import Callable, Collection, Container, Iterable, Sequence
 from functools import lru_cache
 from typing import IO, Any, ClassVar, Self, assert_never, cast
 
@@ -25,12 +25,15 @@ from taxonomy.db.constants import (
     Rank,
     Status,
 )
-from taxonomy.db.derived_data import DerivedField, SetLater
+from taxonomy.db.derived_data import Dependency, DerivedField, SetLater
 from taxonomy.db.models.article import Article
 from taxonomy.db.models.base import ADTField, BaseModel, LintConfig, TextOrNullField
 from taxonomy.db.models.fill_data import fill_data_for_names
 from taxonomy.db.models.location import LocationStatus
 
+from . import closure
+from .closure import InSubtree
+
 
 class _OccurrenceGetter:
     """For easily accessing occurrences of a taxon.
@@ -67,6 +70,18 @@ def _make_parent_getter(index: int) -> Any:
     return _get_ranked_parent
 
 
+def _get_self_and_descendant_ids(taxon: BaseModel) -> Iterable[int]:
+    assert isinstance(taxon, Taxon)
+    for descendant in Taxon.select().filter(InSubtree(Taxon.id, taxon.id)):
+        yield descendant.id
+
+
+# The ranked parents of a taxon change when any of its ancestors is edited
+_RANKED_PARENT_DEPENDENCIES = [
+    Dependency(lambda: Taxon, get_affected_ids=_get_self_and_descendant_ids)
+]
+
+
 class Taxon(BaseModel):
     creation_event = events.Event["Taxon"]()
     save_event = events.Event["Taxon"]()
@@ -86,9 +101,24 @@ class Taxon(BaseModel):
     tags = ADTField["models.tags.TaxonTag"](is_ordered=False)
 
     derived_fields: ClassVar[list[DerivedField[Any]]] = [
-        DerivedField("class_", SetLater, _make_parent_getter(0)),
-        DerivedField("order", SetLater, _make_parent_getter(1)),
-        DerivedField("family", SetLater, _make_parent_getter(2)),
+        DerivedField(
+            "class_",
+            SetLater,
+            _make_parent_getter(0),
+            dependencies=_RANKED_PARENT_DEPENDENCIES,
+        ),
+        DerivedField(
+            "order",
+            SetLater,
+            _make_parent_getter(1),
+            dependencies=_RANKED_PARENT_DEPENDENCIES,
+        ),
+        DerivedField(
+            "family",
+            SetLater,
+            _make_parent_getter(2),
+            dependencies=_RANKED_PARENT_DEPENDENCIES,
+        ),
     ]
     search_fields: ClassVar[list[SearchField]] = [
         SearchField(SearchFieldType.text, "name"),
@@ -205,7 +235,7 @@ class Taxon(BaseModel):
             if self.rank == Rank.subgenus:
                 self._needs_is = (
                     Taxon.select()
-                    .filter(Taxon.parent == self, Taxon.rank == Rank.species_group)
+                    .filter(type(self).parent == self, Taxon.rank == Rank.species_group)
                     .count()
                     > 0
                 )
@@ -213,7 +243,7 @@ class Taxon(BaseModel):
                 self._needs_is = (
                     Taxon.select_valid()
                     .filter(
-                        Taxon.parent == self,
+                        type(self).parent == self,
                         (Taxon.rank == Rank.subgenus)
                         | (Taxon.rank == Rank.species_group),
                     )
@@ -227,20 +257,15 @@ class Taxon(BaseModel):
     def parent_of_rank(self, rank: Rank, original_taxon: Taxon | None = None) -> Taxon:
         if original_taxon is None:
             original_taxon = self
-        if self.rank > rank and self.rank != Rank.unranked:
-            raise ValueError(
-                f"{original_taxon} (id = {original_taxon.id}) has no ancestor of rank"
-                f" {rank.display_name}"
-            )
-        elif self.rank == rank:
-            return self
-        elif self.parent is None:
-            raise ValueError(
-                f"{original_taxon} (id = {original_taxon.id}) has no ancestor of rank"
-                f" {rank.display_name}"
-            )
-        else:
-            return self.parent.parent_of_rank(rank, original_taxon=original_taxon)
+        for ancestor_id, ancestor_rank in closure.get_ancestors(self.id):
+            if ancestor_rank == rank:
+                return Taxon(ancestor_id)
+            if ancestor_rank > rank and ancestor_rank != Rank.unranked:
+                break
+        raise ValueError(
+            f"{original_taxon} (id = {original_taxon.id}) has no ancestor of rank"
+            f" {rank.display_name}"
+        )
 
     def add_tag(self, tag: models.tags.TaxonTag) -> None:
         if self.tags:
@@ -257,12 +282,7 @@ class Taxon(BaseModel):
             return True
 
     def is_child_of(self, taxon: Taxon) -> bool:
-        if self == taxon:
-            return True
-        elif self.parent is None:
-            return False
-        else:
-            return self.parent.is_child_of(taxon)
+        return closure.is_ancestor(taxon.id, self.id)
 
     def diversity_summary(
         self,
@@ -363,18 +383,10 @@ class Taxon(BaseModel):
                 break
 
     def children_of_rank(self, rank: Rank, age: AgeClass | None = None) -> list[Taxon]:
-        if self.rank < rank:
-            return []
-        elif self.rank == rank:
-            if age is None or self.age == age:
-                return [self]
-            else:
-                return []
-        else:
-            out: list[Taxon] = []
-            for child in self.get_children():
-                out += child.children_of_rank(rank, age=age)
-            return out
+        query = Taxon.select().filter(InSubtree(Taxon.id, self.id, rank=rank))
+        if age is not None:
+            query = query.filter(Taxon.age == age)
+        return list(query)
 
     def names_like(self, root_name: str) -> list[models.Name]:
         """Find names matching root_name within this taxon."""
@@ -613,7 +625,7 @@ class Taxon(BaseModel):
         full: bool = False,
         geographically: bool = False,
         region: models.Region | None = None,
-        exclude: Container[Taxon] = frozenset(),
+        exclude: Collection[Taxon] = frozenset(),
         file: IO[str] = sys.stdout,
     ) -> None:
         nams = self.all_names(exclude=exclude)
@@ -1292,40 +1304,30 @@ class Taxon(BaseModel):
     def all_names(
         self,
         age: AgeClass | None = None,
-        exclude: Container[Taxon] = frozenset(),
+        exclude: Collection[Taxon] = frozenset(),
         min_year: int | None = None,
     ) -> set[models.Name]:
-        if self in exclude:
-            return set()
-        names: set[models.Name]
-        if age is not None:
-            if self.age > age:
-                return set()
-            elif self.age == age:
-                names = set(self.get_names())
-            else:
-                names = set()
-        else:
-            names = set(self.get_names())
+        names = set(self.all_names_lazy(exclude=exclude, age=age))
         if min_year is not None:
             names = {nam for nam in names if nam.numeric_year() >= min_year}
-        for child in self.get_children():
-            names |= child.all_names(age=age, exclude=exclude, min_year=min_year)
         return names
 
     def all_names_lazy(
-        self, exclude: Container[Taxon] = frozenset()
+        self, exclude: Collection[Taxon] = frozenset(), age: AgeClass | None = None
     ) -> Iterable[models.Name]:
-        if self in exclude:
-            return
-        yield from self.get_names()
-        for child in self.get_children():
-            yield from child.all_names_lazy(exclude=exclude)
+        return models.Name.select_valid().filter(
+            InSubtree(
+                models.Name.taxon,
+                self.id,
+                age=age,
+                exclude=[taxon.id for taxon in exclude],
+            )
+        )
 
     def all_authors(
         self,
         age: AgeClass | None = None,
-        exclude: Container[Taxon] = frozenset(),
+        exclude: Collection[Taxon] = frozenset(),
         min_year: int | None = None,
     ) -> set[models.Person]:
         nams = self.all_names(age=age, exclude=exclude, min_year=min_year)
@@ -1343,7 +1345,7 @@ class Taxon(BaseModel):
         field: str,
         age: AgeClass | None = None,
         min_year: int | None = None,
-        exclude: Container[Taxon] = frozenset(),
+        exclude: Collection[Taxon] = frozenset(),
     ) -> set[models.Name]:
         return {
             name
@@ -1388,7 +1390,7 @@ class Taxon(BaseModel):
         age: AgeClass | None = None,
         graphical: bool = False,
         focus_field: str | None = None,
-        exclude: Container[Taxon] = frozenset(),
+        exclude: Collection[Taxon] = frozenset(),
         min_year: int | None = None,
     ) -> dict[str, float]:
         names = self.all_names(age=age, min_year=min_year, exclude=exclude)
@@ -1527,7 +1529,7 @@ class Taxon(BaseModel):
     def fill_field_for_names(
         self,
         field: str | None = None,
-        exclude: Container[Taxon] = frozenset(),
+        exclude: Collection[Taxon] = frozenset(),
         min_year: int | None = None,
     ) -> None:
         if field is None:
@@ -1607,6 +1609,14 @@ class Taxon(BaseModel):
         return [name for name in result if name is not None and " " not in name]
 
 
+def _update_closure(taxon: Taxon) -> None:
+    closure.update_taxon(taxon.id, type(taxon).parent.get_raw(taxon))
+
+
+Taxon.creation_event.on(_update_closure)
+Taxon.save_event.on(_update_closure)
+
+
 @lru_cache(maxsize=2048)
 def ranked_parents(
     txn: Taxon | None,
@@ -0,0 +1,57 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from taxonomy.db.models.base import load_many, record_objects, trace_queries
+from taxonomy.db.models.name.name import Name
+from taxonomy.db.models.taxon import Taxon
+
+
+def test_identity_map() -> None:
+    nam = Name(12345, root_name="rattus")
+    assert Name(12345) is nam
+    # Constructing the object again keeps its data
+    assert nam._clirm_data == {"id": 12345, "root_name": "rattus"}
+    assert Name(12345, status=1)._clirm_data == {
+        "id": 12345,
+        "root_name": "rattus",
+        "status": 1,
+    }
+
+
+def test_identity_map_threads() -> None:
+    def construct(_: int) -> list[Name]:
+        return [Name(oid, root_name=f"name{oid}") for oid in range(20000, 20100)]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(construct, range(32)))
+    for nams in results:
+        assert nams == results[0]
+        assert all(a is b for a, b in zip(nams, results[0], strict=True))
+    assert all(nam._clirm_data["root_name"] == f"name{nam.id}" for nam in results[0])
+
+
+def test_record_loaded_objects(db: sqlite3.Connection) -> None:
+    db.executemany(
+        "INSERT INTO taxon (id, valid_name) VALUES (?, ?)", [(1, "Mus"), (2, "Rattus")]
+    )
+    db.commit()
+    taxon = load_many(Taxon, [1])[0]
+    with record_objects() as objects:
+        # Taxon 1 is already loaded, so load_many() does not query it again
+        assert sorted(load_many(Taxon, [1, 2]), key=lambda t: t.id)[0] is taxon
+    assert objects == {("T", 1), ("T", 2)}
+
+
+def test_trace_queries() -> None:
+    conn = sqlite3.connect(":memory:")
+    outer: list[str] = []
+    inner: list[str] = []
+    with trace_queries(conn, outer.append):
+        conn.execute("SELECT 1")
+        with trace_queries(conn, inner.append):
+            conn.execute("SELECT 2")
+        # Leaving the inner block keeps the outer callback
+        conn.execute("SELECT 3")
+    conn.execute("SELECT 4")
+    assert outer == ["SELECT 1", "SELECT 2", "SELECT 3"]
+    assert inner == ["SELECT 2"]
@@ -0,0 +1,54 @@
+import sqlite3
+
+import httpx
+import pytest
+
+from taxonomy.db.models.lint_profile import LinterProfile, LintProfiler, profile_linters
+
+
+def test_linter_profile() -> None:
+    profile = LinterProfile()
+    assert profile.p95_time == 0.0
+    for _ in range(95):
+        profile.add_call(0.001, queries=2, network_calls=0)
+    for _ in range(5):
+        profile.add_call(1.0, queries=0, network_calls=1)
+    assert profile.calls == 100
+    assert profile.queries == 190
+    assert profile.network_calls == 5
+    assert profile.total_time == pytest.approx(5.095)
+    assert 0.001 <= profile.p95_time < 0.0011
+    assert 1.0 <= profile.percentile(1.0) < 1.1
+
+
+def test_report() -> None:
+    profiler = LintProfiler()
+    profiler.get_profile("Name.fast").add_call(0.001, queries=0, network_calls=0)
+    profiler.get_profile("Name.slow").add_call(0.5, queries=3, network_calls=0)
+    profiler.record_skip("Name.fast")
+    assert [key for key, _ in profiler.sorted_profiles()] == ["Name.slow", "Name.fast"]
+    assert profiler.to_json()["Name.fast"]["skipped"] == 1
+    report = profiler.format_report(limit=1).splitlines()
+    assert len(report) == 2
+    assert report[1].startswith("Name.slow")
+    with pytest.raises(ValueError, match="sort_by must be one of"):
+        profiler.sorted_profiles("name")
+
+
+def test_profile_linters(db: sqlite3.Connection) -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text="ok"))
+    with (
+        profile_linters() as profiler,
+        profiler.measure("Name.network"),
+        httpx.Client(transport=transport) as client,
+    ):
+        assert client.get("https://example.com").text == "ok"
+        db.execute("SELECT 1")
+    profile = profiler.get_profile("Name.network")
+    assert profile.calls == 1
+    assert profile.network_calls == 1
+    assert profile.queries == 1
+    # Profiling is no longer active
+    with httpx.Client(transport=transport) as client:
+        client.get("https://example.com")
+    assert profiler.num_network_calls == 1
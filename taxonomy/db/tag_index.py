@@ -0,0 +1,311 @@
+"""Index of the contents of ADT fields.
+
+ADT fields such as Name.tags are stored as JSON, so finding the objects that carry
+a particular tag would otherwise require a substring scan over the whole table.
+The tag_index table has a row for every tag (with arg_number 0) and a row for
+every argument of a tag that is a reference to another object or an integer
+(including enums), keyed by the position of the argument in the serialized tag.
+
+The index is updated whenever an object is created or an ADT field is saved. If
+the table does not exist yet, it is built from scratch on first use. If the
+database is read-only, as on the hsweb server, it is built once per process in a
+temporary file instead, which the connection of every thread attaches.
+
+"""
+
+from __future__ import annotations
+
+import atexit
+import shutil
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from clirm.base import Condition
+
+from taxonomy import adt
+from taxonomy.db import models
+
+if TYPE_CHECKING:
+    from taxonomy.db.models.base import ADTField, BaseModel
+
+TABLE_NAME = "tag_index"
+# Name under which the index built for a read-only database is attached
+SHARED_SCHEMA = "shared_tag_index"
+
+_table_checked = False
+_shared_index_path: Path | None = None
+_shared_index_lock = threading.Lock()
+
+
+class Row(NamedTuple):
+    tag_number: int
+    tag_id: int
+    arg_number: int
+    value: int | None
+    ref_call_sign: str | None
+
+
+class Referrer(NamedTuple):
+    call_sign: str
+    object_id: int
+    field: str
+    tag_id: int
+
+
+def get_connection() -> sqlite3.Connection:
+    conn = models.BaseModel.clirm.conn
+    global _table_checked
+    if _table_checked:
+        return conn
+    if _table_exists(conn, "sqlite_master"):
+        _table_checked = True
+    elif not _is_shared_index_attached(conn):
+        try:
+            rebuild(conn)
+        except sqlite3.OperationalError:
+            # The database is read-only. Unqualified queries for the table find
+            # it in the attached database.
+            conn.execute(
+                f"ATTACH DATABASE ? AS {SHARED_SCHEMA}", (str(_get_shared_index(conn)),)
+            )
+        else:
+            _table_checked = True
+    return conn
+
+
+def _is_shared_index_attached(conn: sqlite3.Connection) -> bool:
+    return any(row[1] == SHARED_SCHEMA for row in conn.execute("PRAGMA database_list"))
+
+
+def _get_shared_index(conn: sqlite3.Connection) -> Path:
+    """Return the path to a copy of the index built from the connection's database."""
+    global _shared_index_path
+    with _shared_index_lock:
+        if _shared_index_path is None:
+            directory = Path(tempfile.mkdtemp(prefix=f"{TABLE_NAME}-"))
+            atexit.register(shutil.rmtree, directory, ignore_errors=True)
+            path = directory / f"{TABLE_NAME}.db"
+            index_conn = sqlite3.connect(path)
+            try:
+                with index_conn:
+                    _create_table(index_conn)
+                    _fill(conn, index_conn)
+            finally:
+                index_conn.close()
+            _shared_index_path = path
+        return _shared_index_path
+
+
+def _table_exists(conn: sqlite3.Connection, master_table: str) -> bool:
+    row = conn.execute(
+        f"SELECT 1 FROM {master_table} WHERE type = 'table' AND name = ?", (TABLE_NAME,)
+    ).fetchone()
+    return row is not None
+
+
+def _create_table(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS `{TABLE_NAME}` (
+            `call_sign` varchar(8) not null,
+            `object_id` integer not null,
+            `field` varchar(255) not null,
+            `tag_number` integer not null,
+            `tag_id` integer not null,
+            `arg_number` integer not null,
+            `value` integer default null,
+            `ref_call_sign` varchar(8) default null
+        )
+        """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS "tag_index_tag"
+        ON `{TABLE_NAME}` (`call_sign`, `field`, `tag_id`, `arg_number`, `value`)
+        """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS "tag_index_object"
+        ON `{TABLE_NAME}` (`call_sign`, `object_id`, `field`)
+        """)
+    conn.execute(f"""
+        CREATE INDEX IF NOT EXISTS "tag_index_reference"
+        ON `{TABLE_NAME}` (`ref_call_sign`, `value`)
+        """)
+
+
+def get_rows(field_obj: ADTField[Any], raw_value: Any) -> Iterable[Row]:
+    """Compute the index rows for the serialized value of an ADT field."""
+    for tag_number, (member_cls, args) in enumerate(
+        models.base.iter_tags(field_obj, raw_value)
+    ):
+        tag_id = member_cls._tag
+        yield Row(tag_number, tag_id, 0, None, None)
+        for arg_number, (arg_type, value) in enumerate(
+            zip(member_cls._attributes.values(), args, strict=False), start=1
+        ):
+            if value is None:
+                continue
+            if isinstance(arg_type, type) and issubclass(arg_type, models.BaseModel):
+                yield Row(tag_number, tag_id, arg_number, value, arg_type.call_sign)
+            elif isinstance(value, int):
+                yield Row(tag_number, tag_id, arg_number, value, None)
+
+
+def _get_adt_fields(model_cls: type[BaseModel]) -> list[ADTField[Any]]:
+    return [
+        field
+        for field in model_cls.clirm_fields.values()
+        if isinstance(field, models.base.ADTField)
+    ]
+
+
+def update_object(obj: BaseModel, field_names: Iterable[str] | None = None) -> None:
+    """Update the index for the given ADT fields of an object (default: all)."""
+    fields = _get_adt_fields(type(obj))
+    if field_names is not None:
+        field_names = set(field_names)
+        fields = [field for field in fields if field.name in field_names]
+    if not fields:
+        return
+    call_sign = obj.call_sign
+    conn = get_connection()
+    with conn:
+        for field in fields:
+            conn.execute(
+                f"DELETE FROM `{TABLE_NAME}` WHERE call_sign = ? AND object_id = ? AND"
+                " field = ?",
+                (call_sign, obj.id, field.name),
+            )
+            conn.executemany(
+                f"INSERT INTO `{TABLE_NAME}` VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (call_sign, obj.id, field.name, *row)
+                    for row in get_rows(field, field.get_raw(obj))
+                ],
+            )
+
+
+def rebuild(conn: sqlite3.Connection | None = None) -> int:
+    """Rebuild the whole index. Returns the number of rows.
+
+    Raises sqlite3.OperationalError if the database is read-only.
+
+    """
+    if conn is None:
+        conn = models.BaseModel.clirm.conn
+    with conn:
+        _create_table(conn)
+        conn.execute(f"DELETE FROM `{TABLE_NAME}`")
+        return _fill(conn, conn)
+
+
+def _fill(source: sqlite3.Connection, target: sqlite3.Connection) -> int:
+    """Index the objects in source into the empty table in target."""
+    num_rows = 0
+    for model_cls in models.BaseModel.__subclasses__():
+        fields = _get_adt_fields(model_cls)
+        if not fields:
+            continue
+        columns = ", ".join(f"`{field.name}`" for field in fields)
+        cursor = source.execute(
+            f"SELECT id, {columns} FROM `{model_cls.clirm_table_name}`"
+        )
+        rows = [
+            (model_cls.call_sign, object_id, field.name, *row)
+            for object_id, *raw_values in cursor.fetchall()
+            for field, raw_value in zip(fields, raw_values, strict=True)
+            for row in get_rows(field, raw_value)
+        ]
+        target.executemany(
+            f"INSERT INTO `{TABLE_NAME}` VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        num_rows += len(rows)
+    return num_rows
+
+
+def _serialize_arg(value: object) -> int:
+    if isinstance(value, models.BaseModel):
+        return value.id
+    if isinstance(value, int):
+        return int(value)
+    raise TypeError(f"only references and integers are indexed, not {value!r}")
+
+
+class HasTag(Condition):
+    """Condition matching objects that have a tag in an ADT field.
+
+    args maps argument names of the tag to the value they must have. All of them
+    must match within the same tag.
+
+    """
+
+    def __init__(
+        self,
+        field_obj: ADTField[Any],
+        tag_cls: type[adt.ADT],
+        args: Mapping[str, object] = {},
+    ) -> None:
+        model_cls = field_obj.model_cls
+        assert issubclass(model_cls, models.BaseModel)
+        self.call_sign = model_cls.call_sign
+        self.field_name = field_obj.name
+        self.tag_id = tag_cls._tag
+        arg_numbers = {name: i for i, name in enumerate(tag_cls._attributes, start=1)}
+        self.args: list[tuple[int, int]] = []
+        for name, value in args.items():
+            if name not in arg_numbers:
+                raise ValueError(f"{tag_cls} has no argument {name!r}")
+            self.args.append((arg_numbers[name], _serialize_arg(value)))
+
+    def stringify(self) -> tuple[str, tuple[object, ...]]:
+        # Make sure the table exists before it is used in a query
+        get_connection()
+        base = (self.call_sign, self.field_name, self.tag_id)
+        if not self.args:
+            query = f"""
+                SELECT object_id FROM `{TABLE_NAME}`
+                WHERE call_sign = ? AND field = ? AND tag_id = ? AND arg_number = 0
+            """
+            return f"(`id` IN ({query}))", base
+        joins = []
+        conditions = []
+        params: list[object] = []
+        for i, (arg_number, value) in enumerate(self.args):
+            alias = f"arg{i}"
+            if i > 0:
+                joins.append(f"""
+                    JOIN `{TABLE_NAME}` AS {alias}
+                    ON {alias}.call_sign = arg0.call_sign
+                    AND {alias}.object_id = arg0.object_id
+                    AND {alias}.field = arg0.field
+                    AND {alias}.tag_number = arg0.tag_number
+                """)
+            conditions.append(
+                f"{alias}.tag_id = ? AND {alias}.arg_number = ? AND {alias}.value = ?"
+            )
+            params += [self.tag_id, arg_number, value]
+        query = f"""
+            SELECT arg0.object_id FROM `{TABLE_NAME}` AS arg0
+            {" ".join(joins)}
+            WHERE arg0.call_sign = ? AND arg0.field = ?
+            AND {" AND ".join(conditions)}
+        """
+        return f"(`id` IN ({query}))", (*base[:2], *params)
+
+
+def get_referrers(obj: BaseModel) -> list[Referrer]:
+    """Return the objects that refer to obj in one of their tags."""
+    rows = (
+        get_connection()
+        .execute(
+            f"""
+            SELECT DISTINCT call_sign, object_id, field, tag_id FROM `{TABLE_NAME}`
+            WHERE ref_call_sign = ? AND value = ?
+            ORDER BY call_sign, object_id
+            """,
+            (obj.call_sign, obj.id),
+        )
+        .fetchall()
+    )
+    return [Referrer(*row) for row in rows]
@@ -0,0 +1,65 @@
+from pathlib import Path
+
+from .derived_data import DerivedDataStore
+
+
+def test_store(tmp_path: Path) -> None:
+    store = DerivedDataStore(tmp_path / "derived.db")
+    assert store.get("N", "variants", 1) is None
+    assert store.get("N", "variants", 1, default=0) == 0
+
+    store.set("N", "variants", 1, [2, 3])
+    store.set("N", "variants", 4, [5])
+    store.set("T", "family", 1, 10)
+    assert store.get("N", "variants", 1) == [2, 3]
+    store.commit()
+
+    reloaded = DerivedDataStore(tmp_path / "derived.db")
+    assert reloaded.get("N", "variants", 1) == [2, 3]
+    assert reloaded.get_field("N", "variants") == {1: [2, 3], 4: [5]}
+    assert reloaded.get_field("T", "family") == {1: 10}
+
+    reloaded.delete("N", "variants", 4)
+    reloaded.replace_field("T", "family", {2: 11})
+    assert reloaded.get("N", "variants", 4) is None
+    reloaded.rollback()
+    assert reloaded.get_field("N", "variants") == {1: [2, 3], 4: [5]}
+
+    reloaded.delete("N", "variants", 4)
+    reloaded.replace_field("T", "family", {2: 11})
+    reloaded.commit()
+    store = DerivedDataStore(tmp_path / "derived.db")
+    assert store.get_field("N", "variants") == {1: [2, 3]}
+    assert store.get("T", "family", 1) is None
+    assert store.get("T", "family", 2) == 11
+
+
+def test_import_data(tmp_path: Path) -> None:
+    store = DerivedDataStore(tmp_path / "derived.db")
+    store.set("N", "variants", 7, [8])
+    store.commit()
+    store.import_data({"N": {1: {"variants": [2], "fill_data_level": 3}}})
+    assert store.get_field("N", "variants") == {1: [2]}
+    assert store.get("N", "fill_data_level", 1) == 3
+
+
+def test_dirty_objects(tmp_path: Path) -> None:
+    store = DerivedDataStore(tmp_path / "derived.db")
+    store.mark_dirty("N", 1)
+    store.mark_dirty("N", 2)
+    store.mark_dirty("T", 1)
+
+    # Survives a crash before the derived data is updated
+    store = DerivedDataStore(tmp_path / "derived.db")
+    assert store.get_dirty() == {"N": {1, 2}, "T": {1}}
+
+    store.clear_dirty()
+    assert store.get_dirty() == {}
+    store.rollback()
+    assert store.get_dirty() == {"N": {1, 2}, "T": {1}}
+
+    store.clear_dirty()
+    store.mark_dirty("N", 2)
+    store.commit()
+    store = DerivedDataStore(tmp_path / "derived.db")
+    assert store.get_dirty() == {"N": {2}}
@@ -0,0 +1,90 @@
+import datetime
+import sqlite3
+import time
+from collections.abc import Iterable
+
+import pytest
+
+from taxonomy.db import cached_data, lint_results
+from taxonomy.db.models.article import Article
+from taxonomy.db.models.base import LintConfig
+from taxonomy.db.models.lint import Lint
+from taxonomy.db.models.name.name import Name
+
+
+def test_hash_objects() -> None:
+    data = {
+        field.name: None for field in Name.clirm_fields.values() if field.name != "id"
+    }
+    nam = Name(-1, **data)
+    original = lint_results.hash_objects([nam])
+    assert lint_results.hash_objects([nam]) == original
+    assert lint_results.hash_objects([]) != original
+
+    nam = Name(-1, **{**data, "year": "2000"})
+    assert lint_results.hash_objects([nam]) != original
+
+
+def test_skip_unchanged(
+    db: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(
+        cached_data._local, "db", sqlite3.connect(":memory:"), raising=False
+    )
+    monkeypatch.setattr(lint_results, "_table_checked", False)
+    db.execute("INSERT INTO article (id, title) VALUES (1, 'Old'), (2, 'Other')")
+    db.execute("INSERT INTO name (id, original_citation_id) VALUES (1, 1)")
+    db.commit()
+
+    lint = Lint(Name, lambda nam: [], lambda nam, unused: None)
+    calls = []
+
+    @lint.add("citation", reads=("original_citation",))
+    def check_citation(nam: Name, cfg: LintConfig) -> Iterable[str]:
+        calls.append(nam.id)
+        return []
+
+    nam = Name(1)
+    cfg = LintConfig(autofix=False, interactive=False)
+    assert list(lint.run(nam, cfg)) == []
+    assert list(lint.run(nam, cfg)) == []
+    assert calls == [1]
+
+    # Not read by the linter
+    Article(2).title = "Changed"
+    assert list(lint.run(nam, cfg)) == []
+    assert calls == [1]
+
+    Article(1).title = "New"
+    assert list(lint.run(nam, cfg)) == []
+    assert calls == [1, 1]
+    assert list(lint.run(nam, cfg)) == []
+    assert calls == [1, 1]
+
+
+def test_ttl(db: sqlite3.Connection, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        cached_data._local, "db", sqlite3.connect(":memory:"), raising=False
+    )
+    monkeypatch.setattr(lint_results, "_table_checked", False)
+    db.execute("INSERT INTO name (id) VALUES (1)")
+    db.commit()
+
+    lint = Lint(Name, lambda nam: [], lambda nam, unused: None)
+    calls = []
+
+    @lint.add("external", reads=(), ttl=datetime.timedelta(days=1))
+    def check_external(nam: Name, cfg: LintConfig) -> Iterable[str]:
+        calls.append(nam.id)
+        return []
+
+    nam = Name(1)
+    cfg = LintConfig(autofix=False, interactive=False)
+    assert list(lint.run(nam, cfg)) == []
+    assert list(lint.run(nam, cfg)) == []
+    assert calls == [1]
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 2 * 24 * 60 * 60)
+    assert list(lint.run(nam, cfg)) == []
+    assert calls == [1, 1]
@@ -0,0 +1,27 @@
+import sqlite3
+
+from taxonomy.db.constants import Group, Status
+from taxonomy.db.models.base import trace_queries
+from taxonomy.db.models.name.name import Name
+
+
+def test_prefetch_query_count(db: sqlite3.Connection) -> None:
+    db.executemany(
+        "INSERT INTO taxon (id, valid_name) VALUES (?, ?)",
+        [(i, f"Taxon {i}") for i in range(1, 21)],
+    )
+    db.executemany(
+        "INSERT INTO name (id, `group`, root_name, status, taxon_id)"
+        " VALUES (?, ?, ?, ?, ?)",
+        [
+            (i, Group.species.value, f"name{i}", Status.valid.value, i)
+            for i in range(1, 21)
+        ],
+    )
+    db.commit()
+    queries: list[str] = []
+    with trace_queries(db, queries.append):
+        valid_names = [nam.taxon.valid_name for nam in Name.select().prefetch("taxon")]
+    assert valid_names == [f"Taxon {i}" for i in range(1, 21)]
+    # One query for the names and one for their taxa
+    assert len(queries) == 2, queries
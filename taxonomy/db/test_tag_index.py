@@ -0,0 +1,101 @@
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from taxonomy.db import tag_index
+from taxonomy.db.constants import SpecimenOrgan
+from taxonomy.db.models.base import BaseModel
+from taxonomy.db.models.collection import Collection
+from taxonomy.db.models.name import TypeTag
+from taxonomy.db.models.name.name import Name
+
+
+def test_get_rows() -> None:
+    raw_value = json.dumps(
+        [
+            [TypeTag.Repository._tag, 3],
+            [TypeTag.Organ._tag, SpecimenOrgan.skull.value, "partial"],
+            [TypeTag.LSIDName._tag, "urn:lsid:zoobank.org:act:1"],
+        ]
+    )
+    rows = list(tag_index.get_rows(Name.type_tags, raw_value))
+    assert rows == [
+        tag_index.Row(0, TypeTag.Repository._tag, 0, None, None),
+        tag_index.Row(0, TypeTag.Repository._tag, 1, 3, "C"),
+        tag_index.Row(1, TypeTag.Organ._tag, 0, None, None),
+        tag_index.Row(1, TypeTag.Organ._tag, 1, SpecimenOrgan.skull.value, None),
+        tag_index.Row(2, TypeTag.LSIDName._tag, 0, None, None),
+    ]
+    assert list(tag_index.get_rows(Name.type_tags, None)) == []
+
+
+def test_rebuild_and_update(db: sqlite3.Connection) -> None:
+    db.executemany(
+        "INSERT INTO name (id, type_tags) VALUES (?, ?)",
+        [(1, json.dumps([[TypeTag.Repository._tag, 3]])), (2, None)],
+    )
+    db.commit()
+    assert tag_index.rebuild() == 2
+
+    def with_repository(**kwargs: object) -> set[int]:
+        condition = tag_index.HasTag(Name.type_tags, TypeTag.Repository, kwargs)
+        return {nam.id for nam in Name.select().filter(condition)}
+
+    assert with_repository() == {1}
+    assert with_repository(repository=3) == {1}
+    assert with_repository(repository=4) == set()
+
+    nam = Name(2)
+    nam.type_tags = [TypeTag.Repository(Collection(4))]
+    nam.save()
+    assert with_repository() == {1, 2}
+    assert with_repository(repository=4) == {2}
+    assert tag_index.get_referrers(Collection(4)) == [
+        tag_index.Referrer("N", 2, "type_tags", TypeTag.Repository._tag)
+    ]
+
+    nam.type_tags = []
+    nam.save()
+    assert with_repository() == {1}
+
+
+def test_read_only(
+    db: sqlite3.Connection, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    db.executemany(
+        "INSERT INTO name (id, type_tags) VALUES (?, ?)",
+        [(1, json.dumps([[TypeTag.Repository._tag, 3]])), (2, None)],
+    )
+    db.commit()
+    db_path = tmp_path / "taxonomy.db"
+    with sqlite3.connect(db_path) as file_conn:
+        db.backup(file_conn)
+    file_conn.close()
+    monkeypatch.setattr(tag_index, "_shared_index_path", None)
+    num_builds = 0
+    fill = tag_index._fill
+
+    def counting_fill(source: sqlite3.Connection, target: sqlite3.Connection) -> int:
+        nonlocal num_builds
+        num_builds += 1
+        return fill(source, target)
+
+    monkeypatch.setattr(tag_index, "_fill", counting_fill)
+
+    def with_repository(_: int) -> set[int]:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        BaseModel.clirm.conn = conn
+        try:
+            condition = tag_index.HasTag(Name.type_tags, TypeTag.Repository)
+            return {nam.id for nam in Name.select().filter(condition)}
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(with_repository, range(8)))
+    assert results == [{1}] * 8
+    # The index is built once and shared by all threads
+    assert num_builds == 1
@@ -0,0 +1,103 @@
+import sqlite3
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from taxonomy.db import url_cache
+from taxonomy.db.url_cache import CacheDomain
+
+
+def test_encode_decode() -> None:
+    large = "x" * url_cache.COMPRESS_MIN_SIZE
+    content, size = url_cache.encode(CacheDomain.bhl_page, large)
+    assert isinstance(content, bytes)
+    assert size == len(large)
+    assert url_cache.decode(content) == large
+
+    assert url_cache.encode(CacheDomain.bhl_page, "small") == ("small", 5)
+    assert url_cache.encode(CacheDomain.nominatim, large) == (large, len(large))
+
+
+def test_ensure_schema_upgrades_old_table(tmp_path: Path) -> None:
+    db = sqlite3.connect(tmp_path / "cache.db")
+    db.executescript("""
+        CREATE TABLE `url_cache` (
+            `domain` INT UNSIGNED NOT NULL,
+            `key` VARCHAR(128),
+            `content` TEXT
+        );
+        CREATE UNIQUE INDEX `full_key` on `url_cache` (`domain`, `key`);
+        INSERT INTO url_cache VALUES (1, 'key', 'value');
+        """)
+    url_cache.ensure_schema(db)
+    url_cache.ensure_schema(db)
+    rows = db.execute("SELECT key, content, size, fetched_at FROM url_cache").fetchall()
+    assert len(rows) == 1
+    key, content, size, fetched_at = rows[0]
+    assert (key, content, size) == ("key", "value", None)
+    assert fetched_at > 0
+
+
+@pytest.fixture
+def cache_db(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[sqlite3.Connection]:
+    db = url_cache.open_database(tmp_path / "cache.db")
+    monkeypatch.setattr(url_cache, "get_database", lambda: db)
+    url_cache.clear_memory_cache()
+    try:
+        yield db
+    finally:
+        url_cache.flush()
+        url_cache.clear_memory_cache()
+        db.close()
+
+
+def test_ttl(cache_db: sqlite3.Connection) -> None:
+    url_cache.store(CacheDomain.test, "fresh", "new value")
+    url_cache.store(CacheDomain.test, "old", "old value")
+    url_cache.flush()
+    expired = int(time.time() - 2 * 24 * 60 * 60)
+    with cache_db:
+        cache_db.execute(
+            "UPDATE url_cache SET fetched_at = ? WHERE key = 'old'", (expired,)
+        )
+
+    assert url_cache.get(CacheDomain.test, "old") is None
+    assert url_cache.get(CacheDomain.test, "fresh") == "new value"
+    url_cache.clear_memory_cache()
+    assert url_cache.get_many(CacheDomain.test, ["old", "fresh"]) == {
+        "fresh": "new value"
+    }
+    assert url_cache.get_missing_keys(CacheDomain.test, ["old", "fresh"]) == ["old"]
+
+    assert url_cache.evict_expired() == 1
+    assert cache_db.execute("SELECT key FROM url_cache").fetchall() == [("fresh",)]
+
+
+def test_compress_existing(cache_db: sqlite3.Connection) -> None:
+    large = "x" * url_cache.COMPRESS_MIN_SIZE
+    rows = [(CacheDomain.bhl_page, f"page{i}", large) for i in range(5)]
+    rows += [
+        (CacheDomain.bhl_page, "small", "small"),
+        (CacheDomain.nominatim, "other", large),
+    ]
+    with cache_db:
+        cache_db.executemany(
+            "INSERT INTO url_cache(domain, key, content, fetched_at) VALUES (?, ?, ?, ?)",
+            [
+                (domain.value, key, content, int(time.time()))
+                for domain, key, content in rows
+            ],
+        )
+
+    assert url_cache.compress_existing(batch_size=2) == 5
+    stored = dict(cache_db.execute("SELECT key, content FROM url_cache").fetchall())
+    assert all(isinstance(stored[f"page{i}"], bytes) for i in range(5))
+    assert stored["small"] == "small"
+    # nominatim values are not compressed
+    assert stored["other"] == large
+    assert url_cache.get(CacheDomain.bhl_page, "page3") == large
+    assert url_cache.compress_existing(batch_size=2) == 0
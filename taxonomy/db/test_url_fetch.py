@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+import pytest
+
+from taxonomy.db import url_fetch
+from taxonomy.db.url_cache import CacheDomain
+
+
+def _parse_test_response(response: httpx.Response) -> str:
+    if response.status_code == 404:
+        return "missing"
+    return url_fetch.get_text(response)
+
+
+@url_fetch.cached_request(CacheDomain.test, handle_response=_parse_test_response)
+def _get_test_data(key: str) -> url_fetch.Request:
+    return url_fetch.Request(f"https://example.com/{key}")
+
+
+def test_fetch_many(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setitem(
+        url_fetch.LIMITS, CacheDomain.test, url_fetch.Limits(concurrency=2, backoff=0)
+    )
+    attempts: dict[str, int] = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        key = request.url.path.removeprefix("/")
+        attempts[key] = attempts.get(key, 0) + 1
+        if key == "flaky" and attempts[key] < 3:
+            return httpx.Response(503)
+        if key == "missing":
+            return httpx.Response(404)
+        if key == "bad":
+            return httpx.Response(400)
+        return httpx.Response(200, text=f"data for {key}")
+
+    async def fetch() -> dict[str, str | Exception]:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return {
+                key: value
+                async for key, value in url_fetch.fetch_many(
+                    client, CacheDomain.test, ["a", "flaky", "missing", "bad", "b"]
+                )
+            }
+
+    results = asyncio.run(fetch())
+    assert results["a"] == "data for a"
+    assert results["b"] == "data for b"
+    assert results["flaky"] == "data for flaky"
+    assert attempts["flaky"] == 3
+    assert results["missing"] == "missing"
+    assert isinstance(results["bad"], httpx.HTTPStatusError)
+    assert attempts["bad"] == 1
@@ -2,29 +2,46 @@
 
 Motivating use case: caching CrossRef API responses.
 
-Table created with:
+Each row records when it was fetched and the size of its content in bytes.
+Entries older than the TTL in the policy of their domain (POLICIES) are treated
+as missing, so they are fetched again; evict_expired() deletes them. Large
+values in domains whose policy asks for it are stored compressed with zstd, as
+a BLOB; other values are stored as TEXT.
 
-CREATE TABLE `url_cache` (
-    `domain` INT UNSIGNED NOT NULL,
-    `key` VARCHAR(128),
-    `content` TEXT
-);
-CREATE UNIQUE INDEX `full_key` on `url_cache` (`domain`, `key`);
+Tables created before fetched_at and size existed are upgraded on first use;
+their rows count as fetched at the time of the upgrade.
 
 """
 
+import atexit
 import datetime
 import enum
 import functools
+import itertools
 import sqlite3
-from collections.abc import Callable, Iterable
+import time
+from collections.abc import Callable, Iterable, Mapping
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any, Generic, TypeVar
 
+from compression import zstd
+
 from taxonomy.config import get_options
 
 CachedCallable = Callable[[str], str]
 
+# Buffered inserts are committed in batches of this size, or by the first
+# store() once this many seconds have passed since the last commit
+WRITE_BATCH_SIZE = 1000
+WRITE_FLUSH_INTERVAL = 5.0
+# Maximum number of keys in a single query of get_many()
+READ_BATCH_SIZE = 500
+SQLITE_CACHE_KIB = 64 * 1024
+SQLITE_MMAP_BYTES = 256 * 1024 * 1024
+# Values in bytes from which domains with compress=True store compressed data
+COMPRESS_MIN_SIZE = 4096
+
 
 class CacheDomain(enum.Enum):
     test = 1  # test data
@@ -50,6 +67,66 @@ class CacheDomain(enum.Enum):
     pubmed_nlmcatalog_abbrev = 19  # NLM Catalog: MedlineTA by journal title
 
 
+@dataclass(frozen=True)
+class DomainPolicy:
+    # Entries older than this are fetched again; None to keep them forever
+    ttl: datetime.timedelta | None = None
+    # Store values of at least COMPRESS_MIN_SIZE bytes compressed
+    compress: bool = False
+
+
+_DAY = datetime.timedelta(days=1)
+DEFAULT_POLICY = DomainPolicy()
+POLICIES = {
+    CacheDomain.test: DomainPolicy(ttl=_DAY),
+    # Crossref metadata is occasionally corrected or enriched
+    CacheDomain.doi: DomainPolicy(ttl=365 * _DAY, compress=True),
+    CacheDomain.crossref_openurl: DomainPolicy(ttl=180 * _DAY),
+    # New works appear in journal listings
+    CacheDomain.crossref_search_by_journal: DomainPolicy(ttl=30 * _DAY, compress=True),
+    # BHL adds items to titles and parts to items
+    CacheDomain.bhl_title: DomainPolicy(ttl=90 * _DAY, compress=True),
+    CacheDomain.bhl_item: DomainPolicy(ttl=180 * _DAY, compress=True),
+    # Pages include OCR text, by far the largest entries
+    CacheDomain.bhl_page: DomainPolicy(compress=True),
+    CacheDomain.bhl_part: DomainPolicy(ttl=180 * _DAY, compress=True),
+    CacheDomain.doi_resolution: DomainPolicy(ttl=365 * _DAY),
+    CacheDomain.europe_pmc_search: DomainPolicy(ttl=90 * _DAY, compress=True),
+    CacheDomain.pubmed_esummary: DomainPolicy(ttl=365 * _DAY, compress=True),
+    # Mostly negative results, which may change as new acts are registered
+    CacheDomain.zoobank_act: DomainPolicy(ttl=90 * _DAY),
+    CacheDomain.zoobank_publication: DomainPolicy(ttl=180 * _DAY),
+    CacheDomain.is_doi_valid: DomainPolicy(ttl=365 * _DAY),
+    CacheDomain.is_hdl_valid: DomainPolicy(ttl=365 * _DAY),
+}
+
+
+def get_policy(domain: CacheDomain) -> DomainPolicy:
+    return POLICIES.get(domain, DEFAULT_POLICY)
+
+
+def _get_cutoff(domain: CacheDomain) -> int:
+    """Return the fetched_at before which entries of the domain are expired."""
+    ttl = get_policy(domain).ttl
+    if ttl is None:
+        return 0
+    return int(time.time() - ttl.total_seconds())
+
+
+def encode(domain: CacheDomain, value: str) -> tuple[str | bytes, int]:
+    """Return the content to store for a value and the size of the value."""
+    data = value.encode()
+    if get_policy(domain).compress and len(data) >= COMPRESS_MIN_SIZE:
+        return zstd.compress(data), len(data)
+    return value, len(data)
+
+
+def decode(content: str | bytes) -> str:
+    if isinstance(content, bytes):
+        return zstd.decompress(content).decode()
+    return content
+
+
 KeyT = TypeVar("KeyT")
 ValueT = TypeVar("ValueT")
 
@@ -88,14 +165,105 @@ class LRU(Generic[KeyT, ValueT]):
                 del self._cache[key]
 
 
-_LOCAL_CACHE: LRU[tuple[CacheDomain, str], str] = LRU(2048)
+class LocalCache:
+    """In-process cache in front of the SQLite cache.
+
+    Domains listed in the urlcache_domain_memory_sizes option get an LRU of their
+    own with that size; the others share one of size urlcache_memory_size.
+
+    """
+
+    def __init__(self, size: int, domain_sizes: Mapping[str, int]) -> None:
+        self.shared: LRU[tuple[CacheDomain, str], str] = LRU(size)
+        self.by_domain: dict[CacheDomain, LRU[tuple[CacheDomain, str], str]] = {
+            CacheDomain[name]: LRU(domain_size)
+            for name, domain_size in domain_sizes.items()
+        }
+
+    def get_lru(self, domain: CacheDomain) -> LRU[tuple[CacheDomain, str], str]:
+        return self.by_domain.get(domain, self.shared)
+
+    def get(self, domain: CacheDomain, key: str) -> str | None:
+        lru = self.get_lru(domain)
+        if (domain, key) in lru:
+            return lru[(domain, key)]
+        return None
+
+    def set(self, domain: CacheDomain, key: str, value: str) -> None:
+        lru = self.get_lru(domain)
+        if lru.max_size > 0:
+            lru[(domain, key)] = value
+
+    def dirty(self, domain: CacheDomain, key: str) -> None:
+        self.get_lru(domain).dirty((domain, key))
+
+    def clear(self, domains: Iterable[CacheDomain] | None = None) -> None:
+        if domains is None:
+            self.shared.clear()
+            for lru in self.by_domain.values():
+                lru.clear()
+            return
+        domain_set = set(domains)
+        self.shared.clear_matching(lambda key: key[0] in domain_set)
+        for domain in domain_set:
+            if domain in self.by_domain:
+                self.by_domain[domain].clear()
+
+
+@functools.cache
+def get_local_cache() -> LocalCache:
+    options = get_options()
+    return LocalCache(
+        options.urlcache_memory_size, options.urlcache_domain_memory_sizes
+    )
 
 
 @functools.cache
 def get_database() -> sqlite3.Connection:
     option = get_options()
     # static analysis: ignore[internal_error]
-    return sqlite3.connect(option.urlcache_filename)
+    return open_database(option.urlcache_filename)
+
+
+def open_database(filename: Path) -> sqlite3.Connection:
+    db = sqlite3.connect(filename)
+    # WAL lets readers in other processes proceed during writes, and with it
+    # synchronous=NORMAL only syncs at checkpoints. A crash may then lose the
+    # last transactions, which is harmless for a cache.
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_KIB}")
+    db.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_BYTES}")
+    db.execute("PRAGMA temp_store = MEMORY")
+    ensure_schema(db)
+    return db
+
+
+def ensure_schema(db: sqlite3.Connection) -> None:
+    with db:
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS `url_cache` (
+                `domain` INT UNSIGNED NOT NULL,
+                `key` VARCHAR(128),
+                `content` TEXT,
+                `fetched_at` INTEGER NOT NULL,
+                `size` INTEGER
+            )
+            """)
+        db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS `full_key` on `url_cache` (`domain`, `key`)"
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(url_cache)")}
+        if "fetched_at" not in columns:
+            # The default only applies to existing rows, because inserts always
+            # set fetched_at; adding a column with a constant default does not
+            # rewrite the table
+            db.execute(
+                "ALTER TABLE url_cache ADD COLUMN fetched_at INTEGER NOT NULL"
+                f" DEFAULT {int(time.time())}"
+            )
+        if "size" not in columns:
+            db.execute("ALTER TABLE url_cache ADD COLUMN size INTEGER")
 
 
 def run_query(sql: str, args: tuple[object, ...]) -> list[tuple[Any, ...]]:
@@ -109,31 +277,13 @@ def cached(domain: CacheDomain) -> Callable[[CachedCallable], CachedCallable]:
     def decorator(func: CachedCallable) -> CachedCallable:
         @functools.wraps(func)
         def wrapper(key: str) -> str:
-            local_key = (domain, key)
-            if local_key in _LOCAL_CACHE:
-                return _LOCAL_CACHE[local_key]
-            cached_rows = run_query(
-                """
-                SELECT content
-                FROM url_cache
-                WHERE domain = ? AND key = ?
-                """,
-                (domain.value, key),
-            )
-            if len(cached_rows) == 1:
-                value = cached_rows[0][0]
-                _LOCAL_CACHE[local_key] = value
+            value = get(domain, key)
+            if value is not None:
                 return value
 
             value = func(key)
-            _LOCAL_CACHE[local_key] = value
-            run_query(
-                """
-                INSERT INTO url_cache(domain, key, content)
-                VALUES(?, ?, ?)
-                """,
-                (domain.value, key, value),
-            )
+            get_local_cache().set(domain, key, value)
+            store(domain, key, value)
             return value
 
         return wrapper
@@ -141,7 +291,125 @@ def cached(domain: CacheDomain) -> Callable[[CachedCallable], CachedCallable]:
     return decorator
 
 
+def get(domain: CacheDomain, key: str) -> str | None:
+    """Return the cached value for a key, or None if it is not cached."""
+    local_cache = get_local_cache()
+    value = local_cache.get(domain, key)
+    if value is not None:
+        return value
+    value = _pending_writes.get((domain, key))
+    if value is not None:
+        return value
+    cached_rows = run_query(
+        """
+        SELECT content
+        FROM url_cache
+        WHERE domain = ? AND key = ? AND fetched_at >= ?
+        """,
+        (domain.value, key, _get_cutoff(domain)),
+    )
+    if len(cached_rows) == 1:
+        value = decode(cached_rows[0][0])
+        local_cache.set(domain, key, value)
+        return value
+    return None
+
+
+def get_many(domain: CacheDomain, keys: Iterable[str]) -> dict[str, str]:
+    """Return the cached values for those of the keys that are cached.
+
+    Keys not in memory are looked up in batches of READ_BATCH_SIZE per query.
+    The values are not added to the in-process cache, so that a bulk lookup does
+    not evict everything else.
+
+    """
+    local_cache = get_local_cache()
+    found = {}
+    to_query = []
+    for key in dict.fromkeys(keys):
+        value = local_cache.get(domain, key)
+        if value is None:
+            value = _pending_writes.get((domain, key))
+        if value is not None:
+            found[key] = value
+        else:
+            to_query.append(key)
+    cutoff = _get_cutoff(domain)
+    for batch in itertools.batched(to_query, READ_BATCH_SIZE):
+        placeholders = ", ".join("?" * len(batch))
+        rows = run_query(
+            f"""
+            SELECT key, content
+            FROM url_cache
+            WHERE domain = ? AND fetched_at >= ? AND key IN ({placeholders})
+            """,
+            (domain.value, cutoff, *batch),
+        )
+        found.update((key, decode(content)) for key, content in rows)
+    return found
+
+
+def get_missing_keys(domain: CacheDomain, keys: Iterable[str]) -> list[str]:
+    """Return the keys that are not cached, without duplicates, in order."""
+    keys = list(dict.fromkeys(keys))
+    found = get_many(domain, keys)
+    return [key for key in keys if key not in found]
+
+
+# Inserts waiting to be committed, in insertion order
+_pending_writes: dict[tuple[CacheDomain, str], str] = {}
+_last_flush = time.monotonic()
+
+
+def store(domain: CacheDomain, key: str, value: str) -> None:
+    """Add a value to the cache.
+
+    The insert is buffered and committed together with others once there are
+    WRITE_BATCH_SIZE of them, and at exit. The interval is only checked here:
+    the first store() more than WRITE_FLUSH_INTERVAL seconds after the last
+    commit flushes the buffer, but nothing is committed while no values are
+    stored. Call flush() to make buffered values visible to other processes
+    right away. Processes that exit without running atexit handlers (such as
+    multiprocessing workers) must also call flush() themselves.
+
+    """
+    _pending_writes[(domain, key)] = value
+    if (
+        len(_pending_writes) >= WRITE_BATCH_SIZE
+        or time.monotonic() - _last_flush >= WRITE_FLUSH_INTERVAL
+    ):
+        flush()
+
+
+def flush() -> None:
+    """Commit all buffered inserts."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    if not _pending_writes:
+        return
+    fetched_at = int(time.time())
+    rows = [
+        (domain.value, key, *encode(domain, value), fetched_at)
+        for (domain, key), value in _pending_writes.items()
+    ]
+    with get_database() as db:
+        # Replace expired entries, and entries that another process cached in
+        # the meantime
+        db.executemany(
+            """
+            INSERT OR REPLACE INTO url_cache(domain, key, content, size, fetched_at)
+            VALUES(?, ?, ?, ?, ?)
+            """,
+            rows,
+        )
+    _pending_writes.clear()
+
+
+atexit.register(flush)
+
+
 def dirty_cache(domain: CacheDomain, key: str) -> None:
+    _pending_writes.pop((domain, key), None)
     run_query(
         """
         DELETE FROM url_cache
@@ -149,16 +417,130 @@ def dirty_cache(domain: CacheDomain, key: str) -> None:
         """,
         (domain.value, key),
     )
-    _LOCAL_CACHE.dirty((domain, key))
+    get_local_cache().dirty(domain, key)
 
 
 def clear_memory_cache(domains: Iterable[CacheDomain] | None = None) -> None:
     """Clear the process-local URL cache while keeping the SQLite cache intact."""
-    if domains is None:
-        _LOCAL_CACHE.clear()
-        return
-    domain_set = set(domains)
-    _LOCAL_CACHE.clear_matching(lambda key: key[0] in domain_set)
+    get_local_cache().clear(domains)
+
+
+@dataclass(frozen=True)
+class DomainStats:
+    domain: CacheDomain
+    rows: int
+    expired: int
+    # Total size of the values, and of what is stored for them after compression
+    size: int
+    stored_size: int
+
+
+def get_stats() -> list[DomainStats]:
+    """Return the number of entries and their size for each domain."""
+    rows = run_query(
+        """
+        SELECT
+            domain,
+            count(*),
+            sum(coalesce(size, length(CAST(content AS BLOB)))),
+            sum(length(CAST(content AS BLOB)))
+        FROM url_cache
+        GROUP BY domain
+        ORDER BY domain
+        """,
+        (),
+    )
+    stats = []
+    for domain_value, count, size, stored_size in rows:
+        domain = CacheDomain(domain_value)
+        ((expired,),) = run_query(
+            "SELECT count(*) FROM url_cache WHERE domain = ? AND fetched_at < ?",
+            (domain.value, _get_cutoff(domain)),
+        )
+        stats.append(DomainStats(domain, count, expired, size or 0, stored_size or 0))
+    return stats
+
+
+def evict_expired() -> int:
+    """Delete expired entries and return how many were deleted."""
+    flush()
+    deleted = 0
+    for domain in CacheDomain:
+        if get_policy(domain).ttl is None:
+            continue
+        with get_database() as db:
+            deleted += db.execute(
+                "DELETE FROM url_cache WHERE domain = ? AND fetched_at < ?",
+                (domain.value, _get_cutoff(domain)),
+            ).rowcount
+    return deleted
+
+
+def compress_existing(batch_size: int = 1000) -> int:
+    """Compress stored values that encode() would now compress.
+
+    Also fills in the size of entries stored before sizes were recorded.
+    Returns the number of entries compressed.
+
+    """
+    flush()
+    db = get_database()
+    with db:
+        db.execute(
+            "UPDATE url_cache SET size = length(CAST(content AS BLOB))"
+            " WHERE size IS NULL AND typeof(content) = 'text'"
+        )
+    compressed = 0
+    for domain in CacheDomain:
+        if not get_policy(domain).compress:
+            continue
+        # Page through the rows, so that only one batch is in memory at a time
+        last_rowid = 0
+        while True:
+            batch = db.execute(
+                """
+                SELECT rowid, content FROM url_cache
+                WHERE rowid > ? AND domain = ? AND typeof(content) = 'text'
+                AND size >= ?
+                ORDER BY rowid
+                LIMIT ?
+                """,
+                (last_rowid, domain.value, COMPRESS_MIN_SIZE, batch_size),
+            ).fetchall()
+            if not batch:
+                break
+            with db:
+                db.executemany(
+                    "UPDATE url_cache SET content = ? WHERE rowid = ?",
+                    [(encode(domain, content)[0], rowid) for rowid, content in batch],
+                )
+            compressed += len(batch)
+            last_rowid = batch[-1][0]
+    return compressed
+
+
+def vacuum(max_pages: int = 0) -> int:
+    """Return free pages to the file system and return how many were freed.
+
+    Uses incremental vacuum, freeing at most max_pages pages (all if 0). A file
+    created without incremental auto-vacuum is converted with a full VACUUM
+    first, which rewrites the whole file once.
+
+    """
+    flush()
+    db = get_database()
+    ((free_before,),) = db.execute("PRAGMA freelist_count").fetchall()
+    ((auto_vacuum,),) = db.execute("PRAGMA auto_vacuum").fetchall()
+    if auto_vacuum != 2:  # INCREMENTAL
+        print("Converting the URL cache to incremental auto-vacuum (full VACUUM)...")
+        db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        db.execute("VACUUM")
+    else:
+        db.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+    # Shrink the WAL file too
+    db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    ((free_after,),) = db.execute("PRAGMA freelist_count").fetchall()
+    return free_before - free_after
 
 
 @cached(CacheDomain.test)
@@ -0,0 +1,280 @@
+"""HTTP fetching for the URL cache.
+
+Functions decorated with cached_request() build an HTTP request for a cache
+key; the response is turned into the cached string by a handler. Called
+normally, such a function behaves like any other url_cache.cached function and
+fetches one key at a time with httpx.get. Because the request is described
+separately from the fetch, prefetch() can also fetch many keys of a domain
+concurrently with a pooled httpx.AsyncClient and store them in the URL cache,
+so that later synchronous calls are cache hits:
+
+    url_fetch.prefetch(CacheDomain.doi, dois)
+
+Both paths share the per-domain limits in LIMITS (concurrency, minimum interval
+between requests and retries, which can be overridden with the
+urlcache_fetch_limits option) and retry transport errors and responses with
+status 429 or 5xx with exponential backoff.
+
+"""
+
+import asyncio
+import dataclasses
+import functools
+import itertools
+import time
+from collections.abc import AsyncIterator, Callable, Iterable, Mapping
+from dataclasses import dataclass
+
+import httpx
+
+from taxonomy.apis.util import RateLimiter
+from taxonomy.config import get_options
+from taxonomy.db.url_cache import (
+    CachedCallable,
+    CacheDomain,
+    cached,
+    flush,
+    get_missing_keys,
+    store,
+)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+PREFETCH_PROGRESS_EVERY = 100
+
+
+@dataclass(frozen=True)
+class Request:
+    url: str
+    params: Mapping[str, str] | None = None
+    headers: Mapping[str, str] | None = None
+    timeout: float = 5.0
+
+
+@dataclass(frozen=True)
+class Limits:
+    # Maximum number of requests in flight during prefetch()
+    concurrency: int = 4
+    # Minimum number of seconds between the starts of two requests
+    min_interval: float = 0.0
+    retries: int = 3
+    # Delay before the first retry, doubled for each further retry
+    backoff: float = 1.0
+
+
+DEFAULT_LIMITS = Limits()
+LIMITS = {
+    # Crossref's polite pool allows 3 concurrent requests
+    CacheDomain.doi: Limits(concurrency=3, min_interval=0.1),
+    CacheDomain.bhl_title: Limits(concurrency=2, min_interval=0.1),
+    CacheDomain.bhl_item: Limits(concurrency=2, min_interval=0.1),
+    CacheDomain.bhl_page: Limits(concurrency=2, min_interval=0.1),
+    CacheDomain.bhl_part: Limits(concurrency=2, min_interval=0.1),
+    # Nominatim's usage policy allows one request per second
+    CacheDomain.nominatim: Limits(concurrency=1, min_interval=1.0),
+    CacheDomain.zoobank_act: Limits(concurrency=1, min_interval=0.5),
+    CacheDomain.zoobank_publication: Limits(concurrency=1, min_interval=0.5),
+}
+
+ResponseHandler = Callable[[httpx.Response], str]
+
+
+def get_text(response: httpx.Response) -> str:
+    response.raise_for_status()
+    return response.text
+
+
+@dataclass(frozen=True)
+class Fetcher:
+    make_request: Callable[[str], Request]
+    handle_response: ResponseHandler
+
+
+_FETCHERS: dict[CacheDomain, Fetcher] = {}
+
+
+def get_limits(domain: CacheDomain) -> Limits:
+    limits = LIMITS.get(domain, DEFAULT_LIMITS)
+    overrides = get_options().urlcache_fetch_limits.get(domain.name)
+    if overrides:
+        unknown = set(overrides) - {field.name for field in dataclasses.fields(Limits)}
+        if unknown:
+            raise ValueError(f"unknown fetch limits for {domain.name}: {unknown}")
+        limits = Limits(
+            concurrency=int(overrides.get("concurrency", limits.concurrency)),
+            min_interval=overrides.get("min_interval", limits.min_interval),
+            retries=int(overrides.get("retries", limits.retries)),
+            backoff=overrides.get("backoff", limits.backoff),
+        )
+    return limits
+
+
+@functools.cache
+def get_rate_limiter(domain: CacheDomain) -> RateLimiter:
+    return RateLimiter(min_interval=get_limits(domain).min_interval)
+
+
+def cached_request(
+    domain: CacheDomain, *, handle_response: ResponseHandler = get_text
+) -> Callable[[Callable[[str], Request]], CachedCallable]:
+    """Cache the result of the request that the decorated function builds.
+
+    handle_response turns the response into the value to cache and may raise
+    to leave the key uncached. By default, it returns the text of successful
+    responses.
+
+    """
+
+    def decorator(make_request: Callable[[str], Request]) -> CachedCallable:
+        fetcher = Fetcher(make_request, handle_response)
+        _FETCHERS[domain] = fetcher
+
+        @cached(domain)
+        @functools.wraps(make_request)
+        def wrapper(key: str) -> str:
+            return fetch(domain, fetcher, key)
+
+        return wrapper
+
+    return decorator
+
+
+def _get_retry_delay(
+    limits: Limits, attempt: int, response: httpx.Response | None
+) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return float(retry_after)
+    return limits.backoff * 2**attempt
+
+
+def _should_retry(response: httpx.Response) -> bool:
+    return response.status_code in RETRY_STATUSES
+
+
+def fetch(domain: CacheDomain, fetcher: Fetcher, key: str) -> str:
+    limits = get_limits(domain)
+    request = fetcher.make_request(key)
+    for attempt in itertools.count():
+        get_rate_limiter(domain).wait()
+        response = None
+        try:
+            # Look up httpx.get at call time, so that callers can block the network
+            response = httpx.get(
+                request.url,
+                params=request.params,
+                headers=request.headers,
+                timeout=request.timeout,
+            )
+        except httpx.TransportError:
+            if attempt >= limits.retries:
+                raise
+        else:
+            if attempt >= limits.retries or not _should_retry(response):
+                return fetcher.handle_response(response)
+        time.sleep(_get_retry_delay(limits, attempt, response))
+    raise AssertionError("unreachable")
+
+
+async def fetch_async(
+    client: httpx.AsyncClient, domain: CacheDomain, fetcher: Fetcher, key: str
+) -> str:
+    limits = get_limits(domain)
+    request = fetcher.make_request(key)
+    for attempt in itertools.count():
+        await get_rate_limiter(domain).wait_async()
+        response = None
+        try:
+            response = await client.get(
+                request.url,
+                params=request.params,
+                headers=request.headers,
+                timeout=request.timeout,
+            )
+        except httpx.TransportError:
+            if attempt >= limits.retries:
+                raise
+        else:
+            if attempt >= limits.retries or not _should_retry(response):
+                return fetcher.handle_response(response)
+        await asyncio.sleep(_get_retry_delay(limits, attempt, response))
+    raise AssertionError("unreachable")
+
+
+async def fetch_many(
+    client: httpx.AsyncClient, domain: CacheDomain, keys: Iterable[str]
+) -> AsyncIterator[tuple[str, str | Exception]]:
+    """Fetch the keys concurrently, yielding (key, value or error) as they finish.
+
+    At most the concurrency of the domain's limits are in flight at a time.
+
+    """
+    fetcher = _FETCHERS.get(domain)
+    if fetcher is None:
+        raise ValueError(f"no cached_request() function for {domain}")
+    queue: asyncio.Queue[tuple[str, str | Exception] | None] = asyncio.Queue()
+    key_iter = iter(keys)
+
+    async def worker() -> None:
+        try:
+            for key in key_iter:
+                try:
+                    value: str | Exception = await fetch_async(
+                        client, domain, fetcher, key
+                    )
+                except Exception as e:
+                    value = e
+                await queue.put((key, value))
+        finally:
+            await queue.put(None)
+
+    num_workers = get_limits(domain).concurrency
+    tasks = [asyncio.create_task(worker()) for _ in range(num_workers)]
+    try:
+        finished = 0
+        while finished < num_workers:
+            item = await queue.get()
+            if item is None:
+                finished += 1
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def prefetch_async(
+    domain: CacheDomain, keys: Iterable[str], *, client: httpx.AsyncClient | None = None
+) -> int:
+    """Fetch the keys that are not in the URL cache yet and store them.
+
+    Returns the number of keys stored. Keys that fail are reported and left
+    uncached.
+
+    """
+    missing = get_missing_keys(domain, keys)
+    if not missing:
+        return 0
+    if client is None:
+        async with httpx.AsyncClient() as new_client:
+            return await prefetch_async(domain, missing, client=new_client)
+    stored = 0
+    done = 0
+    async for key, value in fetch_many(client, domain, missing):
+        done += 1
+        if done % PREFETCH_PROGRESS_EVERY == 0:
+            print(f"{done}/{len(missing)} {domain.name} keys...", flush=True)
+        if isinstance(value, Exception):
+            print(f"Failed to fetch {domain.name} {key}: {value!r}")
+            continue
+        store(domain, key, value)
+        stored += 1
+    flush()
+    print(f"Stored {stored}/{len(missing)} {domain.name} keys", flush=True)
+    return stored
+
+
+def prefetch(domain: CacheDomain, keys: Iterable[str]) -> int:
+    """Synchronous version of prefetch_async()."""
+    return asyncio.run(prefetch_async(domain, keys))
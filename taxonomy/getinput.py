@@ -1,5 +1,6 @@
 """Helpers for retrieving user input."""
 
+import bisect
 import difflib
 import enum
 import functools
@@ -10,7 +11,7 @@ import subprocess
 import sys
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass, field
-from typing import Any, Literal, TypeVar, overload
+from typing import Any, Literal, Self, TypeVar, overload
 
 import prompt_toolkit.completion
 import prompt_toolkit.document
@@ -231,6 +232,61 @@ def _matches_prefix_with_nonascii_wildcards(string: str, query: str) -> bool:
     return True
 
 
+class PrefixIndex:
+    """Sorted set of strings that supports fast prefix queries.
+
+    Queries use the same syntax as shell completion: '*' matches one non-ASCII
+    character. Only the part of the query before the first '*' is used to narrow
+    down the range of candidates with binary search.
+
+    """
+
+    def __init__(self, strings: Iterable[str] = ()) -> None:
+        self._strings = sorted(set(strings))
+
+    @classmethod
+    def from_sorted(cls, strings: list[str]) -> Self:
+        """Wrap a list that is already sorted and free of duplicates, without copying."""
+        index = cls()
+        index._strings = strings
+        return index
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._strings)
+
+    def __contains__(self, string: object) -> bool:
+        if not isinstance(string, str):
+            return False
+        i = bisect.bisect_left(self._strings, string)
+        return i < len(self._strings) and self._strings[i] == string
+
+    def add(self, string: str) -> None:
+        i = bisect.bisect_left(self._strings, string)
+        if i == len(self._strings) or self._strings[i] != string:
+            self._strings.insert(i, string)
+
+    def search(self, query: str, limit: int | None = None) -> list[str]:
+        """Return the strings matching the query, in sorted order."""
+        fixed_prefix = query.split("*", 1)[0]
+        out: list[str] = []
+        if limit is not None and limit <= 0:
+            return out
+        for i in range(
+            bisect.bisect_left(self._strings, fixed_prefix), len(self._strings)
+        ):
+            string = self._strings[i]
+            if not string.startswith(fixed_prefix):
+                break
+            if _matches_prefix_with_nonascii_wildcards(string, query):
+                out.append(string)
+                if limit is not None and len(out) >= limit:
+                    break
+        return out
+
+
 class _Completer(prompt_toolkit.completion.Completer):
     def __init__(self, strings: Iterable[str]) -> None:
         self.strings = sorted(strings)
@@ -263,7 +319,6 @@ class _CallbackCompleter(prompt_toolkit.completion.Completer):
         document: prompt_toolkit.document.Document,
         complete_event: prompt_toolkit.completion.CompleteEvent,
     ) -> Iterable[prompt_toolkit.completion.Completion]:
-        # This might be faster with a prefix tree but I'm lazy.
         text = document.text
         for s in sorted(self._get_unsorted_completions(text)):
             yield prompt_toolkit.completion.Completion(s[len(text) :])
@@ -276,7 +331,13 @@ class _CallbackCompleter(prompt_toolkit.completion.Completer):
                 num_yielded += 1
                 if num_yielded >= self.max_completions:
                     return
-        for string in self.lazy_strings():
+        lazy_strings = self.lazy_strings()
+        if isinstance(lazy_strings, PrefixIndex):
+            yield from lazy_strings.search(
+                query, limit=self.max_completions - num_yielded
+            )
+            return
+        for string in lazy_strings:
             if _matches_prefix_with_nonascii_wildcards(string, query):
                 yield string
                 num_yielded += 1
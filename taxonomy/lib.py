@@ -6,7 +6,7 @@ Contents overlap with shell.py, which defines "commands".
 
 import re
 from collections import defaultdict
-from collections.abc import Container, Iterable
+from collections.abc import Collection, Container, Iterable
 from functools import partial
 
 import clirm
@@ -48,7 +48,7 @@ def locless_names(
     attribute: str = "type_locality",
     age: AgeClass | None = AgeClass.removed,
     min_year: int | None = None,
-    exclude: Container["Taxon"] = frozenset(),
+    exclude: Collection["Taxon"] = frozenset(),
 ) -> list[Name]:
     if age is AgeClass.removed:
         age = genus.age
@@ -66,7 +66,7 @@ def names_with_attribute(
     txn: Taxon,
     attribute: str,
     age: AgeClass | None = None,
-    exclude: Container["Taxon"] = frozenset(),
+    exclude: Collection["Taxon"] = frozenset(),
 ) -> list[Name]:
     nams = [
         name
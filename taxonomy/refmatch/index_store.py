@@ -0,0 +1,451 @@
+"""Persisted ArticleIndex for the reference matcher.
+
+Building the ArticleIndex from scratch resolves the authors, citation group
+aliases and title tokens of every valid Article, which takes minutes. The index
+kept here lives in a separate SQLite file (the refmatch_index_filename option,
+by default next to the main database):
+
+- article: one row per article, with its ArticleRecord serialized with marshal
+  and a hash of the database rows the record was computed from.
+- lookup: the entries of the lookup dicts of ArticleIndex (by_year_author,
+  by_year_title_token, by_url, by_cg_year and by_cg_year_volume_page).
+- citation_group_alias: the aliases of the citation groups of the articles.
+
+Loading returns an ArticleIndex whose lookups are read-only views over these
+tables, so it is nearly instant; records are decoded when they are first looked
+up. Materializing all records up front would take several seconds. The views
+pickle as a reference to the file, so worker processes of run_match_csv() open
+the store themselves instead of receiving a copy of the index.
+
+On load, if the main database file has not changed since the last update, the
+stored index is used as is. Otherwise the raw rows of all articles, citation
+groups and people are hashed (which needs no model loads), and only the
+articles whose inputs changed are rebuilt.
+
+"""
+
+from __future__ import annotations
+
+import ast
+import dataclasses
+import functools
+import hashlib
+import marshal
+import sqlite3
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, overload
+
+from taxonomy.config import get_options
+from taxonomy.db.constants import ArticleType
+from taxonomy.db.models import Article, CitationGroup, Person
+from taxonomy.db.models.base import BaseModel
+
+from .matcher import (
+    INDEX_PROGRESS_EVERY,
+    ArticleIndex,
+    ArticleRecord,
+    build_article_index_from_records,
+    make_article_record,
+    normalize_text,
+)
+
+# Increase when ArticleRecord or make_article_record() changes, so that
+# existing stores are rebuilt
+STORE_VERSION = 1
+
+RECORD_FIELDS = [field.name for field in dataclasses.fields(ArticleRecord)]
+_TYPE_INDEX = RECORD_FIELDS.index("type")
+# Fields of ArticleIndex mapping keys to lists of records
+LOOKUP_FIELDS = (
+    "by_year_author",
+    "by_year_title_token",
+    "by_url",
+    "by_cg_year",
+    "by_cg_year_volume_page",
+)
+
+
+def encode_record(record: ArticleRecord) -> bytes:
+    row = [getattr(record, name) for name in RECORD_FIELDS]
+    if row[_TYPE_INDEX] is not None:
+        row[_TYPE_INDEX] = row[_TYPE_INDEX].value
+    return marshal.dumps(tuple(row))
+
+
+def decode_record(data: bytes) -> ArticleRecord:
+    row = marshal.loads(data)  # noqa: S302
+    # Bypass the frozen dataclass __init__, which is several times slower
+    record = object.__new__(ArticleRecord)
+    record.__dict__.update(zip(RECORD_FIELDS, row, strict=True))
+    if row[_TYPE_INDEX] is not None:
+        record.__dict__["type"] = ArticleType(row[_TYPE_INDEX])
+    return record
+
+
+def _encode_key(key: object) -> str:
+    # Keys are strings or tuples of strings and ints, for which repr() is stable
+    return repr(key)
+
+
+@dataclass(frozen=True)
+class _Inputs:
+    """Hashes of the raw rows that article records are computed from."""
+
+    articles: Mapping[int, bytes]
+    article_rows: Mapping[int, tuple[int | None, int | None]]
+    citation_groups: Mapping[int, bytes]
+    people: Mapping[int, bytes]
+    valid_ids: list[int]
+
+    @classmethod
+    def load(cls) -> _Inputs:
+        articles: dict[int, bytes] = {}
+        article_rows: dict[int, tuple[int | None, int | None]] = {}
+        sql, params = Article.select().stringify()
+        for row in Article.clirm.select(sql, params):
+            articles[row["id"]] = _hash_row(row)
+            article_rows[row["id"]] = (
+                row[Article.citation_group.name],
+                row[Article.clirm_fields["parent"].name],
+            )
+        sql, params = Article.select_valid().stringify("id")
+        valid_ids = sorted(row[0] for row in Article.clirm.select(sql, params))
+        return cls(
+            articles=articles,
+            article_rows=article_rows,
+            citation_groups=_hash_rows(CitationGroup),
+            people=_hash_rows(Person),
+            valid_ids=valid_ids,
+        )
+
+    def get_hash(self, article_id: int, person_ids: Iterable[int]) -> bytes:
+        citation_group_id, parent_id = self.article_rows[article_id]
+        hasher = hashlib.blake2b(self.articles[article_id], digest_size=16)
+        if citation_group_id is not None:
+            hasher.update(self.citation_groups.get(citation_group_id, b""))
+        if parent_id is not None:
+            # Supplements take their authors from the parent
+            hasher.update(self.articles.get(parent_id, b""))
+        for person_id in person_ids:
+            hasher.update(self.people.get(person_id, b""))
+        return hasher.digest()
+
+
+def _hash_row(row: sqlite3.Row) -> bytes:
+    return hashlib.blake2b(repr(tuple(row)).encode(), digest_size=16).digest()
+
+
+def _hash_rows(model_cls: type[BaseModel]) -> dict[int, bytes]:
+    sql, params = model_cls.select().stringify()
+    return {row["id"]: _hash_row(row) for row in model_cls.clirm.select(sql, params)}
+
+
+def _get_marker() -> str:
+    stat = get_options().db_filename.stat()
+    return f"{STORE_VERSION}:{stat.st_mtime_ns}:{stat.st_size}"
+
+
+@functools.cache
+def _get_stored_index(filename: Path) -> ArticleIndex:
+    return ArticleIndexStore(filename).get_index()
+
+
+def _get_stored_view(filename: Path, name: str) -> object:
+    # Unpickle a view onto the same index, so that all views in a process share
+    # one connection and one record cache
+    return getattr(_get_stored_index(filename), name)
+
+
+class _RecordMapping(Mapping[int, ArticleRecord]):
+    """Records by article id, decoded on first access."""
+
+    def __init__(self, store: ArticleIndexStore) -> None:
+        self.store = store
+        self.conn = store.conn
+        self._cache: dict[int, ArticleRecord] = {}
+
+    def __reduce__(self) -> tuple[object, ...]:
+        return (_get_stored_view, (self.store.filename, "by_id"))
+
+    def __getitem__(self, article_id: int) -> ArticleRecord:
+        if article_id not in self._cache:
+            row = self.conn.execute(
+                "SELECT record FROM article WHERE article_id = ?", (article_id,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(article_id)
+            self._cache[article_id] = decode_record(row[0])
+        return self._cache[article_id]
+
+    def __iter__(self) -> Iterator[int]:
+        for (article_id,) in self.conn.execute(
+            "SELECT article_id FROM article ORDER BY article_id"
+        ):
+            yield article_id
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM article").fetchone()[0]
+
+
+class _RecordList(Sequence[ArticleRecord]):
+    """All records in id order."""
+
+    def __init__(self, by_id: _RecordMapping) -> None:
+        self.by_id = by_id
+        self._ids: list[int] | None = None
+
+    def __reduce__(self) -> tuple[object, ...]:
+        return (_get_stored_view, (self.by_id.store.filename, "records"))
+
+    def _get_ids(self) -> list[int]:
+        if self._ids is None:
+            self._ids = list(self.by_id)
+        return self._ids
+
+    @overload
+    def __getitem__(self, index: int) -> ArticleRecord: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[ArticleRecord]: ...
+    def __getitem__(self, index: int | slice) -> ArticleRecord | list[ArticleRecord]:
+        if isinstance(index, slice):
+            return [self.by_id[article_id] for article_id in self._get_ids()[index]]
+        return self.by_id[self._get_ids()[index]]
+
+    def __len__(self) -> int:
+        return len(self._get_ids())
+
+
+class _LookupMapping(Mapping[Any, list[ArticleRecord]]):
+    """One of the lookup dicts of ArticleIndex, backed by the lookup table."""
+
+    def __init__(self, name: str, by_id: _RecordMapping) -> None:
+        self.conn = by_id.conn
+        self.name = name
+        self.by_id = by_id
+
+    def __reduce__(self) -> tuple[object, ...]:
+        return (_get_stored_view, (self.by_id.store.filename, self.name))
+
+    def __getitem__(self, key: object) -> list[ArticleRecord]:
+        rows = self.conn.execute(
+            "SELECT article_id FROM lookup WHERE name = ? AND key = ?"
+            " ORDER BY article_id",
+            (self.name, _encode_key(key)),
+        ).fetchall()
+        if not rows:
+            raise KeyError(key)
+        return [self.by_id[article_id] for (article_id,) in rows]
+
+    def __iter__(self) -> Iterator[Any]:
+        for (key,) in self.conn.execute(
+            "SELECT DISTINCT key FROM lookup WHERE name = ?", (self.name,)
+        ):
+            yield ast.literal_eval(key)
+
+    def __len__(self) -> int:
+        return self.conn.execute(
+            "SELECT count(DISTINCT key) FROM lookup WHERE name = ?", (self.name,)
+        ).fetchone()[0]
+
+
+class ArticleIndexStore:
+    def __init__(self, filename: Path) -> None:
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        with self.conn:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL
+                )
+                """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS article (
+                    article_id INTEGER PRIMARY KEY,
+                    input_hash BLOB NOT NULL,
+                    person_ids TEXT NOT NULL,
+                    citation_group_id INTEGER,
+                    has_doi INTEGER NOT NULL,
+                    record BLOB NOT NULL
+                )
+                """)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS lookup (
+                    name TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    article_id INTEGER NOT NULL,
+                    PRIMARY KEY (name, key, article_id)
+                ) WITHOUT ROWID
+                """)
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS lookup_article ON lookup(article_id)"
+            )
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS citation_group_alias (
+                    citation_group_id INTEGER NOT NULL,
+                    alias TEXT NOT NULL,
+                    alias_key TEXT NOT NULL,
+                    PRIMARY KEY (citation_group_id, alias)
+                )
+                """)
+
+    def get_marker(self) -> str | None:
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'marker'"
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def get_stored_inputs(self) -> dict[int, tuple[bytes, tuple[int, ...]]]:
+        return {
+            article_id: (
+                input_hash,
+                tuple(int(pid) for pid in person_ids.split(",") if pid),
+            )
+            for article_id, input_hash, person_ids in self.conn.execute(
+                "SELECT article_id, input_hash, person_ids FROM article"
+            )
+        }
+
+    def update(
+        self,
+        marker: str,
+        changed: Mapping[int, tuple[bytes, tuple[int, ...], ArticleRecord]],
+        removed: Sequence[int],
+        *,
+        replace_all: bool,
+    ) -> None:
+        with self.conn:
+            if replace_all:
+                for table in ("article", "lookup", "citation_group_alias"):
+                    self.conn.execute(f"DELETE FROM {table}")
+            stale = [(article_id,) for article_id in (*removed, *changed)]
+            self.conn.executemany("DELETE FROM article WHERE article_id = ?", stale)
+            self.conn.executemany("DELETE FROM lookup WHERE article_id = ?", stale)
+            # Aliases come from the citation group, so they are the same for
+            # all articles in it
+            aliases: dict[int, list[tuple[str, str]]] = {}
+            for article_id, (input_hash, person_ids, record) in changed.items():
+                self.conn.execute(
+                    "INSERT INTO article VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        article_id,
+                        input_hash,
+                        ",".join(map(str, person_ids)),
+                        record.citation_group_id,
+                        bool(record.doi),
+                        encode_record(record),
+                    ),
+                )
+                # Reuse the indexing logic on this single record
+                single = build_article_index_from_records([record])
+                self.conn.executemany(
+                    "INSERT INTO lookup VALUES (?, ?, ?)",
+                    [
+                        (name, _encode_key(key), article_id)
+                        for name in LOOKUP_FIELDS
+                        for key in getattr(single, name)
+                    ],
+                )
+                if record.citation_group_id is not None:
+                    aliases[record.citation_group_id] = [
+                        (alias, normalize_text(alias))
+                        for alias in record.citation_group_aliases
+                    ]
+            for citation_group_id, cg_aliases in aliases.items():
+                self.conn.execute(
+                    "DELETE FROM citation_group_alias WHERE citation_group_id = ?",
+                    (citation_group_id,),
+                )
+                self.conn.executemany(
+                    "INSERT INTO citation_group_alias VALUES (?, ?, ?)",
+                    [
+                        (citation_group_id, alias, alias_key)
+                        for alias, alias_key in cg_aliases
+                    ],
+                )
+            self.conn.execute("REPLACE INTO meta VALUES ('marker', ?)", (marker,))
+
+    def get_index(self) -> ArticleIndex:
+        by_id = _RecordMapping(self)
+        sample_article_id = {}
+        with_doi = set()
+        for citation_group_id, article_id, has_doi in self.conn.execute("""
+            SELECT citation_group_id, min(article_id), max(has_doi)
+            FROM article
+            WHERE citation_group_id IS NOT NULL
+            GROUP BY citation_group_id
+            """):
+            sample_article_id[citation_group_id] = article_id
+            if has_doi:
+                with_doi.add(citation_group_id)
+        aliases_by_id: dict[int, list[str]] = {}
+        by_alias: dict[str, set[int]] = {}
+        for citation_group_id, alias, alias_key in self.conn.execute(
+            "SELECT citation_group_id, alias, alias_key FROM citation_group_alias"
+            " ORDER BY citation_group_id, alias"
+        ):
+            if citation_group_id not in sample_article_id:
+                continue
+            aliases_by_id.setdefault(citation_group_id, []).append(alias)
+            if alias_key:
+                by_alias.setdefault(alias_key, set()).add(citation_group_id)
+        return ArticleIndex(
+            records=_RecordList(by_id),
+            by_id=by_id,
+            **{name: _LookupMapping(name, by_id) for name in LOOKUP_FIELDS},
+            citation_group_by_alias=by_alias,
+            citation_group_aliases_by_id={
+                citation_group_id: tuple(cg_aliases)
+                for citation_group_id, cg_aliases in aliases_by_id.items()
+            },
+            citation_group_sample_article_id=sample_article_id,
+            citation_groups_with_doi=frozenset(with_doi),
+        )
+
+
+def load_article_index(*, rebuild: bool = False) -> ArticleIndex:
+    """Return the stored ArticleIndex, updating it first if necessary.
+
+    With rebuild=True, every record is computed again.
+
+    """
+    store = ArticleIndexStore(get_options().refmatch_index_filename)
+    marker = _get_marker()
+    stored_marker = store.get_marker()
+    if not rebuild and stored_marker == marker:
+        print("Loaded stored taxonomy Article index.", flush=True)
+        return store.get_index()
+
+    print("Updating taxonomy Article index...", flush=True)
+    replace_all = (
+        rebuild
+        or stored_marker is None
+        or not stored_marker.startswith(f"{STORE_VERSION}:")
+    )
+    inputs = _Inputs.load()
+    stored_inputs = {} if replace_all else store.get_stored_inputs()
+    changed: dict[int, tuple[bytes, tuple[int, ...], ArticleRecord]] = {}
+    for count, article_id in enumerate(inputs.valid_ids, start=1):
+        if count % INDEX_PROGRESS_EVERY == 0:
+            print(f"  Checked {count} Articles...", flush=True)
+        stored = stored_inputs.get(article_id)
+        if stored is not None and inputs.get_hash(article_id, stored[1]) == stored[0]:
+            continue
+        article = Article(article_id)
+        person_ids = tuple(person.id for person in article.get_authors())
+        changed[article_id] = (
+            inputs.get_hash(article_id, person_ids),
+            person_ids,
+            make_article_record(article),
+        )
+    valid_ids = set(inputs.valid_ids)
+    removed = [
+        article_id for article_id in stored_inputs if article_id not in valid_ids
+    ]
+    print(
+        f"Rebuilt {len(changed)} Article records, removed {len(removed)}.", flush=True
+    )
+    store.update(marker, changed, removed, replace_all=replace_all)
+    return store.get_index()
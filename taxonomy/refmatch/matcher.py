@@ -1,13 +1,16 @@
 import contextlib
 import csv
+import itertools
 import json
+import multiprocessing
 import re
 import unicodedata
 from collections import Counter, defaultdict
-from collections.abc import Callable, Generator, Iterable, Sequence
+from collections.abc import Callable, Generator, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from difflib import SequenceMatcher
-from functools import cache
+from functools import cache, partial
 from pathlib import Path
 from typing import Any, Protocol, cast
 
@@ -16,17 +19,20 @@ import requests
 
 from taxonomy import urlparse
 from taxonomy.apis import bhl
-from taxonomy.db import helpers
+from taxonomy.db import helpers, url_cache, url_fetch
 from taxonomy.db.constants import ArticleIdentifier, ArticleType, NamingConvention
 from taxonomy.db.models import Article, CitationGroup, CitationGroupTag, Name, Person
 from taxonomy.db.models.article import ArticleTag, api_data, batlit
 from taxonomy.db.models.article import lint as article_lint
 from taxonomy.db.models.base import LintConfig
+from taxonomy.db.url_cache import CacheDomain
 
 LOOKUP_MODES = ("off", "cached", "network")
 INDEX_PROGRESS_EVERY = 5000
 ROW_PROGRESS_EVERY = 500
 CLEAR_CROSSREF_CACHE_EVERY = 500
+# Rows sent to a worker process at a time when matching in parallel
+WORKER_CHUNK_SIZE = 100
 DOI_RE = re.compile(r"10\.\d{4,9}/[^\s<>\"]+", re.IGNORECASE)
 
 MATCH_FIELDS = [
@@ -147,16 +153,17 @@ class ScoredCandidate:
 
 @dataclass
 class ArticleIndex:
-    records: list[ArticleRecord]
-    by_id: dict[int, ArticleRecord]
-    by_year_author: dict[tuple[int, str], list[ArticleRecord]]
-    by_year_title_token: dict[tuple[int, str], list[ArticleRecord]]
-    by_url: dict[str, list[ArticleRecord]]
-    by_cg_year: dict[tuple[int, int], list[ArticleRecord]]
-    by_cg_year_volume_page: dict[tuple[int, int, str, str], list[ArticleRecord]]
-    citation_group_by_alias: dict[str, set[int]]
-    citation_group_aliases_by_id: dict[int, tuple[str, ...]]
-    citation_group_sample_article_id: dict[int, int]
+    # Read-only; index_store.load_article_index() returns views over a database
+    records: Sequence[ArticleRecord]
+    by_id: Mapping[int, ArticleRecord]
+    by_year_author: Mapping[tuple[int, str], Sequence[ArticleRecord]]
+    by_year_title_token: Mapping[tuple[int, str], Sequence[ArticleRecord]]
+    by_url: Mapping[str, Sequence[ArticleRecord]]
+    by_cg_year: Mapping[tuple[int, int], Sequence[ArticleRecord]]
+    by_cg_year_volume_page: Mapping[tuple[int, int, str, str], Sequence[ArticleRecord]]
+    citation_group_by_alias: Mapping[str, set[int]]
+    citation_group_aliases_by_id: Mapping[int, tuple[str, ...]]
+    citation_group_sample_article_id: Mapping[int, int]
     citation_groups_with_doi: frozenset[int]
 
 
@@ -2146,12 +2153,69 @@ def run_matching_pass(
     previous_pass: Sequence[RowEvaluation] | None = None,
     clear_crossref_cache_every: int = CLEAR_CROSSREF_CACHE_EVERY,
     label: str,
+    pool: ProcessPoolExecutor | None = None,
 ) -> tuple[list[RowEvaluation], MatchSummary]:
+    """Evaluate all rows, in the processes of pool if given.
+
+    The pool must have been created with init_match_worker() for the same index
+    and database. Results are the same either way.
+
+    """
     print(f"{label}: matching references...", flush=True)
+    numbered_rows = [
+        (
+            row_number,
+            row,
+            (
+                previous_pass[row_number - 1].output_row
+                if previous_pass is not None
+                else None
+            ),
+        )
+        for row_number, row in enumerate(rows, start=1)
+    ]
+    kwargs: dict[str, Any] = {
+        "doi_mode": doi_mode,
+        "bhl_mode": bhl_mode,
+        "learned_mappings": learned_mappings,
+        "include_slow_links": include_slow_links,
+        "clear_crossref_cache_every": clear_crossref_cache_every,
+    }
+    if pool is None:
+        results: Iterable[RowEvaluation] = evaluate_rows(
+            numbered_rows, index, database, **kwargs
+        )
+    else:
+        results = itertools.chain.from_iterable(
+            pool.map(
+                partial(_evaluate_rows_in_worker, **kwargs),
+                itertools.batched(numbered_rows, WORKER_CHUNK_SIZE),
+            )
+        )
     evaluations = []
     summary = MatchSummary()
-    for row_number, row in enumerate(rows, start=1):
-        evaluation = evaluate_row(
+    for evaluation in results:
+        evaluations.append(evaluation)
+        update_summary(summary, evaluation.output_row)
+        row_number = evaluation.row_number
+        if row_number % ROW_PROGRESS_EVERY == 0 or row_number == len(rows):
+            print_progress(row_number, len(rows), summary)
+    return evaluations, summary
+
+
+def evaluate_rows(
+    numbered_rows: Iterable[tuple[int, dict[str, str], dict[str, str] | None]],
+    index: ArticleIndex,
+    database: ReferenceDatabase,
+    *,
+    doi_mode: str,
+    bhl_mode: str,
+    learned_mappings: LearnedMappings | None,
+    include_slow_links: bool,
+    clear_crossref_cache_every: int,
+) -> Iterator[RowEvaluation]:
+    for row_number, row, previous_output_row in numbered_rows:
+        yield evaluate_row(
             row_number,
             row,
             index,
@@ -2160,19 +2224,73 @@ def run_matching_pass(
             bhl_mode=bhl_mode,
             learned_mappings=learned_mappings,
             include_slow_links=include_slow_links,
-            previous_output_row=(
-                previous_pass[row_number - 1].output_row
-                if previous_pass is not None
-                else None
-            ),
+            previous_output_row=previous_output_row,
         )
-        evaluations.append(evaluation)
-        update_summary(summary, evaluation.output_row)
         if doi_mode != "off":
             clear_crossref_memory_caches(row_number, clear_crossref_cache_every)
-        if row_number % ROW_PROGRESS_EVERY == 0 or row_number == len(rows):
-            print_progress(row_number, len(rows), summary)
-    return evaluations, summary
+
+
+# Index and database of a worker process, set by init_match_worker()
+_worker_state: tuple[ArticleIndex, ReferenceDatabase] | None = None
+
+
+def init_match_worker(index: ArticleIndex, database: ReferenceDatabase) -> None:
+    global _worker_state
+    _worker_state = (index, database)
+
+
+def _get_worker_state() -> tuple[ArticleIndex, ReferenceDatabase]:
+    if _worker_state is None:
+        raise RuntimeError("init_match_worker() has not been called")
+    return _worker_state
+
+
+def _evaluate_rows_in_worker(
+    numbered_rows: Sequence[tuple[int, dict[str, str], dict[str, str] | None]],
+    **kwargs: Any,
+) -> list[RowEvaluation]:
+    index, database = _get_worker_state()
+    evaluations = list(evaluate_rows(numbered_rows, index, database, **kwargs))
+    # Worker processes exit without running atexit handlers
+    url_cache.flush()
+    return evaluations
+
+
+def _journal_citation_group_ids_in_worker(
+    dois: Sequence[tuple[int, str]], *, doi_mode: str, clear_crossref_cache_every: int
+) -> list[int | None]:
+    index, _ = _get_worker_state()
+    citation_group_ids = [
+        journal_citation_group_id_for_doi(
+            row_number,
+            doi,
+            index,
+            doi_mode=doi_mode,
+            clear_crossref_cache_every=clear_crossref_cache_every,
+        )
+        for row_number, doi in dois
+    ]
+    url_cache.flush()
+    return citation_group_ids
+
+
+def make_match_pool(
+    workers: int, index: ArticleIndex, database: ReferenceDatabase
+) -> ProcessPoolExecutor:
+    """Return a pool of worker processes for run_matching_pass().
+
+    The index and database are pickled once per worker. The index returned by
+    index_store.load_article_index() pickles as a reference to its file.
+
+    """
+    # Use fresh processes rather than forking, so that no SQLite connection
+    # is shared with the parent; each worker opens its own.
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=init_match_worker,
+        initargs=(index, database),
+    )
 
 
 def secure_taxonomy_match(evaluation: RowEvaluation) -> bool:
@@ -2215,45 +2333,95 @@ def infer_citation_group_id_from_journal_name(
     return None
 
 
+def journal_citation_group_id_for_doi(
+    row_number: int,
+    doi: str,
+    index: ArticleIndex,
+    *,
+    doi_mode: str,
+    clear_crossref_cache_every: int = CLEAR_CROSSREF_CACHE_EVERY,
+) -> int | None:
+    try:
+        with lookup_mode(doi_mode):
+            data = api_data.expand_doi_json(doi)
+    except (Exception, FreshNetworkCall):
+        return None
+    if not data:
+        return None
+    journal_name = data.get("journal")
+    if not isinstance(journal_name, str) or not journal_name:
+        return None
+    citation_group_id = infer_citation_group_id_from_journal_name(journal_name, index)
+    if doi_mode != "off":
+        clear_crossref_memory_caches(row_number, clear_crossref_cache_every)
+    return citation_group_id
+
+
 def build_learned_mappings(
     evaluations: Sequence[RowEvaluation],
     index: ArticleIndex,
     *,
     doi_mode: str,
     clear_crossref_cache_every: int = CLEAR_CROSSREF_CACHE_EVERY,
+    pool: ProcessPoolExecutor | None = None,
 ) -> LearnedMappings:
-    support: defaultdict[str, Counter[int]] = defaultdict(Counter)
+    # Votes of each row for the citation group of its container, in row order
+    votes: list[tuple[str, int | None, str]] = []
+    dois: list[tuple[int, str]] = []
     for row_number, evaluation in enumerate(evaluations, start=1):
         container = evaluation.input_row["container_title"]
         container_key = normalize_text(container)
         if not container_key:
             continue
+        secure_citation_group_id = None
         if (
             secure_taxonomy_match(evaluation)
             and evaluation.match is not None
             and evaluation.match.article.citation_group_id is not None
         ):
-            support[container_key][evaluation.match.article.citation_group_id] += 2
+            secure_citation_group_id = evaluation.match.article.citation_group_id
         doi = evaluation.output_row["doi"]
         if not doi or evaluation.output_row["doi_source"] == "source DOI URL":
-            continue
-        try:
-            with lookup_mode(doi_mode):
-                data = api_data.expand_doi_json(doi)
-        except (Exception, FreshNetworkCall):  # noqa: S112
-            continue
-        if not data:
-            continue
-        journal_name = data.get("journal")
-        if not isinstance(journal_name, str) or not journal_name:
-            continue
-        citation_group_id = infer_citation_group_id_from_journal_name(
-            journal_name, index
+            doi = ""
+        else:
+            dois.append((row_number, doi))
+        votes.append((container_key, secure_citation_group_id, doi))
+    if doi_mode == "network":
+        # Warm the cache concurrently, so that the lookups below do not wait on
+        # the network one DOI at a time
+        url_fetch.prefetch(CacheDomain.doi, [doi for _, doi in dois])
+    if pool is None:
+        doi_citation_group_ids: Iterable[int | None] = (
+            journal_citation_group_id_for_doi(
+                row_number,
+                doi,
+                index,
+                doi_mode=doi_mode,
+                clear_crossref_cache_every=clear_crossref_cache_every,
+            )
+            for row_number, doi in dois
+        )
+    else:
+        doi_citation_group_ids = itertools.chain.from_iterable(
+            pool.map(
+                partial(
+                    _journal_citation_group_ids_in_worker,
+                    doi_mode=doi_mode,
+                    clear_crossref_cache_every=clear_crossref_cache_every,
+                ),
+                itertools.batched(dois, WORKER_CHUNK_SIZE),
+            )
         )
+    doi_citation_group_id_iter = iter(doi_citation_group_ids)
+    support: defaultdict[str, Counter[int]] = defaultdict(Counter)
+    for container_key, secure_citation_group_id, doi in votes:
+        if secure_citation_group_id is not None:
+            support[container_key][secure_citation_group_id] += 2
+        if not doi:
+            continue
+        citation_group_id = next(doi_citation_group_id_iter)
         if citation_group_id is not None:
             support[container_key][citation_group_id] += 1
-        if doi_mode != "off":
-            clear_crossref_memory_caches(row_number, clear_crossref_cache_every)
     learned = {}
     for container_key, counter in support.items():
         top = counter.most_common(2)
@@ -2464,7 +2632,15 @@ def run_match_csv(
     index: ArticleIndex | None = None,
     build_index: Callable[[], ArticleIndex] = build_article_index,
     include_slow_links: bool = True,
+    workers: int = 0,
 ) -> None:
+    """Match the parsed references in input_path and write them to output_path.
+
+    If workers is more than 1, rows are evaluated in a pool of that many
+    processes; the output is the same as with a single process. The database
+    and index must then be picklable.
+
+    """
     if database is None:
         database = TaxonomyDatabase()
     print(
@@ -2482,38 +2658,43 @@ def run_match_csv(
     output_fields = [*input_fields, *MATCH_FIELDS]
     output_path.parent.mkdir(parents=True, exist_ok=True)
     learning_doi_mode = doi_mode if doi_learning else "off"
-    first_pass, _first_summary = run_matching_pass(
-        rows,
-        index,
-        database,
-        doi_mode=learning_doi_mode,
-        bhl_mode=bhl_mode,
-        include_slow_links=False,
-        clear_crossref_cache_every=clear_crossref_cache_every,
-        label="Round 1 (learning)",
-    )
-    learned_mappings = build_learned_mappings(
-        first_pass,
-        index,
-        doi_mode=learning_doi_mode,
-        clear_crossref_cache_every=clear_crossref_cache_every,
-    )
-    print(
-        f"Learned {len(learned_mappings.citation_group_by_container_key)} citation-group mappings from round 1.",
-        flush=True,
-    )
-    second_pass, _second_summary = run_matching_pass(
-        rows,
-        index,
-        database,
-        doi_mode=doi_mode,
-        bhl_mode=bhl_mode,
-        learned_mappings=learned_mappings,
-        previous_pass=first_pass,
-        include_slow_links=include_slow_links,
-        clear_crossref_cache_every=clear_crossref_cache_every,
-        label="Round 2",
-    )
+    pool = make_match_pool(workers, index, database) if workers > 1 else None
+    with pool if pool is not None else contextlib.nullcontext():
+        first_pass, _first_summary = run_matching_pass(
+            rows,
+            index,
+            database,
+            doi_mode=learning_doi_mode,
+            bhl_mode=bhl_mode,
+            include_slow_links=False,
+            clear_crossref_cache_every=clear_crossref_cache_every,
+            label="Round 1 (learning)",
+            pool=pool,
+        )
+        learned_mappings = build_learned_mappings(
+            first_pass,
+            index,
+            doi_mode=learning_doi_mode,
+            clear_crossref_cache_every=clear_crossref_cache_every,
+            pool=pool,
+        )
+        print(
+            f"Learned {len(learned_mappings.citation_group_by_container_key)} citation-group mappings from round 1.",
+            flush=True,
+        )
+        second_pass, _second_summary = run_matching_pass(
+            rows,
+            index,
+            database,
+            doi_mode=doi_mode,
+            bhl_mode=bhl_mode,
+            learned_mappings=learned_mappings,
+            previous_pass=first_pass,
+            include_slow_links=include_slow_links,
+            clear_crossref_cache_every=clear_crossref_cache_every,
+            label="Round 2",
+            pool=pool,
+        )
     final_rows = [
         merge_round_rows(first, second)
         for first, second in zip(first_pass, second_pass, strict=True)
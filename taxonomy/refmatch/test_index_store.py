@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from taxonomy.refmatch import index_store, matcher
+
+from .test_matcher import make_record
+
+
+def assert_same_index(
+    stored: matcher.ArticleIndex, built: matcher.ArticleIndex
+) -> None:
+    assert list(stored.records) == built.records
+    for name in index_store.LOOKUP_FIELDS:
+        stored_lookup = getattr(stored, name)
+        built_lookup = getattr(built, name)
+        assert set(stored_lookup) == set(built_lookup), name
+        for key, records in built_lookup.items():
+            assert list(stored_lookup[key]) == records, (name, key)
+    assert stored.citation_group_by_alias == dict(built.citation_group_by_alias)
+    assert stored.citation_group_aliases_by_id == built.citation_group_aliases_by_id
+    assert (
+        stored.citation_group_sample_article_id
+        == built.citation_group_sample_article_id
+    )
+    assert stored.citation_groups_with_doi == built.citation_groups_with_doi
+
+
+def test_encode_decode_record() -> None:
+    record = make_record()
+    decoded = index_store.decode_record(index_store.encode_record(record))
+    assert decoded == record
+    assert decoded.type is record.type
+
+
+def test_store(tmp_path: Path) -> None:
+    records = [
+        make_record(),
+        make_record(article_id=2, title="Another paper", authors=("jones", "smith")),
+        make_record(article_id=3, citation_group_id=11, citation_group="Mammalia"),
+    ]
+    store = index_store.ArticleIndexStore(tmp_path / "index.db")
+    assert store.get_marker() is None
+    store.update(
+        "1:a",
+        {record.id: (b"hash", (record.id,), record) for record in records},
+        [],
+        replace_all=True,
+    )
+    assert store.get_marker() == "1:a"
+    assert store.get_stored_inputs()[2] == (b"hash", (2,))
+    index = store.get_index()
+    assert_same_index(index, matcher.build_article_index_from_records(records))
+    assert index.by_year_author.get((1900, "smith"), []) == []
+
+    changed = make_record(article_id=2, title="A new title", year=1999)
+    store.update("1:b", {2: (b"new hash", (), changed)}, [3], replace_all=False)
+    assert store.get_stored_inputs() == {1: (b"hash", (1,)), 2: (b"new hash", ())}
+    assert_same_index(
+        store.get_index(),
+        matcher.build_article_index_from_records([records[0], changed]),
+    )
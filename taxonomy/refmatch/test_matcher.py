@@ -128,6 +128,35 @@ def test_run_match_csv_with_static_index_and_database(tmp_path: Path) -> None:
     assert row["bhl_url"] == ""
 
 
+def test_run_match_csv_in_parallel_matches_serial_output(tmp_path: Path) -> None:
+    input_path = tmp_path / "stage2.csv"
+    with input_path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, parse.STAGE2_FIELDS)
+        writer.writeheader()
+        for _ in range(3):
+            writer.writerow(make_row())
+            writer.writerow(make_row(title="Another paper", year="1999"))
+
+    records = [make_record(), make_record(article_id=2, title="Another paper")]
+    index = matcher.build_article_index_from_records(records)
+    database = StaticDatabase(citations={1: "Smith 2001", 2: "Smith 2001 b"})
+    outputs = []
+    for workers in (0, 2):
+        output_path = tmp_path / f"stage3-{workers}.csv"
+        matcher.run_match_csv(
+            input_path,
+            output_path,
+            doi_mode="off",
+            bhl_mode="off",
+            database=database,
+            index=index,
+            include_slow_links=False,
+            workers=workers,
+        )
+        outputs.append(output_path.read_bytes())
+    assert outputs[0] == outputs[1]
+
+
 def test_scientific_description_uses_injected_original_citation_lookup() -> None:
     record = make_record(article_id=5, start_page="100", end_page="120")
     index = matcher.build_article_index_from_records([record])
@@ -39,29 +39,47 @@ CREATE INDEX idx_pages_year ON pages(year);
 
 PRAGMA optimize;
 
+The indexed_file table, created on first use, records the size and modification
+time of the PDF each article was indexed from, so that index_library() in
+taxonomy.db.models.article.search_index only needs to extract new or changed
+files.
+
+The article_facet and article_taxon tables hold the citation group and type of
+each article and the taxa of the names it describes, copied from the main
+database by replace_facets(), so that searches can be filtered and faceted by
+them without loading any models.
+
 """
 
-import functools
+import contextlib
 import re
 import sqlite3
+import subprocess
+import threading
 import traceback
 import unicodedata
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
 from .config import get_options
 
+_local = threading.local()
+
 
-@functools.cache
 def get_database() -> sqlite3.Connection:
     """Return a cached sqlite3 connection to the search database.
 
-    The file path is configured via `Options.search_db_filename`.
+    The file path is configured via `Options.search_db_filename`. Each thread gets
+    its own connection.
     """
-    option = get_options()
-    # static analysis: ignore[internal_error]
-    return sqlite3.connect(option.search_db_filename)
+    db = getattr(_local, "db", None)
+    if db is None:
+        option = get_options()
+        # static analysis: ignore[internal_error]
+        db = _local.db = sqlite3.connect(option.search_db_filename)
+    return db
 
 
 def run_query(sql: str, args: tuple[object, ...] = ()) -> list[tuple[Any, ...]]:
@@ -117,7 +135,197 @@ def replace_article_pages(
 
 def remove_article_pages(article_id: int) -> None:
     """Delete all indexed pages for an article."""
+    _ensure_indexed_file_table()
     run_query("DELETE FROM pages WHERE article_id = ?", (article_id,))
+    run_query("DELETE FROM indexed_file WHERE article_id = ?", (article_id,))
+
+
+# Bulk indexing
+
+FTS_TRIGGERS = {
+    "pages_ai": (
+        """
+        CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+          INSERT INTO pages_fts(rowid, text) VALUES (new.rowid, new.text);
+        END
+    """
+    ),
+    "pages_ad": (
+        """
+        CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+          INSERT INTO pages_fts(pages_fts, rowid, text)
+          VALUES ('delete', old.rowid, old.text);
+        END
+    """
+    ),
+    "pages_au": (
+        """
+        CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE OF text ON pages BEGIN
+          INSERT INTO pages_fts(pages_fts, rowid, text)
+          VALUES ('delete', old.rowid, old.text);
+          INSERT INTO pages_fts(rowid, text) VALUES (new.rowid, new.text);
+        END
+    """
+    ),
+}
+
+_table_checked = False
+
+
+def _ensure_indexed_file_table() -> None:
+    global _table_checked
+    if _table_checked:
+        return
+    with get_database() as db:
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS indexed_file (
+                article_id INTEGER PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                num_pages INTEGER NOT NULL
+            )
+            """)
+    _table_checked = True
+
+
+@dataclass(frozen=True)
+class FileStat:
+    size: int
+    mtime: float
+
+    @classmethod
+    def of(cls, path: Path) -> "FileStat":
+        stat = path.stat()
+        return cls(stat.st_size, stat.st_mtime)
+
+
+@dataclass(frozen=True)
+class ExtractedArticle:
+    article_id: int
+    year: int | None
+    stat: FileStat
+    pages: Sequence[str]
+
+
+def get_indexed_files() -> dict[int, FileStat]:
+    """Return the stat of the PDF each indexed article was indexed from."""
+    _ensure_indexed_file_table()
+    rows = run_query("SELECT article_id, size, mtime FROM indexed_file")
+    return {article_id: FileStat(size, mtime) for article_id, size, mtime in rows}
+
+
+def record_indexed_file(article_id: int, stat: FileStat, num_pages: int) -> None:
+    _ensure_indexed_file_table()
+    run_query(
+        "REPLACE INTO indexed_file VALUES (?, ?, ?, ?)",
+        (article_id, stat.size, stat.mtime, num_pages),
+    )
+
+
+def write_articles(articles: Sequence[ExtractedArticle]) -> None:
+    """Replace the pages of several articles in a single transaction.
+
+    The indexed_file rows are written in the same transaction, so an interrupted
+    run never records an article whose pages were not stored.
+    """
+    _ensure_indexed_file_table()
+    db = get_database()
+    with db:
+        db.executemany(
+            "DELETE FROM pages WHERE article_id = ?",
+            [(art.article_id,) for art in articles],
+        )
+        db.executemany(
+            "INSERT INTO pages(article_id, page_num, year, text) VALUES (?, ?, ?, ?)",
+            [
+                (art.article_id, i, art.year, text)
+                for art in articles
+                for i, text in enumerate(art.pages, start=1)
+            ],
+        )
+        db.executemany(
+            "REPLACE INTO indexed_file VALUES (?, ?, ?, ?)",
+            [
+                (art.article_id, art.stat.size, art.stat.mtime, len(art.pages))
+                for art in articles
+            ],
+        )
+
+
+def remove_articles(article_ids: Sequence[int]) -> None:
+    """Delete the pages of several articles in a single transaction."""
+    _ensure_indexed_file_table()
+    db = get_database()
+    with db:
+        for sql in (
+            "DELETE FROM pages WHERE article_id = ?",
+            "DELETE FROM indexed_file WHERE article_id = ?",
+        ):
+            db.executemany(sql, [(article_id,) for article_id in article_ids])
+
+
+def has_fts_triggers() -> bool:
+    names = {
+        name
+        for (name,) in run_query(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'pages'"
+        )
+    }
+    return names >= FTS_TRIGGERS.keys()
+
+
+@contextlib.contextmanager
+def deferred_fts_sync() -> Iterator[None]:
+    """Drop the FTS triggers for the duration of a bulk update.
+
+    Instead of updating pages_fts row by row, the FTS index is rebuilt from
+    pages once at the end. This also happens if the block raises, so the triggers
+    are always restored. Since the rebuild reads every page, this is only faster
+    than the triggers when a large part of the pages change.
+    """
+    db = get_database()
+    with db:
+        for name in FTS_TRIGGERS:
+            db.execute(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        rebuild_fts()
+
+
+def rebuild_fts() -> None:
+    """Rebuild pages_fts from pages and restore the triggers that keep it in sync."""
+    db = get_database()
+    with db:
+        db.execute("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')")
+        for sql in FTS_TRIGGERS.values():
+            db.execute(sql)
+    db.execute("PRAGMA optimize")
+
+
+def extract_pdf_pages(
+    article_id: int, pdf_path: Path, text_path: Path, year: int | None
+) -> ExtractedArticle:
+    """Extract the text of a PDF, split into preprocessed pages.
+
+    The text is cached at text_path, as with Article.store_pdf_content(), and
+    extracted again only if the PDF is newer than the cache. This runs in
+    worker processes, so it does not touch either database.
+    """
+    stat = FileStat.of(pdf_path)
+    try:
+        is_fresh = text_path.stat().st_mtime >= stat.mtime
+    except FileNotFoundError:
+        is_fresh = False
+    if not is_fresh:
+        subprocess.run(
+            ["pdftotext", pdf_path, text_path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    pages = [preprocess_page_text(page) for page in text_path.read_text().split("\x0c")]
+    return ExtractedArticle(article_id, year, stat, pages)
 
 
 @dataclass(frozen=True)
@@ -126,6 +334,8 @@ class SearchHit:
     page_num: int
     year: int | None
     snippet: str
+    score: float
+    page_id: int
 
 
 def search(
@@ -135,12 +345,15 @@ def search(
     year_max: int | None = None,
     limit: int = 50,
     offset: int = 0,
+    after: tuple[float, int] | None = None,
 ) -> list[SearchHit]:
     """Run an FTS search against `pages_fts` and return highlighted snippets.
 
     - `query`: FTS5 query string (unicode61, diacritics-insensitive as configured).
     - `year_min`/`year_max`: optional inclusive year bounds.
     - `limit`: maximum number of results to return.
+    - `after`: (score, page_id) of the last hit of the previous page; only hits
+      that sort after it are returned.
     """
     conditions = ["pages_fts MATCH ?"]
     args: list[object] = [query]
@@ -150,15 +363,22 @@ def search(
     if year_max is not None:
         conditions.append("pages.year <= ?")
         args.append(year_max)
+    if after is not None:
+        conditions.append(
+            "(bm25(pages_fts) > ? OR (bm25(pages_fts) = ? AND pages.rowid > ?))"
+        )
+        score, page_id = after
+        args += [score, score, page_id]
 
     where_clause = " AND ".join(conditions)
     sql = f"""
         SELECT pages.article_id, pages.page_num, pages.year,
-               snippet(pages_fts, -1, '<b>', '</b>', '…', 10) as snippet
+               snippet(pages_fts, -1, '<b>', '</b>', '…', 10) as snippet,
+               bm25(pages_fts) as score, pages.rowid as page_id
         FROM pages_fts
         JOIN pages ON pages_fts.rowid = pages.rowid
         WHERE {where_clause}
-        ORDER BY bm25(pages_fts)
+        ORDER BY score, page_id
         LIMIT ? OFFSET ?
     """
     args.extend([limit, offset])
@@ -169,11 +389,320 @@ def search(
         traceback.print_exc()
         return []
     return [
-        SearchHit(int(a), int(p), int(y) if y is not None else None, str(s))
-        for a, p, y, s in rows
+        SearchHit(
+            int(a), int(p), int(y) if y is not None else None, str(s), score, page_id
+        )
+        for a, p, y, s, score, page_id in rows
     ]
 
 
+# Filtered and faceted search over articles
+
+# Counting stops at this many articles; beyond it, the count is a lower bound
+MAX_EXACT_COUNT = 10_000
+
+_facet_tables_checked = False
+
+# SQL statement and its arguments
+SqlQuery = tuple[str, Sequence[object]]
+
+
+def _ensure_facet_tables() -> None:
+    global _facet_tables_checked
+    if _facet_tables_checked:
+        return
+    with get_database() as db:
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS article_facet (
+                article_id INTEGER PRIMARY KEY,
+                citation_group_id INTEGER,
+                article_type INTEGER
+            )
+            """)
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS article_taxon (
+                taxon_id INTEGER NOT NULL,
+                article_id INTEGER NOT NULL,
+                PRIMARY KEY (taxon_id, article_id)
+            )
+            """)
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_article_taxon_article
+            ON article_taxon(article_id)
+            """)
+        db.execute("""
+            CREATE INDEX IF NOT EXISTS idx_article_facet_citation_group
+            ON article_facet(citation_group_id)
+            """)
+    _facet_tables_checked = True
+
+
+def replace_facets(source: Path, facets_query: SqlQuery, taxa_query: SqlQuery) -> None:
+    """Replace the facet tables with the results of queries on another database.
+
+    The source database is attached to the search database, so the rows are
+    copied with INSERT ... SELECT instead of passing through Python. The queries
+    are (sql, args) pairs that refer to the tables of the source database
+    unqualified. facets_query selects (article_id, citation_group_id,
+    article_type) and taxa_query selects (taxon_id, article_id) rows.
+    """
+    _ensure_facet_tables()
+    db = get_database()
+    db.execute("ATTACH DATABASE ? AS facet_source", (str(source),))
+    try:
+        with db:
+            db.execute("DELETE FROM article_facet")
+            db.execute("DELETE FROM article_taxon")
+            facets_sql, facets_args = facets_query
+            db.execute(f"INSERT INTO article_facet {facets_sql}", facets_args)
+            taxa_sql, taxa_args = taxa_query
+            db.execute(f"INSERT OR IGNORE INTO article_taxon {taxa_sql}", taxa_args)
+    finally:
+        db.execute("DETACH DATABASE facet_source")
+
+
+def has_facets() -> bool:
+    """Whether the facet tables have been filled."""
+    _ensure_facet_tables()
+    return bool(run_query("SELECT 1 FROM article_facet LIMIT 1"))
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    year_min: int | None = None
+    year_max: int | None = None
+    citation_group_id: int | None = None
+    article_type: int | None = None
+    taxon_id: int | None = None
+
+    def get_conditions(self) -> tuple[list[str], list[object]]:
+        """SQL conditions on pages for these filters, with their arguments."""
+        conditions = []
+        args: list[object] = []
+        if self.year_min is not None:
+            conditions.append("pages.year >= ?")
+            args.append(self.year_min)
+        if self.year_max is not None:
+            conditions.append("pages.year <= ?")
+            args.append(self.year_max)
+        if self.citation_group_id is not None:
+            conditions.append(
+                "pages.article_id IN"
+                " (SELECT article_id FROM article_facet WHERE citation_group_id = ?)"
+            )
+            args.append(self.citation_group_id)
+        if self.article_type is not None:
+            conditions.append(
+                "pages.article_id IN"
+                " (SELECT article_id FROM article_facet WHERE article_type = ?)"
+            )
+            args.append(self.article_type)
+        if self.taxon_id is not None:
+            conditions.append(
+                "pages.article_id IN"
+                " (SELECT article_id FROM article_taxon WHERE taxon_id = ?)"
+            )
+            args.append(self.taxon_id)
+        return conditions, args
+
+
+def _matching_pages_sql(
+    query: str, filters: SearchFilters, columns: str
+) -> tuple[str, list[object]]:
+    _ensure_facet_tables()
+    conditions, args = filters.get_conditions()
+    where_clause = " AND ".join(["pages_fts MATCH ?", *conditions])
+    sql = f"""
+        SELECT {columns}
+        FROM pages_fts
+        JOIN pages ON pages_fts.rowid = pages.rowid
+        WHERE {where_clause}
+    """
+    return sql, [query, *args]
+
+
+def _run_search_query(sql: str, args: Sequence[object]) -> list[tuple[Any, ...]]:
+    try:
+        return run_query(sql, tuple(args))
+    except sqlite3.OperationalError as e:
+        print("Error during search query:", e)
+        traceback.print_exc()
+        return []
+
+
+@dataclass(frozen=True)
+class ArticleHit:
+    article_id: int
+    score: float
+    num_pages: int
+    pages: Sequence[SearchHit]
+
+
+def search_articles(
+    query: str,
+    filters: SearchFilters = SearchFilters(),
+    *,
+    limit: int = 50,
+    after: tuple[float, int] | None = None,
+    pages_per_article: int = 3,
+) -> list[ArticleHit]:
+    """Search pages, collapsing the hits in each article into one result.
+
+    Articles are ranked by their best page. Each result holds the number of
+    matching pages in the article and up to pages_per_article of the best ones,
+    with snippets. `after` is the (score, article_id) of the last result of the
+    previous page.
+    """
+    hits_sql, args = _matching_pages_sql(
+        query,
+        filters,
+        "pages.article_id AS article_id, pages.rowid AS page_id,"
+        " bm25(pages_fts) AS score",
+    )
+    after_clause = ""
+    if after is not None:
+        after_clause = "AND (score > ? OR (score = ? AND article_id > ?))"
+        score, article_id = after
+        args += [score, score, article_id]
+    # bm25() cannot be used in an aggregate query, but it can in a window
+    sql = f"""
+        WITH hits AS ({hits_sql}),
+        ranked AS (
+            SELECT article_id, page_id, score,
+                   row_number() OVER (
+                       PARTITION BY article_id ORDER BY score, page_id
+                   ) AS rank,
+                   count(*) OVER (PARTITION BY article_id) AS num_pages
+            FROM hits
+        )
+        SELECT article_id, score, num_pages
+        FROM ranked
+        WHERE rank = 1 {after_clause}
+        ORDER BY score, article_id
+        LIMIT ?
+    """
+    articles = _run_search_query(sql, [*args, limit])
+    if not articles:
+        return []
+    pages_by_article = _get_best_pages(
+        query, filters, [article_id for article_id, _, _ in articles], pages_per_article
+    )
+    return [
+        ArticleHit(
+            int(article_id), score, int(num_pages), pages_by_article.get(article_id, [])
+        )
+        for article_id, score, num_pages in articles
+    ]
+
+
+def _get_best_pages(
+    query: str, filters: SearchFilters, article_ids: Sequence[int], limit: int
+) -> dict[int, list[SearchHit]]:
+    placeholders = ", ".join("?" for _ in article_ids)
+    hits_sql, args = _matching_pages_sql(
+        query,
+        filters,
+        "pages.article_id AS article_id, pages.rowid AS page_id,"
+        " bm25(pages_fts) AS score",
+    )
+    sql = f"""
+        WITH hits AS ({hits_sql} AND pages.article_id IN ({placeholders})),
+        ranked AS (
+            SELECT page_id, row_number() OVER (
+                PARTITION BY article_id ORDER BY score, page_id
+            ) AS rank
+            FROM hits
+        )
+        SELECT page_id FROM ranked WHERE rank <= ?
+    """
+    page_ids = [
+        page_id for (page_id,) in _run_search_query(sql, [*args, *article_ids, limit])
+    ]
+    if not page_ids:
+        return {}
+    # snippet() cannot be used in a window query, so fetch snippets separately
+    placeholders = ", ".join("?" for _ in page_ids)
+    sql = f"""
+        SELECT pages.article_id, pages.page_num, pages.year,
+               snippet(pages_fts, -1, '<b>', '</b>', '…', 10) as snippet,
+               bm25(pages_fts) as score, pages.rowid as page_id
+        FROM pages_fts
+        JOIN pages ON pages_fts.rowid = pages.rowid
+        WHERE pages_fts MATCH ? AND pages.rowid IN ({placeholders})
+        ORDER BY score, page_id
+    """
+    out: dict[int, list[SearchHit]] = {}
+    for a, p, y, snippet, score, page_id in _run_search_query(sql, [query, *page_ids]):
+        hit = SearchHit(
+            int(a), int(p), int(y) if y is not None else None, snippet, score, page_id
+        )
+        out.setdefault(hit.article_id, []).append(hit)
+    return out
+
+
+@dataclass(frozen=True)
+class HitCount:
+    articles: int
+    is_exact: bool
+
+
+def count_articles(
+    query: str,
+    filters: SearchFilters = SearchFilters(),
+    *,
+    max_count: int = MAX_EXACT_COUNT,
+) -> HitCount:
+    """Count the articles matching a search, stopping at max_count."""
+    hits_sql, args = _matching_pages_sql(query, filters, "DISTINCT pages.article_id")
+    rows = _run_search_query(
+        f"SELECT count(*) FROM ({hits_sql} LIMIT ?)", [*args, max_count + 1]
+    )
+    count = rows[0][0] if rows else 0
+    if count > max_count:
+        return HitCount(max_count, is_exact=False)
+    return HitCount(count, is_exact=True)
+
+
+@dataclass(frozen=True)
+class Facets:
+    """(value, number of matching articles) pairs, most common first."""
+
+    citation_groups: Sequence[tuple[int, int]]
+    article_types: Sequence[tuple[int, int]]
+    taxa: Sequence[tuple[int, int]]
+
+
+def get_facets(
+    query: str, filters: SearchFilters = SearchFilters(), *, limit: int = 20
+) -> Facets:
+    """Count the articles matching a search by citation group, type and taxon."""
+    hits_sql, args = _matching_pages_sql(
+        query, filters, "DISTINCT pages.article_id AS article_id"
+    )
+
+    def count_by(table: str, column: str) -> list[tuple[int, int]]:
+        sql = f"""
+            WITH hits AS ({hits_sql})
+            SELECT {table}.{column}, count(*) AS num_articles
+            FROM hits
+            JOIN {table} ON {table}.article_id = hits.article_id
+            WHERE {table}.{column} IS NOT NULL
+            GROUP BY {table}.{column}
+            ORDER BY num_articles DESC, {table}.{column}
+            LIMIT ?
+        """
+        return [
+            (int(value), int(count))
+            for value, count in _run_search_query(sql, [*args, limit])
+        ]
+
+    return Facets(
+        citation_groups=count_by("article_facet", "citation_group_id"),
+        article_types=count_by("article_facet", "article_type"),
+        taxa=count_by("article_taxon", "taxon_id"),
+    )
+
+
 def get_article_pages(article_id: int) -> list[PageRecord]:
     """Fetch stored pages for an article (for inspection or debugging)."""
     rows = run_query(
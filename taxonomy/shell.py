@@ -51,7 +51,16 @@ from taxonomy.search import search as internal_search
 
 from . import getinput, urlparse
 from .command_set import CommandSet
-from .db import constants, derived_data, export, helpers, models
+from .db import (
+    constants,
+    derived_data,
+    export,
+    helpers,
+    lint_results,
+    models,
+    tag_index,
+    url_cache,
+)
 from .db.constants import (
     NEED_TEXTUAL_RANK,
     AgeClass,
@@ -78,9 +87,11 @@ from .db.models import (
     Taxon,
     TypeTag,
 )
+from .db.models.article.page_index import ArticlePageIndex
 from .db.models.base import LintConfig, Linter, ModelT
 from .db.models.ignored_doi import IgnoreReason
 from .db.models.item_file import ItemFile
+from .db.models.lint_profile import LintProfiler, profile_linters
 from .db.models.person import PersonLevel
 
 T = TypeVar("T")
@@ -1826,9 +1837,14 @@ def resolve_redirects(*, dry_run: bool = False) -> None:
 
 @command
 def run_maintenance(
-    *, skip_slow: bool = True, interactive: bool = False
+    *, skip_slow: bool = True, interactive: bool = False, workers: int = 0
 ) -> dict[Any, Any]:
-    """Runs maintenance checks that are expected to pass for the entire database."""
+    """Runs maintenance checks that are expected to pass for the entire database.
+
+    If workers is more than 1, the linters for each model run in that many
+    processes (not in interactive mode).
+
+    """
     fns: list[Callable[[], Any]] = [
         # We should aim to replace as many of these as possible with linters
         dup_collections,
@@ -1848,7 +1864,10 @@ def run_maintenance(
             for cls in models.BaseModel.__subclasses__()
         ]
         if interactive
-        else [cls.lint_all for cls in models.BaseModel.__subclasses__()]
+        else [
+            functools.partial(cls.lint_all, workers=workers)
+            for cls in models.BaseModel.__subclasses__()
+        ]
     )
     if not skip_slow:
         fns += slow
@@ -1960,6 +1979,7 @@ def _must_have_citation_groups() -> list[CitationGroup]:
 def find_potential_citations(
     *, fix: bool = True, region: models.Region | None = None, aggressive: bool = True
 ) -> int:
+    cgs: Iterable[CitationGroup]
     if region is None:
         cgs = CitationGroup.select_valid()
     else:
@@ -1975,14 +1995,6 @@ def _author_names(obj: Article | Name) -> set[str]:
     return {helpers.simplify_string(person.family_name) for person in obj.get_authors()}
 
 
-def _page_matches_art(start_page: int | None, end_page: int | None, a: Article) -> bool:
-    if start_page is not None and not a.is_page_in_range(start_page):
-        return False
-    if end_page is not None and not a.is_page_in_range(end_page):
-        return False
-    return True
-
-
 def _page_or_range(nam: Name) -> tuple[int | None, int | None]:
     if nam.page_described is not None:
         if nam.page_described.isdigit():
@@ -2002,16 +2014,6 @@ def _page_or_range(nam: Name) -> tuple[int | None, int | None]:
     return None, None
 
 
-def is_possible_match(
-    art: Article, nam: Name, start_page: int | None, end_page: int | None
-) -> bool:
-    if nam.numeric_year() != art.numeric_year() or art.lacks_full_text():
-        return False
-    if not _page_matches_art(start_page, end_page, art):
-        return False
-    return _author_names(nam) <= _author_names(art)
-
-
 @command
 def find_potential_citations_for_group(
     cg: CitationGroup | None = None, *, fix: bool = True
@@ -2028,6 +2030,9 @@ def find_potential_citations_for_group(
     )
     if not potential_arts:
         return 0
+    page_index = ArticlePageIndex(potential_arts)
+    if not page_index:
+        return 0
 
     count = 0
     for nam in nams:
@@ -2037,11 +2042,9 @@ def find_potential_citations_for_group(
         start_page, end_page = _page_or_range(nam)
         if start_page is None and end_page is None:
             continue
-        candidates = [
-            art
-            for art in potential_arts
-            if is_possible_match(art, nam, start_page, end_page)
-        ]
+        candidates = page_index.find(
+            nam.numeric_year(), start_page, end_page, authors=_author_names(nam)
+        )
 
         # Supplement with matches based on StructuredVerbatimCitation, if present
         svc_tags = list(nam.get_tags(nam.type_tags, TypeTag.StructuredVerbatimCitation))
@@ -2049,16 +2052,13 @@ def find_potential_citations_for_group(
             svc = svc_tags[0]
             svc_volume = svc.volume
             if svc_volume is not None:
-                svc_series = svc.series
-
-                svc_candidates = [
-                    art
-                    for art in potential_arts
-                    if (svc_volume is None or art.volume == svc_volume)
-                    and (svc_series is None or art.series == svc_series)
-                    and _page_matches_art(start_page, end_page, art)
-                    and abs(art.numeric_year() - nam.numeric_year()) <= 5
-                ]
+                svc_candidates = page_index.find_in_volume(
+                    svc_volume,
+                    svc.series,
+                    start_page,
+                    end_page,
+                    near_year=nam.numeric_year(),
+                )
                 candidates = sorted(
                     set(candidates) | set(svc_candidates), key=lambda a: a.sort_key()
                 )
@@ -2220,15 +2220,80 @@ def compute_derived_fields() -> None:
     for cls in models.BaseModel.__subclasses__():
         print(f"=== Computing for {cls} ===")
         cls.compute_all_derived_fields()
+    derived_data.clear_dirty_objects()
+    write_derived_data()
+
+
+@command
+def update_derived_fields() -> None:
+    """Recompute only the derived fields affected by edits made in this session."""
+    dirty = derived_data.get_dirty_objects()
+    print(f"{sum(len(ids) for ids in dirty.values())} objects changed")
+    models.BaseModel.update_derived_fields()
     write_derived_data()
 
 
 @command
 def write_derived_data() -> None:
-    derived_data.write_derived_data(derived_data.load_derived_data())
+    derived_data.write_derived_data()
     _save_all_caches(warm=False)
 
 
+@command
+def migrate_derived_data() -> None:
+    """Copy the derived data from the old pickle file into the SQLite store."""
+    derived_data.migrate_pickle()
+
+
+@command
+def rebuild_taxon_closure() -> None:
+    """Rebuild the table of taxon ancestors used for subtree queries."""
+    num_rows = models.taxon.closure.rebuild()
+    print(f"taxon closure rebuilt with {num_rows} rows")
+
+
+@command
+def rebuild_tag_index() -> None:
+    """Rebuild the index of tag contents used by BaseModel.with_tag()."""
+    num_rows = tag_index.rebuild()
+    print(f"tag index rebuilt with {num_rows} rows")
+
+
+@command
+def clear_lint_results(call_sign: str | None = None, label: str | None = None) -> None:
+    """Forget stored clean lint results, so that all linters run again."""
+    num_rows = lint_results.clear(call_sign, label)
+    print(f"cleared {num_rows} lint results")
+
+
+@command
+def profile_lint_all(
+    model_cls: type[models.BaseModel] | None = None,
+    *,
+    autofix: bool = False,
+    sort_by: str = "total_time",
+    limit: int | None = 50,
+    json_path: Path | None = None,
+) -> LintProfiler | None:
+    """Run lint_all() for a model and report which linters take the most time.
+
+    sort_by may be total_time, p95_time, calls, queries or network_calls. If
+    json_path is given, the full report is also written there as JSON.
+
+    """
+    if model_cls is None:
+        model_cls = model_selector()
+        if model_cls is None:
+            return None
+    with profile_linters() as profiler:
+        model_cls.lint_all(autofix=autofix)
+    print(profiler.format_report(sort_by=sort_by, limit=limit))
+    if json_path is not None:
+        profiler.dump(json_path, sort_by=sort_by)
+        print(f"wrote profile to {json_path}")
+    return profiler
+
+
 @command
 def warm_all_caches() -> None:
     _save_all_caches(warm=True)
@@ -2405,9 +2470,7 @@ def check_wikipedia_links(path: str) -> None:
 
 
 def find_names_with_organ(organ: constants.SpecimenOrgan) -> Iterable[Name]:
-    return Name.select_valid().filter(
-        Name.type_tags.contains(f"[{TypeTag.Organ._tag}, {organ.value},")
-    )
+    return Name.with_tag(TypeTag.Organ, organ=organ)
 
 
 @command
@@ -2462,9 +2525,7 @@ def organ_report(focus_organ: constants.SpecimenOrgan | None = None) -> None:
         Counter
     )
     if focus_organ is None:
-        query = Name.select_valid().filter(
-            Name.type_tags.contains(f"[{TypeTag.Organ._tag},")
-        )
+        query = Name.with_tag(TypeTag.Organ)
     else:
         query = find_names_with_organ(focus_organ)
     for nam in getinput.print_every_n(query, label="names"):
@@ -2714,6 +2775,12 @@ def download_bhl_items(
         nams = Name.with_type_tag(TypeTag.AuthorityPageLink).filter(
             Name.original_citation == None
         )
+    nams = list(nams)
+    bhl.prefetch_url_metadata(
+        tag.url
+        for nam in nams
+        for tag in nam.get_tags(nam.type_tags, TypeTag.AuthorityPageLink)
+    )
     for nam in nams:
         nam.load()
         if nam.original_citation is not None:
@@ -2819,6 +2886,41 @@ def print_data_level_report() -> None:
     getinput.print_table(rows)
 
 
+def _print_url_cache_stats() -> None:
+    rows = [["domain", "rows", "expired", "size (MiB)", "stored (MiB)"]]
+    for stats in url_cache.get_stats():
+        rows.append(
+            [
+                stats.domain.name,
+                str(stats.rows),
+                str(stats.expired),
+                f"{stats.size / 2**20:.1f}",
+                f"{stats.stored_size / 2**20:.1f}",
+            ]
+        )
+    getinput.print_table(rows)
+
+
+@command
+def maintain_url_cache(
+    *, evict: bool = True, compress: bool = True, vacuum_pages: int = 0
+) -> None:
+    """Report the size of the URL cache per domain and shrink it.
+
+    Deletes expired entries, compresses large entries in domains whose policy
+    asks for compression, and returns freed pages to the file system with an
+    incremental vacuum (at most vacuum_pages pages if it is nonzero).
+
+    """
+    _print_url_cache_stats()
+    if evict:
+        print(f"Deleted {url_cache.evict_expired()} expired entries")
+    if compress:
+        print(f"Compressed {url_cache.compress_existing()} entries")
+    print(f"Freed {url_cache.vacuum(vacuum_pages)} pages")
+    _print_url_cache_stats()
+
+
 @command
 def edit_names_at_level(query: Iterable[Name] | None = None) -> None:
     ocdl = getinput.get_enum_member(
@@ -3523,6 +3625,20 @@ def get_int(prompt: str, *, allow_empty: bool = False) -> int | None:
     assert False, "unreachable"
 
 
+@command
+def index_pdfs_for_search(
+    *, workers: int = 4, force: bool = False, dry_run: bool = False
+) -> None:
+    """Index new and changed PDFs into the full-text search database.
+
+    Safe to interrupt: running it again continues where it stopped.
+
+    """
+    models.article.search_index.index_library(
+        workers=workers, force=force, dry_run=dry_run
+    )
+
+
 @command
 def search() -> None:
     query = getinput.get_line("query> ")
@@ -0,0 +1,89 @@
+import math
+import random
+
+from taxonomy.coordinates import Geometry, Point, ReverseGeocoder, get_name_for_path
+
+# A C-shaped ring, open to the east
+C_SHAPE = [
+    Point(10, 10),
+    Point(20, 10),
+    Point(20, 12),
+    Point(12, 12),
+    Point(12, 18),
+    Point(20, 18),
+    Point(20, 20),
+    Point(10, 20),
+]
+ISLAND = [Point(-30.5, -5.5), Point(-29.5, -5.5), Point(-30, -4.5)]
+
+
+def _is_in_ring(p: Point, points: list[Point]) -> bool:
+    # Ray casting over all edges, without the index
+    inside = False
+    for p1, p2 in zip(points, [*points[1:], points[0]], strict=True):
+        if (p1.latitude > p.latitude) != (p2.latitude > p.latitude):
+            x = p1.longitude + (p2.longitude - p1.longitude) * (
+                p.latitude - p1.latitude
+            ) / (p2.latitude - p1.latitude)
+            if p.longitude < x:
+                inside = not inside
+    return inside
+
+
+def test_geometry() -> None:
+    geometry = Geometry([C_SHAPE, ISLAND])
+    assert geometry.contains(Point(11, 15))
+    assert geometry.contains(Point(15, 11))
+    assert not geometry.contains(Point(15, 15))
+    assert not geometry.contains(Point(25, 15))
+    assert geometry.contains(Point(-30, -5))
+    assert not geometry.contains(Point(-31, -5))
+    assert geometry.contains_many([Point(11, 15), Point(15, 15)]) == [True, False]
+
+
+def test_matches_unindexed() -> None:
+    rng = random.Random(0)
+    # A ring with enough points to be split into several bands
+    star = [
+        Point(
+            (5 if i % 2 else 2) * math.cos(i * math.pi / 40),
+            (5 if i % 2 else 2) * math.sin(i * math.pi / 40),
+        )
+        for i in range(80)
+    ]
+    rings = [C_SHAPE, ISLAND, star]
+    geometry = Geometry(rings)
+    for _ in range(2000):
+        p = Point(rng.uniform(-35, 25), rng.uniform(-10, 25))
+        expected = any(_is_in_ring(p, ring) for ring in rings)
+        assert geometry.contains(p) == expected, p
+
+
+def test_reverse_geocoder() -> None:
+    geocoder = ReverseGeocoder(
+        {
+            "countries/c": Geometry([C_SHAPE]),
+            "countries/island": Geometry([ISLAND]),
+            "areas/c/bottom": Geometry([[Point(10, 10), Point(20, 10), Point(20, 12)]]),
+        }
+    )
+    assert geocoder.get_paths(Point(11, 15)) == ["countries/c"]
+    assert geocoder.get_paths(Point(19, 10.5)) == ["countries/c", "areas/c/bottom"]
+    assert geocoder.get_paths(Point(-30, -5)) == ["countries/island"]
+    assert geocoder.get_paths(Point(15, 15)) == []
+
+
+def test_is_near() -> None:
+    geometry = Geometry([C_SHAPE])
+    assert geometry.is_near(Point(11, 15), 1)
+    # About 5 km east of the edge at longitude 20
+    assert geometry.is_near(Point(20.05, 11), 10)
+    assert not geometry.is_near(Point(20.05, 11), 1)
+    # Inside the opening of the C, more than 100 km from any edge
+    assert not geometry.is_near(Point(16, 15), 100)
+    assert geometry.is_near(Point(16, 15), 500)
+
+
+def test_get_name_for_path() -> None:
+    assert get_name_for_path("countries/south_africa") == "South Africa"
+    assert get_name_for_path("areas/france/corsica") == "Corsica (France)"
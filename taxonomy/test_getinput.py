@@ -0,0 +1,26 @@
+from .getinput import PrefixIndex
+
+
+def test_prefix_index() -> None:
+    index = PrefixIndex(["Mus", "Musculus", "Cæsar", "Caesar", "Rattus", "Mus"])
+    assert len(index) == 5
+    assert "Mus" in index
+    assert "Mu" not in index
+    assert index.search("Mus") == ["Mus", "Musculus"]
+    assert index.search("Mus", limit=1) == ["Mus"]
+    assert index.search("Mus", limit=0) == []
+    assert index.search("C*") == ["Cæsar"]
+    assert index.search("X") == []
+
+    index.add("Musa")
+    index.add("Mus")
+    assert index.search("Mus") == ["Mus", "Musa", "Musculus"]
+    assert list(index) == sorted(index)
+
+
+def test_prefix_index_from_sorted() -> None:
+    strings = ["Mus", "Musculus", "Rattus"]
+    index = PrefixIndex.from_sorted(strings)
+    assert index.search("Mus") == ["Mus", "Musculus"]
+    index.add("Musa")
+    assert list(index) == ["Mus", "Musa", "Musculus", "Rattus"]
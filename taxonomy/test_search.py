@@ -0,0 +1,83 @@
+import sqlite3
+from pathlib import Path
+
+from taxonomy import search
+
+
+def _add_pages(search_db: sqlite3.Connection) -> None:
+    search_db.executemany(
+        "INSERT INTO pages (article_id, page_num, year, text) VALUES (?, ?, ?, ?)",
+        [
+            (1, 1, 1900, "Rattus rattus"),
+            (1, 2, 1900, "Rattus norvegicus and Rattus rattus"),
+            (1, 3, 1900, "Mus musculus"),
+            (2, 1, 1950, "Rattus exulans"),
+            (3, 1, 2000, "Rattus tanezumi"),
+            (3, 2, 2000, "Rattus everetti"),
+        ],
+    )
+    search_db.commit()
+
+
+def test_search_articles(search_db: sqlite3.Connection) -> None:
+    _add_pages(search_db)
+    hits = search.search_articles("rattus", pages_per_article=1)
+    assert sorted(hit.article_id for hit in hits) == [1, 2, 3]
+    by_article = {hit.article_id: hit for hit in hits}
+    assert by_article[1].num_pages == 2
+    assert by_article[2].num_pages == 1
+    assert by_article[3].num_pages == 2
+    assert all(len(hit.pages) == 1 for hit in hits)
+    assert "<b>Rattus</b>" in by_article[2].pages[0].snippet
+    all_pages = {hit.article_id: hit.pages for hit in search.search_articles("rattus")}
+    assert sorted(page.page_num for page in all_pages[1]) == [1, 2]
+
+    # Page through the same results one article at a time
+    paged = []
+    after = None
+    while page := search.search_articles("rattus", limit=1, after=after):
+        paged += page
+        after = (page[-1].score, page[-1].article_id)
+    assert [hit.article_id for hit in paged] == [hit.article_id for hit in hits]
+
+    filtered = search.search_articles("rattus", search.SearchFilters(year_min=1950))
+    assert sorted(hit.article_id for hit in filtered) == [2, 3]
+    assert search.count_articles("rattus") == search.HitCount(3, is_exact=True)
+    assert search.count_articles("rattus", max_count=2) == search.HitCount(
+        2, is_exact=False
+    )
+
+
+def test_facets(tmp_path: Path, search_db: sqlite3.Connection) -> None:
+    _add_pages(search_db)
+    source = sqlite3.connect(tmp_path / "source.db")
+    source.execute("CREATE TABLE article (id, citation_group_id, type)")
+    source.execute("CREATE TABLE name (taxon_id, original_citation_id)")
+    source.executemany(
+        "INSERT INTO article VALUES (?, ?, ?)", [(1, 10, 1), (2, 10, 2), (3, 11, 1)]
+    )
+    source.executemany(
+        "INSERT INTO name VALUES (?, ?)", [(100, 1), (100, 1), (100, 3), (101, 2)]
+    )
+    source.commit()
+    source.close()
+
+    assert not search.has_facets()
+    search.replace_facets(
+        tmp_path / "source.db",
+        ("SELECT id, citation_group_id, type FROM article WHERE id < ?", (3,)),
+        ("SELECT taxon_id, original_citation_id FROM name", ()),
+    )
+    assert search.has_facets()
+    assert search_db.execute("SELECT * FROM article_facet ORDER BY 1").fetchall() == [
+        (1, 10, 1),
+        (2, 10, 2),
+    ]
+    assert search_db.execute("PRAGMA database_list").fetchall()[1:] == []
+
+    taxon_hits = search.search_articles("rattus", search.SearchFilters(taxon_id=100))
+    assert sorted(hit.article_id for hit in taxon_hits) == [1, 3]
+    facets = search.get_facets("rattus")
+    assert facets.citation_groups == [(10, 2)]
+    assert facets.article_types == [(1, 1), (2, 1)]
+    assert facets.taxa == [(100, 2), (101, 1)]